@@ -0,0 +1,33 @@
+"""Add bootstrap_state table
+
+Revision ID: 4f8d2a6c1e93
+Revises: e3a9c05b7d14
+Create Date: 2026-10-17 16:05:12.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f8d2a6c1e93'
+down_revision: Union[str, Sequence[str], None] = 'e3a9c05b7d14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('bootstrap_state',
+    sa.Column('key', sa.String(length=100), nullable=False),
+    sa.Column('value', sa.String(length=64), nullable=False),
+    sa.Column('applied_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('bootstrap_state')
@@ -0,0 +1,45 @@
+"""Add anketas hot filter indexes
+
+Revision ID: 7c2e4a91d3f0
+Revises: 53de3c7e06bc
+Create Date: 2026-10-17 10:12:05.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e4a91d3f0'
+down_revision: Union[str, Sequence[str], None] = '53de3c7e06bc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_LIVE = sa.text("deleted_at IS NULL")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_anketas_created_by_status_id', 'anketas', ['created_by', 'status', sa.text('id DESC')], unique=False)
+    op.create_index('ix_anketas_created_at', 'anketas', ['created_at'], unique=False)
+    op.create_index('ix_anketas_status_created_at', 'anketas', ['status', 'created_at'], unique=False)
+    op.create_index('ix_anketas_client_type_created_at', 'anketas', ['client_type', 'created_at'], unique=False)
+    op.create_index('ix_anketas_live_created_at', 'anketas', ['created_at'], unique=False,
+                    sqlite_where=_LIVE, postgresql_where=_LIVE)
+    op.create_index('ix_anketas_live_dti', 'anketas', ['dti'], unique=False,
+                    sqlite_where=_LIVE, postgresql_where=_LIVE)
+    op.create_index('ix_anketas_company_inn', 'anketas', ['company_inn'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_anketas_company_inn', table_name='anketas')
+    op.drop_index('ix_anketas_live_dti', table_name='anketas')
+    op.drop_index('ix_anketas_live_created_at', table_name='anketas')
+    op.drop_index('ix_anketas_client_type_created_at', table_name='anketas')
+    op.drop_index('ix_anketas_status_created_at', table_name='anketas')
+    op.drop_index('ix_anketas_created_at', table_name='anketas')
+    op.drop_index('ix_anketas_created_by_status_id', table_name='anketas')
@@ -0,0 +1,30 @@
+"""Add anketas.verdict_fingerprint
+
+Revision ID: a4c93e1f7b62
+Revises: 5d2f8b6e0a17
+Create Date: 2026-10-18 09:12:47.530918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c93e1f7b62'
+down_revision: Union[str, Sequence[str], None] = '5d2f8b6e0a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('anketas', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('verdict_fingerprint', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('anketas', schema=None) as batch_op:
+        batch_op.drop_column('verdict_fingerprint')
@@ -0,0 +1,69 @@
+"""Add anketa_phones table
+
+Revision ID: b5d81f2c6e47
+Revises: 7c2e4a91d3f0
+Create Date: 2026-10-17 11:02:44.530917
+
+"""
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d81f2c6e47'
+down_revision: Union[str, Sequence[str], None] = '7c2e4a91d3f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Разбиение номеров на момент ревизии (копия anketa_service.split_phones) — миграция не
+# зависит от кода приложения, повторный прогон даёт тот же результат
+_MIN_PHONE_DIGITS = 9
+_PHONE_SEPARATORS = re.compile(r"[,;/\n]+")
+
+
+def _split_phones(raw: str | None) -> list[str]:
+    if not raw:
+        return []
+    result = []
+    for part in _PHONE_SEPARATORS.split(raw):
+        phone = "".join(c for c in part if c.isdigit())
+        if len(phone) >= _MIN_PHONE_DIGITS and phone not in result:
+            result.append(phone)
+    return result
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('anketa_phones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('anketa_id', sa.Integer(), nullable=False),
+    sa.Column('phone', sa.String(length=50), nullable=False),
+    sa.ForeignKeyConstraint(['anketa_id'], ['anketas.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_anketa_phones_id'), 'anketa_phones', ['id'], unique=False)
+    op.create_index(op.f('ix_anketa_phones_anketa_id'), 'anketa_phones', ['anketa_id'], unique=False)
+    op.create_index('ix_anketa_phones_phone_anketa_id', 'anketa_phones', ['phone', 'anketa_id'], unique=False)
+
+    # Заполнить таблицу из существующих анкет
+    phones_table = sa.table('anketa_phones', sa.column('anketa_id', sa.Integer), sa.column('phone', sa.String))
+    rows = op.get_bind().execute(sa.text("SELECT id, phone_numbers FROM anketas WHERE phone_numbers IS NOT NULL"))
+    batch = []
+    for anketa_id, raw in rows:
+        batch.extend({"anketa_id": anketa_id, "phone": p} for p in _split_phones(raw))
+        if len(batch) >= 1000:
+            op.bulk_insert(phones_table, batch)
+            batch = []
+    if batch:
+        op.bulk_insert(phones_table, batch)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_anketa_phones_phone_anketa_id', table_name='anketa_phones')
+    op.drop_index(op.f('ix_anketa_phones_anketa_id'), table_name='anketa_phones')
+    op.drop_index(op.f('ix_anketa_phones_id'), table_name='anketa_phones')
+    op.drop_table('anketa_phones')
@@ -0,0 +1,175 @@
+"""Split anketas into core row and 1:1 section tables
+
+Revision ID: e3a9c05b7d14
+Revises: b5d81f2c6e47
+Create Date: 2026-10-17 14:21:37.402816
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a9c05b7d14'
+down_revision: Union[str, Sequence[str], None] = 'b5d81f2c6e47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Колонки, переезжающие из anketas в секции (снимок модели на момент миграции)
+SECTIONS = {
+    'anketa_personal': [
+        ('birth_date', sa.Date()),
+        ('passport_series', sa.String(length=20)),
+        ('passport_issue_date', sa.Date()),
+        ('passport_issued_by', sa.String(length=200)),
+        ('pinfl', sa.String(length=14)),
+        ('registration_address', sa.Text()),
+        ('registration_landmark', sa.String(length=300)),
+        ('actual_address', sa.Text()),
+        ('actual_landmark', sa.String(length=300)),
+        ('relative_phones', sa.Text()),
+    ],
+    'anketa_company': [
+        ('company_oked', sa.String(length=200)),
+        ('company_legal_address', sa.Text()),
+        ('company_actual_address', sa.Text()),
+        ('company_phone', sa.String(length=50)),
+        ('director_full_name', sa.String(length=300)),
+        ('director_phone', sa.String(length=50)),
+        ('director_family_phone', sa.String(length=50)),
+        ('director_family_relation', sa.String(length=50)),
+        ('contact_person_name', sa.String(length=300)),
+        ('contact_person_role', sa.String(length=100)),
+        ('contact_person_phone', sa.String(length=50)),
+    ],
+    'anketa_income': [
+        ('has_official_employment', sa.String(length=10)),
+        ('employer_name', sa.String(length=300)),
+        ('salary_period_months', sa.Float()),
+        ('total_salary', sa.Float()),
+        ('main_activity', sa.String(length=300)),
+        ('main_activity_period', sa.Float()),
+        ('main_activity_income', sa.Float()),
+        ('additional_income_source', sa.String(length=300)),
+        ('additional_income_period', sa.Float()),
+        ('additional_income_total', sa.Float()),
+        ('other_income_source', sa.String(length=300)),
+        ('other_income_period', sa.Float()),
+        ('other_income_total', sa.Float()),
+        ('property_type', sa.String(length=200)),
+        ('property_details', sa.Text()),
+        ('company_revenue_period', sa.Float()),
+        ('company_revenue_total', sa.Float()),
+        ('company_net_profit', sa.Float()),
+        ('director_income_period', sa.Float()),
+        ('director_income_total', sa.Float()),
+    ],
+    'anketa_credit_history': [
+        ('has_current_obligations', sa.String(length=10)),
+        ('total_obligations_amount', sa.Float()),
+        ('obligations_count', sa.Integer()),
+        ('monthly_obligations_payment', sa.Float()),
+        ('closed_obligations_count', sa.Integer()),
+        ('max_overdue_principal_days', sa.Integer()),
+        ('max_overdue_principal_amount', sa.Float()),
+        ('max_continuous_overdue_percent_days', sa.Integer()),
+        ('max_overdue_percent_amount', sa.Float()),
+        ('overdue_category', sa.String(length=20)),
+        ('last_overdue_date', sa.Date()),
+        ('overdue_reason', sa.Text()),
+        ('systematic_overdue', sa.Boolean()),
+        ('worst_active_classification', sa.String(length=50)),
+        ('worst_closed_classification', sa.String(length=50)),
+        ('has_lombard', sa.Boolean()),
+        ('current_overdue_amount', sa.Float()),
+        ('scoring_class', sa.String(length=10)),
+        ('open_applications_count', sa.Integer()),
+        ('company_has_obligations', sa.String(length=10)),
+        ('company_obligations_amount', sa.Float()),
+        ('company_obligations_count', sa.Integer()),
+        ('company_monthly_payment', sa.Float()),
+        ('company_overdue_category', sa.String(length=20)),
+        ('company_last_overdue_date', sa.Date()),
+        ('company_overdue_reason', sa.Text()),
+        ('director_has_obligations', sa.String(length=10)),
+        ('director_obligations_amount', sa.Float()),
+        ('director_obligations_count', sa.Integer()),
+        ('director_monthly_payment', sa.Float()),
+        ('director_overdue_category', sa.String(length=20)),
+        ('director_last_overdue_date', sa.Date()),
+        ('director_overdue_reason', sa.Text()),
+    ],
+    'anketa_guarantor': [
+        ('guarantor_full_name', sa.String(length=300)),
+        ('guarantor_pinfl', sa.String(length=14)),
+        ('guarantor_passport', sa.String(length=20)),
+        ('guarantor_phone', sa.String(length=50)),
+        ('guarantor_monthly_income', sa.Float()),
+        ('guarantor_overdue_category', sa.String(length=20)),
+        ('guarantor_last_overdue_date', sa.Date()),
+    ],
+}
+
+
+def _has_data(columns) -> str:
+    """Строка секции нужна, только если в ней есть данные (False-флаги по умолчанию не в счёт)."""
+    conds = [
+        f"{name} IS TRUE" if isinstance(type_, sa.Boolean) else f"{name} IS NOT NULL"
+        for name, type_ in columns
+    ]
+    return " OR ".join(conds)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Поля парсера кредитного отчёта v2 могли быть добавлены только через init_db — переносим то, что есть
+    existing = {c["name"] for c in sa.inspect(op.get_bind()).get_columns('anketas')}
+
+    for table, columns in SECTIONS.items():
+        op.create_table(table,
+        sa.Column('anketa_id', sa.Integer(), nullable=False),
+        *(sa.Column(name, type_, nullable=True) for name, type_ in columns),
+        sa.ForeignKeyConstraint(['anketa_id'], ['anketas.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('anketa_id')
+        )
+
+        # Перенос данных: одна строка секции на анкету, где секция заполнена
+        present = [(name, type_) for name, type_ in columns if name in existing]
+        names = ", ".join(name for name, _ in present)
+        op.execute(
+            f"INSERT INTO {table} (anketa_id, {names}) "
+            f"SELECT id, {names} FROM anketas WHERE {_has_data(present)}"
+        )
+
+    with op.batch_alter_table('anketas') as batch_op:
+        for columns in SECTIONS.values():
+            for name, _ in columns:
+                if name in existing:
+                    batch_op.drop_column(name)
+
+    # SQLite batch-режим пересоздаёт таблицу и теряет направление DESC в индексе
+    if op.get_bind().dialect.name == "sqlite":
+        op.drop_index('ix_anketas_created_by_status_id', table_name='anketas')
+        op.create_index('ix_anketas_created_by_status_id', 'anketas', ['created_by', 'status', sa.text('id DESC')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('anketas') as batch_op:
+        for columns in SECTIONS.values():
+            for name, type_ in columns:
+                batch_op.add_column(sa.Column(name, type_, nullable=True))
+
+    for table, columns in SECTIONS.items():
+        assignments = ", ".join(
+            f"{name} = (SELECT s.{name} FROM {table} s WHERE s.anketa_id = anketas.id)"
+            for name, _ in columns
+        )
+        op.execute(
+            f"UPDATE anketas SET {assignments} "
+            f"WHERE id IN (SELECT anketa_id FROM {table})"
+        )
+        op.drop_table(table)
@@ -1,19 +1,41 @@
+import asyncio
 import os
 import secrets
 import string
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 
 import bcrypt
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.database import get_db, User, Role
+from app.database import get_db, get_async_db, User, Role
+from app.perm_versions import perm_versions
 
 SECRET_KEY = os.getenv("SECRET_KEY", "fintech-drive-underwriting-secret-2026")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 480  # 8 hours
+# Стоимость bcrypt (log2 раундов). Хеши с другой стоимостью пересчитываются при успешном входе
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Проверка паролей при логине — на отдельном ограниченном пуле, не в threadpool эндпоинтов
+BCRYPT_MAX_WORKERS = int(os.getenv("BCRYPT_MAX_WORKERS", "4"))
+# Права роли кэшируются в процессе; правка через /admin/roles сбрасывает кэш сразу,
+# другие воркеры увидят её не позже чем через TTL
+PERMISSION_CACHE_TTL = float(os.getenv("PERMISSION_CACHE_TTL", "60"))
+# Права, superadmin и версии прав — в самом токене: запрос авторизуется без БД (см. app/perm_versions.py)
+JWT_PERMISSION_CLAIMS = os.getenv("JWT_PERMISSION_CLAIMS", "false").lower() in ("1", "true", "yes")
+# Активные пользователи (снимок полей) кэшируются в процессе; правка/удаление/сброс пароля
+# через /admin/users вытесняют запись сразу, другие воркеры увидят изменения не позже TTL (0 — выключено)
+ACTIVE_USER_CACHE_TTL = float(os.getenv("ACTIVE_USER_CACHE_TTL", "30"))
+ACTIVE_USER_CACHE_SIZE = int(os.getenv("ACTIVE_USER_CACHE_SIZE", "1024"))
 
 security = HTTPBearer()
 
@@ -35,7 +57,27 @@ def verify_password(plain: str, hashed: str) -> bool:
 
 
 def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode("utf-8")
+
+
+def password_needs_rehash(hashed: str) -> bool:
+    """Стоимость хеша ($2b$<cost>$...) отличается от BCRYPT_ROUNDS."""
+    try:
+        return int(hashed.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+_bcrypt_executor = ThreadPoolExecutor(max_workers=BCRYPT_MAX_WORKERS, thread_name_prefix="bcrypt")
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    """verify_password на пуле bcrypt: не больше BCRYPT_MAX_WORKERS проверок одновременно."""
+    return await asyncio.get_running_loop().run_in_executor(_bcrypt_executor, verify_password, plain, hashed)
+
+
+async def hash_password_async(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_bcrypt_executor, hash_password, password)
 
 
 def create_access_token(data: dict) -> str:
@@ -47,23 +89,142 @@ def create_access_token(data: dict) -> str:
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-) -> User:
-    token = credentials.credentials
+def _decode_claims(request: Request, token: str) -> dict:
+    """Claims JWT, декодированные один раз за запрос (request.state.claims — и для логов)."""
+    claims = getattr(request.state, "claims", None)
+    if claims is not None:
+        return claims
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = int(payload.get("sub"))
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Недействительный токен")
-    except JWTError:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        int(claims.get("sub"))
+    except (JWTError, TypeError, ValueError):
         raise HTTPException(status_code=401, detail="Недействительный токен")
+    request.state.claims = claims
+    return claims
+
+
+@dataclass
+class Principal:
+    """Кто делает запрос: claims токена, строка User и права. Один на запрос (request.state.principal)."""
+    claims: dict
+    user: User
+    permissions: dict
+    db: object  # Session / AsyncSession, к которой привязан user
+
+    @property
+    def user_id(self) -> int:
+        return self.user.id
+
+    def has(self, perm_name: str) -> bool:
+        return bool(self.permissions.get(perm_name, False))
+
 
-    user = db.query(User).filter(User.id == user_id, User.is_active == True).first()
+def _cached_principal(request: Request, db) -> Principal | None:
+    principal = getattr(request.state, "principal", None)
+    return principal if principal is not None and principal.db is db else None
+
+
+def _store_principal(request: Request, claims: dict, user: User | None, permissions: dict | None, db) -> Principal:
     if user is None:
         raise HTTPException(status_code=401, detail="Пользователь не найден или деактивирован")
-    return user
+    principal = Principal(claims=claims, user=user, permissions=permissions, db=db)
+    # get_user_permissions(user, db) в сервисах берёт права отсюда, без повторного запроса
+    user._principal = principal
+    request.state.principal = principal
+    return principal
+
+
+def _carries_permissions(claims: dict) -> bool:
+    return JWT_PERMISSION_CLAIMS and "perms" in claims
+
+
+def _principal_from_claims(request: Request, claims: dict, db) -> Principal | None:
+    """Principal без обращения к БД — если версии прав в токене не устарели."""
+    user_id, role_id = int(claims["sub"]), claims.get("rid")
+    if not perm_versions.is_current(user_id, claims.get("uv", 0), role_id, claims.get("rv", 0)):
+        return None
+    # Transient User: в сессию не добавляется, нужен сервисам ради id / full_name / email / role
+    user = User(
+        id=user_id, email=claims.get("email"), full_name=claims.get("name"), role=claims.get("role"),
+        role_id=role_id, is_superadmin=bool(claims.get("sa")), is_active=True,
+    )
+    granted = set(claims["perms"])
+    return _store_principal(request, claims, user, {k: k in granted for k in PERMISSION_KEYS}, db)
+
+
+def permission_claims(user: User, db: Session) -> dict:
+    """Claims для stateless-авторизации; пусто, если JWT_PERMISSION_CLAIMS выключен."""
+    if not JWT_PERMISSION_CLAIMS:
+        return {}
+    if perm_versions.needs_sync():
+        perm_versions.sync(db)
+    perms = _resolve_permissions(user, db)
+    return {
+        "perms": sorted(k for k, granted in perms.items() if granted),
+        "sa": bool(user.is_superadmin),
+        "rid": user.role_id,
+        "email": user.email,
+        "name": user.full_name,
+        "uv": perm_versions.get("user", user.id),
+        "rv": perm_versions.get("role", user.role_id),
+    }
+
+
+def get_principal(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db),
+) -> Principal:
+    principal = _cached_principal(request, db)
+    if principal is not None:
+        return principal
+    claims = _decode_claims(request, credentials.credentials)
+    if _carries_permissions(claims):
+        if perm_versions.needs_sync():
+            perm_versions.sync(db)
+        principal = _principal_from_claims(request, claims, db)
+        if principal is not None:
+            return principal
+    user = active_user_cache.get(int(claims["sub"]))
+    if user is None:
+        user = db.query(User).filter(User.id == int(claims["sub"]), User.is_active == True).first()
+        active_user_cache.put(user)
+    permissions = _resolve_permissions(user, db) if user is not None else None
+    return _store_principal(request, claims, user, permissions, db)
+
+
+async def get_principal_async(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db),
+) -> Principal:
+    """get_principal для async-эндпоинтов (пользователь привязан к AsyncSession запроса)."""
+    principal = _cached_principal(request, db)
+    if principal is not None:
+        return principal
+    claims = _decode_claims(request, credentials.credentials)
+    if _carries_permissions(claims):
+        if perm_versions.needs_sync():
+            await db.run_sync(perm_versions.sync)
+        principal = _principal_from_claims(request, claims, db)
+        if principal is not None:
+            return principal
+    user = active_user_cache.get(int(claims["sub"]))
+    if user is None:
+        result = await db.execute(select(User).where(User.id == int(claims["sub"]), User.is_active == True))
+        user = result.scalar_one_or_none()
+        active_user_cache.put(user)
+    permissions = await db.run_sync(lambda sync_db: _resolve_permissions(user, sync_db)) if user is not None else None
+    return _store_principal(request, claims, user, permissions, db)
+
+
+def get_current_user(principal: Principal = Depends(get_principal)) -> User:
+    return principal.user
+
+
+async def get_current_user_async(principal: Principal = Depends(get_principal_async)) -> User:
+    """get_current_user для async-эндпоинтов."""
+    return principal.user
 
 
 PERMISSION_KEYS = [
@@ -72,15 +233,150 @@ PERMISSION_KEYS = [
 ]
 
 
+class PermissionCache:
+    """role_id -> права роли (None — роли нет) с TTL. Потокобезопасен, считает hits/misses."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: dict[int, tuple[float, dict | None]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, role_id: int, loader) -> dict | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(role_id)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        perms = loader(role_id)
+        with self._lock:
+            self._entries[role_id] = (now + self.ttl, perms)
+        return perms
+
+    def invalidate(self, role_id: int | None = None):
+        with self._lock:
+            if role_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(role_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "size": len(self._entries),
+                "ttl_seconds": self.ttl,
+            }
+
+
+permission_cache = PermissionCache(PERMISSION_CACHE_TTL)
+
+
+class ActiveUserCache:
+    """user_id -> снимок полей активного пользователя; LRU с TTL. Потокобезопасен, считает hits/misses.
+
+    Отдаёт каждый раз новый transient User (не привязан к сессии): хватает роутерам и
+    сервисам (id, email, full_name, role, права), но lazy-связи вроде user.position — None.
+    """
+
+    FIELDS = ("id", "email", "full_name", "role", "role_id", "is_active", "is_superadmin", "telegram_chat_id")
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[int, tuple[float, dict]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> User | None:
+        if self.ttl <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= now:
+                self._entries.pop(user_id, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            snapshot = entry[1]
+        return User(**snapshot)
+
+    def put(self, user: User | None):
+        """Запомнить активного пользователя (None / неактивных не кэшируем)."""
+        if self.ttl <= 0 or user is None or not user.is_active:
+            return
+        snapshot = {f: getattr(user, f) for f in self.FIELDS}
+        with self._lock:
+            self._entries[user.id] = (time.monotonic() + self.ttl, snapshot)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def evict(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+            }
+
+
+active_user_cache = ActiveUserCache(ACTIVE_USER_CACHE_TTL, ACTIVE_USER_CACHE_SIZE)
+
+
+def _load_role_permissions(db: Session, role_id: int) -> dict | None:
+    role = db.query(Role).filter(Role.id == role_id).first()
+    if role is None:
+        return None
+    return {k: bool(getattr(role, k, False)) for k in PERMISSION_KEYS}
+
+
 def get_user_permissions(user: User, db: Session) -> dict:
-    """Get permissions dict for user. Superadmin always gets all. Otherwise reads from Role."""
+    """Get permissions dict for user. Для пользователя текущего запроса — уже вычисленные в Principal."""
+    principal = getattr(user, "_principal", None)
+    if principal is not None:
+        return dict(principal.permissions)
+    return _resolve_permissions(user, db)
+
+
+def _resolve_permissions(user: User, db: Session) -> dict:
+    """Superadmin always gets all. Otherwise reads from Role (cached)."""
     if user.is_superadmin:
         return {k: True for k in PERMISSION_KEYS}
 
     if user.role_id:
-        role = db.query(Role).filter(Role.id == user.role_id).first()
-        if role:
-            return {k: getattr(role, k, False) for k in PERMISSION_KEYS}
+        perms = permission_cache.get(user.role_id, lambda role_id: _load_role_permissions(db, role_id))
+        if perms is not None:
+            return dict(perms)
 
     # Fallback: admin gets all, inspector gets basic
     if user.role == "admin":
@@ -94,25 +390,8 @@ def get_user_permissions(user: User, db: Session) -> dict:
 
 def require_permission(perm_name: str):
     """FastAPI dependency factory — checks a specific permission."""
-    def dependency(
-        credentials: HTTPAuthorizationCredentials = Depends(security),
-        db: Session = Depends(get_db),
-    ) -> User:
-        token = credentials.credentials
-        try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            user_id = int(payload.get("sub"))
-            if user_id is None:
-                raise HTTPException(status_code=401, detail="Недействительный токен")
-        except JWTError:
-            raise HTTPException(status_code=401, detail="Недействительный токен")
-
-        user = db.query(User).filter(User.id == user_id, User.is_active == True).first()
-        if user is None:
-            raise HTTPException(status_code=401, detail="Пользователь не найден или деактивирован")
-
-        perms = get_user_permissions(user, db)
-        if not perms.get(perm_name, False):
+    def dependency(principal: Principal = Depends(get_principal)) -> User:
+        if not principal.has(perm_name):
             raise HTTPException(status_code=403, detail=f"Нет права: {perm_name}")
-        return user
+        return principal.user
     return dependency
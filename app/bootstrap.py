@@ -0,0 +1,222 @@
+"""Bootstrap БД при старте: seed-данные и одноразовые data-fixes с версиями.
+
+Каждый шаг в STEPS — (имя, версия, функция). Применённые версии и общий fingerprint
+(версии шагов + таблицы моделей) хранятся в bootstrap_state. На старте — один SELECT
+fingerprint'а: совпал — больше ничего не делаем. Не совпал (новая установка, новый
+шаг, поднятая версия, новая таблица в моделях) — create_all и только шаги, чья
+версия изменилась.
+
+Перезапустить шаг на всех средах — увеличить его версию в STEPS.
+"""
+
+import hashlib
+import json
+import logging
+import time
+
+from sqlalchemy import inspect, select, text
+from sqlalchemy.orm import Session
+
+from app.database import Base, BootstrapState, Role, RiskRule, UnderwritingRule, User
+
+logger = logging.getLogger("app")
+
+FINGERPRINT_KEY = "fingerprint"
+
+DEFAULT_RISK_RULES = [
+    {"category": c, "min_pv": 20.0} for c in ("E", "E1", "E2", "E3", "E4", "F", "F1", "F2", "F3", "F4")
+]
+
+DEFAULT_RULES = [
+    # DTI
+    {"category": "dti", "rule_key": "max_dti_approve", "value": "50", "label": "DTI: макс. для одобрения (%)", "value_type": "float"},
+    {"category": "dti", "rule_key": "max_dti_review", "value": "60", "label": "DTI: макс. для рассмотрения (%)", "value_type": "float"},
+    # PV
+    {"category": "pv", "rule_key": "min_pv_percent", "value": "5", "label": "Минимальный ПВ (%)", "value_type": "float"},
+    {"category": "pv", "rule_key": "pv_increase_step", "value": "5", "label": "Шаг увеличения ПВ при условиях (%)", "value_type": "float"},
+    # Overdue
+    {"category": "overdue", "rule_key": "overdue_30_result", "value": "approved", "label": "До 30 дней: решение", "value_type": "string"},
+    {"category": "overdue", "rule_key": "overdue_31_60_lt_near_result", "value": "rejected", "label": "31-60, менее порога (ближн.): решение", "value_type": "string"},
+    {"category": "overdue", "rule_key": "overdue_31_60_near_to_far_result", "value": "review", "label": "31-60, между порогами: решение", "value_type": "string"},
+    {"category": "overdue", "rule_key": "overdue_31_60_near_to_far_pv_add", "value": "5", "label": "31-60, между порогами: ПВ +%", "value_type": "float"},
+    {"category": "overdue", "rule_key": "overdue_31_60_gt_far_result", "value": "approved", "label": "31-60, более порога (дальн.): решение", "value_type": "string"},
+    {"category": "overdue", "rule_key": "overdue_31_60_gt_far_pv_add", "value": "0", "label": "31-60, более порога (дальн.): ПВ +%", "value_type": "float"},
+    {"category": "overdue", "rule_key": "overdue_31_60_threshold_near", "value": "6", "label": "31-60: ближний порог (мес)", "value_type": "int"},
+    {"category": "overdue", "rule_key": "overdue_31_60_threshold_far", "value": "12", "label": "31-60: дальний порог (мес)", "value_type": "int"},
+    {"category": "overdue", "rule_key": "overdue_61_90_gt_result", "value": "approved", "label": "61-90, более порога: решение", "value_type": "string"},
+    {"category": "overdue", "rule_key": "overdue_61_90_gt_pv_add", "value": "10", "label": "61-90, более порога: ПВ +%", "value_type": "float"},
+    {"category": "overdue", "rule_key": "overdue_61_90_lte_result", "value": "rejected", "label": "61-90, до порога: решение", "value_type": "string"},
+    {"category": "overdue", "rule_key": "overdue_61_90_threshold", "value": "12", "label": "61-90: порог (мес)", "value_type": "int"},
+    {"category": "overdue", "rule_key": "overdue_90plus_gt_result", "value": "review", "label": "90+, более порога: решение", "value_type": "string"},
+    {"category": "overdue", "rule_key": "overdue_90plus_gt_pv_add", "value": "20", "label": "90+, более порога: ПВ +%", "value_type": "float"},
+    {"category": "overdue", "rule_key": "overdue_90plus_lte_result", "value": "rejected", "label": "90+, до порога: решение", "value_type": "string"},
+    {"category": "overdue", "rule_key": "overdue_90plus_threshold", "value": "24", "label": "90+: порог (мес)", "value_type": "int"},
+    # Credit report
+    {"category": "credit_report", "rule_key": "systematic_overdue_result", "value": "rejected", "label": "Систематическая просрочка: решение", "value_type": "string"},
+    {"category": "credit_report", "rule_key": "bad_classification_result", "value": "rejected", "label": "Плохой класс качества: решение", "value_type": "string"},
+    {"category": "credit_report", "rule_key": "bad_classification_pv_add", "value": "10", "label": "Плохой класс качества: ПВ +%", "value_type": "float"},
+    {"category": "credit_report", "rule_key": "warn_classification_result", "value": "review", "label": "Субстандартный класс: решение", "value_type": "string"},
+    {"category": "credit_report", "rule_key": "warn_classification_pv_add", "value": "5", "label": "Субстандартный класс: ПВ +%", "value_type": "float"},
+    {"category": "credit_report", "rule_key": "lombard_result", "value": "rejected", "label": "Ломбард: решение", "value_type": "string"},
+    {"category": "credit_report", "rule_key": "lombard_pv_add", "value": "5", "label": "Ломбард: ПВ +%", "value_type": "float"},
+    {"category": "credit_report", "rule_key": "closed_classification_result", "value": "rejected", "label": "Закрытые ниже Субстандартного: решение", "value_type": "string"},
+    {"category": "credit_report", "rule_key": "scoring_class_de_result", "value": "rejected", "label": "Скоринговый класс D/E: решение", "value_type": "string"},
+    {"category": "credit_report", "rule_key": "current_overdue_result", "value": "rejected", "label": "Текущая просрочка: решение", "value_type": "string"},
+    # Client
+    {"category": "client", "rule_key": "min_age", "value": "21", "label": "Мин. возраст заёмщика", "value_type": "int"},
+    {"category": "client", "rule_key": "max_age", "value": "65", "label": "Макс. возраст заёмщика", "value_type": "int"},
+    {"category": "client", "rule_key": "open_apps_result", "value": "review", "label": "Открытые заявки за 10 дней: решение", "value_type": "string"},
+]
+
+# Credit report parser v2: колонки, которых нет в начальной Alembic-миграции
+CREDIT_REPORT_V2_COLUMNS = [
+    ("systematic_overdue", "BOOLEAN DEFAULT FALSE"),
+    ("worst_active_classification", "VARCHAR(50)"),
+    ("worst_closed_classification", "VARCHAR(50)"),
+    ("has_lombard", "BOOLEAN DEFAULT FALSE"),
+    ("current_overdue_amount", "FLOAT"),
+    ("scoring_class", "VARCHAR(10)"),
+    ("open_applications_count", "INTEGER"),
+]
+
+
+def _scrub_pinfl(db: Session):
+    """Очистка паспортных данных и PINFL клиента (форма их больше не собирает)."""
+    db.execute(text(
+        "UPDATE anketas SET pinfl_hash = NULL WHERE id IN ("
+        "SELECT anketa_id FROM anketa_personal WHERE pinfl IS NOT NULL OR passport_series IS NOT NULL)"
+    ))
+    db.execute(text(
+        "UPDATE anketa_personal SET pinfl = NULL, "
+        "passport_series = NULL, passport_issue_date = NULL, passport_issued_by = NULL "
+        "WHERE pinfl IS NOT NULL OR passport_series IS NOT NULL"
+    ))
+
+
+def _credit_report_v2_columns(db: Session):
+    """Добавить недостающие колонки парсера v2 — только те, которых действительно нет."""
+    conn = db.connection()
+    existing = {c["name"] for c in inspect(conn).get_columns("anketa_credit_history")}
+    for col_name, col_def in CREDIT_REPORT_V2_COLUMNS:
+        if col_name not in existing:
+            conn.execute(text(f"ALTER TABLE anketa_credit_history ADD COLUMN {col_name} {col_def}"))
+
+
+def _system_roles(db: Session):
+    """Системные роли, роли для пользователей без role_id и суперадмин по умолчанию."""
+    from app.auth import hash_password
+
+    admin_role = db.query(Role).filter(Role.name == "Администратор").first()
+    if not admin_role:
+        admin_role = Role(
+            name="Администратор", is_system=True,
+            anketa_create=True, anketa_edit=True, anketa_view_all=True,
+            anketa_conclude=True, anketa_delete=True, user_manage=True,
+            analytics_view=True, export_excel=True, rules_manage=True,
+        )
+        db.add(admin_role)
+
+    inspector_role = db.query(Role).filter(Role.name == "Инспектор").first()
+    if not inspector_role:
+        inspector_role = Role(
+            name="Инспектор", is_system=True,
+            anketa_create=True, anketa_edit=True, anketa_view_all=False,
+            anketa_conclude=True, anketa_delete=False, user_manage=False,
+            analytics_view=False, export_excel=False, rules_manage=False,
+        )
+        db.add(inspector_role)
+    db.flush()
+
+    for u in db.query(User).filter(User.role_id.is_(None)).all():
+        u.role_id = admin_role.id if u.role == "admin" else inspector_role.id
+
+    existing = db.query(User).filter(User.email == "admin@fintechdrive.uz").first()
+    if not existing:
+        db.add(User(
+            email="admin@fintechdrive.uz",
+            full_name="Администратор",
+            password_hash=hash_password("Forever0109!"),
+            role="admin",
+            is_active=True,
+            role_id=admin_role.id,
+            is_superadmin=True,
+        ))
+    elif not existing.is_superadmin:
+        existing.is_superadmin = True
+
+
+def _risk_rules(db: Session):
+    """Дефолтные risk rules — только в пустую таблицу."""
+    if db.query(RiskRule.id).first() is None:
+        db.add_all(RiskRule(**r) for r in DEFAULT_RISK_RULES)
+
+
+def _underwriting_rules(db: Session):
+    """Недостающие правила андеррайтинга (существующие значения не трогаем) — один SELECT ключей."""
+    existing = set(db.scalars(select(UnderwritingRule.rule_key)))
+    db.add_all(UnderwritingRule(**r) for r in DEFAULT_RULES if r["rule_key"] not in existing)
+
+
+# (имя, версия, функция). Новый шаг — в конец; изменили поведение шага — поднимите версию.
+STEPS = [
+    ("pinfl_scrub", 1, _scrub_pinfl),
+    ("credit_report_v2_columns", 1, _credit_report_v2_columns),
+    ("system_roles", 1, _system_roles),
+    ("risk_rules", 1, _risk_rules),
+    ("underwriting_rules", 1, _underwriting_rules),
+]
+
+
+def bootstrap_fingerprint(steps=STEPS) -> str:
+    """Хеш версий шагов и набора таблиц моделей."""
+    payload = {
+        "steps": [[name, version] for name, version, _ in steps],
+        "tables": sorted(Base.metadata.tables),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _stored_fingerprint(engine) -> str | None:
+    try:
+        with engine.connect() as conn:
+            return conn.execute(
+                select(BootstrapState.value).where(BootstrapState.key == FINGERPRINT_KEY)
+            ).scalar()
+    except Exception:
+        # Таблицы ещё нет (новая установка или до alembic upgrade)
+        return None
+
+
+def _set_state(db: Session, key: str, value: str):
+    state = db.get(BootstrapState, key)
+    if state:
+        state.value = value
+    else:
+        db.add(BootstrapState(key=key, value=value))
+
+
+def run_bootstrap(engine, steps=STEPS, force: bool = False) -> list[str]:
+    """Применить недостающие шаги bootstrap. Возвращает имена применённых шагов.
+
+    force=True — выполнить все шаги заново, игнорируя записанные версии.
+    """
+    fingerprint = bootstrap_fingerprint(steps)
+    if not force and _stored_fingerprint(engine) == fingerprint:
+        return []
+
+    Base.metadata.create_all(bind=engine)
+    applied = []
+    with Session(engine, autoflush=False) as db:
+        done = dict(db.execute(select(BootstrapState.key, BootstrapState.value)).all())
+        for name, version, step in steps:
+            if not force and done.get(f"step:{name}") == str(version):
+                continue
+            start = time.perf_counter()
+            step(db)
+            _set_state(db, f"step:{name}", str(version))
+            db.commit()
+            applied.append(name)
+            logger.info("Bootstrap: шаг %s v%d применён за %.0f мс", name, version, (time.perf_counter() - start) * 1000)
+        _set_state(db, FINGERPRINT_KEY, fingerprint)
+        db.commit()
+    return applied
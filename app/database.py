@@ -1,6 +1,12 @@
 import os
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, Float, Date, Text, ForeignKey, func, text
-from sqlalchemy.orm import sessionmaker, declarative_base, relationship
+from fastapi import Depends
+from sqlalchemy import create_engine, event, Column, Integer, String, Boolean, DateTime, Float, Date, Text, ForeignKey, Index, func, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base, declared_attr, relationship
+
+from app.db_pool import pool_engine_kwargs
+from app.db_replica import DATABASE_REPLICA_URL, ReplicaRouter
+from app.db_sqlite import SQLITE_PERFORMANCE_MODE, enable_sqlite_performance_mode, enable_sqlite_pragmas_async
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./underwriting.db")
 
@@ -10,9 +16,37 @@ if DATABASE_URL.startswith("postgres://"):
 
 _is_sqlite = DATABASE_URL.startswith("sqlite")
 _connect_args = {"check_same_thread": False} if _is_sqlite else {}
-
-engine = create_engine(DATABASE_URL, connect_args=_connect_args)
+# In-memory SQLite живёт в одном соединении — пул из окружения к нему неприменим
+_pool_kwargs = {} if _is_sqlite and ":memory:" in DATABASE_URL else pool_engine_kwargs()
+
+engine = create_engine(DATABASE_URL, connect_args=_connect_args, **_pool_kwargs)
+# Однонодовый SQLite-файл: WAL + pragmas + очередь писателей (см. app/db_sqlite.py)
+_sqlite_performance = _is_sqlite and ":memory:" not in DATABASE_URL and SQLITE_PERFORMANCE_MODE
+if _sqlite_performance:
+    enable_sqlite_performance_mode(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def to_async_url(url: str) -> str:
+    """Sync URL → async-драйвер: asyncpg для PostgreSQL, aiosqlite для SQLite."""
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+
+# Async engine для read-heavy эндпоинтов: не держит поток threadpool на время запроса к БД
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+_async_pool_kwargs = {} if ":memory:" in ASYNC_DATABASE_URL else pool_engine_kwargs(async_engine=True)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_async_pool_kwargs)
+if _sqlite_performance and ASYNC_DATABASE_URL.startswith("sqlite"):
+    enable_sqlite_pragmas_async(async_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Опциональная read-реплика для аналитики, выгрузок и публичных ссылок (см. get_read_db)
+_replica_url = DATABASE_REPLICA_URL.replace("postgres://", "postgresql://", 1)
+replica = ReplicaRouter(_replica_url, to_async_url(_replica_url)) if _replica_url else None
 Base = declarative_base()
 
 
@@ -44,6 +78,66 @@ class SystemSettings(Base):
     value = Column(Text)
 
 
+class PermissionVersion(Base):
+    """Версия прав пользователя или роли; растёт при правке роли, деактивации, сбросе пароля.
+    Токены с правами в claims (JWT_PERMISSION_CLAIMS) выпущены под старую версию — перепроверяются по БД."""
+    __tablename__ = "permission_versions"
+
+    kind = Column(String(10), primary_key=True)  # user | role
+    subject_id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class RulesVersion(Base):
+    """Версия правил андеррайтинга и риск-правил (одна строка, id=1); растёт при каждой правке в админке.
+    Воркеры сравнивают её со своим кэшем правил (app/rules_cache.py) и перечитывают правила при расхождении."""
+    __tablename__ = "rules_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class RescoreJob(Base):
+    """Фоновый пересчёт авто-вердикта по портфелю (app/services/rescore_job.py).
+    last_id — checkpoint: задание продолжается с анкеты id > last_id, в том числе после рестарта."""
+    __tablename__ = "rescore_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String(20), nullable=False, default="pending")  # pending|running|cancelling|completed|cancelled|failed
+    requested_by = Column(Integer, ForeignKey("users.id"))
+    rules_version = Column(Integer)                       # версия правил последней пачки
+    last_id = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=False, default=0)     # анкет в портфеле на момент запуска
+    processed = Column(Integer, nullable=False, default=0)
+    changed = Column(Integer, nullable=False, default=0)   # вердикт / ПВ / причины изменились
+    skipped = Column(Integer, nullable=False, default=0)   # verdict_fingerprint актуален — не пересчитывались
+    error = Column(Text)
+    created_at = Column(DateTime, server_default=func.now())
+    started_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)                        # последняя пачка; старый heartbeat — задание брошено
+    finished_at = Column(DateTime)
+
+
+class RateLimitCounter(Base):
+    """Счётчик rate limit, общий для всех воркеров (RATE_LIMIT_STORAGE=db://, см. app/rate_limit_storage.py)."""
+    __tablename__ = "rate_limit_counters"
+
+    key = Column(String(255), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    expires_at = Column(Float, nullable=False, index=True)  # unix time
+
+
+class BootstrapState(Base):
+    """Что уже применено при старте (см. app/bootstrap.py): версии шагов и общий fingerprint."""
+    __tablename__ = "bootstrap_state"
+
+    key = Column(String(100), primary_key=True)
+    value = Column(String(64), nullable=False)
+    applied_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -63,6 +157,27 @@ class User(Base):
 
 class Anketa(Base):
     __tablename__ = "anketas"
+    __table_args__ = (
+        # Список анкет инспектора: created_by = ? AND status != 'deleted' ORDER BY id DESC
+        Index("ix_anketas_created_by_status_id", "created_by", "status", text("id DESC")),
+        # Воронка и аналитика за период: created_at BETWEEN ... [AND status = ?]
+        Index("ix_anketas_created_at", "created_at"),
+        Index("ix_anketas_status_created_at", "status", "created_at"),
+        Index("ix_anketas_client_type_created_at", "client_type", "created_at"),
+        # Тренды и распределения по живым анкетам (deleted_at IS NULL)
+        Index(
+            "ix_anketas_live_created_at", "created_at",
+            sqlite_where=text("deleted_at IS NULL"),
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+        Index(
+            "ix_anketas_live_dti", "dti",
+            sqlite_where=text("deleted_at IS NULL"),
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+        # Поиск дубликатов по ИНН
+        Index("ix_anketas_company_inn", "company_inn"),
+    )
 
     # Meta
     id = Column(Integer, primary_key=True, index=True)
@@ -73,19 +188,11 @@ class Anketa(Base):
     consent_personal_data = Column(Boolean, default=False)
     client_type = Column(String(20), default="individual")  # individual | legal_entity
 
-    # Block 1: Personal info
+    # Client identity: list, search and duplicate lookups (the rest — in sections below)
     full_name = Column(String(300))
-    birth_date = Column(Date)
-    passport_series = Column(String(20))
-    passport_issue_date = Column(Date)
-    passport_issued_by = Column(String(200))
-    pinfl = Column(String(14))
-    registration_address = Column(Text)
-    registration_landmark = Column(String(300))
-    actual_address = Column(Text)
-    actual_landmark = Column(String(300))
     phone_numbers = Column(Text)
-    relative_phones = Column(Text)
+    company_name = Column(String(300))
+    company_inn = Column(String(14))
 
     # Block 2: Deal conditions
     partner = Column(String(200))
@@ -105,7 +212,98 @@ class Anketa(Base):
     monthly_payment = Column(Float)            # auto-calc
     purchase_purpose = Column(String(200))
 
-    # Block 3: Income
+    # Computed metrics
+    total_monthly_income = Column(Float)       # auto-calc
+    dti = Column(Float)                        # auto-calc
+    overdue_check_result = Column(String(100)) # auto-calc
+
+    # Conclusion
+    decision = Column(String(30))          # approved|review|rejected_underwriter|rejected_client
+    conclusion_comment = Column(Text)
+    concluded_by = Column(Integer, ForeignKey("users.id"))
+    concluded_at = Column(DateTime)
+    pinfl_hash = Column(String(64))        # SHA-256
+
+    # Auto-verdict
+    auto_decision = Column(String(30))           # approved | review | rejected
+    auto_decision_reasons = Column(Text)         # JSON array of reasons
+    recommended_pv = Column(Float)               # recommended down payment %
+    verdict_fingerprint = Column(String(64))     # входы + версия правил сохранённого вердикта (verdict_memo)
+    risk_grade = Column(String(50))              # risk grade (E, E1, F2...)
+    no_scoring_response = Column(Boolean, default=False)  # "Нет ответа от скоринга"
+    final_pv = Column(Float)                     # final PV% from conclusion
+    conclusion_version = Column(Integer, default=0)  # 1, 2, 3... incremented on each conclusion
+
+    # Public share
+    share_token = Column(String(64), unique=True, index=True)
+
+    # Soft delete
+    deleted_at = Column(DateTime)
+    deleted_by = Column(Integer, ForeignKey("users.id"))
+    deletion_reason = Column(Text)
+
+    # Relationships
+    creator = relationship("User", foreign_keys=[created_by], backref="anketas")
+    concluder = relationship("User", foreign_keys=[concluded_by])
+    deleter = relationship("User", foreign_keys=[deleted_by])
+
+    # 1:1 sections — separate narrow tables, loaded lazily on first access
+    personal = relationship("AnketaPersonal", uselist=False, back_populates="anketa", cascade="all, delete-orphan")
+    company = relationship("AnketaCompany", uselist=False, back_populates="anketa", cascade="all, delete-orphan")
+    income = relationship("AnketaIncome", uselist=False, back_populates="anketa", cascade="all, delete-orphan")
+    credit_history = relationship("AnketaCreditHistory", uselist=False, back_populates="anketa", cascade="all, delete-orphan")
+    guarantor = relationship("AnketaGuarantor", uselist=False, back_populates="anketa", cascade="all, delete-orphan")
+
+
+class AnketaSection:
+    """Общая часть 1:1 секций анкеты: PK = FK на anketas.id."""
+
+    @declared_attr
+    def anketa_id(cls):
+        return Column(Integer, ForeignKey("anketas.id", ondelete="CASCADE"), primary_key=True)
+
+
+class AnketaPersonal(AnketaSection, Base):
+    """Block 1: Personal info (физлицо)."""
+    __tablename__ = "anketa_personal"
+
+    birth_date = Column(Date)
+    passport_series = Column(String(20))
+    passport_issue_date = Column(Date)
+    passport_issued_by = Column(String(200))
+    pinfl = Column(String(14))
+    registration_address = Column(Text)
+    registration_landmark = Column(String(300))
+    actual_address = Column(Text)
+    actual_landmark = Column(String(300))
+    relative_phones = Column(Text)
+
+    anketa = relationship("Anketa", back_populates="personal")
+
+
+class AnketaCompany(AnketaSection, Base):
+    """Company info (юрлицо)."""
+    __tablename__ = "anketa_company"
+
+    company_oked = Column(String(200))
+    company_legal_address = Column(Text)
+    company_actual_address = Column(Text)
+    company_phone = Column(String(50))
+    director_full_name = Column(String(300))       # Latin only
+    director_phone = Column(String(50))
+    director_family_phone = Column(String(50))     # family member phone
+    director_family_relation = Column(String(50))  # кем приходится
+    contact_person_name = Column(String(300))
+    contact_person_role = Column(String(100))      # бухгалтер / зам. директора
+    contact_person_phone = Column(String(50))
+
+    anketa = relationship("Anketa", back_populates="company")
+
+
+class AnketaIncome(AnketaSection, Base):
+    """Block 3: Income — физлицо и юрлицо/директор."""
+    __tablename__ = "anketa_income"
+
     has_official_employment = Column(String(10))  # да/нет
     employer_name = Column(String(300))
     salary_period_months = Column(Float)
@@ -119,16 +317,27 @@ class Anketa(Base):
     other_income_source = Column(String(300))
     other_income_period = Column(Float)
     other_income_total = Column(Float)
-    total_monthly_income = Column(Float)       # auto-calc
     property_type = Column(String(200))
     property_details = Column(Text)
 
-    # Block 4: Credit history
+    # Company income
+    company_revenue_period = Column(Float)         # period in months
+    company_revenue_total = Column(Float)          # revenue for period
+    company_net_profit = Column(Float)             # net profit for period
+    director_income_period = Column(Float)         # period in months
+    director_income_total = Column(Float)          # director income for period
+
+    anketa = relationship("Anketa", back_populates="income")
+
+
+class AnketaCreditHistory(AnketaSection, Base):
+    """Block 4: Credit history — клиент, компания, директор."""
+    __tablename__ = "anketa_credit_history"
+
     has_current_obligations = Column(String(10))  # есть/нет
     total_obligations_amount = Column(Float)
     obligations_count = Column(Integer)
     monthly_obligations_payment = Column(Float)
-    dti = Column(Float)                        # auto-calc
     closed_obligations_count = Column(Integer)
     max_overdue_principal_days = Column(Integer)
     max_overdue_principal_amount = Column(Float)
@@ -136,7 +345,6 @@ class Anketa(Base):
     max_overdue_percent_amount = Column(Float)
     overdue_category = Column(String(20))      # до 30 дней/31-60/61-90/90+
     last_overdue_date = Column(Date)
-    overdue_check_result = Column(String(100)) # auto-calc
     overdue_reason = Column(Text)
 
     # Credit report parser v2 fields
@@ -148,29 +356,6 @@ class Anketa(Base):
     scoring_class = Column(String(10))
     open_applications_count = Column(Integer)
 
-    # ===== LEGAL ENTITY FIELDS =====
-    # Company info
-    company_name = Column(String(300))
-    company_inn = Column(String(14))
-    company_oked = Column(String(200))
-    company_legal_address = Column(Text)
-    company_actual_address = Column(Text)
-    company_phone = Column(String(50))
-    director_full_name = Column(String(300))       # Latin only
-    director_phone = Column(String(50))
-    director_family_phone = Column(String(50))     # family member phone
-    director_family_relation = Column(String(50))  # кем приходится
-    contact_person_name = Column(String(300))
-    contact_person_role = Column(String(100))      # бухгалтер / зам. директора
-    contact_person_phone = Column(String(50))
-
-    # Company income
-    company_revenue_period = Column(Float)         # period in months
-    company_revenue_total = Column(Float)          # revenue for period
-    company_net_profit = Column(Float)             # net profit for period
-    director_income_period = Column(Float)         # period in months
-    director_income_total = Column(Float)          # director income for period
-
     # Company credit history
     company_has_obligations = Column(String(10))
     company_obligations_amount = Column(Float)
@@ -189,7 +374,13 @@ class Anketa(Base):
     director_last_overdue_date = Column(Date)
     director_overdue_reason = Column(Text)
 
-    # Guarantor (legal entity only)
+    anketa = relationship("Anketa", back_populates="credit_history")
+
+
+class AnketaGuarantor(AnketaSection, Base):
+    """Guarantor (legal entity only)."""
+    __tablename__ = "anketa_guarantor"
+
     guarantor_full_name = Column(String(300))      # Latin only
     guarantor_pinfl = Column(String(14))
     guarantor_passport = Column(String(20))
@@ -198,34 +389,78 @@ class Anketa(Base):
     guarantor_overdue_category = Column(String(20))
     guarantor_last_overdue_date = Column(Date)
 
-    # Conclusion
-    decision = Column(String(30))          # approved|review|rejected_underwriter|rejected_client
-    conclusion_comment = Column(Text)
-    concluded_by = Column(Integer, ForeignKey("users.id"))
-    concluded_at = Column(DateTime)
-    pinfl_hash = Column(String(64))        # SHA-256
-
-    # Auto-verdict
-    auto_decision = Column(String(30))           # approved | review | rejected
-    auto_decision_reasons = Column(Text)         # JSON array of reasons
-    recommended_pv = Column(Float)               # recommended down payment %
-    risk_grade = Column(String(50))              # risk grade (E, E1, F2...)
-    no_scoring_response = Column(Boolean, default=False)  # "Нет ответа от скоринга"
-    final_pv = Column(Float)                     # final PV% from conclusion
-    conclusion_version = Column(Integer, default=0)  # 1, 2, 3... incremented on each conclusion
-
-    # Public share
-    share_token = Column(String(64), unique=True, index=True)
-
-    # Soft delete
-    deleted_at = Column(DateTime)
-    deleted_by = Column(Integer, ForeignKey("users.id"))
-    deletion_reason = Column(Text)
-
-    # Relationships
-    creator = relationship("User", foreign_keys=[created_by], backref="anketas")
-    concluder = relationship("User", foreign_keys=[concluded_by])
-    deleter = relationship("User", foreign_keys=[deleted_by])
+    anketa = relationship("Anketa", back_populates="guarantor")
+
+
+# relationship name on Anketa -> section model
+ANKETA_SECTIONS = {
+    "personal": AnketaPersonal,
+    "company": AnketaCompany,
+    "income": AnketaIncome,
+    "credit_history": AnketaCreditHistory,
+    "guarantor": AnketaGuarantor,
+}
+
+
+class SectionField:
+    """Поле секции, доступное как атрибут Anketa (anketa.birth_date), — API и сервисы не меняются.
+
+    Чтение без строки секции отдаёт default колонки (None / False); запись None
+    в отсутствующую секцию строку не создаёт — таблицы секций остаются разреженными.
+    На уровне класса (Anketa.birth_date) возвращает колонку секции — для select/join.
+    """
+
+    def __init__(self, section: str, model, name: str):
+        self.section = section
+        self.model = model
+        self.name = name
+        default = model.__table__.c[name].default
+        self.default = default.arg if default is not None and default.is_scalar else None
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return getattr(self.model, self.name)
+        section = getattr(obj, self.section)
+        return getattr(section, self.name) if section is not None else self.default
+
+    def __set__(self, obj, value):
+        section = getattr(obj, self.section)
+        if section is None:
+            if value is None:
+                return
+            section = self.model()
+            setattr(obj, self.section, section)
+        setattr(section, self.name, value)
+
+
+ANKETA_SECTION_FIELDS: dict[str, str] = {}
+for _section, _model in ANKETA_SECTIONS.items():
+    for _col in _model.__table__.columns:
+        if _col.name != "anketa_id":
+            ANKETA_SECTION_FIELDS[_col.name] = _section
+            setattr(Anketa, _col.name, SectionField(_section, _model, _col.name))
+
+
+@event.listens_for(Session, "before_flush")
+def _touch_anketa_on_section_change(session, flush_context, instances):
+    """Изменение только секции всё равно двигает anketas.updated_at (как при старой широкой строке)."""
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, AnketaSection) or not session.is_modified(obj):
+            continue
+        anketa = obj.anketa
+        if anketa is not None and anketa in session and anketa not in session.new:
+            anketa.updated_at = func.now()
+
+
+class AnketaPhone(Base):
+    """Нормализованные телефоны анкеты (по одному на номер) — для поиска дубликатов."""
+    __tablename__ = "anketa_phones"
+    __table_args__ = (
+        Index("ix_anketa_phones_phone_anketa_id", "phone", "anketa_id"),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    anketa_id = Column(Integer, ForeignKey("anketas.id"), nullable=False, index=True)
+    phone = Column(String(50), nullable=False)  # только цифры
 
 
 class AnketaHistory(Base):
@@ -327,187 +562,41 @@ def get_db():
         db.close()
 
 
-def init_db():
-    """Seed начальных данных. Миграции схемы теперь через Alembic (alembic upgrade head).
-    create_all оставлен для тестов (SQLite in-memory)."""
-    from app.auth import hash_password
-
-    Base.metadata.create_all(bind=engine)
-
-    # TODO: убрать после полной очистки PINFL на всех средах
-    with engine.connect() as conn:
-        try:
-            conn.execute(text(
-                "UPDATE anketas SET pinfl = NULL, pinfl_hash = NULL, "
-                "passport_series = NULL, passport_issue_date = NULL, passport_issued_by = NULL "
-                "WHERE pinfl IS NOT NULL OR passport_series IS NOT NULL"
-            ))
-            conn.commit()
-        except Exception:
-            conn.rollback()
-
-    # Add credit report parser v2 columns
-    with engine.connect() as conn:
-        for col_name, col_def in [
-            ("systematic_overdue", "BOOLEAN DEFAULT FALSE"),
-            ("worst_active_classification", "VARCHAR(50)"),
-            ("worst_closed_classification", "VARCHAR(50)"),
-            ("has_lombard", "BOOLEAN DEFAULT FALSE"),
-            ("current_overdue_amount", "FLOAT"),
-            ("scoring_class", "VARCHAR(10)"),
-            ("open_applications_count", "INTEGER"),
-        ]:
-            try:
-                conn.execute(text(f"ALTER TABLE anketas ADD COLUMN {col_name} {col_def}"))
-                conn.commit()
-            except Exception:
-                conn.rollback()
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
 
-    db = SessionLocal()
+
+def get_read_db(primary: Session = Depends(get_db)):
+    """Сессия для тяжёлых чтений: реплика, если она задана и не отстаёт, иначе primary.
+
+    Session primary ленивая — соединение не берётся, пока по ней не выполнен запрос.
+    """
+    if replica is None or not replica.is_usable():
+        yield primary
+        return
+    db = replica.SessionLocal()
     try:
-        # Seed system roles
-        admin_role = db.query(Role).filter(Role.name == "Администратор").first()
-        if not admin_role:
-            admin_role = Role(
-                name="Администратор", is_system=True,
-                anketa_create=True, anketa_edit=True, anketa_view_all=True,
-                anketa_conclude=True, anketa_delete=True, user_manage=True,
-                analytics_view=True, export_excel=True, rules_manage=True,
-            )
-            db.add(admin_role)
-            db.flush()
-
-        inspector_role = db.query(Role).filter(Role.name == "Инспектор").first()
-        if not inspector_role:
-            inspector_role = Role(
-                name="Инспектор", is_system=True,
-                anketa_create=True, anketa_edit=True, anketa_view_all=False,
-                anketa_conclude=True, anketa_delete=False, user_manage=False,
-                analytics_view=False, export_excel=False, rules_manage=False,
-            )
-            db.add(inspector_role)
-            db.flush()
-
-        db.commit()
-
-        # Re-fetch after commit
-        admin_role = db.query(Role).filter(Role.name == "Администратор").first()
-        inspector_role = db.query(Role).filter(Role.name == "Инспектор").first()
-
-        # Assign existing users to roles if not yet assigned
-        users_no_role = db.query(User).filter(User.role_id.is_(None)).all()
-        for u in users_no_role:
-            if u.role == "admin":
-                u.role_id = admin_role.id
-            else:
-                u.role_id = inspector_role.id
-        if users_no_role:
-            db.commit()
-
-        existing = db.query(User).filter(User.email == "admin@fintechdrive.uz").first()
-        if not existing:
-            admin = User(
-                email="admin@fintechdrive.uz",
-                full_name="Администратор",
-                password_hash=hash_password("Forever0109!"),
-                role="admin",
-                is_active=True,
-                role_id=admin_role.id,
-                is_superadmin=True,
-            )
-            db.add(admin)
-            db.commit()
-        elif not existing.is_superadmin:
-            existing.is_superadmin = True
-            db.commit()
-
-        # Seed risk rules if table is empty
-        if db.query(RiskRule).count() == 0:
-            default_risk_rules = [
-                {"category": "E", "min_pv": 20.0},
-                {"category": "E1", "min_pv": 20.0},
-                {"category": "E2", "min_pv": 20.0},
-                {"category": "E3", "min_pv": 20.0},
-                {"category": "E4", "min_pv": 20.0},
-                {"category": "F", "min_pv": 20.0},
-                {"category": "F1", "min_pv": 20.0},
-                {"category": "F2", "min_pv": 20.0},
-                {"category": "F3", "min_pv": 20.0},
-                {"category": "F4", "min_pv": 20.0},
-            ]
-            for r in default_risk_rules:
-                db.add(RiskRule(**r))
-            db.commit()
-
-        # Seed underwriting rules if table is empty
-        if db.query(UnderwritingRule).count() == 0:
-            default_rules = [
-                # DTI
-                {"category": "dti", "rule_key": "max_dti_approve", "value": "50", "label": "DTI: макс. для одобрения (%)", "value_type": "float"},
-                {"category": "dti", "rule_key": "max_dti_review", "value": "60", "label": "DTI: макс. для рассмотрения (%)", "value_type": "float"},
-                # PV
-                {"category": "pv", "rule_key": "min_pv_percent", "value": "5", "label": "Минимальный ПВ (%)", "value_type": "float"},
-                {"category": "pv", "rule_key": "pv_increase_step", "value": "5", "label": "Шаг увеличения ПВ при условиях (%)", "value_type": "float"},
-                # Overdue
-                {"category": "overdue", "rule_key": "overdue_30_result", "value": "approved", "label": "До 30 дней: решение", "value_type": "string"},
-                {"category": "overdue", "rule_key": "overdue_31_60_lt_near_result", "value": "rejected", "label": "31-60, менее порога (ближн.): решение", "value_type": "string"},
-                {"category": "overdue", "rule_key": "overdue_31_60_near_to_far_result", "value": "review", "label": "31-60, между порогами: решение", "value_type": "string"},
-                {"category": "overdue", "rule_key": "overdue_31_60_near_to_far_pv_add", "value": "5", "label": "31-60, между порогами: ПВ +%", "value_type": "float"},
-                {"category": "overdue", "rule_key": "overdue_31_60_gt_far_result", "value": "approved", "label": "31-60, более порога (дальн.): решение", "value_type": "string"},
-                {"category": "overdue", "rule_key": "overdue_31_60_gt_far_pv_add", "value": "0", "label": "31-60, более порога (дальн.): ПВ +%", "value_type": "float"},
-                {"category": "overdue", "rule_key": "overdue_31_60_threshold_near", "value": "6", "label": "31-60: ближний порог (мес)", "value_type": "int"},
-                {"category": "overdue", "rule_key": "overdue_31_60_threshold_far", "value": "12", "label": "31-60: дальний порог (мес)", "value_type": "int"},
-                {"category": "overdue", "rule_key": "overdue_61_90_gt_result", "value": "approved", "label": "61-90, более порога: решение", "value_type": "string"},
-                {"category": "overdue", "rule_key": "overdue_61_90_gt_pv_add", "value": "10", "label": "61-90, более порога: ПВ +%", "value_type": "float"},
-                {"category": "overdue", "rule_key": "overdue_61_90_lte_result", "value": "rejected", "label": "61-90, до порога: решение", "value_type": "string"},
-                {"category": "overdue", "rule_key": "overdue_61_90_threshold", "value": "12", "label": "61-90: порог (мес)", "value_type": "int"},
-                {"category": "overdue", "rule_key": "overdue_90plus_gt_result", "value": "review", "label": "90+, более порога: решение", "value_type": "string"},
-                {"category": "overdue", "rule_key": "overdue_90plus_gt_pv_add", "value": "20", "label": "90+, более порога: ПВ +%", "value_type": "float"},
-                {"category": "overdue", "rule_key": "overdue_90plus_lte_result", "value": "rejected", "label": "90+, до порога: решение", "value_type": "string"},
-                {"category": "overdue", "rule_key": "overdue_90plus_threshold", "value": "24", "label": "90+: порог (мес)", "value_type": "int"},
-                # Credit report
-                {"category": "credit_report", "rule_key": "systematic_overdue_result", "value": "rejected", "label": "Систематическая просрочка: решение", "value_type": "string"},
-                {"category": "credit_report", "rule_key": "bad_classification_result", "value": "rejected", "label": "Плохой класс качества: решение", "value_type": "string"},
-                {"category": "credit_report", "rule_key": "bad_classification_pv_add", "value": "10", "label": "Плохой класс качества: ПВ +%", "value_type": "float"},
-                {"category": "credit_report", "rule_key": "warn_classification_result", "value": "review", "label": "Субстандартный класс: решение", "value_type": "string"},
-                {"category": "credit_report", "rule_key": "warn_classification_pv_add", "value": "5", "label": "Субстандартный класс: ПВ +%", "value_type": "float"},
-                {"category": "credit_report", "rule_key": "lombard_result", "value": "rejected", "label": "Ломбард: решение", "value_type": "string"},
-                {"category": "credit_report", "rule_key": "lombard_pv_add", "value": "5", "label": "Ломбард: ПВ +%", "value_type": "float"},
-                {"category": "credit_report", "rule_key": "closed_classification_result", "value": "rejected", "label": "Закрытые ниже Субстандартного: решение", "value_type": "string"},
-                {"category": "credit_report", "rule_key": "scoring_class_de_result", "value": "rejected", "label": "Скоринговый класс D/E: решение", "value_type": "string"},
-                {"category": "credit_report", "rule_key": "current_overdue_result", "value": "rejected", "label": "Текущая просрочка: решение", "value_type": "string"},
-                # Client
-                {"category": "client", "rule_key": "min_age", "value": "21", "label": "Мин. возраст заёмщика", "value_type": "int"},
-                {"category": "client", "rule_key": "max_age", "value": "65", "label": "Макс. возраст заёмщика", "value_type": "int"},
-                {"category": "client", "rule_key": "open_apps_result", "value": "review", "label": "Открытые заявки за 10 дней: решение", "value_type": "string"},
-            ]
-            for r in default_rules:
-                db.add(UnderwritingRule(**r))
-            db.commit()
-
-        # Seed missing rules (for existing installations)
-        new_rules = [
-            {"category": "overdue", "rule_key": "overdue_31_60_gt_far_pv_add", "value": "0", "label": "31-60, более порога (дальн.): ПВ +%", "value_type": "float"},
-            {"category": "overdue", "rule_key": "overdue_61_90_gt_pv_add", "value": "10", "label": "61-90, более порога: ПВ +%", "value_type": "float"},
-            {"category": "overdue", "rule_key": "overdue_90plus_gt_pv_add", "value": "20", "label": "90+, более порога: ПВ +%", "value_type": "float"},
-            {"category": "credit_report", "rule_key": "systematic_overdue_result", "value": "rejected", "label": "Систематическая просрочка: решение", "value_type": "string"},
-            {"category": "credit_report", "rule_key": "bad_classification_result", "value": "rejected", "label": "Плохой класс качества: решение", "value_type": "string"},
-            {"category": "credit_report", "rule_key": "bad_classification_pv_add", "value": "10", "label": "Плохой класс качества: ПВ +%", "value_type": "float"},
-            {"category": "credit_report", "rule_key": "warn_classification_result", "value": "review", "label": "Субстандартный класс: решение", "value_type": "string"},
-            {"category": "credit_report", "rule_key": "warn_classification_pv_add", "value": "5", "label": "Субстандартный класс: ПВ +%", "value_type": "float"},
-            {"category": "credit_report", "rule_key": "lombard_result", "value": "rejected", "label": "Ломбард: решение", "value_type": "string"},
-            {"category": "credit_report", "rule_key": "lombard_pv_add", "value": "5", "label": "Ломбард: ПВ +%", "value_type": "float"},
-            {"category": "credit_report", "rule_key": "closed_classification_result", "value": "rejected", "label": "Закрытые ниже Субстандартного: решение", "value_type": "string"},
-            {"category": "credit_report", "rule_key": "scoring_class_de_result", "value": "rejected", "label": "Скоринговый класс D/E: решение", "value_type": "string"},
-            {"category": "credit_report", "rule_key": "current_overdue_result", "value": "rejected", "label": "Текущая просрочка: решение", "value_type": "string"},
-            {"category": "client", "rule_key": "min_age", "value": "21", "label": "Мин. возраст заёмщика", "value_type": "int"},
-            {"category": "client", "rule_key": "max_age", "value": "65", "label": "Макс. возраст заёмщика", "value_type": "int"},
-            {"category": "client", "rule_key": "open_apps_result", "value": "review", "label": "Открытые заявки за 10 дней: решение", "value_type": "string"},
-        ]
-        for r in new_rules:
-            exists = db.query(UnderwritingRule).filter(UnderwritingRule.rule_key == r["rule_key"]).first()
-            if not exists:
-                db.add(UnderwritingRule(**r))
-        db.commit()
+        yield db
     finally:
         db.close()
+
+
+async def get_read_async_db(primary: AsyncSession = Depends(get_async_db)):
+    """Async-вариант get_read_db."""
+    if replica is None or not await replica.is_usable_async():
+        yield primary
+        return
+    async with replica.AsyncSessionLocal() as db:
+        yield db
+
+
+def init_db():
+    """Seed начальных данных и одноразовые data-fixes. Миграции схемы — через Alembic
+    (alembic upgrade head); create_all оставлен для тестов и новых установок.
+
+    Применённое записывается в bootstrap_state: повторный старт — один SELECT (см. app/bootstrap.py).
+    """
+    from app.bootstrap import run_bootstrap
+
+    run_bootstrap(engine)
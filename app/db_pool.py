@@ -0,0 +1,147 @@
+"""Пул соединений БД: настройка из окружения и метрики насыщения.
+
+Переменные окружения (все опциональны):
+  DB_POOL_SIZE              — постоянных соединений в пуле (по умолчанию 5)
+  DB_MAX_OVERFLOW           — сверх pool_size под пиковую нагрузку (10)
+  DB_POOL_TIMEOUT           — сколько секунд ждать свободное соединение (30)
+  DB_POOL_PRE_PING          — проверять соединение перед выдачей (true)
+  DB_POOL_RECYCLE           — пересоздавать соединения старше N секунд (1800, -1 = никогда)
+  DB_POOL_SATURATION_WARN   — доля занятых соединений, при которой пишется warning (0.8)
+"""
+
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger("app")
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_SATURATION_WARN = float(os.getenv("DB_POOL_SATURATION_WARN", "0.8"))
+
+# Не чаще одного warning о насыщении за этот интервал — иначе лог забивается под нагрузкой
+SATURATION_LOG_INTERVAL = 60.0
+
+
+class PoolMetrics:
+    """Счётчики ожидания/таймаутов пула. Потокобезопасны — checkout идёт из threadpool FastAPI."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+            self.saturation_events = 0
+            self.peak_checked_out = 0
+            self._last_warning = 0.0
+
+    def record_checkout(self, wait: float, checked_out: int):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+    def record_timeout(self, wait: float):
+        with self._lock:
+            self.timeouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def record_saturation(self) -> bool:
+        """Учесть событие насыщения; True — если пора писать warning."""
+        now = time.monotonic()
+        with self._lock:
+            self.saturation_events += 1
+            if now - self._last_warning < SATURATION_LOG_INTERVAL:
+                return False
+            self._last_warning = now
+            return True
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+                "saturation_events": self.saturation_events,
+                "peak_checked_out": self.peak_checked_out,
+            }
+
+
+class _InstrumentedPoolMixin:
+    """Замер выдачи соединения: ожидание, таймауты, насыщение. Метрики — на каждый пул свои."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            conn = super().connect()
+        except exc.TimeoutError:
+            self.metrics.record_timeout(time.perf_counter() - start)
+            logger.error("Пул соединений БД исчерпан: таймаут %.1f с (%s)", self._timeout, self.status())
+            raise
+        checked_out = self.checkedout()
+        self.metrics.record_checkout(time.perf_counter() - start, checked_out)
+
+        capacity = self.size() + max(self._max_overflow, 0)
+        if capacity and checked_out / capacity >= DB_POOL_SATURATION_WARN and self.metrics.record_saturation():
+            logger.warning("Пул соединений БД насыщен: занято %d из %d (%s)", checked_out, capacity, self.status())
+        return conn
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """QueuePool с метриками — для синхронного engine."""
+    # Логгер пула SQLAlchemy — под sqlalchemy.pool, как у обычного QueuePool, а не под app.*
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.QueuePool"
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool с метриками — для async engine."""
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.AsyncAdaptedQueuePool"
+
+
+def pool_engine_kwargs(async_engine: bool = False) -> dict:
+    """Аргументы create_engine / create_async_engine для пула из окружения."""
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if async_engine else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+
+
+def pool_stats(engine) -> dict:
+    """Текущее состояние пула + накопленные счётчики."""
+    pool = engine.pool
+    stats = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+        })
+    if isinstance(pool, _InstrumentedPoolMixin):
+        stats.update(pool.metrics.snapshot())
+    return stats
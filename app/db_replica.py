@@ -0,0 +1,125 @@
+"""Read-replica: маршрутизация тяжёлых чтений (аналитика, выгрузка, публичные ссылки, PDF).
+
+Переменные окружения (все опциональны):
+  DATABASE_REPLICA_URL        — URL реплики; не задан — все чтения идут в primary
+  DB_REPLICA_MAX_LAG          — допустимое отставание реплики, секунд (5)
+  DB_REPLICA_CHECK_INTERVAL   — как часто перепроверять отставание, секунд (5)
+
+Отставание меряется запросом к самой реплике (PostgreSQL standby:
+now() - pg_last_xact_replay_timestamp()); для прочих СУБД считается нулевым.
+Если реплика отстаёт сильнее порога или недоступна — чтение уходит в primary.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db_pool import pool_engine_kwargs, pool_stats
+
+logger = logging.getLogger("app")
+
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL", "")
+DB_REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", "5"))
+DB_REPLICA_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "5"))
+
+# Standby без новых WAL (receive == replay) не отстаёт, даже если последняя транзакция была давно
+_PG_LAG_SQL = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class ReplicaRouter:
+    """Engines реплики (sync + async) и кэшированная проверка её отставания."""
+
+    def __init__(self, url: str, async_url: str, max_lag: float = DB_REPLICA_MAX_LAG,
+                 check_interval: float = DB_REPLICA_CHECK_INTERVAL, **engine_kwargs):
+        is_sqlite = url.startswith("sqlite")
+        connect_args = {"check_same_thread": False} if is_sqlite else {}
+        self.engine = create_engine(url, connect_args=connect_args, **(engine_kwargs or pool_engine_kwargs()))
+        self.async_engine = create_async_engine(async_url, **(engine_kwargs or pool_engine_kwargs(async_engine=True)))
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.AsyncSessionLocal = async_sessionmaker(self.async_engine, autoflush=False, expire_on_commit=False)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._lag: float | None = None
+        self._checked_at: float | None = None
+        self.fallbacks = 0
+
+    def _lag_sql(self):
+        return _PG_LAG_SQL if self.engine.dialect.name == "postgresql" else None
+
+    def _record(self, lag: float | None) -> bool:
+        with self._lock:
+            self._lag = lag
+            self._checked_at = time.monotonic()
+        if lag is not None and lag > self.max_lag:
+            logger.warning("Реплика отстаёт на %.1f с (порог %.1f с) — чтение из primary", lag, self.max_lag)
+        return self._decide()
+
+    def _decide(self) -> bool:
+        usable = self._lag is not None and self._lag <= self.max_lag
+        if not usable:
+            with self._lock:
+                self.fallbacks += 1
+        return usable
+
+    def _fresh(self) -> bool:
+        return self._checked_at is not None and time.monotonic() - self._checked_at < self.check_interval
+
+    def probe_lag(self) -> float:
+        """Отставание реплики в секундах (sync-запрос)."""
+        sql = self._lag_sql()
+        if sql is None:
+            return 0.0
+        with self.engine.connect() as conn:
+            return float(conn.execute(sql).scalar() or 0)
+
+    async def probe_lag_async(self) -> float:
+        """Отставание реплики в секундах (async-запрос)."""
+        sql = self._lag_sql()
+        if sql is None:
+            return 0.0
+        async with self.async_engine.connect() as conn:
+            return float((await conn.execute(sql)).scalar() or 0)
+
+    def is_usable(self) -> bool:
+        """True — читать из реплики. Проверка не чаще раза в check_interval."""
+        if self._fresh():
+            return self._decide()
+        try:
+            lag = self.probe_lag()
+        except Exception:
+            logger.exception("Реплика недоступна — чтение из primary")
+            lag = None
+        return self._record(lag)
+
+    async def is_usable_async(self) -> bool:
+        if self._fresh():
+            return self._decide()
+        try:
+            lag = await self.probe_lag_async()
+        except Exception:
+            logger.exception("Реплика недоступна — чтение из primary")
+            lag = None
+        return self._record(lag)
+
+    def stats(self) -> dict:
+        return {
+            "lag_seconds": self._lag,
+            "max_lag_seconds": self.max_lag,
+            "fallbacks": self.fallbacks,
+            "sync": pool_stats(self.engine),
+            "async": pool_stats(self.async_engine.sync_engine),
+        }
+
+    async def dispose(self):
+        self.engine.dispose()
+        await self.async_engine.dispose()
@@ -0,0 +1,108 @@
+"""Режим производительности для однонодового SQLite: WAL, pragmas и сериализация записи.
+
+Переменные окружения (все опциональны):
+  SQLITE_PERFORMANCE_MODE   — включить режим для файловой SQLite-базы (true)
+  SQLITE_BUSY_TIMEOUT_MS    — сколько ждать чужую блокировку, мс (5000)
+  SQLITE_CACHE_SIZE_KB      — кэш страниц на соединение, КБ (65536)
+  SQLITE_MMAP_SIZE          — memory-mapped I/O, байт (268435456; 0 — выключить)
+
+Pragmas ставятся на каждое новое соединение: journal_mode=WAL (читатели не блокируют
+писателя и наоборот), synchronous=NORMAL (в WAL безопасно, fsync только на checkpoint),
+busy_timeout, cache_size, mmap_size.
+
+Запись сериализуется одним writer lock на engine: соединение берёт lock перед первым
+INSERT/UPDATE/DELETE транзакции и отпускает на commit/rollback. Второй писатель ждёт
+в очереди на lock, а не крутится в busy-handler SQLite и не получает "database is locked".
+pysqlite открывает транзакцию только перед DML, так что к моменту BEGIN lock уже взят.
+Lock — внутри процесса; между процессами (несколько воркеров uvicorn) остаётся busy_timeout.
+"""
+
+import logging
+import os
+import threading
+
+from sqlalchemy import event
+
+logger = logging.getLogger("app")
+
+SQLITE_PERFORMANCE_MODE = os.getenv("SQLITE_PERFORMANCE_MODE", "true").lower() in ("1", "true", "yes")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 2**20)))
+
+_WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE", "REPLACE", "CREATE", "DROP", "ALTER")
+_LOCK_KEY = "sqlite_writer_lock"
+
+
+def _is_write(statement: str) -> bool:
+    return statement.lstrip()[:7].upper().startswith(_WRITE_PREFIXES)
+
+
+def set_sqlite_pragmas(dbapi_conn, wal: bool = True):
+    cursor = dbapi_conn.cursor()
+    if wal:
+        cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.close()
+
+
+class WriterLock:
+    """Один писатель на engine. Держатель отмечается в connection.info."""
+
+    def __init__(self, timeout: float):
+        self._lock = threading.Lock()
+        self.timeout = timeout
+        self.acquired = 0
+        self.timeouts = 0
+
+    def acquire(self, info: dict):
+        if info.get(_LOCK_KEY):
+            return
+        if self._lock.acquire(timeout=self.timeout):
+            info[_LOCK_KEY] = True
+            self.acquired += 1
+        else:
+            # Не держим запрос бесконечно: дальше решает busy_timeout самой SQLite
+            self.timeouts += 1
+            logger.warning("SQLite writer lock: ожидание > %.1f с, запись без очереди", self.timeout)
+
+    def release(self, info: dict):
+        if info.pop(_LOCK_KEY, False):
+            self._lock.release()
+
+
+def enable_sqlite_performance_mode(engine, wal: bool = True) -> WriterLock:
+    """Pragmas на connect + writer lock для sync engine. Возвращает lock (метрики, тесты)."""
+    writer_lock = WriterLock(timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, connection_record):
+        set_sqlite_pragmas(dbapi_conn, wal=wal)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        if _is_write(statement):
+            writer_lock.acquire(conn.connection.info)
+
+    @event.listens_for(engine, "commit")
+    @event.listens_for(engine, "rollback")
+    def _on_end(conn):
+        writer_lock.release(conn.connection.info)
+
+    # Страховка: соединение вернулось в пул, не завершив транзакцию через Connection
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_conn, connection_record):
+        writer_lock.release(connection_record.info)
+
+    engine.sqlite_writer_lock = writer_lock
+    return writer_lock
+
+
+def enable_sqlite_pragmas_async(async_engine, wal: bool = True):
+    """Только pragmas для async engine: блокирующий lock в event loop недопустим."""
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _on_connect(dbapi_conn, connection_record):
+        set_sqlite_pragmas(dbapi_conn, wal=wal)
@@ -1,4 +1,23 @@
+import os
+
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
-limiter = Limiter(key_func=get_remote_address)
+import app.rate_limit_storage  # noqa: F401 — регистрирует схемы db:// и db+<url> в limits
+
+# Где хранить счётчики: memory:// — в процессе (каждый воркер считает сам);
+# db:// / db+sqlite:///... / db+postgresql://... — общая таблица (app/rate_limit_storage.py);
+#   проверка синхронная и идёт в event loop async-эндпоинтов (login) — короткий upsert через
+#   отдельный engine хранилища, без writer lock основного
+# redis://host:6379 — Redis или совместимый сервер (нужен пакет redis)
+RATE_LIMIT_STORAGE = os.getenv("RATE_LIMIT_STORAGE", "memory://")
+# sliding-window-counter | fixed-window | moving-window (moving — только memory:// и redis://)
+RATE_LIMIT_STRATEGY = os.getenv("RATE_LIMIT_STRATEGY", "sliding-window-counter")
+
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=RATE_LIMIT_STORAGE,
+    strategy=RATE_LIMIT_STRATEGY,
+    # Общее хранилище недоступно — считать в памяти процесса, а не отвечать 500 на логин
+    in_memory_fallback_enabled=not RATE_LIMIT_STORAGE.startswith("memory://"),
+)
@@ -7,10 +7,11 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse, JSONResponse, RedirectResponse
 from slowapi.errors import RateLimitExceeded
 
-from app.database import init_db
+from app.database import async_engine, engine, init_db, replica
 from app.limiter import limiter
 from app.logging_config import setup_logging
 from app.schemas import HealthResponse
+from app.services.rescore_job import resume_rescore_jobs, stop_rescore_jobs
 from app.routers import auth, admin, anketa, credit_report
 from app.routers.anketa import public_router as anketa_public_router
 
@@ -31,7 +32,15 @@ async def lifespan(app: FastAPI):
         init_db()
     except Exception:
         logger.exception("Ошибка инициализации БД")
+    try:
+        resume_rescore_jobs(engine)
+    except Exception:
+        logger.exception("Не удалось возобновить фоновые пересчёты")
     yield
+    stop_rescore_jobs()
+    await async_engine.dispose()
+    if replica:
+        await replica.dispose()
 
 
 app = FastAPI(title="Fintech Drive — Андеррайтинг", lifespan=lifespan)
@@ -45,17 +54,9 @@ async def logging_middleware(request: Request, call_next):
     response = await call_next(request)
     duration_ms = round((time.time() - start) * 1000)
 
-    # Extract user id from JWT if available
-    user_info = ""
-    auth_header = request.headers.get("authorization", "")
-    if auth_header.startswith("Bearer "):
-        try:
-            from jose import jwt as jose_jwt
-            from app.auth import SECRET_KEY, ALGORITHM
-            payload = jose_jwt.decode(auth_header.split(" ", 1)[1], SECRET_KEY, algorithms=[ALGORITHM])
-            user_info = f" user_id={payload.get('sub', '?')}"
-        except Exception:
-            pass
+    # user_id — из claims, которые уже декодировала авторизация запроса (app.auth.get_principal)
+    claims = getattr(request.state, "claims", None)
+    user_info = f" user_id={claims.get('sub', '?')}" if claims else ""
 
     logger.info(
         "%s %s -> %s (%dms)%s",
@@ -0,0 +1,78 @@
+"""Таблица версий прав для stateless-токенов (JWT_PERMISSION_CLAIMS).
+
+Токен несёт версии прав пользователя (uv) и его роли (rv) на момент выдачи. Правка роли,
+деактивация пользователя, смена или сброс пароля поднимают версию (bump). Пока
+записанная версия не больше версии в токене — права из claims актуальны и запрос
+авторизуется без БД. Иначе — обычная проверка по БД (get_principal).
+
+Версии живут в памяти процесса; в БД (permission_versions) — чтобы их видели другие
+воркеры. Память подтягивается из БД не чаще раза в PERM_VERSION_SYNC_INTERVAL секунд (5);
+bump на своём воркере виден сразу.
+"""
+
+import os
+import threading
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.database import PermissionVersion
+
+PERM_VERSION_SYNC_INTERVAL = float(os.getenv("PERM_VERSION_SYNC_INTERVAL", "5"))
+
+
+class PermVersionTable:
+
+    def __init__(self, sync_interval: float = PERM_VERSION_SYNC_INTERVAL):
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._versions: dict[tuple[str, int], int] = {}
+        self._synced_at: float | None = None
+
+    def needs_sync(self) -> bool:
+        return self._synced_at is None or time.monotonic() - self._synced_at >= self.sync_interval
+
+    def sync(self, db: Session):
+        """Подтянуть все записанные версии из БД (таблица маленькая: строка на изменённого юзера/роль)."""
+        rows = db.execute(select(PermissionVersion.kind, PermissionVersion.subject_id, PermissionVersion.version)).all()
+        with self._lock:
+            self._versions = {(kind, subject_id): version for kind, subject_id, version in rows}
+            self._synced_at = time.monotonic()
+
+    def get(self, kind: str, subject_id: int | None) -> int:
+        if subject_id is None:
+            return 0
+        with self._lock:
+            return self._versions.get((kind, subject_id), 0)
+
+    def bump(self, db: Session, kind: str, subject_id: int) -> int:
+        """Поднять версию и закоммитить. Вызывать после успешного изменения.
+
+        Один атомарный upsert (INSERT ... ON CONFLICT DO UPDATE version = version + 1 RETURNING):
+        две одновременные правки одного юзера/роли получают разные версии, а первая правка
+        с двух воркеров не падает на IntegrityError.
+        """
+        insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+        stmt = insert(PermissionVersion).values(kind=kind, subject_id=subject_id, version=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PermissionVersion.kind, PermissionVersion.subject_id],
+            set_={"version": PermissionVersion.version + 1, "updated_at": func.now()},
+        ).returning(PermissionVersion.version)
+        version = db.execute(stmt).scalar_one()
+        db.commit()
+        with self._lock:
+            self._versions[(kind, subject_id)] = max(self._versions.get((kind, subject_id), 0), version)
+        return version
+
+    def is_current(self, user_id: int, user_version: int, role_id: int | None, role_version: int) -> bool:
+        return self.get("user", user_id) <= user_version and self.get("role", role_id) <= role_version
+
+    def clear(self):
+        with self._lock:
+            self._versions.clear()
+            self._synced_at = None
+
+
+perm_versions = PermVersionTable()
@@ -0,0 +1,190 @@
+"""Хранилище rate limit в общей таблице БД — для нескольких воркеров uvicorn.
+
+slowapi / limits по умолчанию считают запросы в памяти процесса: при N воркерах лимит
+фактически умножается на N. DatabaseStorage держит счётчики в таблице rate_limit_counters
+(SQLite или PostgreSQL) и увеличивает их атомарно (INSERT ... ON CONFLICT DO UPDATE ... RETURNING).
+
+Схемы (RATE_LIMIT_STORAGE, см. app/limiter.py):
+  db://                  — основная БД приложения (DATABASE_URL), но через своё подключение
+  db+sqlite:///path.db   — отдельный файл SQLite, общий для воркеров одной машины
+  db+postgresql://...    — отдельная PostgreSQL
+
+Sliding window counter: счётчики текущего и предыдущего окна (ключи key/<номер окна>),
+взвешенная сумма сравнивается с лимитом. Проверка и инкремент — одна транзакция: строка
+текущего окна блокируется upsert'ом, так что конкурентные запросы с одним ключом
+проверяются по очереди и лимит не превышается.
+
+Хранилище синхронное: slowapi проверяет лимит прямо в async-эндпоинте (login) в event loop,
+так что каждая проверка — короткий upsert, блокирующий loop на время запроса к БД. Поэтому
+у хранилища всегда свой engine и пул, без writer lock из SQLITE_PERFORMANCE_MODE: проверка
+лимита не ждёт в loop, пока основной engine пишет анкету. Для нагруженных инсталляций —
+redis:// (см. app/limiter.py).
+"""
+
+import threading
+import time
+from math import floor
+
+from limits.storage import Storage
+from limits.storage.base import SlidingWindowCounterSupport, TimestampedSlidingWindow
+from sqlalchemy import case, create_engine, delete, exc, inspect, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.pool import StaticPool
+
+from app.database import RateLimitCounter
+
+# Как часто (с) процесс удаляет истёкшие счётчики
+PURGE_INTERVAL = 60
+
+_table = RateLimitCounter.__table__
+
+
+class _Rejected(Exception):
+    """Лимит превышен — откатить инкремент."""
+
+
+class DatabaseStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    STORAGE_SCHEME = ["db", "db+sqlite", "db+postgresql", "db+postgres"]
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        if uri.startswith("db+"):
+            url = uri.split("+", 1)[1]
+        else:
+            from app.database import DATABASE_URL as url
+        url = url.replace("postgres://", "postgresql://", 1)
+        connect_args = {"check_same_thread": False, "timeout": 30} if url.startswith("sqlite") else {}
+        # :memory: живёт в одном подключении — иначе у каждого потока была бы своя пустая БД
+        pool_args = {"poolclass": StaticPool} if ":memory:" in url else {"pool_pre_ping": True}
+        self.engine = create_engine(url, connect_args=connect_args, **pool_args)
+        self._table_ready = False
+        self._insert = postgresql.insert if self.engine.dialect.name == "postgresql" else sqlite.insert
+        self._purge_lock = threading.Lock()
+        self._purged_at = 0.0
+
+    @property
+    def base_exceptions(self):
+        return exc.SQLAlchemyError
+
+    # ---------- helpers ----------
+
+    def _ensure_table(self):
+        """Таблица создаётся при первом обращении, а не при импорте (БД может быть ещё недоступна)."""
+        if not self._table_ready:
+            try:
+                _table.create(self.engine, checkfirst=True)
+            except exc.DatabaseError:
+                # Другой воркер создал её одновременно с нами
+                if not inspect(self.engine).has_table(_table.name):
+                    raise
+            self._table_ready = True
+
+    def _incr(self, conn, key: str, expiry: float, amount: int, now: float) -> int:
+        """Атомарный инкремент; истёкший счётчик начинается заново. Возвращает новое значение."""
+        expired = _table.c.expires_at <= now
+        stmt = self._insert(_table).values(key=key, count=amount, expires_at=now + expiry)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[_table.c.key],
+            set_={
+                "count": case((expired, amount), else_=_table.c.count + amount),
+                "expires_at": case((expired, now + expiry), else_=_table.c.expires_at),
+            },
+        ).returning(_table.c.count)
+        return conn.execute(stmt).scalar_one()
+
+    def _get(self, conn, key: str, now: float) -> int:
+        count = conn.execute(
+            select(_table.c.count).where(_table.c.key == key, _table.c.expires_at > now)
+        ).scalar()
+        return count or 0
+
+    def _maybe_purge(self, now: float):
+        if now - self._purged_at < PURGE_INTERVAL or not self._purge_lock.acquire(blocking=False):
+            return
+        try:
+            self._purged_at = now
+            with self.engine.begin() as conn:
+                conn.execute(delete(_table).where(_table.c.expires_at <= now))
+        finally:
+            self._purge_lock.release()
+
+    # ---------- Storage ----------
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        self._ensure_table()
+        now = time.time()
+        self._maybe_purge(now)
+        with self.engine.begin() as conn:
+            return self._incr(conn, key, expiry, amount, now)
+
+    def get(self, key: str) -> int:
+        self._ensure_table()
+        with self.engine.connect() as conn:
+            return self._get(conn, key, time.time())
+
+    def get_expiry(self, key: str) -> float:
+        self._ensure_table()
+        now = time.time()
+        with self.engine.connect() as conn:
+            expires_at = conn.execute(
+                select(_table.c.expires_at).where(_table.c.key == key, _table.c.expires_at > now)
+            ).scalar()
+        return expires_at or now
+
+    def check(self) -> bool:
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return True
+        except exc.SQLAlchemyError:
+            return False
+
+    def reset(self) -> int | None:
+        self._ensure_table()
+        with self.engine.begin() as conn:
+            return conn.execute(delete(_table)).rowcount
+
+    def clear(self, key: str) -> None:
+        self._ensure_table()
+        with self.engine.begin() as conn:
+            conn.execute(delete(_table).where(_table.c.key == key))
+
+    # ---------- SlidingWindowCounterSupport ----------
+
+    def _window_info(self, conn, previous_key: str, current_count: int, expiry: int, now: float):
+        previous_count = self._get(conn, previous_key, now)
+        previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry if previous_count else 0.0
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+        self._ensure_table()
+        now = time.time()
+        self._maybe_purge(now)
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        try:
+            with self.engine.begin() as conn:
+                # Сначала upsert: он блокирует строку (PostgreSQL) / базу на запись (SQLite)
+                # до конца транзакции — проверка ниже не гоняется с другими воркерами
+                current_count = self._incr(conn, current_key, 2 * expiry, amount, now)
+                previous_count, previous_ttl, _, _ = self._window_info(conn, previous_key, current_count, expiry, now)
+                if floor(previous_count * previous_ttl / expiry + current_count) > limit:
+                    raise _Rejected
+        except _Rejected:
+            return False
+        return True
+
+    def get_sliding_window(self, key: str, expiry: int) -> tuple[int, float, int, float]:
+        self._ensure_table()
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        with self.engine.connect() as conn:
+            return self._window_info(conn, previous_key, self._get(conn, current_key, now), expiry, now)
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        self._ensure_table()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        with self.engine.begin() as conn:
+            conn.execute(delete(_table).where(_table.c.key.in_([previous_key, current_key])))
@@ -1,5 +1,6 @@
 import io
-from datetime import datetime, timezone
+import time
+from datetime import datetime, timedelta, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
@@ -9,8 +10,16 @@ from typing import Optional
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 
-from app.database import get_db, User, Anketa, AnketaHistory, UnderwritingRule, RiskRule, EditRequest, Role, SystemSettings, WebhookConfig
-from app.auth import require_permission, hash_password, generate_password, get_user_permissions
+from app.database import engine, async_engine, replica, get_db, get_read_db, User, Anketa, AnketaHistory, UnderwritingRule, RiskRule, EditRequest, Role, SystemSettings, WebhookConfig, RescoreJob
+from app.auth import require_permission, hash_password, generate_password, get_user_permissions, permission_cache, active_user_cache
+from app.perm_versions import perm_versions
+from app.rules_cache import rules_cache
+from app.services.verdict_memo import verdict_memo
+from app.services.anketa_views import EXPORT_VIEW, SCHEDULE_VIEW, select_view
+from app.services.schedule_service import MAX_SCHEDULE_TERM, schedule_cache_stats, schedule_csv
+from app.services.rule_simulation import SEGMENT_FIELDS, simulate_rule_change, verdict_snapshot
+from app.services.rescore_job import ACTIVE_STATUSES, active_job, cancel_job, create_job, job_status, start_rescore_thread
+from app.db_pool import pool_stats
 
 router = APIRouter(prefix="/api/v1/admin", tags=["admin"])
 
@@ -92,6 +101,7 @@ def create_role(
     db.add(role)
     db.commit()
     db.refresh(role)
+    permission_cache.invalidate(role.id)
     return role_to_out(role)
 
 
@@ -116,6 +126,8 @@ def update_role(
             setattr(role, f, val)
     db.commit()
     db.refresh(role)
+    permission_cache.invalidate(role_id)
+    perm_versions.bump(db, "role", role_id)
     return role_to_out(role)
 
 
@@ -133,6 +145,8 @@ def delete_role(
         raise HTTPException(status_code=400, detail=f"Нельзя удалить — {linked} пользователь(ей) привязано к этой должности")
     db.delete(role)
     db.commit()
+    permission_cache.invalidate(role_id)
+    perm_versions.bump(db, "role", role_id)
     return {"detail": "Должность удалена"}
 
 
@@ -254,6 +268,8 @@ def update_user(
         user.telegram_chat_id = body.telegram_chat_id if body.telegram_chat_id.strip() else None
 
     db.commit()
+    active_user_cache.evict(user_id)
+    perm_versions.bump(db, "user", user_id)
     db.refresh(user)
     return user_to_out(user)
 
@@ -271,6 +287,8 @@ def reset_password(
     password = generate_password()
     user.password_hash = hash_password(password)
     db.commit()
+    active_user_cache.evict(user_id)
+    perm_versions.bump(db, "user", user_id)
 
     return {"email": user.email, "generated_password": password}
 
@@ -299,6 +317,8 @@ def delete_user(
 
     db.delete(user)
     db.commit()
+    active_user_cache.evict(user_id)
+    perm_versions.bump(db, "user", user_id)
     return {"detail": "Пользователь удалён"}
 
 
@@ -317,6 +337,25 @@ class UpdateRuleBodyRequest(BaseModel):
     value: str
 
 
+def _parse_rule_value(rule: UnderwritingRule, val: str):
+    """Проверить значение по value_type правила и вернуть его в виде load_rules()."""
+    if rule.value_type == "float":
+        try:
+            return float(val)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Значение должно быть числом (float)")
+    elif rule.value_type == "int":
+        try:
+            return int(val)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Значение должно быть целым числом")
+    elif rule.value_type == "string":
+        allowed = {"approved", "review", "rejected"}
+        if val not in allowed:
+            raise HTTPException(status_code=400, detail=f"Допустимые значения: {', '.join(sorted(allowed))}")
+    return val
+
+
 @router.get("/rules", response_model=list[RuleOutModel])
 def list_rules(db: Session = Depends(get_db), admin: User = Depends(require_permission("rules_manage"))):
     rules = db.query(UnderwritingRule).order_by(UnderwritingRule.category, UnderwritingRule.id).all()
@@ -341,23 +380,10 @@ def update_rule(
         raise HTTPException(status_code=404, detail="Правило не найдено")
 
     val = body.value.strip()
-    if rule.value_type == "float":
-        try:
-            float(val)
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Значение должно быть числом (float)")
-    elif rule.value_type == "int":
-        try:
-            int(val)
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Значение должно быть целым числом")
-    elif rule.value_type == "string":
-        allowed = {"approved", "review", "rejected"}
-        if val not in allowed:
-            raise HTTPException(status_code=400, detail=f"Допустимые значения: {', '.join(sorted(allowed))}")
+    _parse_rule_value(rule, val)
 
     rule.value = val
-    db.commit()
+    rules_cache.bump(db)
     db.refresh(rule)
     return RuleOutModel(
         id=rule.id, category=rule.category, rule_key=rule.rule_key,
@@ -365,6 +391,48 @@ def update_rule(
     )
 
 
+class SimulateRulesRequest(BaseModel):
+    rules: dict[str, str] = {}                            # rule_key -> предлагаемое значение
+    risk_rules: dict[str, Optional[float]] = {}           # категория -> min_pv (null — отключить)
+    segment_by: str = "client_type"
+    refresh: bool = False                                 # перечитать снимок анкет из БД
+
+
+@router.post("/rules/simulate")
+def simulate_rules(
+    body: SimulateRulesRequest,
+    db: Session = Depends(get_db),
+    admin: User = Depends(require_permission("rules_manage")),
+):
+    """Влияние предлагаемых правил на вердикты сохранённых анкет (до PATCH /rules/{id})."""
+    if body.segment_by not in SEGMENT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"segment_by: допустимые значения {', '.join(SEGMENT_FIELDS)}")
+    started = time.perf_counter()
+
+    current = rules_cache.get(db)
+    rules, risk_rules = current.rules, current.risk_rules
+    proposed = dict(rules)
+    by_key = {r.rule_key: r for r in db.query(UnderwritingRule).filter(UnderwritingRule.rule_key.in_(body.rules)).all()}
+    for key, value in body.rules.items():
+        if key not in by_key:
+            raise HTTPException(status_code=400, detail=f"Неизвестное правило: {key}")
+        proposed[key] = _parse_rule_value(by_key[key], value.strip())
+
+    overlay = {c.strip().lower(): (c.strip(), pv) for c, pv in body.risk_rules.items()}
+    if any(not c or (pv is not None and pv < 0) for c, pv in overlay.values()):
+        raise HTTPException(status_code=400, detail="Риск-правила: категория не пустая, min_pv >= 0")
+    proposed_risk = [r for r in risk_rules if r["category"].lower() not in overlay]
+    proposed_risk += [{"category": c, "min_pv": pv} for c, pv in overlay.values() if pv is not None]
+
+    snapshot = verdict_snapshot.get(db, refresh=body.refresh)
+    result = simulate_rule_change(snapshot, rules, risk_rules, proposed, proposed_risk, segment_by=body.segment_by)
+    result["rules_version"] = current.version
+    result["changed_rules"] = sorted(k for k in body.rules if proposed[k] != rules.get(k))
+    result["snapshot"] = verdict_snapshot.stats()
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
 # ---------- RISK RULES ----------
 
 class RiskRuleOut(BaseModel):
@@ -409,7 +477,7 @@ def create_risk_rule(
         raise HTTPException(status_code=400, detail=f"Категория '{category}' уже существует")
     rule = RiskRule(category=category, min_pv=body.min_pv, is_active=True)
     db.add(rule)
-    db.commit()
+    rules_cache.bump(db)
     db.refresh(rule)
     return RiskRuleOut(id=rule.id, category=rule.category, min_pv=rule.min_pv, is_active=rule.is_active)
 
@@ -428,7 +496,7 @@ def update_risk_rule(
         rule.min_pv = body.min_pv
     if body.is_active is not None:
         rule.is_active = body.is_active
-    db.commit()
+    rules_cache.bump(db)
     db.refresh(rule)
     return RiskRuleOut(id=rule.id, category=rule.category, min_pv=rule.min_pv, is_active=rule.is_active)
 
@@ -443,7 +511,7 @@ def delete_risk_rule(
     if not rule:
         raise HTTPException(status_code=404, detail="Правило не найдено")
     db.delete(rule)
-    db.commit()
+    rules_cache.bump(db)
     return {"detail": "Правило удалено"}
 
 
@@ -517,6 +585,109 @@ def get_pending_edit_requests_count(
     return {"count": count}
 
 
+# ---------- DB POOL ----------
+
+@router.get("/db-pool")
+def get_db_pool_stats(
+    admin: User = Depends(require_permission("user_manage")),
+):
+    """Connection pool state (sync, async and read-replica engines): checked-out, overflow, wait time, timeouts."""
+    return {
+        "sync": pool_stats(engine),
+        "async": pool_stats(async_engine.sync_engine),
+        "replica": replica.stats() if replica else None,
+    }
+
+
+# ---------- PERMISSION CACHE ----------
+
+@router.get("/permission-cache")
+def get_permission_cache_stats(
+    admin: User = Depends(require_permission("user_manage")),
+):
+    """Role-permission cache hits/misses (per worker process)."""
+    return permission_cache.stats()
+
+
+@router.get("/user-cache")
+def get_user_cache_stats(
+    admin: User = Depends(require_permission("user_manage")),
+):
+    """Active-user cache hits/misses (per worker process)."""
+    return active_user_cache.stats()
+
+
+@router.get("/rules-cache")
+def get_rules_cache_stats(
+    admin: User = Depends(require_permission("rules_manage")),
+):
+    """Rules cache version and hits/loads (per worker process)."""
+    return rules_cache.stats()
+
+
+@router.get("/verdict-memo")
+def get_verdict_memo_stats(
+    admin: User = Depends(require_permission("rules_manage")),
+):
+    """Verdict memo size and hit rate (per worker process)."""
+    return verdict_memo.stats()
+
+
+# ---------- RESCORE JOBS ----------
+
+RESCORE_JOBS_LIST_LIMIT = 20
+
+
+@router.post("/rescore-jobs", status_code=201)
+def start_rescore_job(
+    db: Session = Depends(get_db),
+    admin: User = Depends(require_permission("rules_manage")),
+):
+    """Пересчитать авто-вердикт сохранённых анкет по текущим правилам (в фоне)."""
+    if active_job(db):
+        raise HTTPException(status_code=409, detail="Пересчёт портфеля уже выполняется")
+    job = create_job(db, admin.id)
+    start_rescore_thread(db.get_bind(), job.id)
+    return job_status(job)
+
+
+@router.get("/rescore-jobs")
+def list_rescore_jobs(
+    db: Session = Depends(get_db),
+    admin: User = Depends(require_permission("rules_manage")),
+):
+    jobs = db.query(RescoreJob).order_by(RescoreJob.id.desc()).limit(RESCORE_JOBS_LIST_LIMIT).all()
+    return [job_status(j) for j in jobs]
+
+
+@router.get("/rescore-jobs/{job_id}")
+def get_rescore_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    admin: User = Depends(require_permission("rules_manage")),
+):
+    job = db.get(RescoreJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Задание не найдено")
+    return job_status(job)
+
+
+@router.post("/rescore-jobs/{job_id}/cancel")
+def cancel_rescore_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    admin: User = Depends(require_permission("rules_manage")),
+):
+    """Отменить задание: ещё не начатое — сразу, выполняющееся — после текущей пачки."""
+    job = db.get(RescoreJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Задание не найдено")
+    if job.status not in ACTIVE_STATUSES:
+        raise HTTPException(status_code=400, detail="Задание уже завершено")
+    cancel_job(db, job)
+    return job_status(job)
+
+
 # ---------- TELEGRAM SETTINGS ----------
 
 class TelegramSettingsOut(BaseModel):
@@ -887,16 +1058,8 @@ def _fill_legal_entity_sheet(ws, anketas, users_map):
         ws.column_dimensions[ws.cell(row=1, column=col).column_letter].width = 16
 
 
-@router.get("/export-excel")
-def export_excel(
-    date_from: str | None = Query(None),
-    date_to: str | None = Query(None),
-    db: Session = Depends(get_db),
-    admin: User = Depends(require_permission("export_excel")),
-):
-    """Export anketas to Excel with separate sheets for individuals and legal entities."""
-    query = db.query(Anketa)
-
+def _filter_created(query, date_from: str | None, date_to: str | None):
+    """Фильтр выгрузки по дате создания (date_to — включительно)."""
     if date_from:
         try:
             dt_from = datetime.fromisoformat(date_from)
@@ -906,16 +1069,26 @@ def export_excel(
 
     if date_to:
         try:
-            from datetime import timedelta
             dt_to = datetime.fromisoformat(date_to) + timedelta(days=1)
             query = query.filter(Anketa.created_at <= dt_to)
         except ValueError:
             raise HTTPException(status_code=400, detail="Неверный формат date_to")
+    return query
+
 
+@router.get("/export-excel")
+def export_excel(
+    date_from: str | None = Query(None),
+    date_to: str | None = Query(None),
+    db: Session = Depends(get_read_db),
+    admin: User = Depends(require_permission("export_excel")),
+):
+    """Export anketas to Excel with separate sheets for individuals and legal entities."""
+    query = _filter_created(select_view(db, EXPORT_VIEW), date_from, date_to)
     anketas = query.order_by(Anketa.id.desc()).all()
 
     # Build users map for concluder names
-    users = db.query(User).all()
+    users = db.query(User.id, User.full_name).all()
     users_map = {u.id: u.full_name for u in users}
 
     individuals = [a for a in anketas if (getattr(a, 'client_type', None) or "individual") == "individual"]
@@ -943,3 +1116,52 @@ def export_excel(
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
+
+
+# ---------- PAYMENT SCHEDULES ----------
+
+# Графиков в одной пачке schedule_matrix при выгрузке
+SCHEDULE_EXPORT_BATCH = 2000
+
+
+@router.get("/export-schedules")
+def export_schedules(
+    date_from: str | None = Query(None),
+    date_to: str | None = Query(None),
+    db: Session = Depends(get_read_db),
+    admin: User = Depends(require_permission("export_excel")),
+):
+    """Графики платежей по всем сохранённым анкетам — потоковый CSV.
+
+    Условия сделок читаются одним запросом (пять чисел на анкету), графики считаются и
+    отдаются пачками по SCHEDULE_EXPORT_BATCH — весь файл в памяти не собирается.
+    """
+    query = _filter_created(select_view(db, SCHEDULE_VIEW), date_from, date_to).filter(
+        Anketa.deleted_at.is_(None),
+        Anketa.status.notin_(("draft", "deleted")),
+        Anketa.remaining_amount > 0,
+        Anketa.interest_rate > 0,
+        Anketa.lease_term_months.between(1, MAX_SCHEDULE_TERM),
+    )
+    rows = query.order_by(Anketa.id).all()
+
+    def batches():
+        for start in range(0, len(rows), SCHEDULE_EXPORT_BATCH):
+            chunk = rows[start:start + SCHEDULE_EXPORT_BATCH]
+            yield ([r.id for r in chunk], [r.remaining_amount for r in chunk],
+                   [r.interest_rate for r in chunk], [r.lease_term_months for r in chunk])
+
+    filename = f"schedules_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
+    return StreamingResponse(
+        schedule_csv(batches()),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+@router.get("/schedule-cache")
+def get_schedule_cache_stats(
+    admin: User = Depends(require_permission("user_manage")),
+):
+    """Schedule LRU cache hits/misses (per worker process)."""
+    return schedule_cache_stats()
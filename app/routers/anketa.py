@@ -2,24 +2,36 @@ import hashlib
 import json
 import logging
 import os
+import time
 from datetime import datetime, timezone
+from itertools import product
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
 
 logger = logging.getLogger("app")
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.database import get_db, Anketa, User, RiskRule, EditRequest, Notification, AnketaViewLog
-from app.auth import get_current_user, get_user_permissions
+from app.database import get_db, get_async_db, get_read_db, get_read_async_db, Anketa, User, EditRequest, Notification, AnketaViewLog
+from app.auth import get_current_user, get_current_user_async, get_user_permissions
 from app.services.pdf_service import generate_anketa_pdf
-from app.services.calculation_service import run_calculations, load_rules, calc_auto_verdict
+from app.rules_cache import RulesSnapshot, rules_cache
+from app.services.calculation_service import run_calculations
+from app.services.verdict_memo import verdict_memo
+from app.services.anketa_views import SCHEDULE_VIEW, load_view
+from app.services.deal_grid import deal_grid, grid_axis
+from app.services.schedule_service import (
+    MAX_SCHEDULE_TERM, anketa_schedule, principal_for, schedule, schedule_csv,
+)
 from app.services.anketa_service import (
     anketa_to_detail, record_history, create_notification,
     check_anketa_access, check_duplicate_field,
     validate_anketa_for_save, notify_admins_on_save,
     notify_admins_on_edit_request,
     apply_anketa_updates, apply_conclusion, query_history,
+    anketa_to_list_item, list_view_options, query_anketa_list,
 )
 from app.services.analytics_service import (
     get_stats_data, get_analytics_data, get_employee_stats_data,
@@ -29,10 +41,10 @@ from app.services.analytics_service import (
 from app.schemas import (
     ConclusionRequest, DeleteAnketaRequest,
     AnketaUpdate, EditRequestCreate, EditRequestOut,
-    AnketaCreateResponse, AnketaListItem, AnketaDetail,
+    AnketaCreateResponse, AnketaListItem, AnketaListPage, AnketaDetail,
     NotificationOut, CountResponse, OkResponse,
     OkIdResponse, DeleteResponse, ViewLogEntry,
-    DuplicateCheckResponse,
+    DuplicateCheckResponse, DealGridRequest, GridRange,
 )
 
 router = APIRouter(prefix="/api/v1/anketas", tags=["anketas"])
@@ -72,23 +84,135 @@ def create_anketa(
     return {"id": anketa.id, "status": anketa.status}
 
 
+def _rules_response(request: Request, response: Response, snapshot: RulesSnapshot, payload):
+    """ETag = версия правил; If-None-Match с той же версией — 304 без тела."""
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if snapshot.etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return payload
+
+
 @router.get("/verdict-rules")
 def get_verdict_rules(
+    request: Request,
+    response: Response,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """Return underwriting rules as {rule_key: value} for client-side preview."""
-    return load_rules(db)
+    snapshot = rules_cache.get(db)
+    return _rules_response(request, response, snapshot, snapshot.rules)
 
 
 @router.get("/risk-rules")
 def get_risk_rules(
+    request: Request,
+    response: Response,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """Return active risk rules for client-side PV validation."""
-    rules = db.query(RiskRule).filter(RiskRule.is_active == True).order_by(RiskRule.category).all()
-    return [{"category": r.category, "min_pv": r.min_pv} for r in rules]
+    snapshot = rules_cache.get(db)
+    return _rules_response(request, response, snapshot, snapshot.risk_rules)
+
+
+# Ограничение на число вариантов (ПВ × срок × ставка) в одном запросе графика
+MAX_SCHEDULE_VARIANTS = 50
+
+
+def _check_schedule_params(rate: float, term: int):
+    if not 1 <= term <= MAX_SCHEDULE_TERM:
+        raise HTTPException(status_code=400, detail=f"Срок должен быть от 1 до {MAX_SCHEDULE_TERM} мес")
+    if not 0 <= rate <= 100:
+        raise HTTPException(status_code=400, detail="Ставка должна быть от 0 до 100%")
+
+
+def _csv_response(chunks, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        chunks, media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/schedule")
+def get_schedule(
+    rate: list[float] = Query(...),
+    term: list[int] = Query(...),
+    price: float | None = Query(None, gt=0),
+    pv: list[float] = Query([0.0]),
+    principal: float | None = Query(None, gt=0),
+    format: str = Query("json", pattern="^(json|csv)$"),
+    user: User = Depends(get_current_user),
+):
+    """График платежей по параметрам калькулятора.
+
+    pv / term / rate можно повторять — вернётся график на каждую комбинацию (варианты сделки).
+    principal вместо price + pv — сразу сумма финансирования.
+    """
+    if principal is None and price is None:
+        raise HTTPException(status_code=400, detail="Укажите стоимость (price) или сумму финансирования (principal)")
+    variants = list(product([None] if principal is not None else pv, term, rate))
+    if len(variants) > MAX_SCHEDULE_VARIANTS:
+        raise HTTPException(status_code=400, detail=f"Не более {MAX_SCHEDULE_VARIANTS} вариантов за запрос")
+    for variant_pv, variant_term, variant_rate in variants:
+        _check_schedule_params(variant_rate, variant_term)
+        if variant_pv is not None and not 0 <= variant_pv < 100:
+            raise HTTPException(status_code=400, detail="ПВ должен быть от 0 до 100%")
+    amounts = [principal if p is None else principal_for(price, p) for p, _, _ in variants]
+
+    if format == "csv":
+        batch = (range(1, len(variants) + 1), amounts, [v[2] for v in variants], [v[1] for v in variants])
+        id_column = "variant" if len(variants) > 1 else None
+        return _csv_response(schedule_csv([batch], id_column=id_column), "schedule.csv")
+
+    result = []
+    for i, ((variant_pv, variant_term, variant_rate), amount) in enumerate(zip(variants, amounts), start=1):
+        sched = schedule(amount, variant_rate, variant_term)
+        result.append({"variant": i, "price": price, "pv": variant_pv, **sched.summary(), "rows": sched.rows()})
+    return {"variants": result}
+
+
+# Ограничения сетки калькулятора: точек на ось и ячеек всего
+MAX_GRID_AXIS = 1000
+MAX_GRID_CELLS = 100_000
+
+
+def _grid_axis(name: str, spec: list | GridRange) -> list:
+    if isinstance(spec, GridRange):
+        if spec.stop < spec.start or (spec.stop - spec.start) / spec.step + 1 > MAX_GRID_AXIS:
+            raise HTTPException(status_code=400, detail=f"{name}: диапазон пуст или длиннее {MAX_GRID_AXIS} точек")
+        return grid_axis(spec.start, spec.stop, spec.step).tolist()
+    if not spec or len(spec) > MAX_GRID_AXIS:
+        raise HTTPException(status_code=400, detail=f"{name}: от 1 до {MAX_GRID_AXIS} значений")
+    return list(spec)
+
+
+@router.post("/deal-grid")
+def get_deal_grid(
+    body: DealGridRequest,
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Сетка ПВ × срок × ставка: платёж, DTI, полоса вердикта и граница допустимых сделок."""
+    started = time.perf_counter()
+    pv, term, rate = (_grid_axis(name, getattr(body, name)) for name in ("pv", "term", "rate"))
+    if len(pv) * len(term) * len(rate) > MAX_GRID_CELLS:
+        raise HTTPException(status_code=400, detail=f"Не более {MAX_GRID_CELLS} ячеек в сетке")
+    if not all(0 <= p < 100 for p in pv):
+        raise HTTPException(status_code=400, detail="ПВ должен быть от 0 до 100%")
+    if any(t != int(t) for t in term):
+        raise HTTPException(status_code=400, detail="Срок — целое число месяцев")
+    # Границы осей покрывают все значения
+    _check_schedule_params(min(rate), int(min(term)))
+    _check_schedule_params(max(rate), int(max(term)))
+
+    snapshot = rules_cache.get(db)
+    grid = deal_grid(body.price, body.income, body.obligations, pv, term, rate, snapshot.rules)
+    result = grid.to_dict()
+    result["rules_version"] = snapshot.version
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
 
 
 @router.get("/stats")
@@ -98,7 +222,7 @@ def get_stats(
     date_to: str | None = Query(None),
     client_type: str | None = Query(None),
     user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """Get anketa statistics for the dashboard funnel."""
     if period == "custom" and date_from and date_to:
@@ -110,51 +234,57 @@ def get_stats(
     return get_stats_data(db, user, period, date_from, date_to, client_type)
 
 
-@router.get("", response_model=list[AnketaListItem])
-def list_anketas(
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+@router.get("", response_model=AnketaListPage | list[AnketaListItem])
+async def list_anketas(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = Query(None),
+    status: str | None = Query(None),
+    client_type: str | None = Query(None),
+    creator: int | None = Query(None),
+    date_from: str | None = Query(None),
+    date_to: str | None = Query(None),
+    partner: str | None = Query(None),
+    q: str | None = Query(None),
+    sort: str = Query("id"),
+    order: str = Query("desc"),
+    legacy: bool = Query(False),
+    user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """List all anketas with summary info (excluding deleted)."""
+    """List anketas (excluding deleted): keyset-paginated page with filters.
+
+    legacy=true returns the old unpaginated list of all visible anketas.
+    """
+    if legacy:
+        return await db.run_sync(_legacy_anketa_list, user)
+
+    return await db.run_sync(
+        query_anketa_list, user, limit=limit, cursor=cursor, status=status, client_type=client_type,
+        created_by=creator, date_from=date_from, date_to=date_to, partner=partner,
+        search=q, sort=sort, order=order,
+    )
+
+
+def _legacy_anketa_list(db: Session, user: User) -> list[dict]:
     perms = get_user_permissions(user, db)
-    query = db.query(Anketa).filter(Anketa.status != "deleted")
+    query = db.query(Anketa).options(*list_view_options()).filter(Anketa.status != "deleted")
     if not perms.get("anketa_view_all"):
         query = query.filter(Anketa.created_by == user.id)
-    anketas = query.order_by(Anketa.id.desc()).all()
-    result = []
-    for a in anketas:
-        result.append({
-            "id": a.id,
-            "status": a.status,
-            "client_type": getattr(a, 'client_type', None) or "individual",
-            "full_name": a.full_name,
-            "company_name": a.company_name,
-            "car_brand": a.car_brand,
-            "car_model": a.car_model,
-            "car_specs": a.car_specs,
-            "car_year": a.car_year,
-            "purchase_price": a.purchase_price,
-            "down_payment_percent": a.down_payment_percent,
-            "dti": a.dti,
-            "decision": a.decision,
-            "created_by": a.created_by,
-            "created_at": str(a.created_at) if a.created_at else None,
-            "creator_name": a.creator.full_name if a.creator else None,
-        })
-    return result
+    return [anketa_to_list_item(a) for a in query.order_by(Anketa.id.desc()).all()]
 
 
 # ---------- Notifications ----------
 
 @router.get("/notifications/list", response_model=list[NotificationOut])
-def list_notifications(
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def list_notifications(
+    user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get latest notifications for the current user."""
-    notifs = db.query(Notification).filter(
-        Notification.user_id == user.id
-    ).order_by(Notification.id.desc()).limit(50).all()
+    notifs = (await db.scalars(
+        select(Notification).where(Notification.user_id == user.id)
+        .order_by(Notification.id.desc()).limit(50)
+    )).all()
     return [
         {
             "id": n.id,
@@ -170,13 +300,15 @@ def list_notifications(
 
 
 @router.get("/notifications/unread-count", response_model=CountResponse)
-def unread_notification_count(
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def unread_notification_count(
+    user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    count = db.query(Notification).filter(
-        Notification.user_id == user.id, Notification.is_read == False
-    ).count()
+    count = await db.scalar(
+        select(func.count(Notification.id)).where(
+            Notification.user_id == user.id, Notification.is_read == False
+        )
+    )
     return {"count": count}
 
 
@@ -209,13 +341,13 @@ def mark_all_notifications_read(
 # ---------- Analytics ----------
 
 @router.get("/analytics")
-def get_analytics(
+async def get_analytics(
     period: str = Query("month"),
     date_from: str | None = Query(None),
     date_to: str | None = Query(None),
     client_type: str | None = Query(None),
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_read_async_db),
 ):
     """Extended analytics: approval rate, avg DTI, trend, risk distribution."""
     if period == "custom" and date_from and date_to:
@@ -224,55 +356,51 @@ def get_analytics(
             datetime.fromisoformat(date_to)
         except ValueError:
             raise HTTPException(status_code=400, detail="Неверный формат даты")
-    return get_analytics_data(db, user, period, date_from, date_to, client_type)
+    return await db.run_sync(get_analytics_data, user, period, date_from, date_to, client_type)
 
 
-@router.get("/analytics/monthly-trend")
-def analytics_monthly_trend(
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    """Тренд анкет по месяцам (последние 12 месяцев)."""
+def _analytics_report(db: Session, user: User, report):
+    """Run an analytics_view-protected report on the sync facade of the async session."""
     perms = get_user_permissions(user, db)
     if not perms.get("analytics_view"):
         raise HTTPException(status_code=403, detail="Нет права: analytics_view")
-    return get_monthly_trend(db)
+    return report(db)
+
+
+@router.get("/analytics/monthly-trend")
+async def analytics_monthly_trend(
+    user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_read_async_db),
+):
+    """Тренд анкет по месяцам (последние 12 месяцев)."""
+    return await db.run_sync(_analytics_report, user, get_monthly_trend)
 
 
 @router.get("/analytics/dti-distribution")
-def analytics_dti_distribution(
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def analytics_dti_distribution(
+    user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_read_async_db),
 ):
     """Распределение анкет по DTI."""
-    perms = get_user_permissions(user, db)
-    if not perms.get("analytics_view"):
-        raise HTTPException(status_code=403, detail="Нет права: analytics_view")
-    return get_dti_distribution(db)
+    return await db.run_sync(_analytics_report, user, get_dti_distribution)
 
 
 @router.get("/analytics/inspector-stats")
-def analytics_inspector_stats(
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def analytics_inspector_stats(
+    user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_read_async_db),
 ):
     """Топ инспекторов по количеству анкет."""
-    perms = get_user_permissions(user, db)
-    if not perms.get("analytics_view"):
-        raise HTTPException(status_code=403, detail="Нет права: analytics_view")
-    return get_inspector_stats(db)
+    return await db.run_sync(_analytics_report, user, get_inspector_stats)
 
 
 @router.get("/analytics/amount-trend")
-def analytics_amount_trend(
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def analytics_amount_trend(
+    user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_read_async_db),
 ):
     """Средняя сумма лизинга по месяцам."""
-    perms = get_user_permissions(user, db)
-    if not perms.get("analytics_view"):
-        raise HTTPException(status_code=403, detail="Нет права: analytics_view")
-    return get_avg_amount_trend(db)
+    return await db.run_sync(_analytics_report, user, get_avg_amount_trend)
 
 
 @router.get("/edit-requests", response_model=list[EditRequestOut])
@@ -314,12 +442,16 @@ def list_edit_requests(
 
 
 @router.get("/{anketa_id}", response_model=AnketaDetail)
-def get_anketa(
+async def get_anketa(
     anketa_id: int,
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get full anketa details."""
+    return await db.run_sync(_anketa_detail_with_view_log, anketa_id, user)
+
+
+def _anketa_detail_with_view_log(db: Session, anketa_id: int, user: User) -> dict:
     anketa = db.query(Anketa).filter(Anketa.id == anketa_id).first()
     if not anketa:
         raise HTTPException(status_code=404, detail="Анкета не найдена")
@@ -330,11 +462,33 @@ def get_anketa(
     return anketa_to_detail(anketa, db)
 
 
+@router.get("/{anketa_id}/schedule")
+def get_anketa_schedule(
+    anketa_id: int,
+    format: str = Query("json", pattern="^(json|csv)$"),
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    """График платежей по условиям сделки анкеты."""
+    anketa = db.query(Anketa).options(load_view(SCHEDULE_VIEW)).filter(Anketa.id == anketa_id).first()
+    if not anketa:
+        raise HTTPException(status_code=404, detail="Анкета не найдена")
+    check_anketa_access(anketa, user, db)
+    sched = anketa_schedule(anketa)
+    if sched is None:
+        raise HTTPException(status_code=400, detail="Недостаточно данных для графика: стоимость, срок и ставка")
+
+    if format == "csv":
+        batch = ([anketa_id], [sched.principal_amount], [sched.annual_rate], [sched.term])
+        return _csv_response(schedule_csv([batch], id_column=None), f"schedule_{anketa_id}.csv")
+    return {"anketa_id": anketa_id, **sched.summary(), "rows": sched.rows()}
+
+
 @router.get("/{anketa_id}/pdf")
 def download_anketa_pdf(
     anketa_id: int,
     user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """Скачать PDF анкеты."""
     anketa = db.query(Anketa).filter(Anketa.id == anketa_id).first()
@@ -378,7 +532,7 @@ def update_anketa(
 
     update_data = data.model_dump(exclude_unset=True)
     apply_anketa_updates(db, anketa, update_data, user.id)
-    run_calculations(anketa)
+    run_calculations(anketa, changed=update_data)
 
     db.commit()
     db.refresh(anketa)
@@ -407,13 +561,11 @@ def save_anketa(
     run_calculations(anketa)
 
     # Auto-verdict
-    rules = load_rules(db)
-    risk_rules_raw = db.query(RiskRule).filter(RiskRule.is_active == True).all()
-    risk_rules = [{"category": r.category, "min_pv": r.min_pv} for r in risk_rules_raw]
-    verdict = calc_auto_verdict(anketa, rules, risk_rules=risk_rules)
+    verdict, fingerprint = verdict_memo.verdict(anketa, rules_cache.get(db))
     anketa.auto_decision = verdict["auto_decision"]
     anketa.auto_decision_reasons = json.dumps(verdict["auto_decision_reasons"], ensure_ascii=False)
     anketa.recommended_pv = verdict["recommended_pv"]
+    anketa.verdict_fingerprint = fingerprint
 
     # Block save if PV below recommended
     current_pv = anketa.down_payment_percent or 0
@@ -495,7 +647,7 @@ def conclude_anketa(
 
     # Отправить webhook-уведомления асинхронно (не блокирует ответ)
     from app.services.webhook_service import notify_webhooks
-    background_tasks.add_task(notify_webhooks, db, f"anketa.{data.decision}", anketa)
+    background_tasks.add_task(notify_webhooks, db, f"anketa.{data.decision}", anketa.id)
 
     return anketa_to_detail(anketa, db)
 
@@ -638,7 +790,7 @@ def get_employee_stats(
     date_from: str | None = Query(None),
     date_to: str | None = Query(None),
     user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """Get per-employee stats."""
     perms = get_user_permissions(user, db)
@@ -660,7 +812,7 @@ def get_employee_stats(
 # ---------- Public API (no auth) ----------
 
 @public_router.get("/anketa/{token}", response_model=AnketaDetail)
-def get_public_anketa(token: str, db: Session = Depends(get_db)):
+def get_public_anketa(token: str, db: Session = Depends(get_read_db)):
     """Return anketa data by share_token (no authentication required)."""
     anketa = db.query(Anketa).filter(
         Anketa.share_token == token,
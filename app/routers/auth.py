@@ -2,10 +2,15 @@ import logging
 
 from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 
-from app.database import get_db, User
-from app.auth import verify_password, create_access_token, get_current_user, get_user_permissions
+from app.database import get_db, get_async_db, User, Role
+from app.auth import (
+    verify_password_async, hash_password_async, password_needs_rehash,
+    create_access_token, get_current_user, get_user_permissions, permission_claims,
+)
 from app.limiter import limiter
 from app.schemas import LoginRequest
 
@@ -33,20 +38,29 @@ class UserResponse(BaseModel):
 
 @router.post("/login", response_model=TokenResponse)
 @limiter.limit("5/minute")
-def login(request: Request, body: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == body.email).first()
-    if not user or not verify_password(body.password, user.password_hash):
+async def login(request: Request, body: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    # async: bcrypt идёт в свой ограниченный пул (app.auth), а не занимает threadpool остальных эндпоинтов
+    result = await db.execute(select(User).options(selectinload(User.position)).where(User.email == body.email))
+    user = result.scalar_one_or_none()
+    await db.commit()  # вернуть соединение в пул на время bcrypt (expire_on_commit=False — user остаётся загружен)
+    if not user or not await verify_password_async(body.password, user.password_hash):
         logger.warning("Неудачная попытка входа: %s", body.email)
         raise HTTPException(status_code=401, detail="Неверный логин или пароль")
     if not user.is_active:
         logger.warning("Попытка входа в деактивированный аккаунт: %s", body.email)
         raise HTTPException(status_code=403, detail="Аккаунт деактивирован")
 
-    perms = get_user_permissions(user, db)
+    if password_needs_rehash(user.password_hash):
+        user.password_hash = await hash_password_async(body.password)
+        await db.commit()
+        logger.info("Пароль перехеширован под BCRYPT_ROUNDS: %s", user.email)
+
+    perms = await db.run_sync(lambda sync_db: get_user_permissions(user, sync_db))
     role_name = user.position.name if user.position else ("Администратор" if user.role == "admin" else "Инспектор")
 
     logger.info("Успешный вход: %s", user.email)
-    token = create_access_token({"sub": user.id, "role": user.role})
+    claims = await db.run_sync(lambda sync_db: permission_claims(user, sync_db))
+    token = create_access_token({"sub": user.id, "role": user.role, **claims})
     return TokenResponse(
         access_token=token,
         user={
@@ -64,7 +78,9 @@ def login(request: Request, body: LoginRequest, db: Session = Depends(get_db)):
 @router.get("/me", response_model=UserResponse)
 def me(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     perms = get_user_permissions(user, db)
-    role_name = user.position.name if user.position else ("Администратор" if user.role == "admin" else "Инспектор")
+    # Не user.position: при правах из токена user — transient, без связи с сессией
+    position = db.get(Role, user.role_id) if user.role_id else None
+    role_name = position.name if position else ("Администратор" if user.role == "admin" else "Инспектор")
     return UserResponse(
         id=user.id,
         email=user.email,
@@ -0,0 +1,118 @@
+"""Кэш правил андеррайтинга и риск-правил в памяти процесса, с версией.
+
+Сохранение анкеты, проверка ПВ по грейду, заключение и /verdict-rules, /risk-rules берут
+правила отсюда, а не сканируют underwriting_rules / risk_rules на каждый запрос.
+
+Версия правил — строка rules_version в БД. Любая правка правил в админке поднимает её
+(bump — атомарный UPDATE version = version + 1 в той же транзакции, что и правка). Воркер
+сверяет свою версию с БД не чаще раза в RULES_VERSION_CHECK_INTERVAL секунд (1) — один
+SELECT по PK — и перечитывает правила, только если версия изменилась; bump на своём
+воркере виден сразу. Версия же служит ETag для /verdict-rules и /risk-rules.
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.database import RiskRule, RulesVersion
+from app.services.calculation_service import OverdueMatrix, load_rules
+
+RULES_VERSION_CHECK_INTERVAL = float(os.getenv("RULES_VERSION_CHECK_INTERVAL", "1"))
+
+
+@dataclass(frozen=True)
+class RulesSnapshot:
+    """Правила на момент версии version. Общий объект для всех запросов — не изменять."""
+    version: int
+    rules: dict                      # {rule_key: значение} как load_rules()
+    risk_rules: list                 # активные [{"category", "min_pv"}] по категории
+    risk_by_category: dict = field(repr=False)  # category.lower() -> то же dict
+    overdue: OverdueMatrix = field(repr=False)   # правила просрочки, скомпилированные под эту версию
+
+    def risk_rule(self, grade: str | None) -> dict | None:
+        """Активное риск-правило для грейда (без учёта регистра)."""
+        return self.risk_by_category.get(grade.lower()) if grade else None
+
+    @property
+    def etag(self) -> str:
+        return f'"rules-{self.version}"'
+
+
+def _db_version(db: Session) -> int:
+    return db.execute(select(RulesVersion.version).where(RulesVersion.id == 1)).scalar() or 0
+
+
+def _load(db: Session, version: int) -> RulesSnapshot:
+    risk_rules = [
+        {"category": r.category, "min_pv": r.min_pv}
+        for r in db.query(RiskRule).filter(RiskRule.is_active == True).order_by(RiskRule.category).all()
+    ]
+    rules = load_rules(db)
+    return RulesSnapshot(
+        version=version,
+        rules=rules,
+        risk_rules=risk_rules,
+        risk_by_category={r["category"].lower(): r for r in risk_rules},
+        overdue=OverdueMatrix(rules),
+    )
+
+
+class RulesCache:
+
+    def __init__(self, check_interval: float = RULES_VERSION_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._snapshot: RulesSnapshot | None = None
+        self._checked_at = 0.0
+        self.hits = 0
+        self.loads = 0
+
+    def get(self, db: Session) -> RulesSnapshot:
+        snap = self._snapshot
+        if snap is not None and time.monotonic() - self._checked_at < self.check_interval:
+            self.hits += 1
+            return snap
+        # Сначала версия, потом правила: правка между ними даст снимок со старой версией
+        # и свежими правилами — при следующей проверке он просто перечитается
+        version = _db_version(db)
+        with self._lock:
+            snap = self._snapshot
+            if snap is None or snap.version != version:
+                snap = self._snapshot = _load(db, version)
+                self.loads += 1
+            else:
+                self.hits += 1
+            self._checked_at = time.monotonic()
+            return snap
+
+    def bump(self, db: Session) -> int:
+        """Поднять версию и закоммитить (вместе с правкой правил в той же сессии)."""
+        if db.execute(update(RulesVersion).where(RulesVersion.id == 1)
+                      .values(version=RulesVersion.version + 1)).rowcount == 0:
+            db.add(RulesVersion(id=1, version=1))
+        db.commit()
+        with self._lock:
+            self._snapshot = None  # свой воркер — перечитать сразу
+        return _db_version(db)
+
+    def clear(self):
+        with self._lock:
+            self._snapshot = None
+            self._checked_at = 0.0
+            self.hits = self.loads = 0
+
+    def stats(self) -> dict:
+        snap = self._snapshot
+        return {
+            "version": snap.version if snap else None,
+            "check_interval": self.check_interval,
+            "hits": self.hits,
+            "loads": self.loads,
+        }
+
+
+rules_cache = RulesCache()
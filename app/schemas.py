@@ -239,6 +239,11 @@ class AnketaListItem(BaseModel):
     creator_name: str | None = None
 
 
+class AnketaListPage(BaseModel):
+    items: list[AnketaListItem]
+    next_cursor: str | None = None
+
+
 class NotificationOut(BaseModel):
     id: int
     type: str
@@ -417,3 +422,19 @@ class EditRequestOut(BaseModel):
     reviewed_at: str | None = None
     anketa_client_name: str | None = None
     anketa_status: str | None = None
+
+
+class GridRange(BaseModel):
+    """Ось сетки калькулятора: start..stop включительно с шагом step."""
+    start: float
+    stop: float
+    step: float = Field(gt=0)
+
+
+class DealGridRequest(BaseModel):
+    price: float = Field(gt=0)             # стоимость авто
+    income: float = Field(gt=0)            # доход клиента в месяц
+    obligations: float = Field(0, ge=0)    # платежи по другим кредитам в месяц
+    pv: list[float] | GridRange            # ПВ%, список значений или диапазон
+    term: list[int] | GridRange            # срок, мес
+    rate: list[float] | GridRange          # годовая ставка, %
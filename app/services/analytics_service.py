@@ -5,6 +5,7 @@ from sqlalchemy import func as sa_func, extract, case
 
 from app.database import Anketa, User
 from app.auth import get_user_permissions
+from app.services.anketa_views import EMPLOYEE_STATS_VIEW, select_view
 
 
 def get_stats_data(db: Session, user: User, period: str,
@@ -172,7 +173,7 @@ def get_employee_stats_data(db: Session, user: User, period: str,
         start = now - timedelta(days=30)
         end = now
 
-    base = db.query(Anketa).filter(
+    base = select_view(db, EMPLOYEE_STATS_VIEW).filter(
         Anketa.created_at >= start,
         Anketa.created_at <= end,
         Anketa.status != "deleted",
@@ -193,7 +194,7 @@ def get_employee_stats_data(db: Session, user: User, period: str,
     user_ids = list(by_user.keys())
     users_map = {}
     if user_ids:
-        users_list = db.query(User).filter(User.id.in_(user_ids)).all()
+        users_list = db.query(User.id, User.full_name).filter(User.id.in_(user_ids)).all()
         users_map = {u.id: u.full_name for u in users_list}
 
     result = []
@@ -1,15 +1,20 @@
+import base64
+import binascii
 import hashlib
 import json
 import os
+import re
 import secrets
-from datetime import date, datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func as sa_func
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import String, cast, func, insert, and_, or_
 
-from app.database import Anketa, AnketaHistory, EditRequest, Notification, User, Role, RiskRule
+from app.database import Anketa, AnketaHistory, AnketaPhone, EditRequest, Notification, User, Role
 from app.auth import get_user_permissions
+from app.rules_cache import rules_cache
+from app.services.anketa_views import LIST_VIEW, load_view
 
 
 def anketa_to_detail(a: Anketa, db: Session = None) -> dict:
@@ -152,6 +157,129 @@ def anketa_to_detail(a: Anketa, db: Session = None) -> dict:
     return result
 
 
+def anketa_to_list_item(a: Anketa) -> dict:
+    """Convert Anketa ORM object to list row dict."""
+    return {
+        "id": a.id,
+        "status": a.status,
+        "client_type": getattr(a, 'client_type', None) or "individual",
+        "full_name": a.full_name,
+        "company_name": a.company_name,
+        "car_brand": a.car_brand,
+        "car_model": a.car_model,
+        "car_specs": a.car_specs,
+        "car_year": a.car_year,
+        "purchase_price": a.purchase_price,
+        "down_payment_percent": a.down_payment_percent,
+        "dti": a.dti,
+        "decision": a.decision,
+        "created_by": a.created_by,
+        "created_at": str(a.created_at) if a.created_at else None,
+        "creator_name": a.creator.full_name if a.creator else None,
+    }
+
+
+def list_view_options() -> tuple:
+    """Only the list columns plus the creator's name — no full-row hydration."""
+    return load_view(LIST_VIEW), joinedload(Anketa.creator).load_only(User.full_name)
+
+
+LIST_SORT_FIELDS = {"id", "created_at"}
+
+
+def _encode_cursor(sort: str, order: str, a: Anketa) -> str:
+    # created_at IS NULL (старые строки) — сортируются последними, в курсоре v = null
+    if sort == "created_at":
+        value = a.created_at.isoformat() if a.created_at else None
+    else:
+        value = a.id
+    raw = json.dumps({"s": sort, "o": order, "v": value, "id": a.id})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort: str, order: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        if data["s"] != sort or data["o"] != order:
+            raise ValueError("sort mismatch")
+        if sort == "created_at":
+            value = datetime.fromisoformat(data["v"]) if data["v"] is not None else None
+        else:
+            value = int(data["v"])
+        return value, int(data["id"])
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Неверный курсор пагинации")
+
+
+def query_anketa_list(db: Session, user: User, *, limit: int, cursor: str | None = None,
+                      status: str | None = None, client_type: str | None = None,
+                      created_by: int | None = None, date_from: str | None = None,
+                      date_to: str | None = None, partner: str | None = None,
+                      search: str | None = None, sort: str = "id", order: str = "desc") -> dict:
+    """Keyset-paginated anketa list with server-side filters. Returns {"items", "next_cursor"}."""
+    if sort not in LIST_SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Недопустимая сортировка. Допустимые: {', '.join(sorted(LIST_SORT_FIELDS))}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="Порядок сортировки: asc или desc")
+
+    perms = get_user_permissions(user, db)
+    q = db.query(Anketa).options(*list_view_options()).filter(Anketa.status != "deleted")
+    if not perms.get("anketa_view_all"):
+        q = q.filter(Anketa.created_by == user.id)
+    elif created_by:
+        q = q.filter(Anketa.created_by == created_by)
+
+    if status:
+        q = q.filter(Anketa.status == status)
+    if client_type:
+        # Старые анкеты без client_type показываются как физлица — так же и фильтруются
+        q = q.filter(func.coalesce(Anketa.client_type, "individual") == client_type)
+    if partner:
+        q = q.filter(Anketa.partner.ilike(f"%{partner.strip()}%"))
+    if search and search.strip():
+        pattern = f"%{search.strip()}%"
+        q = q.filter(or_(
+            Anketa.full_name.ilike(pattern), Anketa.company_name.ilike(pattern),
+            Anketa.car_brand.ilike(pattern), Anketa.car_model.ilike(pattern),
+            cast(Anketa.id, String).like(pattern),
+            Anketa.creator.has(User.full_name.ilike(pattern)),
+        ))
+    try:
+        if date_from:
+            q = q.filter(Anketa.created_at >= datetime.fromisoformat(date_from))
+        if date_to:
+            q = q.filter(Anketa.created_at < datetime.fromisoformat(date_to) + timedelta(days=1))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Неверный формат даты")
+
+    desc = order == "desc"
+    if cursor:
+        value, last_id = _decode_cursor(cursor, sort, order)
+        after_id = Anketa.id < last_id if desc else Anketa.id > last_id
+        if sort == "id":
+            q = q.filter(after_id)
+        elif value is None:
+            # Курсор уже в хвосте без created_at
+            q = q.filter(Anketa.created_at.is_(None), after_id)
+        else:
+            after_value = Anketa.created_at < value if desc else Anketa.created_at > value
+            q = q.filter(or_(after_value, and_(Anketa.created_at == value, after_id), Anketa.created_at.is_(None)))
+
+    if sort == "created_at":
+        created = Anketa.created_at.desc() if desc else Anketa.created_at.asc()
+        q = q.order_by(created.nulls_last(), Anketa.id.desc() if desc else Anketa.id.asc())
+    else:
+        q = q.order_by(Anketa.id.desc() if desc else Anketa.id.asc())
+
+    rows = q.limit(limit + 1).all()
+    next_cursor = _encode_cursor(sort, order, rows[limit - 1]) if len(rows) > limit else None
+    return {
+        "items": [anketa_to_list_item(a) for a in rows[:limit]],
+        "next_cursor": next_cursor,
+    }
+
+
 def record_history(db: Session, anketa_id: int, user_id: int,
                    field_name: str, old_value, new_value):
     """Record a change in anketa_history."""
@@ -174,6 +302,59 @@ def _normalize_phone(raw: str) -> str:
     return "".join(c for c in raw if c.isdigit())
 
 
+MIN_PHONE_DIGITS = 9
+_PHONE_SEPARATORS = re.compile(r"[,;/\n]+")
+
+
+def split_phones(raw: str | None) -> list[str]:
+    """Split a phone field into normalized numbers: one entry per number, no duplicates."""
+    if not raw:
+        return []
+    result = []
+    for part in _PHONE_SEPARATORS.split(raw):
+        phone = _normalize_phone(part)
+        if len(phone) >= MIN_PHONE_DIGITS and phone not in result:
+            result.append(phone)
+    return result
+
+
+def sync_anketa_phones(db: Session, anketa: Anketa):
+    """Rewrite anketa_phones rows for the anketa from its phone_numbers field."""
+    db.query(AnketaPhone).filter(AnketaPhone.anketa_id == anketa.id).delete(synchronize_session=False)
+    for phone in split_phones(anketa.phone_numbers):
+        db.add(AnketaPhone(anketa_id=anketa.id, phone=phone))
+
+
+def backfill_anketa_phones(db: Session, batch_size: int = 1000) -> int:
+    """Rebuild anketa_phones from anketas.phone_numbers in id-ordered batches. Returns rows written."""
+    db.query(AnketaPhone).delete(synchronize_session=False)
+    db.commit()
+    total = 0
+    last_id = 0
+    while True:
+        rows = db.query(Anketa.id, Anketa.phone_numbers).filter(
+            Anketa.id > last_id, Anketa.phone_numbers.isnot(None)
+        ).order_by(Anketa.id).limit(batch_size).all()
+        if not rows:
+            break
+        mappings = [
+            {"anketa_id": anketa_id, "phone": phone}
+            for anketa_id, raw in rows
+            for phone in split_phones(raw)
+        ]
+        if mappings:
+            db.execute(insert(AnketaPhone), mappings)
+        db.commit()
+        total += len(mappings)
+        last_id = rows[-1].id
+    return total
+
+
+def _phone_matches(db: Session, phones: list[str]):
+    """Subquery of anketa ids having any of the given normalized phones (index probe)."""
+    return db.query(AnketaPhone.anketa_id).filter(AnketaPhone.phone.in_(phones))
+
+
 def find_duplicates(db: Session, anketa: Anketa) -> list[dict]:
     # Collect match fields per anketa id
     matches: dict[int, dict] = {}  # anketa_id -> {"obj": Anketa, "fields": [str]}
@@ -187,12 +368,12 @@ def find_duplicates(db: Session, anketa: Anketa) -> list[dict]:
             matches[m.id] = {"obj": m, "fields": [match_field]}
 
     # По номеру телефона
-    if anketa.phone_numbers and anketa.phone_numbers.strip():
-        phone_norm = _normalize_phone(anketa.phone_numbers)
-        if len(phone_norm) >= 9:
-            for m in db.query(Anketa).filter(Anketa.phone_numbers.isnot(None), Anketa.id != anketa.id, Anketa.status != "deleted").all():
-                if m.phone_numbers and _normalize_phone(m.phone_numbers) == phone_norm:
-                    _add(m, "Телефон")
+    phones = split_phones(anketa.phone_numbers)
+    if phones:
+        for m in db.query(Anketa).filter(
+            Anketa.id.in_(_phone_matches(db, phones)), Anketa.id != anketa.id, Anketa.status != "deleted"
+        ).all():
+            _add(m, "Телефон")
 
     # По ИНН (юр. лица)
     if anketa.client_type == "legal_entity" and anketa.company_inn and anketa.company_inn.strip():
@@ -239,13 +420,10 @@ def check_duplicate_field(db: Session, field: str, value: str, exclude_id: int |
         base_q = base_q.filter(Anketa.id != exclude_id)
 
     if field == "phone_numbers":
-        phone_norm = _normalize_phone(value)
-        if len(phone_norm) < 9:
+        phones = split_phones(value)
+        if not phones:
             return []
-        matches = []
-        for m in base_q.filter(Anketa.phone_numbers.isnot(None)).all():
-            if m.phone_numbers and _normalize_phone(m.phone_numbers) == phone_norm:
-                matches.append(m)
+        matches = base_q.filter(Anketa.id.in_(_phone_matches(db, phones))).all()
     elif field == "company_inn":
         matches = base_q.filter(Anketa.company_inn == value).all()
     else:
@@ -310,13 +488,10 @@ def validate_anketa_for_save(anketa: Anketa, db: Session) -> list[str]:
 
     # Validate PV against risk grade
     if anketa.risk_grade and not anketa.no_scoring_response:
-        risk_rule = db.query(RiskRule).filter(
-            sa_func.lower(RiskRule.category) == anketa.risk_grade.lower(),
-            RiskRule.is_active == True
-        ).first()
+        risk_rule = rules_cache.get(db).risk_rule(anketa.risk_grade)
         if risk_rule and anketa.down_payment_percent is not None:
-            if anketa.down_payment_percent < risk_rule.min_pv:
-                errors.append(f"ПВ ({anketa.down_payment_percent}%) ниже минимума для грейда {anketa.risk_grade} ({risk_rule.min_pv}%)")
+            if anketa.down_payment_percent < risk_rule["min_pv"]:
+                errors.append(f"ПВ ({anketa.down_payment_percent}%) ниже минимума для грейда {anketa.risk_grade} ({risk_rule['min_pv']}%)")
 
     return errors
 
@@ -399,6 +574,9 @@ def apply_anketa_updates(db: Session, anketa: Anketa, update_data: dict, user_id
             record_history(db, anketa.id, user_id, key, old_value, value)
         setattr(anketa, key, value)
 
+    if "phone_numbers" in update_data:
+        sync_anketa_phones(db, anketa)
+
 
 def apply_conclusion(db: Session, anketa: Anketa, decision: str, comment: str | None,
                      final_pv: float, user: User):
@@ -406,14 +584,11 @@ def apply_conclusion(db: Session, anketa: Anketa, decision: str, comment: str |
     anketa.final_pv = final_pv
 
     if anketa.risk_grade and not anketa.no_scoring_response:
-        risk_rule = db.query(RiskRule).filter(
-            sa_func.lower(RiskRule.category) == anketa.risk_grade.lower(),
-            RiskRule.is_active == True
-        ).first()
-        if risk_rule and final_pv < risk_rule.min_pv:
+        risk_rule = rules_cache.get(db).risk_rule(anketa.risk_grade)
+        if risk_rule and final_pv < risk_rule["min_pv"]:
             raise HTTPException(
                 status_code=400,
-                detail=f"Итоговый ПВ ({final_pv}%) ниже минимума для грейда {anketa.risk_grade} ({risk_rule.min_pv}%)"
+                detail=f"Итоговый ПВ ({final_pv}%) ниже минимума для грейда {anketa.risk_grade} ({risk_rule['min_pv']}%)"
             )
 
     is_reconclusion = anketa.decision is not None
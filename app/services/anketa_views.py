@@ -0,0 +1,95 @@
+"""Проекции Anketa: именованные наборы колонок для списков, выгрузок и статистики.
+
+Основная строка anketas — клиент, авто, сделка, расчёт и вердикт (~50 колонок); остальные
+поля анкеты лежат в таблицах секций (anketa_personal, anketa_company, ...). Спискам и
+отчётам нужна дюжина полей.
+Каждый view — кортеж колонок; его можно применить двумя способами:
+
+- ``load_view(VIEW)`` — опция ``load_only`` для ORM-запроса (остальные атрибуты
+  отложены и догружаются только при обращении);
+- ``select_view(db, VIEW)`` — лёгкие Row-кортежи без identity map и отслеживания
+  изменений; доступ к полям по имени (``row.status``), как у ORM-объекта.
+
+``load_view`` — только для колонок основной строки anketas; поля секций
+(anketa_personal, anketa_company, ...) доступны через ``select_view``.
+"""
+
+from sqlalchemy.orm import Query, Session, load_only
+
+from app.database import Anketa
+
+# Строка списка анкет (anketa_to_list_item + курсор пагинации)
+LIST_VIEW = (
+    Anketa.id, Anketa.status, Anketa.client_type, Anketa.full_name, Anketa.company_name,
+    Anketa.car_brand, Anketa.car_model, Anketa.car_specs, Anketa.car_year,
+    Anketa.purchase_price, Anketa.down_payment_percent, Anketa.dti, Anketa.decision,
+    Anketa.created_by, Anketa.created_at,
+)
+
+# Статистика по сотрудникам (get_employee_stats_data)
+EMPLOYEE_STATS_VIEW = (
+    Anketa.created_by, Anketa.status, Anketa.dti, Anketa.created_at, Anketa.concluded_at,
+)
+
+# Payload webhook-уведомления
+WEBHOOK_VIEW = (
+    Anketa.id, Anketa.full_name, Anketa.company_name, Anketa.client_type, Anketa.decision,
+    Anketa.dti, Anketa.purchase_price, Anketa.down_payment_percent,
+)
+
+# Excel-выгрузка: оба листа (физ. и юр. лица)
+EXPORT_VIEW = (
+    Anketa.id, Anketa.created_at, Anketa.status, Anketa.client_type,
+    Anketa.full_name, Anketa.birth_date, Anketa.phone_numbers, Anketa.actual_address,
+    Anketa.company_name, Anketa.company_inn, Anketa.company_oked, Anketa.company_phone,
+    Anketa.company_legal_address, Anketa.company_actual_address,
+    Anketa.director_full_name, Anketa.director_phone,
+    Anketa.contact_person_name, Anketa.contact_person_role, Anketa.contact_person_phone,
+    Anketa.company_revenue_total, Anketa.company_net_profit, Anketa.director_income_total,
+    Anketa.partner, Anketa.car_brand, Anketa.car_model, Anketa.car_year, Anketa.mileage,
+    Anketa.purchase_price, Anketa.down_payment_percent, Anketa.down_payment_amount,
+    Anketa.remaining_amount, Anketa.lease_term_months, Anketa.interest_rate, Anketa.monthly_payment,
+    Anketa.total_monthly_income, Anketa.dti, Anketa.overdue_category,
+    Anketa.auto_decision, Anketa.recommended_pv,
+    Anketa.decision, Anketa.conclusion_comment, Anketa.concluded_by, Anketa.concluded_at,
+)
+
+
+# Входы авто-вердикта (batch_verdict.load_verdict_columns — пересчёт портфеля)
+VERDICT_VIEW = (
+    Anketa.id, Anketa.client_type, Anketa.dti, Anketa.down_payment_percent, Anketa.total_monthly_income,
+    Anketa.monthly_obligations_payment, Anketa.interest_rate, Anketa.lease_term_months, Anketa.purchase_price,
+    Anketa.overdue_category, Anketa.last_overdue_date,
+    Anketa.company_overdue_category, Anketa.company_last_overdue_date,
+    Anketa.director_overdue_category, Anketa.director_last_overdue_date,
+    Anketa.guarantor_overdue_category, Anketa.guarantor_last_overdue_date,
+    Anketa.current_overdue_amount, Anketa.systematic_overdue, Anketa.worst_active_classification,
+    Anketa.worst_closed_classification, Anketa.has_lombard, Anketa.scoring_class, Anketa.birth_date,
+    Anketa.open_applications_count, Anketa.risk_grade, Anketa.no_scoring_response,
+)
+# Фоновый пересчёт вердикта (rescore_job): входы + сохранённый результат для сравнения
+RESCORE_VIEW = VERDICT_VIEW + (
+    Anketa.auto_decision, Anketa.recommended_pv, Anketa.auto_decision_reasons, Anketa.verdict_fingerprint,
+)
+# График платежей (schedule_service.anketa_schedule, массовая выгрузка графиков)
+SCHEDULE_VIEW = (
+    Anketa.id, Anketa.created_by, Anketa.remaining_amount, Anketa.interest_rate, Anketa.lease_term_months,
+)
+
+
+def load_view(view: tuple):
+    """ORM-опция: загрузить только колонки view."""
+    return load_only(*view)
+
+
+def select_view(db: Session, view: tuple) -> Query:
+    """Запрос, возвращающий Row-кортежи с колонками view.
+
+    Колонки секций (Anketa.birth_date -> anketa_personal) подтягиваются outer join'ом
+    только для секций, которые view действительно использует.
+    """
+    query = db.query(*view).select_from(Anketa)
+    sections = {col.class_ for col in view if col.class_ is not Anketa}
+    for section in sorted(sections, key=lambda m: m.__tablename__):
+        query = query.outerjoin(section, section.anketa_id == Anketa.id)
+    return query
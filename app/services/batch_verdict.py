@@ -0,0 +1,266 @@
+"""Пакетный авто-вердикт: calc_auto_verdict для многих анкет сразу, на колонках NumPy.
+
+Вход — колонки полей VERDICT_FIELDS: verdict_columns(rows) из объектов (Anketa, Row,
+SimpleNamespace) или load_verdict_columns(db) прямо из БД без ORM-объектов. Выход — BatchVerdict:
+auto_decision, recommended_pv, dti_suggestion_pv / dti_suggestion_price и requires_guarantor
+для каждой строки — те же значения, что вернул бы calc_auto_verdict (причины — только у него).
+
+Строковые поля и даты кодируются категориально (коды + уникальные значения): проверки вроде
+«класс ниже стандартного» или «месяцев с просрочки» считаются один раз на уникальное значение,
+дальше — индексация массивов. Степени (1 + r) ** n и округления тоже считаются в Python на
+уникальных значениях, поэтому результат совпадает со скалярным путём бит в бит.
+"""
+
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.database import Anketa
+from app.services.anketa_views import VERDICT_VIEW, select_view
+from app.services.calculation_service import (
+    CLOSED_OK_CLASSES, STANDARD_CLASSES, OverdueMatrix, _age_years, _months_since, overdue_matrix,
+)
+
+NUMERIC_FIELDS = (
+    "dti", "down_payment_percent", "total_monthly_income", "monthly_obligations_payment",
+    "interest_rate", "lease_term_months", "purchase_price", "current_overdue_amount",
+    "open_applications_count",
+)
+FLAG_FIELDS = ("systematic_overdue", "has_lombard", "no_scoring_response")
+CATEGORY_FIELDS = (
+    "client_type", "overdue_category", "company_overdue_category", "director_overdue_category",
+    "guarantor_overdue_category", "worst_active_classification", "worst_closed_classification",
+    "scoring_class", "risk_grade",
+    # даты — тоже категориально: повторяются, а месяцы / возраст считаются на уникальных
+    "last_overdue_date", "company_last_overdue_date", "director_last_overdue_date",
+    "guarantor_last_overdue_date", "birth_date",
+)
+VERDICT_FIELDS = NUMERIC_FIELDS + FLAG_FIELDS + CATEGORY_FIELDS
+
+DECISIONS = np.array(["approved", "review", "rejected"], dtype=object)
+_RANK = {"approved": 0, "review": 1, "rejected": 2}  # как в _worst_decision; прочее — -1
+
+
+@dataclass
+class Categorical:
+    """Колонка как коды в список уникальных значений."""
+    codes: np.ndarray
+    values: list
+
+    def map(self, fn, dtype) -> np.ndarray:
+        """fn(значение) для каждой строки — вычисляется по одному разу на уникальное значение."""
+        return np.array([fn(v) for v in self.values], dtype=dtype)[self.codes] if self.values \
+            else np.zeros(0, dtype=dtype)
+
+
+def _encode(values: list) -> Categorical:
+    index: dict = {}
+    codes = np.fromiter((index.setdefault(v, len(index)) for v in values), dtype=np.int32, count=len(values))
+    return Categorical(codes, list(index))
+
+
+def verdict_columns(rows) -> dict:
+    """Колонки VERDICT_FIELDS из объектов с атрибутами (нет атрибута — None)."""
+    rows = list(rows)
+    columns = {}
+    for f in NUMERIC_FIELDS:
+        columns[f] = np.array([getattr(r, f, None) for r in rows], dtype=float)  # None -> NaN
+    for f in FLAG_FIELDS:
+        columns[f] = np.fromiter((bool(getattr(r, f, False)) for r in rows), dtype=bool, count=len(rows))
+    for f in CATEGORY_FIELDS:
+        columns[f] = _encode([getattr(r, f, None) for r in rows])
+    return columns
+
+
+def load_verdict_columns(db: Session, anketa_ids=None,
+                         criteria: tuple = (), extra: tuple = ()) -> tuple[np.ndarray, dict]:
+    """(id анкет, колонки) прямо из БД — Row-кортежи VERDICT_VIEW, без ORM-объектов.
+
+    criteria — дополнительные условия WHERE; extra — колонки Anketa сверх VERDICT_VIEW
+    (например, Anketa.status для разбивки), попадают в результат категориально по имени.
+    """
+    query = select_view(db, VERDICT_VIEW + tuple(extra)).order_by(Anketa.id)
+    if anketa_ids is not None:
+        query = query.filter(Anketa.id.in_(list(anketa_ids)))
+    if criteria:
+        query = query.filter(*criteria)
+    rows = query.all()
+    columns = verdict_columns(rows)
+    for col in extra:
+        columns[col.key] = _encode([getattr(r, col.key) for r in rows])
+    return np.array([r.id for r in rows], dtype=np.int64), columns
+
+
+@dataclass
+class BatchVerdict:
+    """Результаты по строкам; NaN в dti_suggestion_* — подсказки нет (None).
+
+    decision_code — индекс auto_decision в DECISIONS (0/1/2), для подсчётов без сравнения строк.
+    """
+    auto_decision: np.ndarray
+    recommended_pv: np.ndarray
+    dti_suggestion_pv: np.ndarray
+    dti_suggestion_price: np.ndarray
+    requires_guarantor: np.ndarray
+    decision_code: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.auto_decision)
+
+    def row(self, i: int) -> dict:
+        """Строка i в формате calc_auto_verdict (без auto_decision_reasons)."""
+        pv, price = self.dti_suggestion_pv[i], self.dti_suggestion_price[i]
+        return {
+            "auto_decision": self.auto_decision[i],
+            "recommended_pv": float(self.recommended_pv[i]),
+            "dti_suggestion_pv": None if np.isnan(pv) else float(pv),
+            "dti_suggestion_price": None if np.isnan(price) else int(price),
+            "requires_guarantor": bool(self.requires_guarantor[i]),
+        }
+
+
+def _rank(decision) -> int:
+    return _RANK.get(decision, -1)
+
+
+def _zero_if_nan(a: np.ndarray) -> np.ndarray:
+    """Аналог `x or 0` для колонки с NaN вместо None."""
+    return np.where(np.isnan(a), 0.0, a)
+
+
+def _round_unique(a: np.ndarray, ndigits: int) -> np.ndarray:
+    """round(x, ndigits) как в Python — на уникальных значениях."""
+    if not len(a):
+        return a.astype(float)
+    uniques, inverse = np.unique(a, return_inverse=True)
+    return np.array([round(float(u), ndigits) for u in uniques])[inverse]
+
+
+def _overdue(category: Categorical, overdue_date: Categorical, matrix: OverdueMatrix, today: date):
+    """(ранг решения, pv_add, нужен поручитель) по колонкам — ячейки OverdueMatrix."""
+    months = overdue_date.map(lambda d: -1 if not d else _months_since(d, today), np.int64)  # -1 — нет даты
+    n = len(category.codes)
+    rank = np.zeros(n, dtype=np.int8)
+    pv_add = np.zeros(n)
+    guarantor = np.zeros(n, dtype=bool)
+    for code, cat in enumerate(category.values):
+        entry = matrix.table.get(cat)
+        if entry is None:
+            continue
+        edges, cells, no_date = entry
+        rows = np.flatnonzero(category.codes == code)
+        m = months[rows]
+        # Ячейка 0 — «нет даты», дальше — корзины давности
+        bucket = np.where(m < 0, 0, np.searchsorted(np.array(edges, dtype=np.int64), m, side="right") + 1)
+        cells = (no_date,) + cells
+        rank[rows] = np.array([c.rank for c in cells], dtype=np.int8)[bucket]
+        pv_add[rows] = np.array([c.pv_add for c in cells])[bucket]
+        guarantor[rows] = np.array([c.requires_guarantor for c in cells])[bucket]
+    return rank, pv_add, guarantor
+
+
+def batch_auto_verdict(columns: dict, rules: dict, risk_rules: list | None = None,
+                       today: date | None = None, overdue: OverdueMatrix | None = None) -> BatchVerdict:
+    """calc_auto_verdict для всех строк колонок сразу (overdue — как в calc_auto_verdict)."""
+    today = today or date.today()
+    overdue = overdue or overdue_matrix(rules)
+    n = len(columns["dti"])
+
+    # --- DTI ---
+    dti = columns["dti"]
+    has_dti = ~np.isnan(dti)
+    max_approve = rules.get("max_dti_approve", 50)
+    max_review = rules.get("max_dti_review", 60)
+    final = np.where(has_dti & (dti > max_review), 2, np.where(has_dti & (dti > max_approve), 1, 0)).astype(np.int8)
+
+    # --- Просрочки: физлицо — своя категория, юрлицо — худшее из компании, директора, поручителя ---
+    is_legal = columns["client_type"].map(lambda t: t == "legal_entity", bool)
+    ind_rank, ind_pv, ind_guar = _overdue(columns["overdue_category"], columns["last_overdue_date"], overdue, today)
+    comp_rank, comp_pv, comp_guar = _overdue(columns["company_overdue_category"],
+                                             columns["company_last_overdue_date"], overdue, today)
+    dir_rank, dir_pv, dir_guar = _overdue(columns["director_overdue_category"],
+                                          columns["director_last_overdue_date"], overdue, today)
+    guar_rank, guar_pv, _ = _overdue(columns["guarantor_overdue_category"],
+                                     columns["guarantor_last_overdue_date"], overdue, today)
+    legal_rank = np.maximum.reduce([np.zeros(n, dtype=np.int8), comp_rank, dir_rank, guar_rank])
+    final = np.maximum(final, np.where(is_legal, legal_rank, ind_rank))
+    pv_add = np.where(is_legal, 0.0 + comp_pv + dir_pv + guar_pv, 0.0 + ind_pv)
+    requires_guarantor = np.where(is_legal, comp_guar | dir_guar, ind_guar)
+
+    # --- Остальные проверки: (условие по строкам, решение из правил) ---
+    checks = [
+        (columns["current_overdue_amount"] > 0, rules.get("current_overdue_result", "rejected")),
+        (columns["systematic_overdue"], rules.get("systematic_overdue_result", "rejected")),
+        (columns["worst_active_classification"].map(lambda c: bool(c) and c not in STANDARD_CLASSES, bool),
+         rules.get("bad_classification_result", "rejected")),
+        (columns["worst_closed_classification"].map(lambda c: bool(c) and c not in CLOSED_OK_CLASSES, bool),
+         rules.get("closed_classification_result", "rejected")),
+        (columns["has_lombard"], rules.get("lombard_result", "rejected")),
+        (columns["scoring_class"].map(lambda c: bool(c) and c.upper() in ("D", "E"), bool),
+         rules.get("scoring_class_de_result", "rejected")),
+        (columns["open_applications_count"] > 0, rules.get("open_apps_result", "review")),
+    ]
+    min_age, max_age = rules.get("min_age", 21), rules.get("max_age", 65)
+    age_out = columns["birth_date"].map(
+        lambda bd: (lambda age: age is not None and (age < min_age or age > max_age))(_age_years(bd, today)), bool)
+    checks.append((age_out, "rejected"))
+    for mask, decision in checks:
+        final = np.maximum(final, np.where(mask, np.int8(_rank(decision)), np.int8(0)))
+
+    # --- Рекомендуемый ПВ ---
+    base_pv = rules.get("min_pv_percent", 5)
+
+    def _grade_pv(grade):
+        if grade and risk_rules:
+            matched = next((r for r in risk_rules if r["category"].lower() == grade.lower()), None)
+            if matched and matched["min_pv"] > base_pv:
+                return matched["min_pv"]
+        return base_pv
+
+    grade_pv = columns["risk_grade"].map(_grade_pv, float)
+    recommended_raw = np.where(columns["no_scoring_response"], float(base_pv), grade_pv) + pv_add
+
+    # --- Подсказки по DTI ---
+    income = _zero_if_nan(columns["total_monthly_income"])
+    obligations = _zero_if_nan(columns["monthly_obligations_payment"])
+    rate = _zero_if_nan(columns["interest_rate"])
+    term = _zero_if_nan(columns["lease_term_months"])
+    price = _zero_if_nan(columns["purchase_price"])
+    current_pv = _zero_if_nan(columns["down_payment_percent"])
+
+    suggestion_pv = np.full(n, np.nan)
+    suggestion_price = np.full(n, np.nan)
+    eligible = has_dti & (dti > max_approve) & (income > 0) & (rate > 0) & (term > 0) & (price > 0)
+    max_payment = income * max_approve / 100 - obligations
+    eligible &= max_payment > 0
+    idx = np.flatnonzero(eligible)
+    if len(idx):
+        # calc_max_principal: r и (1 + r) ** n — в Python на уникальных (ставка, срок)
+        pairs, inverse = np.unique(np.stack([rate[idx], term[idx]], axis=1), axis=0, return_inverse=True)
+        r_table, f_table = [], []
+        for annual_rate, months in pairs:
+            r = float(annual_rate) / 100 / 12
+            r_table.append(r)
+            f_table.append((1 + r) ** int(months))
+        r, f = np.array(r_table)[inverse.ravel()], np.array(f_table)[inverse.ravel()]
+        max_principal = max_payment[idx] * (f - 1) / (r * f)
+
+        below = max_principal < price[idx]
+        pv_idx = idx[below]
+        min_pv = np.array([round(float(x), 1) for x in (1 - max_principal[below] / price[pv_idx]) * 100])
+        suggestion_pv[pv_idx] = np.maximum(min_pv, recommended_raw[pv_idx])
+
+        with_pv = current_pv[idx] > 0
+        price_idx = idx[with_pv]
+        suggestion_price[price_idx] = np.rint(max_principal[with_pv] / (1 - current_pv[price_idx] / 100))
+
+    return BatchVerdict(
+        auto_decision=DECISIONS[final],
+        recommended_pv=_round_unique(recommended_raw, 1),
+        dti_suggestion_pv=suggestion_pv,
+        dti_suggestion_price=suggestion_price,
+        requires_guarantor=requires_guarantor,
+        decision_code=final,
+    )
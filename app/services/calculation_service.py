@@ -1,5 +1,11 @@
 import logging
+import math
+from bisect import bisect_right
+from dataclasses import dataclass
 from datetime import date
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Callable, Iterable
 
 from sqlalchemy.orm import Session
 
@@ -9,6 +15,10 @@ logger = logging.getLogger("app")
 
 
 _DECISION_RU = {"approved": "одобрено", "review": "на рассмотрение", "rejected": "отказ"}
+_DECISION_ORDER = {"approved": 0, "review": 1, "rejected": 2}
+
+# Категории просрочки с правилами (прочие значения — без влияния на вердикт)
+OVERDUE_CATEGORIES = ("до 30 дней", "31-60", "61-90", "90+")
 
 
 def _decision_ru(d: str) -> str:
@@ -93,47 +103,93 @@ def _worst_overdue_category(*categories: str | None) -> str | None:
     return worst
 
 
-def run_calculations(anketa: Anketa):
-    """Run all auto-calculations on the anketa."""
-    # Down payment
+def _calc_down_payment(anketa: Anketa) -> dict:
     if anketa.purchase_price and anketa.down_payment_percent:
-        anketa.down_payment_amount = round(anketa.purchase_price * anketa.down_payment_percent / 100, 2)
-        anketa.remaining_amount = round(anketa.purchase_price - anketa.down_payment_amount, 2)
-    else:
-        anketa.down_payment_amount = None
-        anketa.remaining_amount = None
+        down_payment_amount = round(anketa.purchase_price * anketa.down_payment_percent / 100, 2)
+        return {
+            "down_payment_amount": down_payment_amount,
+            "remaining_amount": round(anketa.purchase_price - down_payment_amount, 2),
+        }
+    return {"down_payment_amount": None, "remaining_amount": None}
+
 
+def _calc_monthly_payment(anketa: Anketa) -> dict:
     # Monthly payment (annuity)
     if anketa.remaining_amount and anketa.interest_rate and anketa.lease_term_months:
-        anketa.monthly_payment = round(
+        return {"monthly_payment": round(
             calc_annuity(anketa.remaining_amount, anketa.interest_rate, anketa.lease_term_months), 2
-        )
-    else:
-        anketa.monthly_payment = None
+        )}
+    return {"monthly_payment": None}
 
-    # Total monthly income
-    anketa.total_monthly_income = calc_total_monthly_income(anketa)
 
-    # DTI
+def _calc_dti(anketa: Anketa) -> dict:
     payment = anketa.monthly_payment or 0
     obligations = anketa.monthly_obligations_payment or 0
     income = anketa.total_monthly_income or 0
-    if income > 0:
-        anketa.dti = round((payment + obligations) / income * 100, 2)
-    else:
-        anketa.dti = None
+    return {"dti": round((payment + obligations) / income * 100, 2) if income > 0 else None}
 
-    # Overdue check (individual)
-    anketa.overdue_check_result = calc_overdue_check(anketa.overdue_category)
 
+def _calc_overdue_check(anketa: Anketa) -> dict:
     # For legal entities, compute combined worst overdue from company + director + guarantor
     if getattr(anketa, 'client_type', None) == "legal_entity":
-        combined_worst = _worst_overdue_category(
+        category = _worst_overdue_category(
             anketa.company_overdue_category,
             anketa.director_overdue_category,
             anketa.guarantor_overdue_category,
         )
-        anketa.overdue_check_result = calc_overdue_check(combined_worst)
+    else:
+        category = anketa.overdue_category
+    return {"overdue_check_result": calc_overdue_check(category)}
+
+
+@dataclass(frozen=True)
+class DerivedNode:
+    """Узел графа авто-расчётов: outputs считаются функцией compute из inputs."""
+    inputs: frozenset
+    outputs: tuple
+    compute: Callable[[Anketa], dict]
+
+
+# Граф авто-расчётов в топологическом порядке: узел идёт после узлов, чьи outputs он читает
+DERIVED_GRAPH = (
+    DerivedNode(frozenset({"purchase_price", "down_payment_percent"}),
+                ("down_payment_amount", "remaining_amount"), _calc_down_payment),
+    DerivedNode(frozenset({"remaining_amount", "interest_rate", "lease_term_months"}),
+                ("monthly_payment",), _calc_monthly_payment),
+    DerivedNode(frozenset({
+        "client_type",
+        "company_revenue_total", "company_revenue_period", "director_income_total", "director_income_period",
+        "total_salary", "salary_period_months", "main_activity_income", "main_activity_period",
+        "additional_income_total", "additional_income_period", "other_income_total", "other_income_period",
+    }), ("total_monthly_income",), lambda a: {"total_monthly_income": calc_total_monthly_income(a)}),
+    DerivedNode(frozenset({"monthly_payment", "monthly_obligations_payment", "total_monthly_income"}),
+                ("dti",), _calc_dti),
+    DerivedNode(frozenset({
+        "client_type", "overdue_category",
+        "company_overdue_category", "director_overdue_category", "guarantor_overdue_category",
+    }), ("overdue_check_result",), _calc_overdue_check),
+)
+
+
+def run_calculations(anketa: Anketa, changed: Iterable[str] | None = None) -> set[str]:
+    """Run auto-calculations on the anketa.
+
+    changed — изменённые поля (PATCH): пересчитываются только узлы ниже по графу, и только
+    если их вход действительно изменился. None — пересчитать всё. Запись — только
+    изменившихся значений; возвращает имена изменённых производных полей.
+    """
+    dirty = None if changed is None else set(changed)
+    updated = set()
+    for node in DERIVED_GRAPH:
+        if dirty is not None and dirty.isdisjoint(node.inputs):
+            continue
+        for field_name, value in node.compute(anketa).items():
+            if getattr(anketa, field_name) != value:
+                setattr(anketa, field_name, value)
+                updated.add(field_name)
+                if dirty is not None:
+                    dirty.add(field_name)
+    return updated
 
 
 def load_rules(db: Session) -> dict:
@@ -150,89 +206,219 @@ def load_rules(db: Session) -> dict:
     return result
 
 
-def _months_since(d: date | None) -> int | None:
-    """Calculate months since a given date until today."""
+# Классы активов кредитного отчёта, не дающие отказа (действующие / закрытые обязательства)
+STANDARD_CLASSES = {"Стандартный", "Standart", "Standard", "н/д", None}
+CLOSED_OK_CLASSES = {"Стандартный", "Standart", "Standard", "Субстандартный", "Substandart", "н/д", None}
+
+
+def _months_since(d: date | None, today: date | None = None) -> int | None:
+    """Calculate months since a given date until today (or the given date)."""
     if not d:
         return None
-    today = date.today()
+    today = today or date.today()
     months = (today.year - d.year) * 12 + (today.month - d.month)
     if today.day < d.day:
         months -= 1
     return max(months, 0)
 
 
+def _age_years(bd, today: date | None = None) -> int | None:
+    """Full years until today (or the given date); bd — date or ISO string, anything unparsable → None."""
+    if not bd:
+        return None
+    try:
+        if isinstance(bd, str):
+            bd = date.fromisoformat(bd)
+        today = today or date.today()
+        return today.year - bd.year - ((today.month, today.day) < (bd.month, bd.day))
+    except (ValueError, TypeError):
+        return None
+
+
 def _worst_decision(a: str | None, b: str | None) -> str:
     """Return the worst (most restrictive) of two decisions."""
-    order = {"approved": 0, "review": 1, "rejected": 2}
-    va = order.get(a, -1)
-    vb = order.get(b, -1)
+    va = _DECISION_ORDER.get(a, -1)
+    vb = _DECISION_ORDER.get(b, -1)
     if va >= vb:
         return a
     return b
 
 
-def _calc_overdue_decision_for_category(cat: str | None, overdue_date: date | None,
-                                         rules: dict, reasons: list, prefix: str) -> tuple[str, float, bool]:
-    """Calculate overdue decision for a single overdue category. Returns (decision, pv_add, requires_guarantor)."""
-    decision = "approved"
-    pv_add = 0.0
-    months = _months_since(overdue_date)
+@dataclass(frozen=True)
+class OverdueCell:
+    """Итог правил просрочки для (категория, корзина давности).
 
-    requires_guarantor = False
+    reason — шаблон причины (текст до давности, текст после или None, если давность не
+    пишется); строка собирается только в explain().
+    """
+    decision: str
+    pv_add: float = 0.0
+    requires_guarantor: bool = False
+    reason: tuple[str, str | None] | None = None
+
+    @property
+    def rank(self) -> int:
+        return _DECISION_ORDER.get(self.decision, -1)
+
+    def explain(self, prefix: str, months: int | None) -> str | None:
+        if self.reason is None:
+            return None
+        head, tail = self.reason
+        if tail is None:
+            return prefix + head
+        m_str = f"{months} мес" if months is not None else "нет даты"
+        return f"{prefix}{head}{m_str}{tail}"
+
+
+_NO_OVERDUE = OverdueCell("approved")
 
-    if cat and cat != "до 30 дней":
-        if cat == "31-60":
-            near = rules.get("overdue_31_60_threshold_near", 6)
-            far = rules.get("overdue_31_60_threshold_far", 12)
-            if months is not None and months < near:
-                decision = rules.get("overdue_31_60_lt_near_result", "rejected")
-                reasons.append(f"{prefix}Просрочка 31-60, давность {months} мес < {near} мес — {_decision_ru(decision)}")
-            elif months is not None and months <= far:
-                decision = rules.get("overdue_31_60_near_to_far_result", "review")
-                pv_add += rules.get("overdue_31_60_near_to_far_pv_add", 5)
-                reasons.append(f"{prefix}Просрочка 31-60, давность {months} мес ({near}–{far}) — {_decision_ru(decision)}, ПВ +{rules.get('overdue_31_60_near_to_far_pv_add', 5)}%")
-            else:
-                # Документ: 31-60 > 12 мес → одобрено без ПВ
-                decision = rules.get("overdue_31_60_gt_far_result", "approved")
-                pv_add += rules.get("overdue_31_60_gt_far_pv_add", 0)
-                m_str = f"{months} мес" if months is not None else "нет даты"
-                reasons.append(f"{prefix}Просрочка 31-60, давность {m_str} > {far} мес — {_decision_ru(decision)}")
-        elif cat == "61-90":
-            threshold = rules.get("overdue_61_90_threshold", 12)
-            if months is not None and months > threshold:
-                # Документ: 61-90 > 12 мес → одобрено + ПВ +10%
-                decision = rules.get("overdue_61_90_gt_result", "approved")
-                pv_add += rules.get("overdue_61_90_gt_pv_add", 10)
-                reasons.append(f"{prefix}Просрочка 61-90, давность {months} мес > {threshold} мес — {_decision_ru(decision)}, ПВ +{rules.get('overdue_61_90_gt_pv_add', 10):.0f}%")
-            else:
-                decision = rules.get("overdue_61_90_lte_result", "rejected")
-                m_str = f"{months} мес" if months is not None else "нет даты"
-                reasons.append(f"{prefix}Просрочка 61-90, давность {m_str} ≤ {threshold} мес — {_decision_ru(decision)}")
-        elif cat == "90+":
-            threshold = rules.get("overdue_90plus_threshold", 24)
-            if months is not None and months > threshold:
-                # Документ: 90+ > 24 мес → на рассмотрение + ПВ +20% + обязательный поручитель
-                decision = rules.get("overdue_90plus_gt_result", "review")
-                pv_add += rules.get("overdue_90plus_gt_pv_add", 20)
-                requires_guarantor = True
-                reasons.append(f"{prefix}Просрочка 90+, давность {months} мес > {threshold} мес — {_decision_ru(decision)}, ПВ +{rules.get('overdue_90plus_gt_pv_add', 20):.0f}%, обязательный поручитель")
-            else:
-                decision = rules.get("overdue_90plus_lte_result", "rejected")
-                m_str = f"{months} мес" if months is not None else "нет даты"
-                reasons.append(f"{prefix}Просрочка 90+, давность {m_str} ≤ {threshold} мес — {_decision_ru(decision)}")
-    elif cat == "до 30 дней":
+
+def _overdue_cell(cat: str, months: int | None, rules: dict) -> OverdueCell:
+    """Правила просрочки для одной категории и давности (в месяцах, None — нет даты)."""
+    if cat == "до 30 дней":
         decision = rules.get("overdue_30_result", "approved")
-        reasons.append(f"{prefix}Просрочка до 30 дней — {_decision_ru(decision)}")
+        return OverdueCell(decision, reason=(f"Просрочка до 30 дней — {_decision_ru(decision)}", None))
+    if cat == "31-60":
+        near = rules.get("overdue_31_60_threshold_near", 6)
+        far = rules.get("overdue_31_60_threshold_far", 12)
+        head = "Просрочка 31-60, давность "
+        if months is not None and months < near:
+            decision = rules.get("overdue_31_60_lt_near_result", "rejected")
+            return OverdueCell(decision, reason=(head, f" < {near} мес — {_decision_ru(decision)}"))
+        if months is not None and months <= far:
+            decision = rules.get("overdue_31_60_near_to_far_result", "review")
+            add = rules.get("overdue_31_60_near_to_far_pv_add", 5)
+            return OverdueCell(decision, 0.0 + add,
+                               reason=(head, f" ({near}–{far}) — {_decision_ru(decision)}, ПВ +{add}%"))
+        # Документ: 31-60 > 12 мес → одобрено без ПВ
+        decision = rules.get("overdue_31_60_gt_far_result", "approved")
+        return OverdueCell(decision, 0.0 + rules.get("overdue_31_60_gt_far_pv_add", 0),
+                           reason=(head, f" > {far} мес — {_decision_ru(decision)}"))
+    if cat == "61-90":
+        threshold = rules.get("overdue_61_90_threshold", 12)
+        head = "Просрочка 61-90, давность "
+        if months is not None and months > threshold:
+            # Документ: 61-90 > 12 мес → одобрено + ПВ +10%
+            decision = rules.get("overdue_61_90_gt_result", "approved")
+            add = rules.get("overdue_61_90_gt_pv_add", 10)
+            return OverdueCell(decision, 0.0 + add,
+                               reason=(head, f" > {threshold} мес — {_decision_ru(decision)}, ПВ +{add:.0f}%"))
+        decision = rules.get("overdue_61_90_lte_result", "rejected")
+        return OverdueCell(decision, reason=(head, f" ≤ {threshold} мес — {_decision_ru(decision)}"))
+    if cat == "90+":
+        threshold = rules.get("overdue_90plus_threshold", 24)
+        head = "Просрочка 90+, давность "
+        if months is not None and months > threshold:
+            # Документ: 90+ > 24 мес → на рассмотрение + ПВ +20% + обязательный поручитель
+            decision = rules.get("overdue_90plus_gt_result", "review")
+            add = rules.get("overdue_90plus_gt_pv_add", 20)
+            return OverdueCell(decision, 0.0 + add, True, reason=(
+                head, f" > {threshold} мес — {_decision_ru(decision)}, ПВ +{add:.0f}%, обязательный поручитель"))
+        decision = rules.get("overdue_90plus_lte_result", "rejected")
+        return OverdueCell(decision, reason=(head, f" ≤ {threshold} мес — {_decision_ru(decision)}"))
+    return _NO_OVERDUE
+
+
+def _month_edges(cat: str, rules: dict) -> tuple[int, ...]:
+    """Давности (мес), с которых меняется ячейка категории: пороги «<», «<=» и «>» в целых месяцах."""
+    if cat == "31-60":
+        bounds = [math.ceil(rules.get("overdue_31_60_threshold_near", 6)),
+                  math.floor(rules.get("overdue_31_60_threshold_far", 12)) + 1]
+    elif cat == "61-90":
+        bounds = [math.floor(rules.get("overdue_61_90_threshold", 12)) + 1]
+    elif cat == "90+":
+        bounds = [math.floor(rules.get("overdue_90plus_threshold", 24)) + 1]
+    else:
+        bounds = []
+    return tuple(sorted({b for b in bounds if b > 0}))
+
+
+class OverdueMatrix:
+    """Правила просрочки, скомпилированные в таблицу (категория, корзина давности) -> OverdueCell.
+
+    table[категория] = (границы корзин, ячейки корзин, ячейка «нет даты»); корзина i —
+    давность в [границы[i-1], границы[i]). Ячейка каждой корзины вычисляется один раз
+    через _overdue_cell на её нижней границе — пороги целочисленные, внутри корзины итог тот же.
+    """
+
+    def __init__(self, rules: dict):
+        table = {}
+        for cat in OVERDUE_CATEGORIES:
+            edges = _month_edges(cat, rules)
+            cells = tuple(_overdue_cell(cat, m, rules) for m in (0,) + edges)
+            table[cat] = (edges, cells, _overdue_cell(cat, None, rules))
+        self.table = MappingProxyType(table)
+
+    def lookup(self, cat: str | None, months: int | None) -> OverdueCell:
+        entry = self.table.get(cat)
+        if entry is None:
+            return _NO_OVERDUE
+        edges, cells, no_date = entry
+        if months is None:
+            return no_date
+        return cells[bisect_right(edges, months)]
+
+
+# Правила, которые читает _overdue_cell — ключ кэша скомпилированных матриц
+OVERDUE_RULE_KEYS = (
+    "overdue_30_result",
+    "overdue_31_60_threshold_near", "overdue_31_60_threshold_far", "overdue_31_60_lt_near_result",
+    "overdue_31_60_near_to_far_result", "overdue_31_60_near_to_far_pv_add",
+    "overdue_31_60_gt_far_result", "overdue_31_60_gt_far_pv_add",
+    "overdue_61_90_threshold", "overdue_61_90_gt_result", "overdue_61_90_gt_pv_add", "overdue_61_90_lte_result",
+    "overdue_90plus_threshold", "overdue_90plus_gt_result", "overdue_90plus_gt_pv_add", "overdue_90plus_lte_result",
+)
+_MISSING = object()
+
+
+def _overdue_rules_key(rules: dict) -> tuple:
+    return tuple(rules.get(k, _MISSING) for k in OVERDUE_RULE_KEYS)
 
-    return decision, pv_add, requires_guarantor
+
+@lru_cache(maxsize=32)
+def _compile_overdue_matrix(key: tuple) -> OverdueMatrix:
+    return OverdueMatrix({k: v for k, v in zip(OVERDUE_RULE_KEYS, key) if v is not _MISSING})
+
+
+def overdue_matrix(rules: dict) -> OverdueMatrix:
+    """Матрица для набора правил; компилируется один раз на уникальные значения overdue_*."""
+    return _compile_overdue_matrix(_overdue_rules_key(rules))
+
+
+class _Reasons(list):
+    """Причины вердикта; строка форматируется, только если причины нужны (explain)."""
+
+    def __init__(self, explain: bool):
+        super().__init__()
+        self.explain = explain
+
+    def add(self, template: str, *args):
+        if self.explain:
+            self.append(template.format(*args))
+
+
+def _calc_overdue_decision_for_category(matrix: OverdueMatrix, cat: str | None, overdue_date: date | None,
+                                         reasons: _Reasons, prefix: str) -> tuple[str, float, bool]:
+    """Calculate overdue decision for a single overdue category. Returns (decision, pv_add, requires_guarantor)."""
+    if cat not in matrix.table:
+        return _NO_OVERDUE.decision, _NO_OVERDUE.pv_add, _NO_OVERDUE.requires_guarantor
+    months = _months_since(overdue_date)
+    cell = matrix.lookup(cat, months)
+    if reasons.explain:
+        reasons.append(cell.explain(prefix, months))
+    return cell.decision, cell.pv_add, cell.requires_guarantor
 
 
-def calc_auto_verdict(anketa: Anketa, rules: dict, risk_rules: list | None = None) -> dict:
+def calc_auto_verdict(anketa: Anketa, rules: dict, risk_rules: list | None = None,
+                      overdue: OverdueMatrix | None = None, with_reasons: bool = True) -> dict:
     """Calculate automatic underwriting verdict based on rules.
 
     risk_rules: list of dicts {"category": "E", "min_pv": 20.0} from RiskRule table.
+    overdue: compiled overdue rules (rules_cache snapshot); compiled from rules if omitted.
+    with_reasons=False: reason strings are not formatted, auto_decision_reasons is [].
     """
-    reasons = []
+    overdue = overdue or overdue_matrix(rules)
+    reasons = _Reasons(with_reasons)
     pv_add = 0.0
 
     # --- DTI check ---
@@ -244,15 +430,15 @@ def calc_auto_verdict(anketa: Anketa, rules: dict, risk_rules: list | None = Non
     if dti is not None:
         if dti <= max_approve:
             dti_decision = "approved"
-            reasons.append(f"DTI {dti:.1f}% ≤ {max_approve}% — одобрено")
+            reasons.add("DTI {:.1f}% ≤ {}% — одобрено", dti, max_approve)
         elif dti <= max_review:
             dti_decision = "review"
-            reasons.append(f"DTI {dti:.1f}% > {max_approve}%, ≤ {max_review}% — на рассмотрение")
+            reasons.add("DTI {:.1f}% > {}%, ≤ {}% — на рассмотрение", dti, max_approve, max_review)
         else:
             dti_decision = "rejected"
-            reasons.append(f"DTI {dti:.1f}% > {max_review}% — отказ")
+            reasons.add("DTI {:.1f}% > {}% — отказ", dti, max_review)
     else:
-        reasons.append("DTI не рассчитан")
+        reasons.add("DTI не рассчитан")
 
     # --- Overdue check ---
     is_legal = getattr(anketa, 'client_type', None) == "legal_entity"
@@ -266,8 +452,8 @@ def calc_auto_verdict(anketa: Anketa, rules: dict, risk_rules: list | None = Non
 
         # Company overdue
         comp_decision, comp_pv, comp_guar = _calc_overdue_decision_for_category(
-            anketa.company_overdue_category, anketa.company_last_overdue_date,
-            rules, reasons, "[Компания] "
+            overdue, anketa.company_overdue_category, anketa.company_last_overdue_date,
+            reasons, "[Компания] "
         )
         pv_add += comp_pv
         requires_guarantor = requires_guarantor or comp_guar
@@ -275,8 +461,8 @@ def calc_auto_verdict(anketa: Anketa, rules: dict, risk_rules: list | None = Non
 
         # Director overdue
         dir_decision, dir_pv, dir_guar = _calc_overdue_decision_for_category(
-            anketa.director_overdue_category, anketa.director_last_overdue_date,
-            rules, reasons, "[Директор] "
+            overdue, anketa.director_overdue_category, anketa.director_last_overdue_date,
+            reasons, "[Директор] "
         )
         pv_add += dir_pv
         requires_guarantor = requires_guarantor or dir_guar
@@ -284,8 +470,8 @@ def calc_auto_verdict(anketa: Anketa, rules: dict, risk_rules: list | None = Non
 
         # Guarantor overdue
         guar_decision, guar_pv, guar_guar = _calc_overdue_decision_for_category(
-            anketa.guarantor_overdue_category, anketa.guarantor_last_overdue_date,
-            rules, reasons, "[Поручитель] "
+            overdue, anketa.guarantor_overdue_category, anketa.guarantor_last_overdue_date,
+            reasons, "[Поручитель] "
         )
         pv_add += guar_pv
         overdue_decision = _worst_decision(overdue_decision, guar_decision)
@@ -293,8 +479,8 @@ def calc_auto_verdict(anketa: Anketa, rules: dict, risk_rules: list | None = Non
     else:
         # Individual: use same function
         overdue_decision, ind_pv, ind_guar = _calc_overdue_decision_for_category(
-            anketa.overdue_category, anketa.last_overdue_date,
-            rules, reasons, ""
+            overdue, anketa.overdue_category, anketa.last_overdue_date,
+            reasons, ""
         )
         pv_add += ind_pv
         requires_guarantor = requires_guarantor or ind_guar
@@ -304,72 +490,63 @@ def calc_auto_verdict(anketa: Anketa, rules: dict, risk_rules: list | None = Non
     current_overdue_amt = getattr(anketa, 'current_overdue_amount', None)
     if current_overdue_amt and current_overdue_amt > 0:
         current_overdue_decision = rules.get("current_overdue_result", "rejected")
-        reasons.append(f"Текущая просрочка {current_overdue_amt:,.0f} сум — {_decision_ru(current_overdue_decision)}")
+        reasons.add("Текущая просрочка {:,.0f} сум — {}", current_overdue_amt, _decision_ru(current_overdue_decision))
 
     # --- Credit report: systematic overdue ---
     systematic_decision = "approved"
     if getattr(anketa, 'systematic_overdue', False):
         systematic_decision = rules.get("systematic_overdue_result", "rejected")
-        reasons.append(f"Систематическая просрочка (3+ эпизодов 31+ дней за 12 мес) — {_decision_ru(systematic_decision)}")
+        reasons.add("Систематическая просрочка (3+ эпизодов 31+ дней за 12 мес) — {}", _decision_ru(systematic_decision))
 
     # --- Credit report: worst active classification ---
     # Документ: если по действующим обязательствам классификация ниже "Стандартный" → отказ
     classification_decision = "approved"
     worst_class = getattr(anketa, 'worst_active_classification', None)
-    STANDARD_CLASSES = {"Стандартный", "Standart", "Standard", "н/д", None}
     if worst_class and worst_class not in STANDARD_CLASSES:
         classification_decision = rules.get("bad_classification_result", "rejected")
-        reasons.append(f"Класс активов (действующие): {worst_class} — {_decision_ru(classification_decision)}")
+        reasons.add("Класс активов (действующие): {} — {}", worst_class, _decision_ru(classification_decision))
 
     # --- Credit report: worst closed classification ---
     # Документ: если по закрытым обязательствам ниже "Субстандартный" → отказ
     closed_classification_decision = "approved"
     closed_class = getattr(anketa, 'worst_closed_classification', None)
-    CLOSED_OK_CLASSES = {"Стандартный", "Standart", "Standard", "Субстандартный", "Substandart", "н/д", None}
     if closed_class and closed_class not in CLOSED_OK_CLASSES:
         closed_classification_decision = rules.get("closed_classification_result", "rejected")
-        reasons.append(f"Класс активов (закрытые): {closed_class} — {_decision_ru(closed_classification_decision)}")
+        reasons.add("Класс активов (закрытые): {} — {}", closed_class, _decision_ru(closed_classification_decision))
 
     # --- Credit report: lombard ---
     # Документ: наличие ломбардных обязательств → автоматический отказ
     lombard_decision = "approved"
     if getattr(anketa, 'has_lombard', False):
         lombard_decision = rules.get("lombard_result", "rejected")
-        reasons.append(f"Ломбардные обязательства — {_decision_ru(lombard_decision)}")
+        reasons.add("Ломбардные обязательства — {}", _decision_ru(lombard_decision))
 
     # --- Scoring class D/E → auto reject ---
     scoring_class_decision = "approved"
     sc = getattr(anketa, 'scoring_class', None)
     if sc and sc.upper() in ("D", "E"):
         scoring_class_decision = rules.get("scoring_class_de_result", "rejected")
-        reasons.append(f"Скоринговый класс {sc.upper()} — {_decision_ru(scoring_class_decision)}")
+        reasons.add("Скоринговый класс {} — {}", sc.upper(), _decision_ru(scoring_class_decision))
 
     # --- Age check ---
     min_age = rules.get("min_age", 21)
     max_age = rules.get("max_age", 65)
     age_decision = "approved"
-    bd = getattr(anketa, 'birth_date', None)
-    if bd:
-        try:
-            if isinstance(bd, str):
-                bd = date.fromisoformat(bd)
-            today = date.today()
-            age = today.year - bd.year - ((today.month, today.day) < (bd.month, bd.day))
-            if age < min_age:
-                age_decision = "rejected"
-                reasons.append(f"Возраст {age} лет < {min_age} — отказ")
-            elif age > max_age:
-                age_decision = "rejected"
-                reasons.append(f"Возраст {age} лет > {max_age} — отказ")
-        except (ValueError, TypeError):
-            pass
+    age = _age_years(getattr(anketa, 'birth_date', None))
+    if age is not None:
+        if age < min_age:
+            age_decision = "rejected"
+            reasons.add("Возраст {} лет < {} — отказ", age, min_age)
+        elif age > max_age:
+            age_decision = "rejected"
+            reasons.add("Возраст {} лет > {} — отказ", age, max_age)
 
     # --- Open applications in last 10 days ---
     open_apps_decision = "approved"
     open_apps_count = getattr(anketa, 'open_applications_count', None)
     if open_apps_count and open_apps_count > 0:
         open_apps_decision = rules.get("open_apps_result", "review")
-        reasons.append(f"Открытые заявки за 10 дней: {open_apps_count} — {_decision_ru(open_apps_decision)}")
+        reasons.add("Открытые заявки за 10 дней: {} — {}", open_apps_count, _decision_ru(open_apps_decision))
 
     # --- Final decision = worst of all checks ---
     final = _worst_decision(dti_decision, overdue_decision)
@@ -392,12 +569,12 @@ def calc_auto_verdict(anketa: Anketa, rules: dict, risk_rules: list | None = Non
         matched = next((r for r in risk_rules if r["category"].lower() == grade.lower()), None)
         if matched and matched["min_pv"] > base_pv:
             base_pv = matched["min_pv"]
-            reasons.append(f"Риск-грейд {grade} — мин. ПВ {base_pv:.0f}%")
+            reasons.add("Риск-грейд {} — мин. ПВ {:.0f}%", grade, base_pv)
 
     current_pv = anketa.down_payment_percent or 0
     recommended_pv = base_pv + pv_add
     if current_pv < recommended_pv:
-        reasons.append(f"Текущий ПВ {current_pv:.0f}% ниже рекомендуемого {recommended_pv:.0f}%")
+        reasons.add("Текущий ПВ {:.0f}% ниже рекомендуемого {:.0f}%", current_pv, recommended_pv)
 
     # --- DTI suggestions: if DTI > threshold, suggest min PV or max car price ---
     dti_suggestion_pv = None
@@ -417,12 +594,12 @@ def calc_auto_verdict(anketa: Anketa, rules: dict, risk_rules: list | None = Non
                 min_pv_for_dti = round((1 - max_principal / price) * 100, 1)
                 min_pv_for_dti = max(min_pv_for_dti, recommended_pv)
                 dti_suggestion_pv = min_pv_for_dti
-                reasons.append(f"Для DTI ≤ {max_approve}%: увеличьте ПВ до {min_pv_for_dti:.0f}%")
+                reasons.add("Для DTI ≤ {}%: увеличьте ПВ до {:.0f}%", max_approve, min_pv_for_dti)
             # Max car price for DTI ≤ 50% at current PV%
             if current_pv > 0:
                 max_price = max_principal / (1 - current_pv / 100)
                 dti_suggestion_price = round(max_price)
-                reasons.append(f"Или выберите авто до {max_price:,.0f} сум при ПВ {current_pv:.0f}%")
+                reasons.add("Или выберите авто до {:,.0f} сум при ПВ {:.0f}%", max_price, current_pv)
 
     logger.info(
         "Авто-вердикт для анкеты #%s: %s, DTI=%.1f%%",
@@ -431,7 +608,7 @@ def calc_auto_verdict(anketa: Anketa, rules: dict, risk_rules: list | None = Non
 
     return {
         "auto_decision": final,
-        "auto_decision_reasons": reasons,
+        "auto_decision_reasons": list(reasons),
         "recommended_pv": round(recommended_pv, 1),
         "dti_suggestion_pv": dti_suggestion_pv,
         "dti_suggestion_price": dti_suggestion_price,
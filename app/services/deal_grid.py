@@ -0,0 +1,97 @@
+"""Сетка структуры сделки для калькулятора: все комбинации ПВ × срок × ставка сразу.
+
+Для каждой ячейки — ежемесячный платёж, DTI и полоса вердикта по DTI (max_dti_approve /
+max_dti_review из кэша правил). Сетка считается одним broadcast NumPy (ось ПВ × ось срока ×
+ось ставки), округления — как в run_calculations: ПВ и остаток до копеек, платёж до копеек,
+DTI до 0.01.
+
+Граница допустимых сделок (DTI ≤ max_dti_approve) — в замкнутой форме, как DTI-подсказки
+calc_auto_verdict: минимальный ПВ% для каждого (срок, ставка) и максимальная стоимость авто
+для каждого (ПВ, срок, ставка). Если доход не покрывает обязательства — границы нет (None).
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.services.schedule_service import annuity_payment, max_principal
+
+# Полосы вердикта по DTI; band в сетке — индекс в этом кортеже
+BANDS = ("approved", "review", "rejected")
+
+
+def grid_axis(start: float, stop: float, step: float) -> np.ndarray:
+    """Значения оси start..stop включительно с шагом step."""
+    count = int(np.floor((stop - start) / step + 1e-9)) + 1
+    return np.round(start + step * np.arange(max(count, 0)), 6)
+
+
+def _nullable(values: np.ndarray) -> list:
+    """Массив → вложенные списки, NaN → None."""
+    return np.where(np.isnan(values), None, values).tolist()
+
+
+@dataclass
+class DealGrid:
+    """Оси и значения сетки; трёхмерные массивы — [ПВ, срок, ставка]."""
+    pv: np.ndarray
+    term: np.ndarray
+    rate: np.ndarray
+    principal: np.ndarray        # [ПВ]
+    monthly_payment: np.ndarray
+    dti: np.ndarray
+    band: np.ndarray             # индексы BANDS
+    min_pv: np.ndarray           # [срок, ставка], NaN — недостижимо
+    max_price: np.ndarray        # NaN — недостижимо
+    max_dti_approve: float
+    max_dti_review: float
+
+    @property
+    def cells(self) -> int:
+        return self.band.size
+
+    def to_dict(self) -> dict:
+        counts = np.bincount(self.band.ravel(), minlength=len(BANDS))
+        return {
+            "axes": {"pv": self.pv.tolist(), "term": self.term.astype(int).tolist(), "rate": self.rate.tolist()},
+            "thresholds": {"max_dti_approve": self.max_dti_approve, "max_dti_review": self.max_dti_review},
+            "bands": list(BANDS),
+            "counts": {b: int(c) for b, c in zip(BANDS, counts)},
+            "principal": self.principal.tolist(),
+            "monthly_payment": self.monthly_payment.tolist(),
+            "dti": self.dti.tolist(),
+            "band": self.band.tolist(),
+            "frontier": {
+                "min_pv": _nullable(self.min_pv),
+                "max_price": _nullable(self.max_price),
+            },
+        }
+
+
+def deal_grid(price: float, income: float, obligations: float,
+              pv: np.ndarray, term: np.ndarray, rate: np.ndarray, rules: dict) -> DealGrid:
+    """Сетка для стоимости price и дохода / обязательств клиента в месяц (income > 0)."""
+    pv, term, rate = (np.asarray(a, dtype=float) for a in (pv, term, rate))
+    max_approve = rules.get("max_dti_approve", 50)
+    max_review = rules.get("max_dti_review", 60)
+
+    principal = np.round(price - np.round(price * pv / 100, 2), 2)
+    payment = np.round(annuity_payment(principal[:, None, None], rate[None, None, :], term[None, :, None]), 2)
+    dti = np.round((payment + obligations) / income * 100, 2)
+    band = np.where(dti <= max_approve, 0, np.where(dti <= max_review, 1, 2)).astype(np.int8)
+
+    max_payment = income * max_approve / 100 - obligations
+    if max_payment > 0:
+        limit = max_principal(rate[None, :], term[:, None], max_payment)   # [срок, ставка]
+        # Вверх до 0.1%: при ПВ = min_pv DTI уже проходит
+        min_pv = np.ceil(np.round(np.maximum(1 - limit / price, 0) * 1000, 6)) / 10
+        min_pv = np.where(min_pv < 100, min_pv, np.nan)
+        max_price = np.floor(limit[None, :, :] / (1 - pv[:, None, None] / 100))
+    else:
+        min_pv = np.full((len(term), len(rate)), np.nan)
+        max_price = np.full(band.shape, np.nan)
+
+    return DealGrid(
+        pv=pv, term=term, rate=rate, principal=principal, monthly_payment=payment, dti=dti, band=band,
+        min_pv=min_pv, max_price=max_price, max_dti_approve=max_approve, max_dti_review=max_review,
+    )
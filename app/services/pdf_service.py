@@ -6,6 +6,8 @@ from datetime import date, datetime
 
 from jinja2 import Environment, FileSystemLoader
 
+from app.services.schedule_service import anketa_schedule
+
 _TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates")
 _env = Environment(loader=FileSystemLoader(_TEMPLATES_DIR), autoescape=True)
 
@@ -51,16 +53,8 @@ def _fmt_datetime(value) -> str:
     return str(value)
 
 
-def generate_anketa_pdf(anketa, creator, concluder=None) -> bytes:
-    """Генерирует PDF байты из анкеты.
-
-    Args:
-        anketa: объект Anketa (SQLAlchemy model)
-        creator: объект User — создатель анкеты
-        concluder: объект User | None — кто заключил анкету
-    Returns:
-        bytes — содержимое PDF
-    """
+def render_anketa_html(anketa, creator, concluder=None) -> str:
+    """HTML анкеты для PDF (аргументы — как у generate_anketa_pdf)."""
     # Парсим причины авто-вердикта из JSON
     auto_reasons = []
     if anketa.auto_decision_reasons:
@@ -74,8 +68,11 @@ def generate_anketa_pdf(anketa, creator, concluder=None) -> bytes:
     next_section = 9 if is_legal else 5
     next_section_conclusion = next_section + 1 if anketa.auto_decision else next_section
 
+    # Приложение: график платежей по условиям сделки
+    sched = anketa_schedule(anketa)
+
     template = _env.get_template("anketa_pdf.html")
-    html_content = template.render(
+    return template.render(
         anketa=anketa,
         creator=creator,
         concluder_name=concluder.full_name if concluder else "—",
@@ -91,8 +88,23 @@ def generate_anketa_pdf(anketa, creator, concluder=None) -> bytes:
         next_section_conclusion=next_section_conclusion,
         fmt_number=_fmt_number,
         fmt_date=_fmt_date,
+        schedule=sched.summary() if sched else None,
+        schedule_rows=sched.rows() if sched else [],
     )
 
+
+def generate_anketa_pdf(anketa, creator, concluder=None) -> bytes:
+    """Генерирует PDF байты из анкеты.
+
+    Args:
+        anketa: объект Anketa (SQLAlchemy model)
+        creator: объект User — создатель анкеты
+        concluder: объект User | None — кто заключил анкету
+    Returns:
+        bytes — содержимое PDF
+    """
+    html_content = render_anketa_html(anketa, creator, concluder)
+
     from weasyprint import HTML
     pdf_bytes = HTML(string=html_content).write_pdf()
     return pdf_bytes
@@ -0,0 +1,291 @@
+"""Фоновый пересчёт авто-вердикта по портфелю после правки правил.
+
+Задание (rescore_jobs) идёт по сохранённым анкетам (SNAPSHOT_CRITERIA) пачками по
+RESCORE_BATCH_SIZE (500) в порядке id. Пачка — один короткий запрос Row-кортежей RESCORE_VIEW
+(id > last_id ORDER BY id LIMIT n), без ORM-объектов; анкеты, у которых verdict_fingerprint
+совпадает с текущим (is_verdict_current), пропускаются. Остальные — calc_auto_verdict и один
+executemany UPDATE на пачку; UPDATE условный по прежнему отпечатку, так что сохранение анкеты
+во время пересчёта не перетирается. Checkpoint (last_id и счётчики) коммитится вместе с пачкой:
+после рестарта задание продолжается со следующей анкеты.
+
+Троттлинг — RESCORE_DUTY_CYCLE (0.5): после пачки, занявшей t секунд, пауза t * (1/duty - 1),
+то есть пересчёт занимает БД не больше половины времени. Правила сменились посреди задания —
+пересчёт начинается заново с начала портфеля (уже актуальные анкеты просто пропускаются).
+
+Задание выполняется в потоке того воркера, который его запустил. Воркер отмечает heartbeat_at
+на каждой пачке; при старте приложения (resume_rescore_jobs) незавершённые задания с
+heartbeat старше RESCORE_STALE_AFTER секунд (120) подхватываются — захват атомарным UPDATE,
+поэтому при нескольких воркерах задание выполняет только один.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import bindparam, case, func, or_, update
+from sqlalchemy.orm import Session
+
+from app.database import Anketa, RescoreJob
+from app.rules_cache import rules_cache
+from app.services.anketa_views import RESCORE_VIEW, select_view
+from app.services.calculation_service import calc_auto_verdict
+from app.services.rule_simulation import SNAPSHOT_CRITERIA
+from app.services.verdict_memo import verdict_fingerprint
+
+logger = logging.getLogger("app")
+
+RESCORE_BATCH_SIZE = int(os.getenv("RESCORE_BATCH_SIZE", "500"))
+# Доля времени, которую пересчёт занимает БД (1 — без пауз)
+RESCORE_DUTY_CYCLE = float(os.getenv("RESCORE_DUTY_CYCLE", "0.5"))
+# Без heartbeat дольше этого задание считается брошенным и подхватывается при старте
+RESCORE_STALE_AFTER = int(os.getenv("RESCORE_STALE_AFTER", "120"))
+
+ACTIVE_STATUSES = ("pending", "running", "cancelling")
+
+_shutdown = threading.Event()
+_threads: dict[int, threading.Thread] = {}
+_threads_lock = threading.Lock()
+
+
+class _QuietVerdictLog(logging.Filter):
+    """В потоке пересчёта построчный лог calc_auto_verdict не пишется — итог задания логируется отдельно."""
+    local = threading.local()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not (record.funcName == "calc_auto_verdict" and getattr(self.local, "quiet", False))
+
+
+logger.addFilter(_QuietVerdictLog())
+
+_anketas = Anketa.__table__
+_UPDATE_VERDICT = (
+    update(_anketas)
+    .where(
+        _anketas.c.id == bindparam("b_id"),
+        # Анкету пересохранили во время пачки — её вердикт уже свежий
+        func.coalesce(_anketas.c.verdict_fingerprint, "") == bindparam("b_old_fingerprint"),
+    )
+    .values(
+        auto_decision=bindparam("b_decision"),
+        recommended_pv=bindparam("b_pv"),
+        auto_decision_reasons=bindparam("b_reasons"),
+        verdict_fingerprint=bindparam("b_fingerprint"),
+    )
+)
+
+
+def _utcnow() -> datetime:
+    # Колонки DateTime без зоны: naive UTC, чтобы сравнения heartbeat не зависели от драйвера
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _portfolio_size(db: Session) -> int:
+    return db.query(func.count(Anketa.id)).filter(*SNAPSHOT_CRITERIA).scalar() or 0
+
+
+def active_job(db: Session) -> RescoreJob | None:
+    return db.query(RescoreJob).filter(RescoreJob.status.in_(ACTIVE_STATUSES)).order_by(RescoreJob.id).first()
+
+
+def create_job(db: Session, user_id: int | None) -> RescoreJob:
+    job = RescoreJob(status="pending", requested_by=user_id, rules_version=rules_cache.get(db).version,
+                     last_id=0, total=_portfolio_size(db), processed=0, changed=0, skipped=0)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def cancel_job(db: Session, job: RescoreJob):
+    """Ещё не захваченное задание отменяется сразу, выполняющееся — после текущей пачки."""
+    if job.status == "pending" and job.heartbeat_at is None:
+        _finish(db, job, "cancelled")
+    elif job.status in ("pending", "running"):
+        job.status = "cancelling"
+        db.commit()
+    db.refresh(job)
+
+
+def _claim(db: Session, job_id: int) -> bool:
+    """Захватить задание: True, если его никто не выполняет (heartbeat пуст или устарел)."""
+    now = _utcnow()
+    claimed = db.execute(
+        update(RescoreJob)
+        .where(
+            RescoreJob.id == job_id,
+            RescoreJob.status.in_(ACTIVE_STATUSES),
+            or_(RescoreJob.heartbeat_at.is_(None), RescoreJob.heartbeat_at < now - timedelta(seconds=RESCORE_STALE_AFTER)),
+        )
+        .values(
+            status=case((RescoreJob.status == "cancelling", "cancelling"), else_="running"),
+            started_at=func.coalesce(RescoreJob.started_at, now),
+            heartbeat_at=now,
+        )
+    ).rowcount
+    db.commit()
+    return claimed == 1
+
+
+def _rescore_batch(db: Session, job: RescoreJob, batch_size: int) -> int:
+    """Пересчитать следующую пачку после job.last_id; возвращает число прочитанных анкет."""
+    rules = rules_cache.get(db)
+    if rules.version != job.rules_version:
+        logger.info("Пересчёт #%d: правила изменились (v%s -> v%d), начинаем с начала портфеля",
+                    job.id, job.rules_version, rules.version)
+        job.rules_version, job.last_id, job.total = rules.version, 0, _portfolio_size(db)
+        job.processed = job.changed = job.skipped = 0
+
+    rows = (select_view(db, RESCORE_VIEW)
+            .filter(Anketa.id > job.last_id, *SNAPSHOT_CRITERIA)
+            .order_by(Anketa.id).limit(batch_size).all())
+    params, changed = [], 0
+    for row in rows:
+        fingerprint = verdict_fingerprint(row, rules.version)
+        if fingerprint == row.verdict_fingerprint:
+            continue
+        verdict = calc_auto_verdict(row, rules.rules, risk_rules=rules.risk_rules, overdue=rules.overdue)
+        reasons = json.dumps(verdict["auto_decision_reasons"], ensure_ascii=False)
+        if (verdict["auto_decision"], verdict["recommended_pv"], reasons) != \
+                (row.auto_decision, row.recommended_pv, row.auto_decision_reasons):
+            changed += 1
+        params.append({
+            "b_id": row.id, "b_old_fingerprint": row.verdict_fingerprint or "",
+            "b_decision": verdict["auto_decision"], "b_pv": verdict["recommended_pv"],
+            "b_reasons": reasons, "b_fingerprint": fingerprint,
+        })
+    if params:
+        db.execute(_UPDATE_VERDICT, params)
+
+    if rows:
+        job.last_id = rows[-1].id
+    job.processed += len(rows)
+    job.changed += changed
+    job.skipped += len(rows) - len(params)
+    job.heartbeat_at = _utcnow()
+    db.commit()
+    return len(rows)
+
+
+def _finish(db: Session, job: RescoreJob, status: str, error: str | None = None):
+    job.status, job.error = status, error
+    job.heartbeat_at = None
+    job.finished_at = _utcnow()
+    db.commit()
+
+
+def run_rescore_job(engine, job_id: int, batch_size: int = RESCORE_BATCH_SIZE,
+                    duty_cycle: float = RESCORE_DUTY_CYCLE) -> str | None:
+    """Выполнить задание до конца, отмены или остановки приложения. Возвращает итоговый статус
+    (None — задание выполняет другой воркер)."""
+    _QuietVerdictLog.local.quiet = True
+    try:
+        return _run(engine, job_id, batch_size, duty_cycle)
+    finally:
+        _QuietVerdictLog.local.quiet = False
+
+
+def _run(engine, job_id: int, batch_size: int, duty_cycle: float) -> str | None:
+    with Session(engine, autoflush=False) as db:
+        if not _claim(db, job_id):
+            return None
+        job = db.get(RescoreJob, job_id)
+        logger.info("Пересчёт #%d: старт с анкеты id > %d", job.id, job.last_id)
+        try:
+            while True:
+                db.refresh(job)
+                if job.status in ("cancelling", "cancelled"):
+                    _finish(db, job, "cancelled")
+                    break
+                if _shutdown.is_set():
+                    # Остановка приложения: checkpoint уже сохранён, heartbeat снимаем —
+                    # следующий старт подхватит задание сразу
+                    job.heartbeat_at = None
+                    db.commit()
+                    break
+                start = time.perf_counter()
+                if not _rescore_batch(db, job, batch_size):
+                    _finish(db, job, "completed")
+                    break
+                if duty_cycle < 1:
+                    _shutdown.wait((time.perf_counter() - start) * (1 / duty_cycle - 1))
+        except Exception as e:
+            logger.exception("Пересчёт #%d: ошибка", job_id)
+            db.rollback()
+            _finish(db, db.get(RescoreJob, job_id), "failed", str(e))
+        logger.info("Пересчёт #%d: %s, обработано %d, изменено %d, пропущено %d",
+                    job.id, job.status, job.processed, job.changed, job.skipped)
+        return job.status
+
+
+def start_rescore_thread(engine, job_id: int):
+    """Запустить задание в фоновом потоке этого воркера."""
+    def target():
+        try:
+            run_rescore_job(engine, job_id)
+        finally:
+            with _threads_lock:
+                _threads.pop(job_id, None)
+
+    thread = threading.Thread(target=target, name=f"rescore-{job_id}", daemon=True)
+    with _threads_lock:
+        _threads[job_id] = thread
+    thread.start()
+
+
+def resume_rescore_jobs(engine) -> list[int]:
+    """При старте: подхватить незавершённые задания (захватит их только один воркер)."""
+    _shutdown.clear()
+    with Session(engine) as db:
+        ids = [job_id for (job_id,) in db.query(RescoreJob.id).filter(RescoreJob.status.in_(ACTIVE_STATUSES))]
+    for job_id in ids:
+        start_rescore_thread(engine, job_id)
+    return ids
+
+
+def stop_rescore_jobs(timeout: float = 10):
+    """При остановке: дождаться, пока потоки сохранят checkpoint после текущей пачки."""
+    _shutdown.set()
+    with _threads_lock:
+        threads = list(_threads.values())
+    for thread in threads:
+        thread.join(timeout)
+
+
+def _elapsed(job: RescoreJob) -> float | None:
+    if job.started_at is None:
+        return None
+    end = job.finished_at or job.heartbeat_at or _utcnow()
+    return max((end - job.started_at).total_seconds(), 0.0)
+
+
+def job_status(job: RescoreJob) -> dict:
+    """Статус задания с прогрессом, скоростью и оценкой оставшегося времени."""
+    elapsed = _elapsed(job)
+    rate = job.processed / elapsed if elapsed and job.processed else None
+    remaining = max(job.total - job.processed, 0)
+    if job.status == "completed":
+        progress = 100.0
+    else:
+        progress = round(min(job.processed / job.total, 1) * 100, 1) if job.total else 0.0
+    return {
+        "id": job.id,
+        "status": job.status,
+        "requested_by": job.requested_by,
+        "rules_version": job.rules_version,
+        "total": job.total,
+        "processed": job.processed,
+        "changed": job.changed,
+        "skipped": job.skipped,
+        "last_id": job.last_id,
+        "progress": progress,
+        "rows_per_second": round(rate, 1) if rate else None,
+        "eta_seconds": round(remaining / rate) if rate and job.status in ACTIVE_STATUSES else None,
+        "error": job.error,
+        "created_at": str(job.created_at) if job.created_at else None,
+        "started_at": str(job.started_at) if job.started_at else None,
+        "heartbeat_at": str(job.heartbeat_at) if job.heartbeat_at else None,
+        "finished_at": str(job.finished_at) if job.finished_at else None,
+    }
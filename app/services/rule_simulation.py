@@ -0,0 +1,143 @@
+"""Симулятор изменения правил андеррайтинга: что станет с вердиктами, если поменять порог.
+
+Вердикт пересчитывается по всем сохранённым анкетам (не черновики, не удалённые) дважды —
+с текущими правилами и с предложенными (overlay поверх текущих) — пакетным движком
+batch_auto_verdict. Входы читаются из БД один раз в колоночный снимок (VerdictSnapshotCache)
+и переиспользуются между вызовами: повторная симуляция на 100k анкет — доли секунды.
+
+Снимок живёт SIMULATION_SNAPSHOT_TTL секунд (300) и сбрасывается раньше, если изменился
+отпечаток таблицы (число живых анкет, max id, max updated_at). Правка только секции анкеты
+(anketa_personal, ...) тоже двигает anketas.updated_at, так что сохранение через приложение
+сбрасывает снимок сразу; refresh=True нужен только после прямых правок в БД в обход ORM.
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.database import Anketa
+from app.services.batch_verdict import DECISIONS, BatchVerdict, batch_auto_verdict, load_verdict_columns
+
+SIMULATION_SNAPSHOT_TTL = float(os.getenv("SIMULATION_SNAPSHOT_TTL", "300"))
+
+# Поля, по которым можно разбить результат
+SEGMENT_FIELDS = ("client_type", "status", "risk_grade", "scoring_class")
+
+# Историческая выборка: всё, что было сохранено и не удалено
+SNAPSHOT_CRITERIA = (Anketa.deleted_at.is_(None), Anketa.status.notin_(("draft", "deleted")))
+
+
+@dataclass
+class VerdictSnapshot:
+    ids: np.ndarray
+    columns: dict
+    fingerprint: tuple
+    loaded_at: float  # time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def _fingerprint(db: Session) -> tuple:
+    count, max_id, max_updated = db.query(
+        func.count(Anketa.id), func.max(Anketa.id), func.max(Anketa.updated_at)
+    ).filter(*SNAPSHOT_CRITERIA).one()
+    return count, max_id, str(max_updated) if max_updated else None
+
+
+class VerdictSnapshotCache:
+    """Колоночный снимок входов вердикта (один на процесс)."""
+
+    def __init__(self, ttl: float = SIMULATION_SNAPSHOT_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._snapshot: VerdictSnapshot | None = None
+        self.hits = 0
+        self.loads = 0
+
+    def get(self, db: Session, refresh: bool = False) -> VerdictSnapshot:
+        fingerprint = _fingerprint(db)
+        with self._lock:
+            snap = self._snapshot
+            if (not refresh and snap is not None and snap.fingerprint == fingerprint
+                    and time.monotonic() - snap.loaded_at < self.ttl):
+                self.hits += 1
+                return snap
+            # Загрузка под локом: параллельные симуляции не читают портфель дважды
+            ids, columns = load_verdict_columns(db, criteria=SNAPSHOT_CRITERIA, extra=(Anketa.status,))
+            self._snapshot = VerdictSnapshot(ids, columns, fingerprint, time.monotonic())
+            self.loads += 1
+            return self._snapshot
+
+    def clear(self):
+        with self._lock:
+            self._snapshot = None
+            self.hits = self.loads = 0
+
+    def stats(self) -> dict:
+        snap = self._snapshot
+        return {
+            "rows": len(snap) if snap else 0,
+            "age_seconds": round(time.monotonic() - snap.loaded_at, 1) if snap else None,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "loads": self.loads,
+        }
+
+
+verdict_snapshot = VerdictSnapshotCache()
+
+
+def _decision_counts(codes: np.ndarray) -> dict:
+    counts = np.bincount(codes, minlength=len(DECISIONS))
+    return {d: int(c) for d, c in zip(DECISIONS, counts)}
+
+
+def _summary(before: BatchVerdict, after: BatchVerdict, mask: np.ndarray | None = None) -> dict:
+    b, a = before.decision_code, after.decision_code
+    pv_delta = after.recommended_pv - before.recommended_pv
+    if mask is not None:
+        b, a, pv_delta = b[mask], a[mask], pv_delta[mask]
+    k = len(DECISIONS)
+    matrix = np.bincount(b.astype(np.int64) * k + a, minlength=k * k).reshape(k, k)
+    return {
+        "total": int(len(b)),
+        "changed": int(np.count_nonzero(b != a)),
+        "before": _decision_counts(b),
+        "after": _decision_counts(a),
+        "transitions": {
+            f"{DECISIONS[i]}->{DECISIONS[j]}": int(matrix[i, j])
+            for i in range(k) for j in range(k) if i != j and matrix[i, j]
+        },
+        "recommended_pv": {
+            "mean_delta": round(float(pv_delta.mean()), 2) if len(pv_delta) else 0.0,
+            "max_increase": round(float(pv_delta.max()), 1) if len(pv_delta) else 0.0,
+            "max_decrease": round(float(-pv_delta.min()), 1) if len(pv_delta) else 0.0,
+            "increased": int(np.count_nonzero(pv_delta > 0)),
+            "decreased": int(np.count_nonzero(pv_delta < 0)),
+        },
+    }
+
+
+def simulate_rule_change(snapshot: VerdictSnapshot, rules: dict, risk_rules: list,
+                         proposed_rules: dict, proposed_risk_rules: list,
+                         segment_by: str = "client_type", today: date | None = None) -> dict:
+    """Сравнение вердиктов по снимку: текущие правила vs предложенные."""
+    today = today or date.today()
+    before = batch_auto_verdict(snapshot.columns, rules, risk_rules, today=today)
+    after = batch_auto_verdict(snapshot.columns, proposed_rules, proposed_risk_rules, today=today)
+    result = _summary(before, after)
+
+    segment = snapshot.columns[segment_by]
+    result["segments"] = sorted(
+        ({"segment": value, **_summary(before, after, segment.codes == code)}
+         for code, value in enumerate(segment.values)),
+        key=lambda s: (-s["changed"], -s["total"]),
+    )
+    return result
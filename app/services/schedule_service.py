@@ -0,0 +1,195 @@
+"""График платежей по аннуитету: помесячно платёж, основной долг, проценты, остаток.
+
+Графики считаются целиком массивами NumPy, без цикла по месяцам: остаток после k-го
+платежа — замкнутая формула B_k = P·(1+r)^k − A·((1+r)^k − 1)/r, проценты месяца — r·B_{k−1},
+основной долг — A − проценты. Платёж A — формула calc_annuity. Последний платёж
+закрывает остаток точно (остаток 0, без хвоста от округлений float).
+
+schedule(principal, rate, term) — один график, кэш LRU по (principal, rate, term) на
+SCHEDULE_CACHE_SIZE записей (256): калькулятор и партнёры запрашивают одни и те же варианты.
+schedule_matrix(principals, rates, terms) — много графиков одной операцией (N × max срок,
+за сроком — нули): варианты ПВ / срока / ставки и массовая выгрузка.
+"""
+
+import io
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, Iterator
+
+import numpy as np
+
+SCHEDULE_CACHE_SIZE = int(os.getenv("SCHEDULE_CACHE_SIZE", "256"))
+# Потолок срока (мес) — защита от запросов на гигантские массивы
+MAX_SCHEDULE_TERM = 600
+
+CSV_COLUMNS = ("month", "payment", "principal", "interest", "balance")
+
+
+@dataclass(frozen=True)
+class Schedule:
+    """Массивы длины term; month — 1..term. Массивы только для чтения (объект общий из кэша)."""
+    principal_amount: float
+    annual_rate: float
+    term: int
+    month: np.ndarray
+    payment: np.ndarray
+    principal: np.ndarray
+    interest: np.ndarray
+    balance: np.ndarray
+
+    @property
+    def monthly_payment(self) -> float:
+        return float(self.payment[0]) if self.term else 0.0
+
+    @property
+    def total_payment(self) -> float:
+        return float(self.payment.sum())
+
+    @property
+    def total_interest(self) -> float:
+        return float(self.interest.sum())
+
+    def summary(self) -> dict:
+        return {
+            "principal": self.principal_amount,
+            "rate": self.annual_rate,
+            "term": self.term,
+            "monthly_payment": round(self.monthly_payment, 2),
+            "total_payment": round(self.total_payment, 2),
+            "total_interest": round(self.total_interest, 2),
+        }
+
+    def rows(self) -> list[dict]:
+        """Строки графика для JSON, суммы округлены до 2 знаков."""
+        columns = [self.month.tolist()] + [np.round(getattr(self, c), 2).tolist() for c in CSV_COLUMNS[1:]]
+        return [dict(zip(CSV_COLUMNS, values)) for values in zip(*columns)]
+
+
+def annuity_payment(principals, rates, terms) -> np.ndarray:
+    """calc_annuity поэлементно, с broadcast (ставка 0 — principal / срок)."""
+    principals, rates, terms = np.broadcast_arrays(
+        np.asarray(principals, dtype=float), np.asarray(rates, dtype=float), np.asarray(terms, dtype=float))
+    r = rates / 100 / 12
+    has_rate = r > 0
+    growth = np.where(has_rate, (1 + np.where(has_rate, r, 0.0)) ** terms, 2.0)  # (1+r)^n
+    return np.where(
+        has_rate,
+        principals * r * growth / (growth - 1),
+        principals / np.maximum(terms, 1),
+    )
+
+
+def max_principal(rates, terms, max_payment) -> np.ndarray:
+    """calc_max_principal поэлементно: сумма, при которой аннуитет = max_payment (0, если max_payment ≤ 0)."""
+    rates, terms, max_payment = np.broadcast_arrays(
+        np.asarray(rates, dtype=float), np.asarray(terms, dtype=float), np.asarray(max_payment, dtype=float))
+    r = rates / 100 / 12
+    has_rate = r > 0
+    growth = np.where(has_rate, (1 + np.where(has_rate, r, 0.0)) ** terms, 2.0)
+    amount = np.where(has_rate, max_payment * (growth - 1) / (np.where(has_rate, r, 1.0) * growth),
+                      max_payment * terms)
+    return np.where(max_payment > 0, amount, 0.0)
+
+
+def schedule_matrix(principals, rates, terms) -> dict:
+    """Графики для массивов (principal, годовая ставка %, срок мес) — поэлементно, с broadcast.
+
+    Возвращает {"payment", "principal", "interest", "balance"}: массивы N × max(term),
+    месяцы после срока строки — нули.
+    """
+    principals, rates, terms = np.broadcast_arrays(
+        np.asarray(principals, dtype=float), np.asarray(rates, dtype=float), np.asarray(terms, dtype=np.int64))
+    principals, rates, terms = principals.ravel(), rates.ravel(), terms.ravel()
+    n, width = len(principals), int(terms.max(initial=0))
+    k = np.arange(1, width + 1)
+    active = k[None, :] <= terms[:, None]
+
+    r = rates / 100 / 12
+    has_rate = r > 0
+    safe_r = np.where(has_rate, r, 1.0)[:, None]
+    growth = np.where(has_rate[:, None], (1 + safe_r) ** k[None, :], 1.0)  # (1+r)^k
+    payment = annuity_payment(principals, rates, terms)
+    balance = np.where(
+        has_rate[:, None],
+        principals[:, None] * growth - payment[:, None] * (growth - 1) / safe_r,
+        principals[:, None] - payment[:, None] * k[None, :],
+    )
+    previous = np.concatenate([principals[:, None], balance[:, :-1]], axis=1)
+    interest = r[:, None] * previous
+    principal_part = payment[:, None] - interest
+
+    # Последний месяц: гасится весь остаток
+    last = (np.arange(n), np.maximum(terms - 1, 0))
+    if width:
+        principal_part[last] = previous[last]
+        balance[last] = 0.0
+    payment_m = principal_part + interest
+
+    zero = np.zeros((n, width))
+    return {
+        "payment": np.where(active, payment_m, zero),
+        "principal": np.where(active, principal_part, zero),
+        "interest": np.where(active, interest, zero),
+        "balance": np.where(active, balance, zero),
+    }
+
+
+@lru_cache(maxsize=SCHEDULE_CACHE_SIZE)
+def _cached_schedule(principal: float, annual_rate: float, term: int) -> Schedule:
+    m = schedule_matrix([principal], [annual_rate], [term])
+    arrays = {name: m[name][0] for name in ("payment", "principal", "interest", "balance")}
+    month = np.arange(1, term + 1)
+    for a in (month, *arrays.values()):
+        a.setflags(write=False)
+    return Schedule(principal, annual_rate, term, month, **arrays)
+
+
+def schedule(principal: float, annual_rate: float, term: int) -> Schedule:
+    """График одного кредита (кэш LRU по параметрам)."""
+    return _cached_schedule(float(principal), float(annual_rate or 0), int(term))
+
+
+def schedule_cache_stats() -> dict:
+    info = _cached_schedule.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
+
+
+def principal_for(price: float, down_payment_percent: float | None) -> float:
+    """Сумма финансирования: стоимость минус ПВ (как remaining_amount в run_calculations)."""
+    down_payment = round(price * (down_payment_percent or 0) / 100, 2)
+    return round(price - down_payment, 2)
+
+
+def has_schedule_terms(anketa) -> bool:
+    """Условия сделки для графика есть — те же, что для monthly_payment в run_calculations."""
+    return bool(anketa.remaining_amount and anketa.interest_rate and anketa.lease_term_months
+                and anketa.lease_term_months <= MAX_SCHEDULE_TERM)
+
+
+def anketa_schedule(anketa) -> Schedule | None:
+    """График по анкете (ORM-объект или Row SCHEDULE_VIEW); None — условий не хватает."""
+    if not has_schedule_terms(anketa):
+        return None
+    return schedule(anketa.remaining_amount, anketa.interest_rate, anketa.lease_term_months)
+
+
+def schedule_csv(batches: Iterable[tuple], id_column: str | None = "anketa_id") -> Iterator[str]:
+    """CSV графиков кусками — по одному на пачку, для StreamingResponse.
+
+    batches — итерируемое (ids, principals, rates, terms); графики пачки считаются одной
+    schedule_matrix. Колонки: [id_column,] month, payment, principal, interest, balance.
+    """
+    with_id = id_column is not None
+    yield ",".join(((id_column,) if with_id else ()) + CSV_COLUMNS) + "\n"
+    for ids, principals, rates, terms in batches:
+        if not len(ids):
+            continue
+        m = schedule_matrix(principals, rates, terms)
+        row, col = np.nonzero(np.arange(m["payment"].shape[1])[None, :] < np.asarray(terms)[:, None])
+        table = [np.asarray(ids)[row], col + 1] if with_id else [col + 1]
+        table += [np.round(m[c][row, col], 2) for c in CSV_COLUMNS[1:]]
+        buf = io.StringIO()
+        np.savetxt(buf, np.column_stack(table), delimiter=",",
+                   fmt=["%d"] * (len(table) - 4) + ["%.2f"] * 4)
+        yield buf.getvalue()
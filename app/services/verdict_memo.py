@@ -0,0 +1,99 @@
+"""Мемоизация авто-вердикта: те же входы и та же версия правил — тот же результат.
+
+Ключ — отпечаток (verdict_fingerprint) полей, которые читает calc_auto_verdict (VERDICT_VIEW),
+и версии правил (rules_cache). Даты входят в отпечаток так, как их видит вердикт: возраст в
+полных годах и месяцы с последней просрочки. Отпечаток меняется, когда может измениться
+вердикт (день рождения, новый месяц давности), и в остальном от сегодняшней даты не зависит.
+
+Кэш — LRU в памяти процесса на VERDICT_MEMO_SIZE записей (10000). Отпечаток, с которым
+посчитан сохранённый вердикт, пишется в anketas.verdict_fingerprint — пакетный пересчёт
+пропускает анкеты, у которых он совпадает с текущим (is_verdict_current).
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from app.rules_cache import RulesSnapshot
+from app.services.anketa_views import VERDICT_VIEW
+from app.services.calculation_service import _age_years, _months_since, calc_auto_verdict
+
+VERDICT_MEMO_SIZE = int(os.getenv("VERDICT_MEMO_SIZE", "10000"))
+
+# Поля анкеты, которые читает calc_auto_verdict
+VERDICT_INPUTS = tuple(col.key for col in VERDICT_VIEW if col.key != "id")
+_OVERDUE_DATES = frozenset(name for name in VERDICT_INPUTS if name.endswith("last_overdue_date"))
+
+
+def verdict_fingerprint(anketa, rules_version: int) -> str:
+    """sha256 входов вердикта и версии правил; anketa — ORM-объект или Row VERDICT_VIEW."""
+    values = []
+    for name in VERDICT_INPUTS:
+        value = getattr(anketa, name, None)
+        if name == "birth_date":
+            value = _age_years(value)
+        elif name in _OVERDUE_DATES:
+            value = _months_since(value)
+        values.append(value)
+    payload = json.dumps([rules_version, values], ensure_ascii=False, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _copy(verdict: dict) -> dict:
+    # Результат общий для всех попаданий — наружу отдаётся копия
+    return {**verdict, "auto_decision_reasons": list(verdict["auto_decision_reasons"])}
+
+
+class VerdictMemo:
+    """LRU: отпечаток → результат calc_auto_verdict (один на процесс)."""
+
+    def __init__(self, max_size: int = VERDICT_MEMO_SIZE):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def verdict(self, anketa, rules: RulesSnapshot) -> tuple[dict, str]:
+        """(вердикт, отпечаток) — из кэша или calc_auto_verdict с правилами снимка."""
+        fingerprint = verdict_fingerprint(anketa, rules.version)
+        with self._lock:
+            cached = self._entries.get(fingerprint)
+            if cached is not None:
+                self._entries.move_to_end(fingerprint)
+                self.hits += 1
+                return _copy(cached), fingerprint
+            self.misses += 1
+        verdict = calc_auto_verdict(anketa, rules.rules, risk_rules=rules.risk_rules, overdue=rules.overdue)
+        with self._lock:
+            self._entries[fingerprint] = _copy(verdict)
+            self._entries.move_to_end(fingerprint)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return verdict, fingerprint
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else None,
+        }
+
+
+verdict_memo = VerdictMemo()
+
+
+def is_verdict_current(anketa, rules: RulesSnapshot) -> bool:
+    """Сохранённый вердикт посчитан на тех же входах и той же версии правил."""
+    stored = getattr(anketa, "verdict_fingerprint", None)
+    return stored is not None and stored == verdict_fingerprint(anketa, rules.version)
@@ -8,11 +8,13 @@ import httpx
 from sqlalchemy.orm import Session
 
 from app.database import Anketa, WebhookConfig
+from app.services.anketa_views import WEBHOOK_VIEW, select_view
 
 logger = logging.getLogger("app")
 
 
-def _build_payload(event: str, anketa: Anketa) -> dict:
+def _build_payload(event: str, anketa) -> dict:
+    """anketa — ORM-объект или Row с колонками WEBHOOK_VIEW."""
     client_name = anketa.full_name or anketa.company_name or ""
     return {
         "event": event,
@@ -45,8 +47,13 @@ def send_webhook(config: WebhookConfig, event: str, payload: dict) -> None:
         logger.exception("Webhook %s -> %s failed", config.name, config.url)
 
 
-def notify_webhooks(db: Session, event: str, anketa: Anketa) -> None:
+def notify_webhooks(db: Session, event: str, anketa_id: int) -> None:
     configs = db.query(WebhookConfig).filter(WebhookConfig.is_active == True).all()
+    if not configs:
+        return
+    anketa = select_view(db, WEBHOOK_VIEW).filter(Anketa.id == anketa_id).first()
+    if not anketa:
+        return
     payload = _build_payload(event, anketa)
     for cfg in configs:
         if cfg.events and cfg.events != "all":
@@ -919,6 +919,8 @@ function copyCredentials() {
 
 let currentAnketaId = null;
 let anketasData = [];
+let anketasNextCursor = null;
+const ANKETAS_PAGE_SIZE = 50;
 
 // All form field IDs (without f- prefix)
 const anketaFields = [
@@ -1009,20 +1011,39 @@ function selectClientType(type) {
 
 // ---------- ANKETA: LIST ----------
 
-async function loadAnketas() {
-  showSkeleton('anketyTableBody', 'table-rows', 7);
+function anketaListParams() {
+  const params = new URLSearchParams({ limit: ANKETAS_PAGE_SIZE });
+  const filters = {
+    status: document.getElementById('filterStatus').value,
+    client_type: document.getElementById('filterClientType').value,
+    date_from: document.getElementById('filterDateFrom').value,
+    date_to: document.getElementById('filterDateTo').value,
+    q: document.getElementById('anketySearch').value.trim(),
+  };
+  Object.entries(filters).forEach(([k, v]) => { if (v) params.set(k, v); });
+  return params;
+}
+
+async function loadAnketas(append = false) {
+  if (!append) showSkeleton('anketyTableBody', 'table-rows', 7);
 
   try {
-    const res = await fetch('/api/v1/anketas', { headers: authHeaders() });
+    const params = anketaListParams();
+    if (append && anketasNextCursor) params.set('cursor', anketasNextCursor);
+    const res = await fetch('/api/v1/anketas?' + params, { headers: authHeaders() });
     if (res.status === 401) { logout(); return; }
     if (!res.ok) throw new Error('Ошибка загрузки');
 
-    anketasData = await res.json();
+    const page = await res.json();
+    anketasData = append ? anketasData.concat(page.items) : page.items;
+    anketasNextCursor = page.next_cursor;
     renderAnketasTable(anketasData);
 
     // Update badge count
     const badge = document.getElementById('anketyBadge');
-    if (badge) badge.textContent = anketasData.length;
+    if (badge) badge.textContent = anketasData.length + (anketasNextCursor ? '+' : '');
+    const loadMore = document.getElementById('anketyLoadMore');
+    if (loadMore) loadMore.style.display = anketasNextCursor ? '' : 'none';
   } catch (err) {
     showToast('Ошибка загрузки анкет', 'error');
     showErrorState('anketyTableBody', 'Ошибка загрузки анкет', 'loadAnketas()', true, 7);
@@ -1075,42 +1096,12 @@ function renderAnketasTable(data) {
   }).join('');
 }
 
-function filterAnketas() {
-  const q = (document.getElementById('anketySearch').value || '').toLowerCase();
-  const status = document.getElementById('filterStatus').value;
-  const clientType = document.getElementById('filterClientType').value;
-  const dateFrom = document.getElementById('filterDateFrom').value;
-  const dateTo = document.getElementById('filterDateTo').value;
-
-  let filtered = anketasData;
-
-  if (q) {
-    filtered = filtered.filter(a =>
-      (a.full_name || '').toLowerCase().includes(q) ||
-      (a.company_name || '').toLowerCase().includes(q) ||
-      String(a.id).includes(q) ||
-      (a.car_brand || '').toLowerCase().includes(q) ||
-      (a.car_model || '').toLowerCase().includes(q) ||
-      (a.creator_name || '').toLowerCase().includes(q)
-    );
-  }
-  if (status) {
-    filtered = filtered.filter(a => a.status === status);
-  }
-  if (clientType) {
-    filtered = filtered.filter(a => (a.client_type || 'individual') === clientType);
-  }
-  if (dateFrom) {
-    const from = new Date(dateFrom);
-    filtered = filtered.filter(a => a.created_at && new Date(a.created_at) >= from);
-  }
-  if (dateTo) {
-    const to = new Date(dateTo);
-    to.setDate(to.getDate() + 1);
-    filtered = filtered.filter(a => a.created_at && new Date(a.created_at) <= to);
-  }
+// All filters and search run server-side (loadAnketas) — search covers every page, not just loaded rows
+let anketaSearchTimer = null;
 
-  renderAnketasTable(filtered);
+function filterAnketas() {
+  clearTimeout(anketaSearchTimer);
+  anketaSearchTimer = setTimeout(() => loadAnketas(), 300);
 }
 
 function clearAnketaFilters() {
@@ -1119,7 +1110,7 @@ function clearAnketaFilters() {
   document.getElementById('filterClientType').value = '';
   document.getElementById('filterDateFrom').value = '';
   document.getElementById('filterDateTo').value = '';
-  renderAnketasTable(anketasData);
+  loadAnketas();
 }
 
 function openAnketa(id, status) {
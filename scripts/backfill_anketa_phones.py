@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Перестроить таблицу anketa_phones из anketas.phone_numbers.
+
+Нужно после массового импорта анкет в обход API или если индекс телефонов
+разошёлся с данными. Миграция b5d81f2c6e47 делает то же самое один раз.
+
+Usage:
+  DATABASE_URL="postgresql://..." python scripts/backfill_anketa_phones.py [batch_size]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import SessionLocal
+from app.services.anketa_service import backfill_anketa_phones
+
+
+def main():
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        total = backfill_anketa_phones(db, batch_size=batch_size)
+        print(f"Записано телефонов: {total} за {time.perf_counter() - start:.1f} с")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
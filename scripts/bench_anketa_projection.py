@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк проекций Anketa: полная гидратация ORM vs load_only / Row-кортежи.
+
+Создаёт временную SQLite-базу с N анкетами (с заполненными тяжёлыми текстовыми
+полями в секциях) и для каждого сценария замеряет время и пик памяти (tracemalloc):
+  full      — db.query(Anketa) со всеми колонками и всеми секциями
+  projected — view из app/services/anketa_views.py
+
+Usage:
+  python scripts/bench_anketa_projection.py [--rows 100000] [--repeat 3]
+"""
+
+import argparse
+import gc
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker, joinedload, selectinload
+
+from app.database import (
+    Base, Anketa, AnketaCreditHistory, AnketaIncome, AnketaPersonal, User, ANKETA_SECTIONS,
+)
+from app.services.anketa_service import anketa_to_list_item, list_view_options
+from app.services.anketa_views import EMPLOYEE_STATS_VIEW, EXPORT_VIEW, select_view
+
+ADDRESS = "г. Ташкент, Юнусабадский район, квартал 19, дом 7, квартира 42. " * 4
+REASON = "Задержка заработной платы у работодателя, просрочка погашена полностью. " * 3
+
+
+def _populate(db, n: int):
+    db.add(User(id=1, email="bench@test", full_name="Bench", password_hash="x", role="inspector"))
+    db.commit()
+    chunk = 10_000
+    for start in range(0, n, chunk):
+        ids = range(start + 1, min(start + chunk, n) + 1)
+        db.execute(insert(Anketa), [
+            {
+                "id": i, "created_by": 1, "status": "saved" if i % 3 else "approved", "client_type": "individual",
+                "full_name": f"CLIENT {i}", "phone_numbers": f"+998 90 {i % 1000:03d} {i % 100:02d} {i % 97:02d}",
+                "car_brand": "Chevrolet", "car_model": "Cobalt", "car_year": 2024,
+                "purchase_price": 150_000_000 + i, "down_payment_percent": 20, "dti": (i % 70) + 0.5,
+                "total_monthly_income": 12_000_000,
+                "auto_decision_reasons": '["ПДН выше порога"]', "conclusion_comment": "Одобрено",
+            }
+            for i in ids
+        ])
+        db.execute(insert(AnketaPersonal), [
+            {"anketa_id": i, "passport_series": f"AA{i:07d}", "pinfl": f"{i:014d}",
+             "registration_address": ADDRESS, "actual_address": ADDRESS}
+            for i in ids
+        ])
+        db.execute(insert(AnketaIncome), [
+            {"anketa_id": i, "employer_name": "ООО Пример", "property_details": ADDRESS} for i in ids
+        ])
+        db.execute(insert(AnketaCreditHistory), [{"anketa_id": i, "overdue_reason": REASON} for i in ids])
+        db.commit()
+
+
+# full — старое поведение: вся анкета со всеми секциями
+_FULL = [joinedload(Anketa.creator)] + [selectinload(getattr(Anketa, s)) for s in ANKETA_SECTIONS]
+
+SCENARIOS = {
+    "list": (
+        lambda db: [anketa_to_list_item(a) for a in db.query(Anketa).options(*_FULL).all()],
+        lambda db: [anketa_to_list_item(a) for a in db.query(Anketa).options(*list_view_options()).all()],
+    ),
+    "export": (
+        lambda db: [a.actual_address for a in db.query(Anketa).options(*_FULL).all()],
+        lambda db: [a.actual_address for a in select_view(db, EXPORT_VIEW).all()],
+    ),
+    "employee_stats": (
+        lambda db: [a.dti for a in db.query(Anketa).options(*_FULL).all()],
+        lambda db: [a.dti for a in select_view(db, EMPLOYEE_STATS_VIEW).all()],
+    ),
+}
+
+
+def _measure(session_factory, fn, repeat: int) -> tuple[float, float]:
+    """Медианное время (с) и пик памяти (МБ) за repeat прогонов, каждый в новой сессии."""
+    timings, peaks = [], []
+    for _ in range(repeat):
+        db = session_factory()
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        fn(db)
+        timings.append(time.perf_counter() - start)
+        peaks.append(tracemalloc.get_traced_memory()[1] / 2**20)
+        tracemalloc.stop()
+        db.close()
+    return statistics.median(timings), statistics.median(peaks)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine)
+        db = session_factory()
+        _populate(db, args.rows)
+        db.close()
+
+        print(f"rows: {args.rows}")
+        print(f"{'scenario':<15} | {'full, s':>8} | {'proj, s':>8} | {'full, MB':>9} | {'proj, MB':>9}")
+        for name, (full_fn, proj_fn) in SCENARIOS.items():
+            full_t, full_m = _measure(session_factory, full_fn, args.repeat)
+            proj_t, proj_m = _measure(session_factory, proj_fn, args.repeat)
+            print(f"{name:<15} | {full_t:>8.2f} | {proj_t:>8.2f} | {full_m:>9.1f} | {proj_m:>9.1f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
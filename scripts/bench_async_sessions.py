@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный бенчмарк: sync-путь (get_db + threadpool) vs async-путь (AsyncSession).
+
+Поднимает приложение in-process (httpx.ASGITransport), наполняет БД и гоняет
+одинаковые запросы с заданной конкурентностью. Async — настоящие эндпоинты
+/api/v1/anketas/..., sync — их двойники /bench/sync/..., вызывающие ту же
+бизнес-логику через get_db в threadpool. Размер threadpool (--threads) по
+умолчанию как у anyio — 40.
+
+Для реалистичной картины запускать против PostgreSQL (--database-url): на
+локальном SQLite запрос к БД почти не ждёт I/O, и разница минимальна.
+
+Usage:
+  python scripts/bench_async_sessions.py [--database-url URL] [--rows 5000]
+                                         [--concurrency 50,200] [--requests 2000] [--threads 40]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--concurrency", default="50,200")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=40)
+    return parser.parse_args()
+
+
+ARGS = _parse_args()
+_TMP = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = ARGS.database_url or f"sqlite:///{_TMP.name}/bench.db"
+
+import anyio  # noqa: E402
+import httpx  # noqa: E402
+from fastapi import Depends  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.auth import create_access_token, get_current_user  # noqa: E402
+from app.database import Base, Anketa, Notification, SessionLocal, User, engine, get_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.routers.anketa import _anketa_detail_with_view_log  # noqa: E402
+from app.services.analytics_service import get_analytics_data  # noqa: E402
+from app.services.anketa_service import query_anketa_list  # noqa: E402
+
+
+# ---------- sync twins of the async endpoints ----------
+
+@app.get("/bench/sync/unread-count")
+def _sync_unread(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    count = db.query(Notification).filter(Notification.user_id == user.id, Notification.is_read == False).count()
+    return {"count": count}
+
+
+@app.get("/bench/sync/list")
+def _sync_list(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    return query_anketa_list(db, user, limit=50)
+
+
+@app.get("/bench/sync/detail/{anketa_id}")
+def _sync_detail(anketa_id: int, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    return _anketa_detail_with_view_log(db, anketa_id, user)
+
+
+@app.get("/bench/sync/analytics")
+def _sync_analytics(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    return get_analytics_data(db, user, "month", None, None, None)
+
+
+SCENARIOS = {
+    "unread-count": ("/bench/sync/unread-count", "/api/v1/anketas/notifications/unread-count"),
+    "list": ("/bench/sync/list", "/api/v1/anketas?limit=50"),
+    "detail": ("/bench/sync/detail/{id}", "/api/v1/anketas/{id}"),
+    "analytics": ("/bench/sync/analytics", "/api/v1/anketas/analytics"),
+}
+
+
+def _populate(n: int) -> tuple[str, int]:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = User(email="bench@test", full_name="Bench", password_hash="x", role="admin", is_superadmin=True)
+    db.add(user)
+    db.commit()
+    for start in range(0, n, 5000):
+        db.execute(insert(Anketa), [
+            {"created_by": user.id, "status": "saved", "full_name": f"CLIENT {i}", "dti": i % 70,
+             "purchase_price": 100_000_000 + i, "down_payment_percent": 20}
+            for i in range(start, min(start + 5000, n))
+        ])
+    db.execute(insert(Notification), [
+        {"user_id": user.id, "type": "info", "title": "t", "message": "m", "is_read": i % 2 == 0}
+        for i in range(200)
+    ])
+    db.commit()
+    anketa_id = db.query(Anketa.id).order_by(Anketa.id.desc()).first()[0]
+    token = create_access_token({"sub": user.id})
+    db.close()
+    return token, anketa_id
+
+
+async def _run(client: httpx.AsyncClient, path: str, total: int, concurrency: int) -> tuple[float, list[float]]:
+    latencies: list[float] = []
+    remaining = iter(range(total))
+
+    async def _worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            resp = await client.get(path)
+            latencies.append((time.perf_counter() - start) * 1000)
+            resp.raise_for_status()
+
+    start = time.perf_counter()
+    async with anyio.create_task_group() as tg:
+        for _ in range(concurrency):
+            tg.start_soon(_worker)
+    return time.perf_counter() - start, latencies
+
+
+async def main():
+    token, anketa_id = _populate(ARGS.rows)
+    anyio.to_thread.current_default_thread_limiter().total_tokens = ARGS.threads
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    print(f"db: {engine.url.get_backend_name()}, rows: {ARGS.rows}, threads: {ARGS.threads}, "
+          f"requests per run: {ARGS.requests}")
+    print(f"{'scenario':<13} {'conc':>5} | {'sync rps':>9} {'p50':>7} {'p95':>7} | {'async rps':>9} {'p50':>7} {'p95':>7}")
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        for concurrency in (int(c) for c in ARGS.concurrency.split(",")):
+            for name, (sync_path, async_path) in SCENARIOS.items():
+                row = f"{name:<13} {concurrency:>5} |"
+                for path in (sync_path, async_path):
+                    elapsed, lat = await _run(client, path.format(id=anketa_id), ARGS.requests, concurrency)
+                    p95 = statistics.quantiles(lat, n=20)[-1]
+                    row += f" {ARGS.requests / elapsed:>9.0f} {statistics.median(lat):>7.1f} {p95:>7.1f} |"
+                print(row.rstrip(" |"))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
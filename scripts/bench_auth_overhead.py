@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк накладных расходов авторизации на запрос: проверка по БД vs права в JWT
+(JWT_PERMISSION_CLAIMS, app/perm_versions.py).
+
+Поднимает приложение in-process (httpx.ASGITransport) на временной SQLite-базе (или
+--database-url) с одним пользователем и гоняет последовательные запросы к пустому
+эндпоинту /bench/auth под require_permission("anketa_create"). Замеряются задержка
+(median / p95) и число SQL-запросов на запрос:
+  db      — обычный токен: SELECT users + роль (из PermissionCache; --cold — без кэша)
+  claims  — токен с правами: без запросов, пока версии прав не изменились
+
+Usage:
+  python scripts/bench_auth_overhead.py [--database-url URL] [--requests 2000] [--cold]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--cold", action="store_true", help="сбрасывать кэш прав ролей перед каждым запросом")
+    return parser.parse_args()
+
+
+ARGS = _parse_args()
+_TMP = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = ARGS.database_url or f"sqlite:///{_TMP.name}/bench.db"
+
+import httpx  # noqa: E402
+from fastapi import Depends  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+import app.auth  # noqa: E402
+from app.auth import create_access_token, permission_cache, permission_claims, require_permission  # noqa: E402
+from app.database import Base, Role, SessionLocal, User, engine  # noqa: E402
+from app.main import app as fastapi_app  # noqa: E402
+
+
+@fastapi_app.get("/bench/auth")
+def _bench_auth(user: User = Depends(require_permission("anketa_create"))):
+    return {"id": user.id}
+
+
+def _setup() -> dict[str, str]:
+    """Пользователь с ролью; токены обоих видов."""
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        role = Role(name="Bench", anketa_create=True)
+        db.add(role)
+        db.flush()
+        user = User(email="bench-auth@test", full_name="Bench", password_hash="x", role="inspector", role_id=role.id)
+        db.add(user)
+        db.commit()
+        app.auth.JWT_PERMISSION_CLAIMS = True
+        tokens = {
+            "db": create_access_token({"sub": user.id, "role": user.role}),
+            "claims": create_access_token({"sub": user.id, "role": user.role, **permission_claims(user, db)}),
+        }
+    return tokens
+
+
+async def _run(token: str, n: int, cold: bool) -> tuple[list[float], float]:
+    """(задержки в мс, SQL-запросов на запрос)."""
+    queries = [0]
+
+    def _count(*args):
+        queries[0] += 1
+
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=fastapi_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(50):  # прогрев: кэш прав, синхронизация версий
+            await client.get("/bench/auth", headers=headers)
+        event.listen(engine, "before_cursor_execute", _count)
+        latencies = []
+        try:
+            for _ in range(n):
+                if cold:
+                    permission_cache.clear()
+                start = time.perf_counter()
+                resp = await client.get("/bench/auth", headers=headers)
+                latencies.append((time.perf_counter() - start) * 1000)
+                assert resp.status_code == 200, resp.text
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+    return latencies, queries[0] / n
+
+
+def main():
+    tokens = _setup()
+    print(f"requests: {ARGS.requests}, role cache: {'cold' if ARGS.cold else 'warm'}")
+    print(f"{'mode':<8} | {'median ms':>9} | {'p95 ms':>7} | {'SQL/req':>7}")
+    for mode, token in tokens.items():
+        latencies, per_request = asyncio.run(_run(token, ARGS.requests, ARGS.cold))
+        p95 = statistics.quantiles(latencies, n=20)[-1]
+        print(f"{mode:<8} | {statistics.median(latencies):>9.3f} | {p95:>7.3f} | {per_request:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
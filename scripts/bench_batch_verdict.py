@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк пакетного авто-вердикта (app/services/batch_verdict.py) против построчного
+calc_auto_verdict на синтетическом портфеле.
+
+Генерирует N случайных анкет в памяти (без БД), замеряет:
+  columns — сборка колонок verdict_columns()
+  batch   — batch_auto_verdict() по всему портфелю
+  scalar  — calc_auto_verdict() на выборке --sample строк, экстраполировано на N
+и сверяет результаты на выборке.
+
+Usage:
+  python scripts/bench_batch_verdict.py [--rows 500000] [--sample 5000] [--seed 1]
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.batch_verdict import batch_auto_verdict, verdict_columns
+from app.bootstrap import DEFAULT_RULES
+from app.services.calculation_service import calc_auto_verdict
+
+CATEGORIES = [None, None, None, "до 30 дней", "31-60", "61-90", "90+"]
+CLASSES = [None, "Стандартный", "Субстандартный", "Сомнительный", "Безнадёжный"]
+RISK_RULES = [{"category": "E", "min_pv": 20.0}, {"category": "F1", "min_pv": 25.0}]
+
+
+def _default_rules() -> dict:
+    """DEFAULT_RULES из bootstrap в виде load_rules()."""
+    parse = {"float": float, "int": int}
+    return {r["rule_key"]: parse.get(r["value_type"], str)(r["value"]) for r in DEFAULT_RULES}
+
+
+def _anketa(rnd: random.Random, today: date) -> SimpleNamespace:
+    pick = rnd.choice
+
+    def overdue_date():
+        return None if rnd.random() < 0.5 else today - timedelta(days=rnd.randrange(0, 1500))
+
+    return SimpleNamespace(
+        client_type="legal_entity" if rnd.random() < 0.3 else "individual",
+        dti=round(rnd.uniform(0, 100), 2), down_payment_percent=pick([0, 5, 10, 15, 20, 30]),
+        total_monthly_income=rnd.uniform(1e6, 5e7), monthly_obligations_payment=rnd.uniform(0, 2e7),
+        interest_rate=pick([18, 22, 24, 28, 36]), lease_term_months=pick([12, 24, 36, 48, 60]),
+        purchase_price=rnd.randrange(50, 1000) * 1_000_000,
+        overdue_category=pick(CATEGORIES), last_overdue_date=overdue_date(),
+        company_overdue_category=pick(CATEGORIES), company_last_overdue_date=overdue_date(),
+        director_overdue_category=pick(CATEGORIES), director_last_overdue_date=overdue_date(),
+        guarantor_overdue_category=pick(CATEGORIES), guarantor_last_overdue_date=overdue_date(),
+        current_overdue_amount=0 if rnd.random() < 0.95 else 1_000_000,
+        systematic_overdue=rnd.random() < 0.05,
+        worst_active_classification=pick(CLASSES), worst_closed_classification=pick(CLASSES),
+        has_lombard=rnd.random() < 0.05, scoring_class=pick([None, "A", "B", "C", "D", "E"]),
+        birth_date=today - timedelta(days=rnd.randrange(18 * 365, 75 * 365)),
+        open_applications_count=pick([0, 0, 0, 1, 2]),
+        risk_grade=pick([None, "A", "B", "E", "F1"]), no_scoring_response=rnd.random() < 0.1,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--sample", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    logging.getLogger("app").setLevel(logging.WARNING)  # calc_auto_verdict логирует каждую строку
+
+    rnd = random.Random(args.seed)
+    today = date.today()
+    rules = _default_rules()
+    t0 = time.perf_counter()
+    anketas = [_anketa(rnd, today) for _ in range(args.rows)]
+    print(f"Сгенерировано {args.rows} анкет за {time.perf_counter() - t0:.1f} с")
+
+    t0 = time.perf_counter()
+    columns = verdict_columns(anketas)
+    t_columns = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    batch = batch_auto_verdict(columns, rules, RISK_RULES, today=today)
+    t_batch = time.perf_counter() - t0
+
+    sample = rnd.sample(range(args.rows), min(args.sample, args.rows))
+    mismatches = 0
+    t0 = time.perf_counter()
+    for i in sample:
+        result = calc_auto_verdict(anketas[i], rules, risk_rules=RISK_RULES, with_reasons=False)
+        del result["auto_decision_reasons"]
+        mismatches += result != batch.row(i)
+    t_scalar = (time.perf_counter() - t0) / len(sample) * args.rows
+
+    print(f"{'columns':<8} {t_columns:8.2f} s")
+    print(f"{'batch':<8} {t_batch:8.2f} s")
+    print(f"{'scalar':<8} {t_scalar:8.2f} s  (экстраполяция по {len(sample)} строкам)")
+    print(f"Ускорение batch vs scalar: x{t_scalar / t_batch:.0f}; расхождений на выборке: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
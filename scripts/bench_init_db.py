@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк старта: init_db со всеми шагами на каждом буте vs проверка fingerprint.
+
+Создаёт временную SQLite-базу (или использует --database-url) с N анкетами и
+замеряет медианное время:
+  all steps   — run_bootstrap(force=True): как старый init_db — UPDATE по всей
+                anketa_personal, ALTER-проверки, роли, SELECT по каждому правилу
+  fingerprint — обычный повторный старт: один SELECT из bootstrap_state
+
+Usage:
+  python scripts/bench_init_db.py [--database-url URL] [--rows 200000] [--repeat 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import create_engine, insert
+
+from app.bootstrap import run_bootstrap
+from app.database import Anketa, AnketaPersonal, User
+
+
+def _populate(engine, n: int):
+    run_bootstrap(engine, steps=[])  # только схема
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": 1, "email": "bench@test", "full_name": "Bench",
+                                     "password_hash": "x", "role": "inspector"}])
+        for start in range(0, n, 10_000):
+            ids = range(start + 1, min(start + 10_000, n) + 1)
+            conn.execute(insert(Anketa), [{"id": i, "created_by": 1, "status": "saved"} for i in ids])
+            conn.execute(insert(AnketaPersonal), [
+                {"anketa_id": i, "birth_date": None, "registration_address": "г. Ташкент"} for i in ids
+            ])
+
+
+def _measure(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(args.database_url or f"sqlite:///{tmp}/bench.db")
+        _populate(engine, args.rows)
+
+        start = time.perf_counter()
+        run_bootstrap(engine)
+        first = (time.perf_counter() - start) * 1000
+
+        all_steps = _measure(lambda: run_bootstrap(engine, force=True), args.repeat)
+        fingerprint = _measure(lambda: run_bootstrap(engine), args.repeat)
+        engine.dispose()
+
+    print(f"db: {engine.url.get_backend_name()}, rows: {args.rows}")
+    print(f"{'first boot (seed)':<24}: {first:>9.2f} ms")
+    print(f"{'reboot, all steps':<24}: {all_steps:>9.2f} ms")
+    print(f"{'reboot, fingerprint':<24}: {fingerprint:>9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк пропускной способности логина на один воркер при разной стоимости bcrypt
+(BCRYPT_ROUNDS) — «начало смены»: много инспекторов входят одновременно.
+
+Поднимает приложение in-process (httpx.ASGITransport) на временной SQLite-базе (или
+--database-url). Для каждой стоимости пароли пользователей хешируются с ней, затем
+--logins входов идут с конкурентностью --concurrency. Параллельно раз в 20 мс
+опрашивается GET /api/v1/auth/me (sync-эндпоинт в threadpool): его p95 показывает,
+не отнимает ли bcrypt потоки у остальных запросов. Rate limit на время замера выключен.
+
+Usage:
+  python scripts/bench_login.py [--database-url URL] [--costs 10,11,12] [--logins 200]
+                                [--concurrency 50] [--users 20] [--bcrypt-workers 4]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--costs", default="10,11,12")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--bcrypt-workers", type=int, default=4)
+    return parser.parse_args()
+
+
+ARGS = _parse_args()
+_TMP = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = ARGS.database_url or f"sqlite:///{_TMP.name}/bench.db"
+os.environ["BCRYPT_MAX_WORKERS"] = str(ARGS.bcrypt_workers)
+
+import httpx  # noqa: E402
+from sqlalchemy import delete  # noqa: E402
+
+import app.auth  # noqa: E402
+from app.auth import create_access_token, hash_password  # noqa: E402
+from app.database import Base, SessionLocal, User, async_engine, engine  # noqa: E402
+from app.limiter import limiter  # noqa: E402
+from app.main import app as fastapi_app  # noqa: E402
+
+PASSWORD = "Shift-Start-1!"
+
+
+def _seed(cost: int, n: int) -> list[str]:
+    """n пользователей с паролем, захешированным при данной стоимости; их email."""
+    app.auth.BCRYPT_ROUNDS = cost
+    password_hash = hash_password(PASSWORD)
+    emails = [f"bench-login-{i}@test.com" for i in range(n)]
+    with SessionLocal() as db:
+        db.execute(delete(User).where(User.email.like("bench-login-%")))
+        db.add_all(User(email=e, full_name="Bench", password_hash=password_hash, role="inspector") for e in emails)
+        db.commit()
+    return emails
+
+
+async def _run(emails: list[str], logins: int, concurrency: int) -> tuple[float, list[float], list[float]]:
+    """(входов/с, задержки входа в мс, задержки /auth/me в мс)."""
+    transport = httpx.ASGITransport(app=fastapi_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        me_token = create_access_token({"sub": 1})
+        me_headers = {"Authorization": f"Bearer {me_token}"}
+        queue = asyncio.Queue()
+        for i in range(logins):
+            queue.put_nowait(emails[i % len(emails)])
+        login_latencies, probe_latencies = [], []
+        done = asyncio.Event()
+
+        async def _login_worker():
+            while not queue.empty():
+                email = queue.get_nowait()
+                start = time.perf_counter()
+                resp = await client.post("/api/v1/auth/login", json={"email": email, "password": PASSWORD})
+                login_latencies.append((time.perf_counter() - start) * 1000)
+                assert resp.status_code == 200, resp.text
+
+        async def _probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/api/v1/auth/me", headers=me_headers)
+                probe_latencies.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(0.02)
+
+        probe = asyncio.create_task(_probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(_login_worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await probe
+    return logins / elapsed, login_latencies, probe_latencies
+
+
+async def main():
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        if db.get(User, 1) is None:
+            db.add(User(id=1, email="bench-probe@test.com", full_name="Probe", password_hash="x", role="inspector"))
+            db.commit()
+    limiter.enabled = False
+
+    print(f"logins: {ARGS.logins}, concurrency: {ARGS.concurrency}, bcrypt workers: {ARGS.bcrypt_workers}")
+    print(f"{'cost':>4} | {'logins/s':>8} | {'login p50 ms':>12} | {'login p95 ms':>12} | {'/me p95 ms':>10}")
+    for cost in (int(c) for c in ARGS.costs.split(",")):
+        emails = _seed(cost, ARGS.users)
+        rate, logins, probes = await _run(emails, ARGS.logins, ARGS.concurrency)
+        p95 = lambda xs: statistics.quantiles(xs, n=20)[-1] if len(xs) > 1 else xs[0]
+        print(f"{cost:>4} | {rate:>8.1f} | {statistics.median(logins):>12.0f} | {p95(logins):>12.0f} | "
+              f"{p95(probes):>10.1f}")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк поиска дубликатов по телефону: индекс anketa_phones vs полный перебор.
+
+Для каждого размера создаёт временную SQLite-базу с N анкетами, заполняет
+anketa_phones и замеряет check_duplicate_field (индексный поиск). Полный
+перебор (старое поведение) замеряется только до --scan-limit строк.
+
+Usage:
+  python scripts/bench_phone_lookup.py [--sizes 10000,100000,1000000] [--lookups 200]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, Anketa, User
+from app.services.anketa_service import (
+    _normalize_phone, backfill_anketa_phones, check_duplicate_field,
+)
+
+
+def _phone(i: int) -> str:
+    return f"+998 9{i // 10_000_000 % 10} {i // 10_000 % 1000:03d} {i // 100 % 100:02d} {i % 100:02d}"
+
+
+def _populate(db, n: int):
+    db.add(User(id=1, email="bench@test", full_name="Bench", password_hash="x", role="inspector"))
+    db.commit()
+    chunk = 10_000
+    for start in range(0, n, chunk):
+        db.execute(insert(Anketa), [
+            {"created_by": 1, "status": "saved", "full_name": f"CLIENT {i}", "phone_numbers": _phone(i)}
+            for i in range(start, min(start + chunk, n))
+        ])
+        db.commit()
+
+
+def _full_scan(db, value: str) -> list[int]:
+    """Старая реализация: нормализация каждой анкеты в Python."""
+    norm = _normalize_phone(value)
+    return [
+        a.id for a in db.query(Anketa).filter(Anketa.phone_numbers.isnot(None), Anketa.status != "deleted").all()
+        if _normalize_phone(a.phone_numbers) == norm
+    ]
+
+
+def _median_ms(fn, values) -> float:
+    timings = []
+    for v in values:
+        start = time.perf_counter()
+        fn(v)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--scan-limit", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'N':>10} | {'backfill, s':>11} | {'index, ms':>9} | {'full scan, ms':>13}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{tmp}/bench.db")
+            Base.metadata.create_all(bind=engine)
+            db = sessionmaker(bind=engine)()
+            _populate(db, n)
+
+            start = time.perf_counter()
+            backfill_anketa_phones(db, batch_size=10_000)
+            backfill_s = time.perf_counter() - start
+
+            values = [_phone(random.randrange(n)) for _ in range(args.lookups)]
+            indexed = _median_ms(lambda v: check_duplicate_field(db, "phone_numbers", v, None), values)
+            scan = "—"
+            if n <= args.scan_limit:
+                scan = f"{_median_ms(lambda v: _full_scan(db, v), values[:5]):.1f}"
+            print(f"{n:>10} | {backfill_s:>11.1f} | {indexed:>9.2f} | {scan:>13}")
+            db.close()
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Стресс-тест конкурентной записи в SQLite: дефолтный pysqlite vs режим производительности
+(app/db_sqlite.py: WAL, synchronous=NORMAL, pragmas, writer lock).
+
+N потоков одновременно «сохраняют анкету»: читают правила, вставляют анкету и её
+секцию, обновляют статус, пишут историю — одной транзакцией, с небольшой паузой
+на «расчёты» между записями. Замеряются транзакции/с и ошибки "database is locked".
+
+Usage:
+  python scripts/bench_sqlite_writers.py [--threads 16] [--tx 50] [--work-ms 2] [--busy-timeout 1.0]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import create_engine, exc
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, Anketa, AnketaHistory, AnketaPersonal, UnderwritingRule, User
+from app.db_sqlite import enable_sqlite_performance_mode
+
+
+def _save(db, user_id: int, work: float):
+    db.query(UnderwritingRule).all()
+    a = Anketa(created_by=user_id, status="draft", full_name="STRESS")
+    db.add(a)
+    db.flush()
+    time.sleep(work)  # calculations between the writes
+    db.add(AnketaPersonal(anketa_id=a.id, registration_address="г. Ташкент"))
+    a.status = "saved"
+    db.add(AnketaHistory(anketa_id=a.id, changed_by=user_id, field_name="status", old_value="draft", new_value="saved"))
+    db.commit()
+
+
+def run(engine, threads: int, tx: int, work: float) -> tuple[float, int, int]:
+    """(транзакций/с, успешных, ошибок)."""
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as db:
+        db.add(User(id=1, email="stress@test", full_name="Stress", password_hash="x", role="inspector"))
+        db.commit()
+
+    ok, errors = [0], [0]
+    counter_lock = threading.Lock()
+
+    def _worker():
+        for _ in range(tx):
+            db = Session()
+            try:
+                _save(db, 1, work)
+                with counter_lock:
+                    ok[0] += 1
+            except exc.OperationalError:
+                db.rollback()
+                with counter_lock:
+                    errors[0] += 1
+            finally:
+                db.close()
+
+    workers = [threading.Thread(target=_worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    return ok[0] / elapsed, ok[0], errors[0]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--tx", type=int, default=50)
+    parser.add_argument("--work-ms", type=float, default=2)
+    parser.add_argument("--busy-timeout", type=float, default=1.0, help="pysqlite timeout для дефолтного режима, с")
+    args = parser.parse_args()
+
+    print(f"threads: {args.threads}, tx per thread: {args.tx}, work: {args.work_ms} ms")
+    print(f"{'mode':<12} | {'tx/s':>8} | {'ok':>6} | {'locked':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline = create_engine(f"sqlite:///{tmp}/default.db", connect_args={
+            "check_same_thread": False, "timeout": args.busy_timeout,
+        })
+        tps, ok, errors = run(baseline, args.threads, args.tx, args.work_ms / 1000)
+        print(f"{'default':<12} | {tps:>8.0f} | {ok:>6} | {errors:>6}")
+        baseline.dispose()
+
+        perf = create_engine(f"sqlite:///{tmp}/perf.db", connect_args={"check_same_thread": False})
+        enable_sqlite_performance_mode(perf)
+        tps, ok, errors = run(perf, args.threads, args.tx, args.work_ms / 1000)
+        print(f"{'performance':<12} | {tps:>8.0f} | {ok:>6} | {errors:>6}")
+        perf.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,36 @@
-"""Фикстуры для тестов: тестовая БД (SQLite in-memory), TestClient, юзеры, правила."""
+"""Фикстуры для тестов: тестовая БД (временный файл SQLite), TestClient, юзеры, правила."""
+
+import os
+import tempfile
 
 import pytest
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 from fastapi.testclient import TestClient
 
-from app.database import Base, get_db, Role, User, UnderwritingRule, RiskRule
-from app.auth import hash_password, create_access_token
+from app.database import Base, get_db, get_async_db, Role, User, UnderwritingRule, RiskRule
+from app.auth import hash_password, create_access_token, permission_cache, active_user_cache
 from app.main import app
 from app.limiter import limiter
+from app.perm_versions import perm_versions
+from app.rules_cache import rules_cache
+from app.services.rule_simulation import verdict_snapshot
+from app.services.verdict_memo import verdict_memo
 
-# SQLite in-memory с StaticPool — гарантирует одно соединение для всех сессий
+# Файл, а не :memory: — async-эндпоинты (aiosqlite) открывают своё соединение к той же БД.
+# Sync: StaticPool — одно соединение для всех сессий; async: NullPool — соединение на запрос
+# (у TestClient event loop может меняться между запросами).
+TEST_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="underwriting-tests-"), "test.db")
 TEST_ENGINE = create_engine(
-    "sqlite:///:memory:",
+    f"sqlite:///{TEST_DB_PATH}",
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
 TestSession = sessionmaker(autocommit=False, autoflush=False, bind=TEST_ENGINE)
+TEST_ASYNC_ENGINE = create_async_engine(f"sqlite+aiosqlite:///{TEST_DB_PATH}", poolclass=NullPool)
+TestAsyncSession = async_sessionmaker(TEST_ASYNC_ENGINE, autoflush=False, expire_on_commit=False)
 
 
 @pytest.fixture(autouse=True)
@@ -25,6 +38,12 @@ def db_session():
     """Создаёт все таблицы, возвращает сессию, откатывает после теста."""
     Base.metadata.create_all(bind=TEST_ENGINE)
     limiter._storage.reset()
+    permission_cache.clear()
+    perm_versions.clear()
+    active_user_cache.clear()
+    verdict_snapshot.clear()
+    rules_cache.clear()
+    verdict_memo.clear()
     session = TestSession()
     try:
         yield session
@@ -42,7 +61,12 @@ def client(db_session):
         finally:
             pass
 
+    async def _override_get_async_db():
+        async with TestAsyncSession() as session:
+            yield session
+
     app.dependency_overrides[get_db] = _override_get_db
+    app.dependency_overrides[get_async_db] = _override_get_async_db
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
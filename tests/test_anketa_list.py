@@ -0,0 +1,165 @@
+"""Тесты списка анкет: keyset-пагинация, серверные фильтры, сортировка, legacy-режим."""
+
+from datetime import datetime
+
+from app.database import Anketa
+
+
+def _seed_anketas(db, user_id, n, **kwargs) -> list[int]:
+    ids = []
+    for i in range(n):
+        a = Anketa(created_by=user_id, status="saved", full_name=f"КЛИЕНТ {i}", **kwargs)
+        db.add(a)
+        db.commit()
+        ids.append(a.id)
+    return ids
+
+
+def _collect_pages(client, headers, **params) -> list[list[int]]:
+    pages = []
+    cursor = None
+    while True:
+        query = dict(params)
+        if cursor:
+            query["cursor"] = cursor
+        resp = client.get("/api/v1/anketas", params=query, headers=headers)
+        assert resp.status_code == 200, resp.text
+        data = resp.json()
+        pages.append([item["id"] for item in data["items"]])
+        cursor = data["next_cursor"]
+        if not cursor:
+            return pages
+
+
+class TestKeysetPagination:
+
+    def test_pages_by_id_desc(self, client, admin_headers, seeded_db):
+        ids = _seed_anketas(seeded_db["session"], seeded_db["admin"].id, 5)
+        pages = _collect_pages(client, admin_headers, limit=2)
+        assert pages == [ids[:-3:-1], ids[2:0:-1], ids[:1]]
+
+    def test_exact_page_boundary_has_no_next_cursor(self, client, admin_headers, seeded_db):
+        _seed_anketas(seeded_db["session"], seeded_db["admin"].id, 4)
+        pages = _collect_pages(client, admin_headers, limit=2)
+        assert [len(p) for p in pages] == [2, 2]
+
+    def test_sort_by_created_at_asc_with_ties(self, client, admin_headers, seeded_db):
+        db = seeded_db["session"]
+        admin_id = seeded_db["admin"].id
+        same_time = datetime(2026, 5, 1, 12, 0)
+        ids = _seed_anketas(db, admin_id, 3, created_at=same_time)
+        ids += _seed_anketas(db, admin_id, 1, created_at=datetime(2026, 4, 1))
+        pages = _collect_pages(client, admin_headers, limit=2, sort="created_at", order="asc")
+        flat = [i for p in pages for i in p]
+        assert flat == [ids[3], ids[0], ids[1], ids[2]]
+
+    def test_sort_by_created_at_null_rows_last(self, client, admin_headers, seeded_db):
+        db = seeded_db["session"]
+        admin_id = seeded_db["admin"].id
+        dated = _seed_anketas(db, admin_id, 2, created_at=datetime(2026, 5, 1))
+        legacy = _seed_anketas(db, admin_id, 3)
+        db.query(Anketa).filter(Anketa.id.in_(legacy)).update({"created_at": None}, synchronize_session=False)
+        db.commit()
+        for order, expected in (("asc", dated + legacy), ("desc", dated[::-1] + legacy[::-1])):
+            pages = _collect_pages(client, admin_headers, limit=2, sort="created_at", order=order)
+            assert [i for p in pages for i in p] == expected
+
+    def test_invalid_cursor(self, client, admin_headers, seeded_db):
+        resp = client.get("/api/v1/anketas", params={"cursor": "мусор"}, headers=admin_headers)
+        assert resp.status_code == 400
+
+    def test_cursor_from_other_sort_rejected(self, client, admin_headers, seeded_db):
+        _seed_anketas(seeded_db["session"], seeded_db["admin"].id, 3)
+        cursor = client.get("/api/v1/anketas", params={"limit": 1}, headers=admin_headers).json()["next_cursor"]
+        resp = client.get(
+            "/api/v1/anketas", params={"cursor": cursor, "sort": "created_at"}, headers=admin_headers,
+        )
+        assert resp.status_code == 400
+
+    def test_invalid_sort(self, client, admin_headers, seeded_db):
+        resp = client.get("/api/v1/anketas", params={"sort": "full_name"}, headers=admin_headers)
+        assert resp.status_code == 400
+
+
+class TestListFilters:
+
+    def test_status_and_client_type(self, client, admin_headers, seeded_db):
+        db = seeded_db["session"]
+        admin_id = seeded_db["admin"].id
+        _seed_anketas(db, admin_id, 2)
+        legal = _seed_anketas(db, admin_id, 1, client_type="legal_entity")
+        db.add(Anketa(created_by=admin_id, status="draft"))
+        db.commit()
+        data = client.get("/api/v1/anketas", params={"status": "saved", "client_type": "legal_entity"},
+                          headers=admin_headers).json()
+        assert [i["id"] for i in data["items"]] == legal
+
+    def test_client_type_null_counts_as_individual(self, client, admin_headers, seeded_db):
+        db = seeded_db["session"]
+        admin_id = seeded_db["admin"].id
+        legacy = _seed_anketas(db, admin_id, 1)
+        db.query(Anketa).filter(Anketa.id == legacy[0]).update({"client_type": None})
+        db.commit()
+        _seed_anketas(db, admin_id, 1, client_type="legal_entity")
+        data = client.get("/api/v1/anketas", params={"client_type": "individual"}, headers=admin_headers).json()
+        assert [i["id"] for i in data["items"]] == legacy
+        assert data["items"][0]["client_type"] == "individual"
+
+    def test_search_covers_all_pages(self, client, admin_headers, seeded_db):
+        db = seeded_db["session"]
+        admin_id = seeded_db["admin"].id
+        target = _seed_anketas(db, admin_id, 1, car_brand="Chevrolet")
+        _seed_anketas(db, admin_id, 5)
+        data = client.get("/api/v1/anketas", params={"q": "chevro", "limit": 2}, headers=admin_headers).json()
+        assert [i["id"] for i in data["items"]] == target and data["next_cursor"] is None
+        by_name = client.get("/api/v1/anketas", params={"q": "КЛИЕНТ 3"}, headers=admin_headers).json()
+        assert len(by_name["items"]) == 1
+        by_creator = client.get("/api/v1/anketas", params={"q": "Инспектор"}, headers=admin_headers).json()
+        assert by_creator["items"] == []
+
+    def test_partner_and_dates(self, client, admin_headers, seeded_db):
+        db = seeded_db["session"]
+        admin_id = seeded_db["admin"].id
+        match = _seed_anketas(db, admin_id, 1, partner="Auto Dealer", created_at=datetime(2026, 3, 10, 15, 0))
+        _seed_anketas(db, admin_id, 1, partner="Auto Dealer", created_at=datetime(2026, 2, 1))
+        _seed_anketas(db, admin_id, 1, partner="Other", created_at=datetime(2026, 3, 10))
+        data = client.get("/api/v1/anketas", params={
+            "partner": "dealer", "date_from": "2026-03-01", "date_to": "2026-03-10",
+        }, headers=admin_headers).json()
+        assert [i["id"] for i in data["items"]] == match
+
+    def test_creator_filter_for_admin(self, client, admin_headers, seeded_db):
+        db = seeded_db["session"]
+        _seed_anketas(db, seeded_db["admin"].id, 2)
+        mine = _seed_anketas(db, seeded_db["inspector"].id, 1)
+        data = client.get("/api/v1/anketas", params={"creator": seeded_db["inspector"].id},
+                          headers=admin_headers).json()
+        assert [i["id"] for i in data["items"]] == mine
+        assert data["items"][0]["creator_name"] == "Тест Инспектор"
+
+    def test_inspector_sees_only_own(self, client, inspector_headers, seeded_db):
+        db = seeded_db["session"]
+        _seed_anketas(db, seeded_db["admin"].id, 2)
+        mine = _seed_anketas(db, seeded_db["inspector"].id, 1)
+        data = client.get("/api/v1/anketas", params={"creator": seeded_db["admin"].id},
+                          headers=inspector_headers).json()
+        assert [i["id"] for i in data["items"]] == mine
+
+    def test_deleted_excluded(self, client, admin_headers, seeded_db):
+        db = seeded_db["session"]
+        ids = _seed_anketas(db, seeded_db["admin"].id, 2)
+        db.query(Anketa).filter(Anketa.id == ids[0]).update({"status": "deleted"})
+        db.commit()
+        data = client.get("/api/v1/anketas", headers=admin_headers).json()
+        assert [i["id"] for i in data["items"]] == [ids[1]]
+
+
+class TestLegacyList:
+
+    def test_legacy_returns_plain_list(self, client, admin_headers, seeded_db):
+        ids = _seed_anketas(seeded_db["session"], seeded_db["admin"].id, 3)
+        resp = client.get("/api/v1/anketas", params={"legacy": "true", "limit": 1}, headers=admin_headers)
+        assert resp.status_code == 200
+        data = resp.json()
+        assert isinstance(data, list)
+        assert [i["id"] for i in data] == ids[::-1]
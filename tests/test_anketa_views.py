@@ -0,0 +1,139 @@
+"""Тесты проекций Anketa: списки/отчёты не тянут лишние колонки, секции грузятся лениво."""
+
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app.database import Anketa, AnketaCompany, AnketaGuarantor
+from app.services.anketa_service import query_anketa_list
+from app.services.anketa_views import WEBHOOK_VIEW, select_view
+from app.services.webhook_service import _build_payload
+from tests.conftest import TEST_ENGINE
+
+
+def _captured_selects(fn) -> list[str]:
+    statements = []
+
+    def _listener(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM anketa" in statement:
+            statements.append(statement)
+
+    event.listen(TEST_ENGINE, "before_cursor_execute", _listener)
+    try:
+        fn()
+    finally:
+        event.remove(TEST_ENGINE, "before_cursor_execute", _listener)
+    return statements
+
+
+def _seed(db, user_id, **kwargs) -> Anketa:
+    a = Anketa(
+        created_by=user_id, status="saved", full_name="КЛИЕНТ",
+        registration_address="г. Ташкент, " + "очень длинный адрес " * 50,
+        property_details="квартира", overdue_reason="болезнь", **kwargs,
+    )
+    db.add(a)
+    db.commit()
+    return a
+
+
+class TestLazySections:
+
+    def test_plain_load_skips_sections(self, seeded_db):
+        db = seeded_db["session"]
+        anketa_id = _seed(db, seeded_db["admin"].id).id
+        db.expunge_all()
+
+        statements = _captured_selects(lambda: db.query(Anketa).filter(Anketa.id == anketa_id).one())
+        assert len(statements) == 1
+        assert "registration_address" not in statements[0]
+        assert "full_name" in statements[0]
+
+    def test_section_loaded_on_first_access(self, seeded_db):
+        db = seeded_db["session"]
+        anketa_id = _seed(db, seeded_db["admin"].id).id
+        db.expunge_all()
+        a = db.query(Anketa).filter(Anketa.id == anketa_id).one()
+
+        statements = _captured_selects(lambda: (a.registration_address, a.birth_date, a.pinfl))
+        assert len(statements) == 1
+        assert "FROM anketa_personal" in statements[0]
+        assert a.property_details == "квартира"
+        assert a.overdue_reason == "болезнь"
+
+    def test_missing_section_reads_defaults(self, seeded_db):
+        db = seeded_db["session"]
+        a = Anketa(created_by=seeded_db["admin"].id, status="draft", company_name="ООО")
+        db.add(a)
+        db.commit()
+        assert a.guarantor is None
+        assert a.guarantor_full_name is None
+        assert a.credit_history is None
+        assert a.systematic_overdue is False
+
+    def test_setting_none_does_not_create_section(self, seeded_db):
+        db = seeded_db["session"]
+        a = Anketa(created_by=seeded_db["admin"].id, status="draft")
+        db.add(a)
+        db.commit()
+        a.guarantor_full_name = None
+        a.director_phone = "+998901234567"
+        db.commit()
+        assert db.query(AnketaGuarantor).count() == 0
+        assert db.query(AnketaCompany).filter(AnketaCompany.anketa_id == a.id).one().director_phone == "+998901234567"
+
+    def test_section_change_bumps_updated_at(self, seeded_db):
+        db = seeded_db["session"]
+        a = _seed(db, seeded_db["admin"].id)
+        db.query(Anketa).filter(Anketa.id == a.id).update({"updated_at": datetime(2020, 1, 1)})
+        db.commit()
+        a.passport_issued_by = "ИИБ"
+        db.commit()
+        assert a.updated_at > datetime(2020, 1, 1)
+
+    def test_detail_endpoint_returns_heavy_text(self, client, admin_headers, seeded_db):
+        a = _seed(seeded_db["session"], seeded_db["admin"].id)
+        data = client.get(f"/api/v1/anketas/{a.id}", headers=admin_headers).json()
+        assert data["property_details"] == "квартира"
+        assert data["registration_address"].startswith("г. Ташкент")
+
+
+class TestProjectedQueries:
+
+    def test_list_selects_only_list_columns(self, seeded_db):
+        db = seeded_db["session"]
+        admin = seeded_db["admin"]
+        _seed(db, admin.id)
+        db.expunge(db.query(Anketa).one())
+
+        result = {}
+        statements = _captured_selects(lambda: result.update(query_anketa_list(db, admin, limit=10)))
+        assert len(statements) == 1
+        assert "registration_address" not in statements[0]
+        assert "passport_series" not in statements[0]
+        assert result["items"][0]["creator_name"] == "Тест Админ"
+
+    def test_employee_stats_projection(self, client, admin_headers, seeded_db):
+        _seed(seeded_db["session"], seeded_db["admin"].id)
+        statements = _captured_selects(
+            lambda: client.get("/api/v1/anketas/employee-stats/data", headers=admin_headers),
+        )
+        assert statements and all("passport_series" not in s for s in statements)
+
+    def test_export_projection(self, client, admin_headers, seeded_db):
+        _seed(seeded_db["session"], seeded_db["admin"].id)
+        holder = {}
+        statements = _captured_selects(
+            lambda: holder.update(resp=client.get("/api/v1/admin/export-excel", headers=admin_headers)),
+        )
+        assert holder["resp"].status_code == 200
+        assert statements and all("passport_series" not in s for s in statements)
+
+    def test_webhook_payload_from_row(self, seeded_db):
+        db = seeded_db["session"]
+        a = _seed(db, seeded_db["admin"].id, decision="approved", dti=31.5)
+        row = select_view(db, WEBHOOK_VIEW).filter(Anketa.id == a.id).one()
+        payload = _build_payload("anketa.approved", row)
+        assert payload["anketa_id"] == a.id
+        assert payload["client_name"] == "КЛИЕНТ"
+        assert payload["dti"] == 31.5
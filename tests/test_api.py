@@ -30,8 +30,8 @@ class TestAnketaCRUD:
         resp = client.get("/api/v1/anketas", headers=admin_headers)
         assert resp.status_code == 200, f"Список анкет → 200, получили {resp.status_code}"
         data = resp.json()
-        assert isinstance(data, list), "Ответ должен быть списком"
-        assert len(data) >= 1, "Список должен содержать хотя бы одну анкету"
+        assert isinstance(data["items"], list), "Ответ должен содержать список items"
+        assert len(data["items"]) >= 1, "Список должен содержать хотя бы одну анкету"
 
     def test_update_anketa(self, client, admin_headers, sample_anketa_data, seeded_db):
         create_resp = client.post("/api/v1/anketas?client_type=individual", headers=admin_headers)
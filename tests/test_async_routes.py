@@ -0,0 +1,106 @@
+"""Тесты async-эндпоинтов (AsyncSession): detail, список, уведомления, аналитика."""
+
+import fastapi.dependencies.utils
+import fastapi.routing
+import pytest
+
+from app.database import Anketa, AnketaViewLog, Notification
+
+
+@pytest.fixture
+def threadpool_calls(monkeypatch):
+    """Счётчик вызовов threadpool из FastAPI (sync-эндпоинты и sync-зависимости)."""
+    calls = []
+
+    def _wrap(original):
+        async def _counting(func, *args, **kwargs):
+            calls.append(getattr(func, "__name__", repr(func)))
+            return await original(func, *args, **kwargs)
+        return _counting
+
+    monkeypatch.setattr(fastapi.routing, "run_in_threadpool", _wrap(fastapi.routing.run_in_threadpool))
+    monkeypatch.setattr(
+        fastapi.dependencies.utils, "run_in_threadpool", _wrap(fastapi.dependencies.utils.run_in_threadpool),
+    )
+    return calls
+
+
+def _notify(db, user_id, n, is_read=False):
+    for i in range(n):
+        db.add(Notification(user_id=user_id, type="info", title=f"N{i}", message="m", is_read=is_read))
+    db.commit()
+
+
+class TestNoThreadpool:
+
+    @pytest.mark.parametrize("path", [
+        "/api/v1/anketas",
+        "/api/v1/anketas/notifications/list",
+        "/api/v1/anketas/notifications/unread-count",
+        "/api/v1/anketas/analytics",
+        "/api/v1/anketas/analytics/monthly-trend",
+    ])
+    def test_read_endpoints_stay_on_event_loop(self, client, admin_headers, seeded_db, threadpool_calls, path):
+        resp = client.get(path, headers=admin_headers)
+        assert resp.status_code == 200, resp.text
+        assert threadpool_calls == []
+
+    def test_sync_endpoint_uses_threadpool(self, client, admin_headers, seeded_db, threadpool_calls):
+        # Контроль: счётчик действительно ловит sync-путь
+        client.get("/api/v1/anketas/stats", headers=admin_headers)
+        assert threadpool_calls
+
+
+class TestNotifications:
+
+    def test_unread_count_only_own_unread(self, client, admin_headers, seeded_db):
+        db = seeded_db["session"]
+        _notify(db, seeded_db["admin"].id, 3)
+        _notify(db, seeded_db["admin"].id, 2, is_read=True)
+        _notify(db, seeded_db["inspector"].id, 4)
+        resp = client.get("/api/v1/anketas/notifications/unread-count", headers=admin_headers)
+        assert resp.json() == {"count": 3}
+
+    def test_list_latest_first(self, client, admin_headers, seeded_db):
+        _notify(seeded_db["session"], seeded_db["admin"].id, 3)
+        data = client.get("/api/v1/anketas/notifications/list", headers=admin_headers).json()
+        assert [n["title"] for n in data] == ["N2", "N1", "N0"]
+
+    def test_read_all_visible_to_async_count(self, client, admin_headers, seeded_db):
+        _notify(seeded_db["session"], seeded_db["admin"].id, 2)
+        client.post("/api/v1/anketas/notifications/read-all", headers=admin_headers)
+        resp = client.get("/api/v1/anketas/notifications/unread-count", headers=admin_headers)
+        assert resp.json() == {"count": 0}
+
+
+class TestDetailAndAnalytics:
+
+    def test_detail_records_view(self, client, admin_headers, seeded_db):
+        db = seeded_db["session"]
+        a = Anketa(created_by=seeded_db["admin"].id, status="saved", full_name="КЛИЕНТ")
+        db.add(a)
+        db.commit()
+        resp = client.get(f"/api/v1/anketas/{a.id}", headers=admin_headers)
+        assert resp.status_code == 200
+        assert resp.json()["full_name"] == "КЛИЕНТ"
+        assert db.query(AnketaViewLog).filter(AnketaViewLog.anketa_id == a.id).count() == 1
+
+    def test_detail_not_found(self, client, admin_headers, seeded_db):
+        resp = client.get("/api/v1/anketas/999999", headers=admin_headers)
+        assert resp.status_code == 404
+
+    def test_detail_foreign_anketa_forbidden(self, client, inspector_headers, seeded_db):
+        db = seeded_db["session"]
+        a = Anketa(created_by=seeded_db["admin"].id, status="saved")
+        db.add(a)
+        db.commit()
+        resp = client.get(f"/api/v1/anketas/{a.id}", headers=inspector_headers)
+        assert resp.status_code == 403
+
+    def test_analytics_report_requires_permission(self, client, inspector_headers, seeded_db):
+        resp = client.get("/api/v1/anketas/analytics/dti-distribution", headers=inspector_headers)
+        assert resp.status_code == 403
+
+    def test_invalid_token_rejected(self, client, seeded_db):
+        resp = client.get("/api/v1/anketas/notifications/unread-count", headers={"Authorization": "Bearer x"})
+        assert resp.status_code == 401
@@ -1,14 +1,18 @@
 """Тесты аутентификации: JWT, логин, пермишены, пароли."""
 
 import string
+import threading
 from datetime import datetime, timedelta, timezone
 
+import bcrypt
 from jose import jwt
 
+import app.auth
 from app.auth import (
     create_access_token,
     hash_password,
     verify_password,
+    password_needs_rehash,
     generate_password,
     get_user_permissions,
     SECRET_KEY,
@@ -128,3 +132,49 @@ class TestPasswords:
         assert has_upper, "Пароль должен содержать заглавную букву"
         assert has_digit, "Пароль должен содержать цифру"
         assert has_special, "Пароль должен содержать спецсимвол"
+
+
+# ===== Стоимость bcrypt и перехеширование =====
+
+LOGIN = {"email": "inspector@test.com", "password": "Inspector123!"}
+
+
+def _cost(hashed: str) -> int:
+    return int(hashed.split("$")[2])
+
+
+class TestBcryptCost:
+
+    def test_hash_uses_configured_cost(self, monkeypatch):
+        monkeypatch.setattr(app.auth, "BCRYPT_ROUNDS", 5)
+        hashed = hash_password("test123")
+        assert _cost(hashed) == 5
+        assert not password_needs_rehash(hashed)
+        monkeypatch.setattr(app.auth, "BCRYPT_ROUNDS", 6)
+        assert password_needs_rehash(hashed)
+
+    def test_login_rehashes_on_cost_change(self, client, seeded_db, monkeypatch):
+        monkeypatch.setattr(app.auth, "BCRYPT_ROUNDS", 5)
+        assert client.post("/api/v1/auth/login", json=LOGIN).status_code == 200
+        db = seeded_db["session"]
+        db.expire_all()
+        new_hash = seeded_db["inspector"].password_hash
+        assert _cost(new_hash) == 5
+        assert client.post("/api/v1/auth/login", json=LOGIN).status_code == 200
+        db.expire_all()
+        assert seeded_db["inspector"].password_hash == new_hash  # стоимость совпала — без перехеширования
+
+    def test_failed_login_does_not_rehash(self, client, seeded_db, monkeypatch):
+        old_hash = seeded_db["inspector"].password_hash
+        monkeypatch.setattr(app.auth, "BCRYPT_ROUNDS", 5)
+        client.post("/api/v1/auth/login", json={**LOGIN, "password": "WrongPass!"})
+        seeded_db["session"].expire_all()
+        assert seeded_db["inspector"].password_hash == old_hash
+
+    def test_login_verifies_on_bcrypt_pool(self, client, seeded_db, monkeypatch):
+        threads = []
+        original = bcrypt.checkpw
+        monkeypatch.setattr(bcrypt, "checkpw",
+                            lambda *a: threads.append(threading.current_thread().name) or original(*a))
+        assert client.post("/api/v1/auth/login", json=LOGIN).status_code == 200
+        assert len(threads) == 1 and threads[0].startswith("bcrypt")
@@ -0,0 +1,128 @@
+"""Тесты пакетного авто-вердикта: совпадение с calc_auto_verdict на случайных портфелях (property test)."""
+
+import random
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+from dateutil.relativedelta import relativedelta
+
+from app.database import Anketa, AnketaCreditHistory
+from app.services.batch_verdict import batch_auto_verdict, load_verdict_columns, verdict_columns
+from app.services.calculation_service import calc_auto_verdict
+
+CATEGORIES = [None, "", "до 30 дней", "31-60", "61-90", "90+", "неизвестно"]
+CLASSES = [None, "", "Стандартный", "Standard", "н/д", "Субстандартный", "Substandart", "Сомнительный", "Безнадёжный"]
+RISK_RULES = [{"category": "E", "min_pv": 20.0}, {"category": "F1", "min_pv": 25.0}, {"category": "A", "min_pv": 3.0}]
+
+
+def _overdue_date(rnd: random.Random):
+    if rnd.random() < 0.2:
+        return None
+    # вокруг порогов 6 / 12 / 24 мес, ± день
+    months = rnd.choice([0, 1, 5, 6, 7, 11, 12, 13, 23, 24, 25, 40])
+    return date.today() - relativedelta(months=months) + timedelta(days=rnd.choice([-1, 0, 1]))
+
+
+def _random_anketa(rnd: random.Random) -> SimpleNamespace:
+    pick = rnd.choice
+    maybe = lambda value, p=0.15: None if rnd.random() < p else value
+    birth = date.today() - relativedelta(years=rnd.choice([18, 21, 22, 40, 65, 66, 70])) + timedelta(
+        days=pick([-1, 0, 1]))
+    return SimpleNamespace(
+        client_type=pick(["individual", "legal_entity", None]),
+        dti=maybe(pick([0.0, 30.5, 50.0, 50.01, 55.5, 60.0, 60.01, 85.3, rnd.uniform(0, 120)])),
+        down_payment_percent=maybe(pick([0, 5, 10, 15.5, 20, 30, rnd.uniform(0, 60)])),
+        total_monthly_income=maybe(pick([0, 1_500_000, 8_000_000, rnd.uniform(1e6, 5e7)])),
+        monthly_obligations_payment=maybe(pick([0, 500_000, 3_000_000, rnd.uniform(0, 2e7)])),
+        interest_rate=maybe(pick([0, 18, 24.5, 36, rnd.uniform(1, 60)])),
+        lease_term_months=maybe(pick([0, 12, 24, 36, 48, 60])),
+        purchase_price=maybe(pick([0, 150_000_000, 300_000_000, rnd.uniform(5e7, 1e9)])),
+        overdue_category=pick(CATEGORIES), last_overdue_date=_overdue_date(rnd),
+        company_overdue_category=pick(CATEGORIES), company_last_overdue_date=_overdue_date(rnd),
+        director_overdue_category=pick(CATEGORIES), director_last_overdue_date=_overdue_date(rnd),
+        guarantor_overdue_category=pick(CATEGORIES), guarantor_last_overdue_date=_overdue_date(rnd),
+        current_overdue_amount=maybe(pick([0, 0, 1_000_000])),
+        systematic_overdue=pick([None, False, False, True]),
+        worst_active_classification=pick(CLASSES),
+        worst_closed_classification=pick(CLASSES),
+        has_lombard=pick([None, False, False, True]),
+        scoring_class=pick([None, "", "A", "c", "D", "e", "E"]),
+        birth_date=pick([None, birth, birth.isoformat(), "не дата"]),
+        open_applications_count=maybe(pick([0, 0, 1, 3])),
+        risk_grade=pick([None, "", "e", "E", "F1", "A", "Z"]),
+        no_scoring_response=pick([None, False, True]),
+    )
+
+
+def _rules_variant(rnd: random.Random, default_rules: dict) -> dict:
+    rules = dict(default_rules)
+    decisions = ["approved", "review", "rejected", "неизвестно"]
+    for key in list(rules):
+        if key.endswith("_result") and rnd.random() < 0.3:
+            rules[key] = rnd.choice(decisions)
+        elif key.endswith("_pv_add") and rnd.random() < 0.3:
+            rules[key] = rnd.choice([0, 2.5, 7, 15])
+        elif "_threshold" in key and rnd.random() < 0.5:
+            rules[key] = rnd.choice([0, 3, 6, 6.5, 12, 13, 24])
+    for key in ("lombard_result", "open_apps_result", "scoring_class_de_result", "current_overdue_result"):
+        if rnd.random() < 0.3:
+            rules[key] = rnd.choice(decisions)
+    if rnd.random() < 0.5:
+        rules["min_pv_percent"] = rnd.choice([5, 10, 12.5])
+    return rules
+
+
+def _scalar(anketa, rules, risk_rules):
+    result = calc_auto_verdict(anketa, rules, risk_rules=risk_rules, with_reasons=False)
+    del result["auto_decision_reasons"]
+    return result
+
+
+class TestBatchMatchesScalar:
+
+    @pytest.mark.parametrize("seed", range(6))
+    def test_random_portfolio(self, seed, default_rules):
+        rnd = random.Random(seed)
+        rules = default_rules if seed == 0 else _rules_variant(rnd, default_rules)
+        risk_rules = RISK_RULES if seed % 3 else None
+        anketas = [_random_anketa(rnd) for _ in range(1500)]
+        batch = batch_auto_verdict(verdict_columns(anketas), rules, risk_rules)
+        assert len(batch) == len(anketas)
+        for i, anketa in enumerate(anketas):
+            assert batch.row(i) == _scalar(anketa, rules, risk_rules), f"строка {i}: {vars(anketa)}"
+
+    def test_dti_suggestions_exercised(self, default_rules):
+        rnd = random.Random(42)
+        anketas = [_random_anketa(rnd) for _ in range(1500)]
+        batch = batch_auto_verdict(verdict_columns(anketas), default_rules, RISK_RULES)
+        rows = [batch.row(i) for i in range(len(batch))]
+        assert any(r["dti_suggestion_pv"] is not None for r in rows)
+        assert any(r["dti_suggestion_price"] is not None for r in rows)
+        assert {r["auto_decision"] for r in rows} == {"approved", "review", "rejected"}
+        assert any(r["requires_guarantor"] for r in rows)
+
+    def test_empty(self, default_rules):
+        assert len(batch_auto_verdict(verdict_columns([]), default_rules)) == 0
+
+
+class TestLoadVerdictColumns:
+
+    def test_from_database_matches_orm(self, seeded_db, default_rules):
+        db = seeded_db["session"]
+        user_id = seeded_db["inspector"].id
+        for i, (dti, category) in enumerate([(40.0, None), (55.0, "31-60"), (70.0, "90+")]):
+            a = Anketa(created_by=user_id, status="saved", client_type="individual", dti=dti,
+                       down_payment_percent=20, purchase_price=200_000_000, interest_rate=24,
+                       lease_term_months=36, total_monthly_income=10_000_000)
+            a.overdue_category = category
+            a.last_overdue_date = date.today() - relativedelta(months=9 * (i + 1))
+            db.add(a)
+        db.commit()
+        ids, columns = load_verdict_columns(db)
+        batch = batch_auto_verdict(columns, default_rules)
+        orm = {a.id: a for a in db.query(Anketa).all()}
+        assert len(ids) == 3
+        for i, anketa_id in enumerate(ids):
+            assert batch.row(i) == _scalar(orm[int(anketa_id)], default_rules, None)
+        assert db.query(AnketaCreditHistory).count() == 3
@@ -0,0 +1,87 @@
+"""Тесты bootstrap при старте: seed, запись fingerprint, O(1)-повторный старт, версии шагов."""
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+
+from app.bootstrap import STEPS, DEFAULT_RULES, run_bootstrap
+from app.database import Anketa, AnketaPersonal, RiskRule, Role, UnderwritingRule, User
+
+
+@pytest.fixture
+def engine(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path}/boot.db")
+    yield eng
+    eng.dispose()
+
+
+def _count_statements(engine, fn):
+    statements = []
+
+    def _capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+    return statements
+
+
+class TestBootstrap:
+
+    def test_first_boot_seeds_everything(self, engine):
+        applied = run_bootstrap(engine)
+        assert applied == [name for name, _, _ in STEPS]
+        with Session(engine) as db:
+            assert {r.name for r in db.query(Role)} == {"Администратор", "Инспектор"}
+            assert db.query(User).filter(User.email == "admin@fintechdrive.uz", User.is_superadmin == True).count() == 1
+            assert db.query(UnderwritingRule).count() == len(DEFAULT_RULES)
+            assert db.query(RiskRule).count() == 10
+
+    def test_second_boot_is_single_select(self, engine):
+        run_bootstrap(engine)
+        statements = _count_statements(engine, lambda: run_bootstrap(engine))
+        assert len(statements) == 1
+        assert "bootstrap_state" in statements[0]
+
+    def test_bumped_step_version_reruns_only_that_step(self, engine):
+        run_bootstrap(engine)
+        steps = [(n, v + 1 if n == "risk_rules" else v, f) for n, v, f in STEPS]
+        assert run_bootstrap(engine, steps=steps) == ["risk_rules"]
+        assert run_bootstrap(engine, steps=steps) == []
+
+    def test_existing_rule_values_preserved(self, engine):
+        run_bootstrap(engine)
+        with Session(engine) as db:
+            db.query(UnderwritingRule).filter(UnderwritingRule.rule_key == "max_dti_approve").update({"value": "45"})
+            db.query(UnderwritingRule).filter(UnderwritingRule.rule_key == "min_age").delete()
+            db.commit()
+        run_bootstrap(engine, force=True)
+        with Session(engine) as db:
+            assert db.query(UnderwritingRule.value).filter(UnderwritingRule.rule_key == "max_dti_approve").scalar() == "45"
+            assert db.query(UnderwritingRule).filter(UnderwritingRule.rule_key == "min_age").count() == 1
+
+    def test_pinfl_scrubbed_once(self, engine):
+        run_bootstrap(engine, steps=[])  # только схема
+        with Session(engine) as db:
+            db.add(User(id=1, email="u@test", full_name="U", password_hash="x", role="inspector"))
+            a = Anketa(created_by=1, status="saved", pinfl="12345678901234", passport_series="AA1234567", pinfl_hash="h")
+            db.add(a)
+            db.commit()
+            anketa_id = a.id
+        run_bootstrap(engine)
+        with Session(engine) as db:
+            personal = db.get(AnketaPersonal, anketa_id)
+            assert personal.pinfl is None and personal.passport_series is None
+            assert db.get(Anketa, anketa_id).pinfl_hash is None
+
+    def test_missing_credit_report_columns_added(self, engine):
+        run_bootstrap(engine, steps=[])
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE anketa_credit_history DROP COLUMN scoring_class"))
+        run_bootstrap(engine)
+        with engine.connect() as conn:
+            cols = {row[1] for row in conn.execute(text("PRAGMA table_info(anketa_credit_history)"))}
+        assert "scoring_class" in cols
@@ -1,14 +1,18 @@
 """Тесты расчётов: аннуитет, доход, ПВ, DTI, worst_overdue."""
 
+import random
+from datetime import datetime
 from types import SimpleNamespace
 
+import app.services.calculation_service as calculation_service
 from app.services.calculation_service import (
+    DERIVED_GRAPH,
     calc_annuity,
     calc_total_monthly_income,
     run_calculations,
     _worst_overdue_category,
 )
-from app.database import Anketa
+from app.database import Anketa, AnketaHistory
 
 
 def _make_anketa(**kwargs) -> Anketa:
@@ -198,6 +202,94 @@ class TestRunCalculations:
         assert a.remaining_amount is None, "Без цены остаток = None"
 
 
+# ===== Инкрементальный пересчёт (run_calculations с changed) =====
+
+DERIVED_FIELDS = {f for node in DERIVED_GRAPH for f in node.outputs}
+DERIVED_STATE = sorted(DERIVED_FIELDS)
+
+PATCH_VALUES = {
+    "purchase_price": [None, 0, 150_000_000, 287_654_321.5],
+    "down_payment_percent": [None, 0, 10, 33.3],
+    "interest_rate": [None, 0, 24, 36.5],
+    "lease_term_months": [None, 0, 12, 48],
+    "monthly_obligations_payment": [None, 0, 2_500_000],
+    "client_type": ["individual", "legal_entity"],
+    "total_salary": [None, 60_000_000], "salary_period_months": [None, 6, 12],
+    "company_revenue_total": [None, 900_000_000], "company_revenue_period": [None, 12],
+    "director_income_total": [None, 120_000_000], "director_income_period": [None, 12],
+    "overdue_category": [None, "31-60", "90+"],
+    "company_overdue_category": [None, "до 30 дней", "61-90"],
+    "guarantor_overdue_category": [None, "90+"],
+    "actual_address": ["г. Ташкент", "г. Самарканд"],
+}
+
+
+class TestIncrementalCalculations:
+
+    def test_graph_is_topologically_ordered(self):
+        produced = set()
+        for node in DERIVED_GRAPH:
+            assert not (node.inputs & DERIVED_FIELDS) - produced, node.outputs
+            produced.update(node.outputs)
+
+    def test_random_patches_match_full_recalculation(self):
+        rnd = random.Random(7)
+        for _ in range(200):
+            incremental, full = Anketa(), Anketa()
+            run_calculations(incremental)
+            for _ in range(6):
+                patch = {k: rnd.choice(PATCH_VALUES[k]) for k in rnd.sample(sorted(PATCH_VALUES), rnd.randint(1, 4))}
+                for target in (incremental, full):
+                    for key, value in patch.items():
+                        setattr(target, key, value)
+                run_calculations(incremental, changed=patch)
+                run_calculations(full)
+                assert [getattr(incremental, f) for f in DERIVED_STATE] == [getattr(full, f) for f in DERIVED_STATE]
+
+    def test_unrelated_field_recomputes_nothing(self, monkeypatch):
+        a = _make_anketa(purchase_price=10_000_000, down_payment_percent=20, interest_rate=24,
+                         lease_term_months=12, total_salary=600_000, salary_period_months=6)
+        run_calculations(a)
+
+        def _fail(anketa):
+            raise AssertionError("доход не должен пересчитываться")
+        monkeypatch.setattr(calculation_service, "calc_total_monthly_income", _fail)
+        a.actual_address = "г. Ташкент"
+        assert run_calculations(a, changed={"actual_address"}) == set()
+
+    def test_only_changed_outputs_written(self):
+        a = _make_anketa(purchase_price=10_000_000, down_payment_percent=20, interest_rate=24,
+                         lease_term_months=12, total_salary=600_000, salary_period_months=6)
+        assert run_calculations(a) == DERIVED_FIELDS
+        a.interest_rate = 30
+        assert run_calculations(a, changed={"interest_rate"}) == {"monthly_payment", "dti"}
+        # Тот же ПВ другим путём: остаток не изменился — платёж и DTI не трогаются
+        a.purchase_price, a.down_payment_percent = 10_000_000, 20
+        assert run_calculations(a, changed={"purchase_price", "down_payment_percent"}) == set()
+
+
+class TestPatchRecalculation:
+
+    def _create(self, client, headers, data) -> int:
+        anketa_id = client.post("/api/v1/anketas/", json={"client_type": "individual"}, headers=headers).json()["id"]
+        client.patch(f"/api/v1/anketas/{anketa_id}", json=data, headers=headers)
+        return anketa_id
+
+    def test_unchanged_values_no_history_no_bump(self, client, seeded_db, inspector_headers):
+        db = seeded_db["session"]
+        data = {"purchase_price": 100_000_000, "down_payment_percent": 20, "interest_rate": 24, "lease_term_months": 36}
+        anketa_id = self._create(client, inspector_headers, data)
+        db.query(Anketa).filter(Anketa.id == anketa_id).update({"updated_at": datetime(2020, 1, 1)})
+        db.commit()
+        history = db.query(AnketaHistory).filter(AnketaHistory.anketa_id == anketa_id).count()
+
+        resp = client.patch(f"/api/v1/anketas/{anketa_id}", json=data, headers=inspector_headers)
+        assert resp.status_code == 200
+        db.expire_all()
+        assert db.query(AnketaHistory).filter(AnketaHistory.anketa_id == anketa_id).count() == history
+        assert db.get(Anketa, anketa_id).updated_at == datetime(2020, 1, 1)
+
+
 # ===== _worst_overdue_category =====
 
 class TestWorstOverdueCategory:
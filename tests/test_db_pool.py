@@ -0,0 +1,75 @@
+"""Тесты пула соединений: метрики ожидания/таймаутов, warning о насыщении, эндпоинт /admin/db-pool."""
+
+import logging
+
+import pytest
+from sqlalchemy import create_engine, exc
+
+from app.db_pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, pool_stats
+
+
+@pytest.fixture
+def small_engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/pool.db",
+        poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=1, pool_timeout=0.05,
+    )
+    yield engine
+    engine.dispose()
+
+
+class TestPoolMetrics:
+
+    def test_checkout_counted(self, small_engine):
+        with small_engine.connect():
+            stats = pool_stats(small_engine)
+        assert stats["checkouts"] == 1
+        assert stats["checked_out"] == 1
+        assert stats["size"] == 1
+        assert pool_stats(small_engine)["checked_out"] == 0
+
+    def test_overflow_and_timeout(self, small_engine):
+        first = small_engine.connect()
+        second = small_engine.connect()
+        assert pool_stats(small_engine)["overflow"] == 1
+        with pytest.raises(exc.TimeoutError):
+            small_engine.connect()
+        stats = pool_stats(small_engine)
+        assert stats["timeouts"] == 1
+        assert stats["peak_checked_out"] == 2
+        assert stats["wait_max_ms"] >= 50
+        first.close()
+        second.close()
+
+    def test_pool_logger_under_sqlalchemy(self, small_engine):
+        # Уровень логгера app не должен менять логирование пула SQLAlchemy
+        assert small_engine.pool.logger.name == "sqlalchemy.pool.impl.QueuePool"
+        assert InstrumentedAsyncQueuePool(lambda: None).logger.name.startswith("sqlalchemy.pool.")
+
+    def test_saturation_logged_once(self, small_engine, caplog):
+        with caplog.at_level(logging.WARNING, logger="app"):
+            conns = [small_engine.connect() for _ in range(2)]
+            for c in conns:
+                c.close()
+            conns = [small_engine.connect() for _ in range(2)]
+            for c in conns:
+                c.close()
+        warnings = [r for r in caplog.records if "насыщен" in r.getMessage()]
+        assert len(warnings) == 1
+        assert pool_stats(small_engine)["saturation_events"] == 2
+
+
+class TestPoolEndpoint:
+
+    def test_admin_sees_stats(self, client, admin_headers, seeded_db):
+        resp = client.get("/api/v1/admin/db-pool", headers=admin_headers)
+        assert resp.status_code == 200
+        data = resp.json()
+        assert set(data) == {"sync", "async", "replica"}
+        assert data["replica"] is None
+        assert "pool_class" in data["sync"]
+        assert "timeouts" in data["async"]
+
+    def test_inspector_forbidden(self, client, inspector_headers, seeded_db):
+        resp = client.get("/api/v1/admin/db-pool", headers=inspector_headers)
+        assert resp.status_code == 403
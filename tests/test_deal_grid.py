@@ -0,0 +1,115 @@
+"""Тесты сетки структуры сделки (app/services/deal_grid.py) и POST /anketas/deal-grid."""
+
+import numpy as np
+import pytest
+
+from app.database import Anketa, UnderwritingRule
+from app.services.calculation_service import run_calculations
+from app.services.deal_grid import BANDS, deal_grid, grid_axis
+
+RULES = {"max_dti_approve": 50, "max_dti_review": 60}
+
+
+def _scalar_dti(price, pv, term, rate, income, obligations):
+    """DTI той же сделки через run_calculations."""
+    anketa = Anketa(purchase_price=price, down_payment_percent=pv, lease_term_months=term,
+                    interest_rate=rate, monthly_obligations_payment=obligations,
+                    total_salary=income, salary_period_months=1)
+    run_calculations(anketa)
+    return anketa.dti
+
+
+class TestDealGrid:
+
+    def test_grid_axis(self):
+        assert grid_axis(0, 1, 0.1).tolist() == [0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
+        assert grid_axis(12, 60, 12).tolist() == [12, 24, 36, 48, 60]
+        assert grid_axis(5, 5, 1).tolist() == [5]
+
+    def test_matches_run_calculations(self):
+        price, income, obligations = 287_654_321, 25_000_000, 3_500_000
+        pv, term, rate = [5, 15.5, 30, 45], [12, 36, 60], [9.9, 18.5, 28]
+        grid = deal_grid(price, income, obligations, pv, term, rate, RULES)
+        assert grid.dti.shape == (4, 3, 3)
+        for i, p in enumerate(pv):
+            for j, t in enumerate(term):
+                for k, r in enumerate(rate):
+                    dti = _scalar_dti(price, p, t, r, income, obligations)
+                    assert grid.dti[i, j, k] == pytest.approx(dti, abs=0.011)
+                    expected = 0 if dti <= 50 else 1 if dti <= 60 else 2
+                    if abs(dti - 50) > 0.02 and abs(dti - 60) > 0.02:
+                        assert grid.band[i, j, k] == expected
+
+    def test_frontier_min_pv(self):
+        pv = grid_axis(0, 99, 0.1)
+        grid = deal_grid(300_000_000, 20_000_000, 2_000_000, pv, [12, 24, 48], [20, 30], RULES)
+        for j in range(3):
+            for k in range(2):
+                min_pv = grid.min_pv[j, k]
+                approved = grid.band[:, j, k] == 0
+                # выше границы — одобрено, заметно ниже — нет
+                assert approved[pv >= min_pv + 0.05].all()
+                assert not approved[pv <= min_pv - 0.15].any()
+
+    def test_frontier_max_price(self):
+        income, obligations = 15_000_000, 1_000_000
+        grid = deal_grid(100_000_000, income, obligations, [10, 30], [24, 36], [24], RULES)
+        for i, pv in enumerate([10, 30]):
+            for j, term in enumerate([24, 36]):
+                max_price = grid.max_price[i, j, 0]
+                assert _scalar_dti(max_price, pv, term, 24, income, obligations) <= 50.01
+                assert _scalar_dti(max_price * 1.01, pv, term, 24, income, obligations) > 50
+
+    def test_infeasible_frontier(self):
+        grid = deal_grid(100_000_000, 10_000_000, 6_000_000, [20], [36], [24], RULES)
+        data = grid.to_dict()
+        assert data["frontier"] == {"min_pv": [[None]], "max_price": [[[None]]]}
+        assert data["band"] == [[[BANDS.index("rejected")]]]
+
+    def test_min_pv_zero_when_affordable(self):
+        grid = deal_grid(10_000_000, 100_000_000, 0, [0], [36], [24], RULES)
+        assert grid.min_pv.tolist() == [[0.0]]
+        assert grid.to_dict()["counts"] == {"approved": 1, "review": 0, "rejected": 0}
+
+
+class TestDealGridApi:
+
+    def test_ranges(self, client, seeded_db, inspector_headers):
+        body = {"price": 300_000_000, "income": 20_000_000, "obligations": 2_000_000,
+                "pv": {"start": 0, "stop": 60, "step": 5}, "term": [12, 24, 36],
+                "rate": {"start": 20, "stop": 30, "step": 2.5}}
+        resp = client.post("/api/v1/anketas/deal-grid", json=body, headers=inspector_headers)
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["axes"]["pv"] == list(range(0, 65, 5)) and data["axes"]["rate"] == [20, 22.5, 25, 27.5, 30]
+        assert np.array(data["dti"]).shape == (13, 3, 5)
+        assert sum(data["counts"].values()) == 13 * 3 * 5
+        assert data["thresholds"] == {"max_dti_approve": 50.0, "max_dti_review": 60.0}
+        assert np.array(data["frontier"]["min_pv"]).shape == (3, 5)
+
+    def test_uses_cached_rules(self, client, seeded_db, admin_headers, inspector_headers):
+        rule_id = seeded_db["session"].query(UnderwritingRule.id).filter(
+            UnderwritingRule.rule_key == "max_dti_approve").scalar()
+        client.patch(f"/api/v1/admin/rules/{rule_id}", json={"value": "40"}, headers=admin_headers)
+        body = {"price": 100_000_000, "income": 10_000_000, "pv": [20], "term": [36], "rate": [24]}
+        data = client.post("/api/v1/anketas/deal-grid", json=body, headers=inspector_headers).json()
+        assert data["thresholds"]["max_dti_approve"] == 40.0
+        assert data["rules_version"] == 1
+
+    @pytest.mark.parametrize("changes", [
+        {"pv": [100]},
+        {"pv": []},
+        {"term": [0]},
+        {"term": {"start": 12, "stop": 24, "step": 0.5}},
+        {"rate": [-1]},
+        {"pv": {"start": 10, "stop": 0, "step": 1}},
+        {"pv": {"start": 0, "stop": 99, "step": 0.01}},
+        {"pv": grid_axis(0, 90, 0.1).tolist(), "rate": grid_axis(0, 60, 0.5).tolist(), "term": [12, 24]},
+    ])
+    def test_invalid(self, client, seeded_db, inspector_headers, changes):
+        body = {"price": 100_000_000, "income": 10_000_000, "pv": [20], "term": [36], "rate": [24], **changes}
+        assert client.post("/api/v1/anketas/deal-grid", json=body, headers=inspector_headers).status_code == 400
+
+    def test_requires_income(self, client, seeded_db, inspector_headers):
+        body = {"price": 100_000_000, "income": 0, "pv": [20], "term": [36], "rate": [24]}
+        assert client.post("/api/v1/anketas/deal-grid", json=body, headers=inspector_headers).status_code == 422
@@ -0,0 +1,81 @@
+"""Тесты поиска дубликатов: нормализация телефонов, anketa_phones, эндпоинт check-duplicate."""
+
+from app.database import Anketa, AnketaPhone
+from app.services.anketa_service import split_phones, backfill_anketa_phones, find_duplicates
+
+
+def _create_with_phone(client, headers, phone: str) -> int:
+    anketa_id = client.post("/api/v1/anketas?client_type=individual", headers=headers).json()["id"]
+    resp = client.patch(f"/api/v1/anketas/{anketa_id}", json={"phone_numbers": phone}, headers=headers)
+    assert resp.status_code == 200, resp.text
+    return anketa_id
+
+
+class TestSplitPhones:
+
+    def test_single_number_normalized(self):
+        assert split_phones("+998 (90) 123-45-67") == ["998901234567"]
+
+    def test_multiple_numbers(self):
+        assert split_phones("+998901234567, 90 765 43 21; 998901234567") == ["998901234567", "907654321"]
+
+    def test_short_and_empty_skipped(self):
+        assert split_phones("12345, ") == []
+        assert split_phones(None) == []
+
+
+class TestPhoneIndexSync:
+
+    def test_patch_writes_phone_rows(self, client, admin_headers, seeded_db):
+        db = seeded_db["session"]
+        anketa_id = _create_with_phone(client, admin_headers, "+998901234567, +998907654321")
+        phones = {p.phone for p in db.query(AnketaPhone).filter(AnketaPhone.anketa_id == anketa_id)}
+        assert phones == {"998901234567", "998907654321"}
+
+    def test_patch_replaces_phone_rows(self, client, admin_headers, seeded_db):
+        db = seeded_db["session"]
+        anketa_id = _create_with_phone(client, admin_headers, "+998901234567")
+        client.patch(f"/api/v1/anketas/{anketa_id}", json={"phone_numbers": "+998935555555"}, headers=admin_headers)
+        phones = [p.phone for p in db.query(AnketaPhone).filter(AnketaPhone.anketa_id == anketa_id)]
+        assert phones == ["998935555555"]
+
+    def test_backfill_rebuilds_table(self, seeded_db):
+        db = seeded_db["session"]
+        admin_id = seeded_db["admin"].id
+        db.add_all([
+            Anketa(created_by=admin_id, status="saved", phone_numbers="+998901111111"),
+            Anketa(created_by=admin_id, status="saved", phone_numbers="+998902222222, +998903333333"),
+            Anketa(created_by=admin_id, status="saved", phone_numbers=None),
+        ])
+        db.commit()
+        assert backfill_anketa_phones(db, batch_size=2) == 3
+        assert db.query(AnketaPhone).count() == 3
+
+
+class TestDuplicateLookup:
+
+    def test_check_duplicate_endpoint(self, client, admin_headers, seeded_db):
+        existing_id = _create_with_phone(client, admin_headers, "+998 90 123 45 67")
+        resp = client.get(
+            "/api/v1/anketas/check-duplicate",
+            params={"field": "phone_numbers", "value": "998901234567"},
+            headers=admin_headers,
+        )
+        assert resp.status_code == 200
+        assert [d["id"] for d in resp.json()["duplicates"]] == [existing_id]
+
+    def test_match_on_any_of_several_numbers(self, client, admin_headers, seeded_db):
+        first_id = _create_with_phone(client, admin_headers, "+998901234567, +998907654321")
+        second_id = _create_with_phone(client, admin_headers, "+998907654321")
+        resp = client.get(f"/api/v1/anketas/{second_id}", headers=admin_headers)
+        dupes = resp.json()["duplicates"]
+        assert [d["id"] for d in dupes] == [first_id]
+        assert dupes[0]["match_field"] == "Телефон"
+
+    def test_excludes_self_and_deleted(self, client, admin_headers, seeded_db):
+        db = seeded_db["session"]
+        first_id = _create_with_phone(client, admin_headers, "+998901234567")
+        second_id = _create_with_phone(client, admin_headers, "+998901234567")
+        client.request("DELETE", f"/api/v1/anketas/{first_id}", json={"reason": "тест"}, headers=admin_headers)
+        second = db.query(Anketa).filter(Anketa.id == second_id).first()
+        assert find_duplicates(db, second) == []
@@ -0,0 +1,98 @@
+"""Тесты кэша прав ролей: hits/misses, TTL, сброс при правке /admin/roles."""
+
+import pytest
+from sqlalchemy import event
+
+from app.auth import PermissionCache, create_access_token, permission_cache
+from app.database import Role, User
+from tests.conftest import TEST_ENGINE
+
+
+@pytest.fixture
+def role_selects():
+    """Список SELECT ... FROM roles, выполненных через тестовый engine."""
+    statements = []
+
+    def _capture(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM roles" in statement:
+            statements.append(statement)
+
+    event.listen(TEST_ENGINE, "before_cursor_execute", _capture)
+    yield statements
+    event.remove(TEST_ENGINE, "before_cursor_execute", _capture)
+
+
+@pytest.fixture
+def analyst(seeded_db):
+    """Пользователь с отдельной ролью без analytics_view."""
+    db = seeded_db["session"]
+    role = Role(name="Аналитик", anketa_create=True, analytics_view=False)
+    db.add(role)
+    db.commit()
+    user = User(email="analyst@test.com", full_name="Аналитик", password_hash="x", role="inspector", role_id=role.id)
+    db.add(user)
+    db.commit()
+    return {"role": role, "headers": {"Authorization": f"Bearer {create_access_token({'sub': user.id})}"}}
+
+
+class TestPermissionCacheUnit:
+
+    def test_second_lookup_is_hit(self):
+        cache = PermissionCache(ttl=60)
+        loads = []
+        loader = lambda role_id: loads.append(role_id) or {"analytics_view": True}
+        cache.get(1, loader)
+        cache.get(1, loader)
+        assert loads == [1]
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_expired_entry_reloaded(self):
+        cache = PermissionCache(ttl=0)
+        loads = []
+        cache.get(1, lambda role_id: loads.append(role_id) or {})
+        cache.get(1, lambda role_id: loads.append(role_id) or {})
+        assert loads == [1, 1]
+
+    def test_missing_role_cached(self):
+        cache = PermissionCache(ttl=60)
+        assert cache.get(7, lambda role_id: None) is None
+        assert cache.get(7, lambda role_id: pytest.fail("should be cached")) is None
+
+
+class TestPermissionCacheRequests:
+
+    def test_repeated_requests_skip_role_query(self, client, inspector_headers, role_selects):
+        client.get("/api/v1/anketas/edit-requests", headers=inspector_headers)
+        assert len(role_selects) == 1
+        for _ in range(3):
+            client.get("/api/v1/anketas/edit-requests", headers=inspector_headers)
+        assert len(role_selects) == 1
+        assert permission_cache.hits >= 3
+
+    def test_conclude_single_role_query(self, client, inspector_headers, sample_anketa_data, role_selects):
+        anketa_id = client.post("/api/v1/anketas?client_type=individual", headers=inspector_headers).json()["id"]
+        client.patch(f"/api/v1/anketas/{anketa_id}", json=sample_anketa_data, headers=inspector_headers)
+        client.post(f"/api/v1/anketas/{anketa_id}/save", headers=inspector_headers)
+        role_selects.clear()
+        permission_cache.clear()
+        resp = client.post(
+            f"/api/v1/anketas/{anketa_id}/conclude",
+            json={"decision": "rejected_underwriter", "comment": "Отказ тестом", "final_pv": 20},
+            headers=inspector_headers,
+        )
+        assert resp.status_code == 200, resp.text
+        assert len(role_selects) == 1
+
+    def test_role_update_takes_effect_immediately(self, client, admin_headers, analyst):
+        url = "/api/v1/anketas/employee-stats/data"
+        assert client.get(url, headers=analyst["headers"]).status_code == 403
+        resp = client.patch(f"/api/v1/admin/roles/{analyst['role'].id}", json={"analytics_view": True}, headers=admin_headers)
+        assert resp.status_code == 200
+        assert client.get(url, headers=analyst["headers"]).status_code == 200
+
+    def test_stats_endpoint(self, client, admin_headers, inspector_headers):
+        client.get("/api/v1/anketas/edit-requests", headers=inspector_headers)
+        client.get("/api/v1/anketas/edit-requests", headers=inspector_headers)
+        stats = client.get("/api/v1/admin/permission-cache", headers=admin_headers).json()
+        assert stats["misses"] == 1
+        assert stats["hits"] >= 1
@@ -0,0 +1,133 @@
+"""Тесты stateless-прав в JWT (JWT_PERMISSION_CLAIMS): авторизация без БД, версии прав, откат на БД."""
+
+import pytest
+from jose import jwt
+from sqlalchemy import event
+
+import app.auth
+from app.auth import ALGORITHM, SECRET_KEY
+from app.database import PermissionVersion, Role, User
+from app.perm_versions import perm_versions
+from tests.conftest import TEST_ENGINE
+
+
+@pytest.fixture
+def claims_mode(monkeypatch):
+    monkeypatch.setattr(app.auth, "JWT_PERMISSION_CLAIMS", True)
+
+
+@pytest.fixture
+def auth_selects():
+    """SELECT из users / roles через тестовый engine."""
+    captured = []
+
+    def _capture(conn, cursor, statement, *args):
+        if statement.lstrip().startswith("SELECT") and ("FROM users" in statement or "FROM roles" in statement):
+            captured.append(statement)
+
+    event.listen(TEST_ENGINE, "before_cursor_execute", _capture)
+    yield captured
+    event.remove(TEST_ENGINE, "before_cursor_execute", _capture)
+
+
+def _login(client, email="inspector@test.com", password="Inspector123!"):
+    resp = client.post("/api/v1/auth/login", json={"email": email, "password": password})
+    assert resp.status_code == 200, resp.text
+    return resp.json()["access_token"]
+
+
+def _headers(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+class TestPermissionClaims:
+
+    def test_login_embeds_permissions(self, client, seeded_db, claims_mode):
+        claims = jwt.decode(_login(client), SECRET_KEY, algorithms=[ALGORITHM])
+        assert "anketa_create" in claims["perms"]
+        assert "user_manage" not in claims["perms"]
+        assert claims["sa"] is False
+        assert claims["rid"] == seeded_db["inspector_role"].id
+        assert (claims["uv"], claims["rv"]) == (0, 0)
+
+    def test_login_without_mode_has_no_permissions(self, client, seeded_db):
+        claims = jwt.decode(_login(client), SECRET_KEY, algorithms=[ALGORITHM])
+        assert "perms" not in claims
+
+    def test_request_authorized_without_user_or_role_query(self, client, seeded_db, claims_mode, auth_selects):
+        token = _login(client)
+        client.get("/api/v1/anketas/edit-requests", headers=_headers(token))  # прогрев синхронизации версий
+        auth_selects.clear()
+        resp = client.get("/api/v1/anketas/edit-requests", headers=_headers(token))
+        assert resp.status_code == 200
+        assert auth_selects == []
+
+    def test_permission_denied_from_claims(self, client, seeded_db, claims_mode):
+        token = _login(client)
+        assert client.get("/api/v1/admin/users", headers=_headers(token)).status_code == 403
+
+    def test_role_edit_falls_back_to_db(self, client, seeded_db, admin_headers, claims_mode):
+        token = _login(client)
+        url = "/api/v1/anketas/employee-stats/data"
+        assert client.get(url, headers=_headers(token)).status_code == 403
+        role_id = seeded_db["inspector_role"].id
+        client.patch(f"/api/v1/admin/roles/{role_id}", json={"analytics_view": True}, headers=admin_headers)
+        assert client.get(url, headers=_headers(token)).status_code == 200
+
+    def test_deactivated_user_rejected(self, client, seeded_db, admin_headers, claims_mode):
+        token = _login(client)
+        inspector_id = seeded_db["inspector"].id
+        client.patch(f"/api/v1/admin/users/{inspector_id}", json={"is_active": False}, headers=admin_headers)
+        assert client.get("/api/v1/anketas/edit-requests", headers=_headers(token)).status_code == 401
+
+    def test_version_bump_from_other_worker(self, client, seeded_db, claims_mode):
+        token = _login(client)
+        db = seeded_db["session"]
+        # Другой воркер деактивировал пользователя: строка версии в БД, в памяти этого процесса её нет
+        db.query(User).filter(User.id == seeded_db["inspector"].id).update({"is_active": False})
+        db.add(PermissionVersion(kind="user", subject_id=seeded_db["inspector"].id, version=1))
+        db.commit()
+        perm_versions.sync_interval = 0
+        try:
+            assert client.get("/api/v1/anketas/edit-requests", headers=_headers(token)).status_code == 401
+        finally:
+            perm_versions.sync_interval = 5
+
+    def test_bump_is_atomic_increment(self, seeded_db):
+        db = seeded_db["session"]
+        subject_id = seeded_db["inspector"].id
+        assert perm_versions.bump(db, "user", subject_id) == 1
+        # Инкремент с другого воркера между bump: версия растёт от записанной в БД, а не от прочитанной
+        db.execute(PermissionVersion.__table__.update().values(version=PermissionVersion.version + 1))
+        db.commit()
+        assert perm_versions.bump(db, "user", subject_id) == 3
+        assert perm_versions.get("user", subject_id) == 3
+
+    def test_new_token_after_bump_is_stateless_again(self, client, seeded_db, admin_headers, claims_mode, auth_selects):
+        client.patch(f"/api/v1/admin/roles/{seeded_db['inspector_role'].id}", json={"analytics_view": True},
+                     headers=admin_headers)
+        token = _login(client)
+        assert jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])["rv"] == 1
+        client.get("/api/v1/anketas/edit-requests", headers=_headers(token))
+        auth_selects.clear()
+        client.get("/api/v1/anketas/edit-requests", headers=_headers(token))
+        assert auth_selects == []
+
+    def test_me_role_name_from_claims(self, client, seeded_db, claims_mode):
+        db = seeded_db["session"]
+        role = Role(name="Старший инспектор", anketa_create=True)
+        db.add(role)
+        db.commit()
+        db.query(User).filter(User.id == seeded_db["inspector"].id).update({"role_id": role.id})
+        db.commit()
+        data = client.get("/api/v1/auth/me", headers=_headers(_login(client))).json()
+        assert data["role_name"] == "Старший инспектор"
+        assert data["email"] == "inspector@test.com"
+
+    def test_claims_ignored_when_mode_off(self, client, seeded_db, monkeypatch, auth_selects):
+        monkeypatch.setattr(app.auth, "JWT_PERMISSION_CLAIMS", True)
+        token = _login(client)
+        monkeypatch.setattr(app.auth, "JWT_PERMISSION_CLAIMS", False)
+        auth_selects.clear()
+        assert client.get("/api/v1/anketas/edit-requests", headers=_headers(token)).status_code == 200
+        assert any("FROM users" in s for s in auth_selects)
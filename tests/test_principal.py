@@ -0,0 +1,107 @@
+"""Тесты request-scoped principal: пользователь и права — один раз на запрос, бюджет запросов к БД."""
+
+import logging
+
+import pytest
+from sqlalchemy import event
+
+from app.auth import permission_cache
+from tests.conftest import TEST_ASYNC_ENGINE, TEST_ENGINE
+
+
+@pytest.fixture
+def statements():
+    """SQL, выполненные за время теста через sync и async тестовые engines."""
+    captured = []
+
+    def _capture(conn, cursor, statement, *args):
+        captured.append(" ".join(statement.split()))
+
+    engines = (TEST_ENGINE, TEST_ASYNC_ENGINE.sync_engine)
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _capture)
+    yield captured
+    for engine in engines:
+        event.remove(engine, "before_cursor_execute", _capture)
+
+
+def _selects_from(statements, table):
+    return [s for s in statements if s.startswith("SELECT") and f"FROM {table} " in s + " "]
+
+
+def _principal_lookups(statements):
+    """Загрузка пользователя по токену (с фильтром is_active) — в отличие от, например, anketa.creator."""
+    return [s for s in _selects_from(statements, "users") if "users.is_active = 1" in s]
+
+
+@pytest.fixture
+def anketas(client, inspector_headers, sample_anketa_data):
+    """Черновик и сохранённая анкета инспектора."""
+    ids = {}
+    for name in ("draft", "saved"):
+        ids[name] = client.post("/api/v1/anketas?client_type=individual", headers=inspector_headers).json()["id"]
+        client.patch(f"/api/v1/anketas/{ids[name]}", json=sample_anketa_data, headers=inspector_headers)
+    client.post(f"/api/v1/anketas/{ids['saved']}/save", headers=inspector_headers)
+    return ids
+
+
+# (метод, путь, тело, максимум SQL-запросов за запрос при тёплых кэшах прав и пользователей)
+ENDPOINTS = [
+    ("get", "/api/v1/anketas", None, 2),
+    ("get", "/api/v1/anketas/{saved}", None, 10),
+    ("get", "/api/v1/anketas/{saved}/history", None, 3),
+    ("patch", "/api/v1/anketas/{draft}", {"car_brand": "Chevrolet"}, 13),
+    ("post", "/api/v1/anketas/{saved}/conclude",
+     {"decision": "rejected_underwriter", "comment": "Отказ тестом", "final_pv": 20}, 15),
+]
+
+
+class TestPrincipalQueries:
+
+    @pytest.mark.parametrize("method,path,body,budget", ENDPOINTS, ids=[e[1] + ":" + e[0] for e in ENDPOINTS])
+    def test_request_query_budget(self, client, inspector_headers, anketas, statements,
+                                       method, path, body, budget):
+        # прогреть кэши прав и пользователей
+        client.get("/api/v1/anketas", headers=inspector_headers)
+        statements.clear()
+
+        kwargs = {"headers": inspector_headers}
+        if body is not None:
+            kwargs["json"] = body
+        resp = getattr(client, method)(path.format(**anketas), **kwargs)
+        assert resp.status_code == 200, resp.text
+
+        assert _principal_lookups(statements) == []
+        assert _selects_from(statements, "roles") == []
+        assert len(statements) <= budget, "\n".join(statements)
+
+    def test_principal_user_lookup_single_query(self, client, inspector_headers, seeded_db, statements):
+        permission_cache.clear()
+        resp = client.get("/api/v1/anketas/edit-requests", headers=inspector_headers)
+        assert resp.status_code == 200
+        assert len(_principal_lookups(statements)) == 1
+        assert len(_selects_from(statements, "roles")) == 1
+
+    def test_require_permission_and_handler_share_principal(self, client, admin_headers, seeded_db, statements):
+        resp = client.get("/api/v1/admin/edit-requests/count", headers=admin_headers)
+        assert resp.status_code == 200
+        assert len(_principal_lookups(statements)) == 1
+
+
+class TestLoggingMiddleware:
+
+    def test_logs_user_id_from_principal(self, client, inspector_headers, seeded_db, caplog, monkeypatch):
+        import jose.jwt
+
+        decode_calls = []
+        original = jose.jwt.decode
+        monkeypatch.setattr(jose.jwt, "decode", lambda *a, **kw: decode_calls.append(1) or original(*a, **kw))
+        with caplog.at_level(logging.INFO, logger="app"):
+            client.get("/api/v1/anketas/edit-requests", headers=inspector_headers)
+        assert f"user_id={seeded_db['inspector'].id}" in caplog.text
+        assert len(decode_calls) == 1
+
+    def test_invalid_token_not_logged_as_user(self, client, caplog):
+        with caplog.at_level(logging.INFO, logger="app"):
+            client.get("/api/v1/anketas/edit-requests", headers={"Authorization": "Bearer garbage"})
+        assert "user_id=" not in caplog.text
@@ -0,0 +1,136 @@
+"""Регрессия планов запросов: горячие запросы по anketas должны идти по индексам.
+
+Запросы не пишутся руками — вызываются настоящие сервисы/эндпоинты,
+SQL перехватывается и прогоняется через EXPLAIN.
+SQLite проверяется всегда, PostgreSQL — если задан TEST_POSTGRES_URL.
+"""
+
+import json
+import os
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, User, Anketa
+from app.services.analytics_service import (
+    get_stats_data, get_analytics_data, get_employee_stats_data,
+    get_monthly_trend, get_dti_distribution, get_avg_amount_trend,
+)
+from app.services.anketa_service import find_duplicates, query_anketa_list
+from tests.conftest import TEST_ENGINE
+
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+HOT_QUERIES = {
+    "list_own": lambda db, u: query_anketa_list(db, u, limit=50),
+    "list_own_by_status": lambda db, u: query_anketa_list(db, u, limit=50, status="saved"),
+    "stats_by_client_type": lambda db, u: get_stats_data(db, u, "month", None, None, "individual"),
+    "stats_all_types": lambda db, u: get_stats_data(db, u, "week", None, None, None),
+    "analytics": lambda db, u: get_analytics_data(db, u, "month", None, None, None),
+    "employee_stats": lambda db, u: get_employee_stats_data(db, u, "month", None, None),
+    "monthly_trend": lambda db, u: get_monthly_trend(db),
+    "dti_distribution": lambda db, u: get_dti_distribution(db),
+    "amount_trend": lambda db, u: get_avg_amount_trend(db),
+    "duplicates_by_inn": lambda db, u: find_duplicates(db, Anketa(
+        id=-1, client_type="legal_entity", company_inn="12345678901234",
+    )),
+    "duplicates_by_phone": lambda db, u: find_duplicates(db, Anketa(
+        id=-1, client_type="individual", phone_numbers="+998901234567, +998907654321",
+    )),
+}
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def plan_engine(request):
+    if request.param == "sqlite":
+        yield TEST_ENGINE
+        return
+    if not TEST_POSTGRES_URL:
+        pytest.skip("TEST_POSTGRES_URL не задан")
+    engine = create_engine(TEST_POSTGRES_URL)
+    Base.metadata.create_all(bind=engine)
+    try:
+        yield engine
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+@pytest.fixture
+def plan_session(plan_engine):
+    session = sessionmaker(bind=plan_engine)()
+    inspector = User(
+        email="plan@test.com", full_name="План Инспектор", password_hash="x",
+        role="inspector", is_active=True, is_superadmin=False,
+    )
+    session.add(inspector)
+    session.commit()
+    try:
+        yield session, inspector
+    finally:
+        session.rollback()
+        session.query(User).filter(User.email == "plan@test.com").delete()
+        session.commit()
+        session.close()
+
+
+def _capture_anketa_statements(engine, fn) -> list[tuple[str, object]]:
+    captured = []
+
+    def _listener(conn, cursor, statement, parameters, context, executemany):
+        if "anketas" in statement and statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _listener)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", _listener)
+    return captured
+
+
+def _sqlite_anketa_access(conn, statement, params) -> list[str]:
+    """Строки плана SQLite, касающиеся таблицы anketas."""
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, params).fetchall()
+    return [r[3] for r in rows if " anketas" in r[3]]
+
+
+def _pg_anketa_access(conn, statement, params) -> list[str]:
+    """Узлы плана PostgreSQL по anketas в виде 'Node Type [Index Name]'."""
+    conn.exec_driver_sql("SET enable_seqscan = off")
+    raw = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, params).scalar()
+    plan = raw if isinstance(raw, list) else json.loads(raw)
+    found = []
+
+    def _walk(node):
+        if node.get("Relation Name") == "anketas":
+            found.append(f"{node['Node Type']} {node.get('Index Name', '')}".strip())
+        for child in node.get("Plans", []):
+            _walk(child)
+
+    _walk(plan[0]["Plan"])
+    return found
+
+
+def _uses_index(access: str) -> bool:
+    """SQLite: SEARCH (индекс/PK) или SCAN ... USING INDEX; PostgreSQL: всё, кроме Seq Scan."""
+    if access.startswith(("SEARCH", "Index", "Bitmap")):
+        return True
+    return "USING" in access and "INDEX" in access
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_uses_index(plan_engine, plan_session, name):
+    session, inspector = plan_session
+    statements = _capture_anketa_statements(plan_engine, lambda: HOT_QUERIES[name](session, inspector))
+    assert statements, f"{name}: не перехвачено ни одного запроса к anketas"
+
+    explain = _sqlite_anketa_access if plan_engine.dialect.name == "sqlite" else _pg_anketa_access
+    with plan_engine.connect() as conn:
+        for statement, params in statements:
+            accesses = explain(conn, statement, params)
+            assert accesses, f"{name}: план не содержит обращения к anketas\n{statement}"
+            for access in accesses:
+                assert _uses_index(access), f"{name}: полный скан anketas ({access})\n{statement}"
@@ -0,0 +1,107 @@
+"""Тесты общего хранилища rate limit (app/rate_limit_storage.py): sliding window, несколько процессов."""
+
+import multiprocessing
+
+import pytest
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import SlidingWindowCounterRateLimiter
+
+import app.database
+import app.rate_limit_storage
+from app.limiter import limiter
+from app.rate_limit_storage import DatabaseStorage
+
+
+def _hits_in_process(uri: str, limit: str, attempts: int) -> int:
+    """Отдельный процесс = отдельный воркер: своё хранилище, свой лимитер. Сколько попыток прошло."""
+    rate_limiter = SlidingWindowCounterRateLimiter(storage_from_string(uri))
+    item = parse(limit)
+    return sum(rate_limiter.hit(item, "login", "10.0.0.1") for _ in range(attempts))
+
+
+def _run_workers(uri: str, limit: str, workers: int, attempts: int) -> int:
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(workers) as pool:
+        return sum(pool.starmap(_hits_in_process, [(uri, limit, attempts)] * workers))
+
+
+@pytest.fixture
+def storage_uri(tmp_path):
+    return f"db+sqlite:///{tmp_path}/limits.db"
+
+
+@pytest.fixture
+def frozen_clock(monkeypatch):
+    """Часы хранилища посередине минутного окна — все попытки теста попадают в одно окно."""
+    monkeypatch.setattr(app.rate_limit_storage.time, "time", lambda: 1_800_000_030.0)
+
+
+class TestDatabaseStorage:
+
+    def test_sliding_window_limit(self, storage_uri, frozen_clock):
+        rate_limiter = SlidingWindowCounterRateLimiter(storage_from_string(storage_uri))
+        item = parse("5/minute")
+        assert [rate_limiter.hit(item, "k") for _ in range(7)] == [True] * 5 + [False] * 2
+        assert rate_limiter.get_window_stats(item, "k").remaining == 0
+
+    def test_rejected_hit_not_counted(self, storage_uri):
+        storage = storage_from_string(storage_uri)
+        rate_limiter = SlidingWindowCounterRateLimiter(storage)
+        item = parse("2/minute")
+        for _ in range(5):
+            rate_limiter.hit(item, "k")
+        _, _, current, _ = storage.get_sliding_window(item.key_for("k"), item.get_expiry())
+        assert current == 2
+
+    def test_previous_window_weighted(self, storage_uri, monkeypatch):
+        storage = storage_from_string(storage_uri)
+        rate_limiter = SlidingWindowCounterRateLimiter(storage)
+        item = parse("4/minute")
+        now = 1_800_000_000.0  # начало минутного окна
+        monkeypatch.setattr(app.rate_limit_storage.time, "time", lambda: now)
+        assert all(rate_limiter.hit(item, "k") for _ in range(4))
+        # Четверть следующего окна: предыдущие 4 весят 4 * 0.75 = 3 → проходит ещё один
+        now += 75
+        assert [rate_limiter.hit(item, "k") for _ in range(2)] == [True, False]
+
+    def test_clear_and_reset(self, storage_uri):
+        storage = storage_from_string(storage_uri)
+        rate_limiter = SlidingWindowCounterRateLimiter(storage)
+        item = parse("1/minute")
+        rate_limiter.hit(item, "a")
+        rate_limiter.hit(item, "b")
+        rate_limiter.clear(item, "a")
+        assert rate_limiter.hit(item, "a")
+        assert not rate_limiter.hit(item, "b")
+        assert storage.reset() >= 2
+        assert rate_limiter.hit(item, "b")
+
+    def test_registered_schemes(self, storage_uri):
+        assert isinstance(storage_from_string(storage_uri), DatabaseStorage)
+        storage = storage_from_string("db://")
+        assert isinstance(storage, DatabaseStorage)
+        # Своё подключение к основной БД, без writer lock основного engine
+        assert storage.engine is not app.database.engine
+        assert storage.engine.url == app.database.engine.url
+
+
+class TestAcrossProcesses:
+
+    def test_limit_shared_across_processes(self, storage_uri):
+        assert _run_workers(storage_uri, "30/minute", workers=4, attempts=20) == 30
+
+    def test_memory_storage_multiplies_limit(self):
+        # Что чинит общее хранилище: у каждого процесса свои счётчики
+        assert _run_workers("memory://", "5/minute", workers=4, attempts=5) == 20
+
+
+class TestLoginWithDatabaseStorage:
+
+    def test_login_limit_with_shared_storage(self, client, seeded_db, storage_uri, monkeypatch, frozen_clock):
+        storage = storage_from_string(storage_uri)
+        monkeypatch.setattr(limiter, "_storage", storage)
+        monkeypatch.setattr(limiter, "_limiter", SlidingWindowCounterRateLimiter(storage))
+        payload = {"email": "admin@test.com", "password": "WrongPass!"}
+        codes = [client.post("/api/v1/auth/login", json=payload).status_code for _ in range(6)]
+        assert codes == [401] * 5 + [429]
@@ -0,0 +1,118 @@
+"""Тесты read-реплики: маршрутизация get_read_db, откат в primary при отставании/недоступности."""
+
+import io
+import sqlite3
+
+import pytest
+from openpyxl import load_workbook
+from sqlalchemy.pool import NullPool
+
+import app.database as database
+from app.database import Anketa
+from app.db_replica import ReplicaRouter
+from tests.conftest import TEST_DB_PATH
+
+
+@pytest.fixture
+def replica_router(tmp_path):
+    """Реплика — отдельный SQLite-файл; отставание подменяется через router.lag."""
+    path = tmp_path / "replica.db"
+    router = ReplicaRouter(
+        f"sqlite:///{path}", f"sqlite+aiosqlite:///{path}",
+        max_lag=5, check_interval=0, poolclass=NullPool,
+    )
+    router.lag = 0.0
+    router.probe_lag = lambda: router.lag
+
+    async def _probe_async():
+        return router.lag
+    router.probe_lag_async = _probe_async
+    router.path = path
+    yield router
+    router.engine.dispose()
+
+
+@pytest.fixture
+def replica(replica_router, seeded_db, monkeypatch):
+    """Копия засеянной primary-БД + анкета, которая есть только на реплике."""
+    src, dst = sqlite3.connect(TEST_DB_PATH), sqlite3.connect(replica_router.path)
+    src.backup(dst)
+    src.close()
+    dst.execute(
+        "INSERT INTO anketas (created_by, status, client_type, full_name, dti, share_token, created_at) "
+        "VALUES (?, 'approved', 'individual', 'ТОЛЬКО НА РЕПЛИКЕ', 10, 'replica-token', CURRENT_TIMESTAMP)",
+        (seeded_db["admin"].id,),
+    )
+    dst.commit()
+    dst.close()
+    monkeypatch.setattr(database, "replica", replica_router)
+    return replica_router
+
+
+class TestReplicaRouter:
+
+    def test_usable_within_lag(self, replica_router):
+        assert replica_router.is_usable() is True
+
+    def test_lagging_replica_not_usable(self, replica_router):
+        replica_router.lag = 30.0
+        assert replica_router.is_usable() is False
+        assert replica_router.fallbacks == 1
+
+    def test_unreachable_replica_not_usable(self, replica_router):
+        def _boom():
+            raise OSError("connection refused")
+        replica_router.probe_lag = _boom
+        assert replica_router.is_usable() is False
+
+    def test_lag_check_cached(self, replica_router):
+        calls = []
+        replica_router.probe_lag = lambda: calls.append(1) or 0.0
+        replica_router.check_interval = 60
+        for _ in range(5):
+            replica_router.is_usable()
+        assert len(calls) == 1
+
+    def test_sqlite_probe_reports_zero_lag(self, tmp_path):
+        router = ReplicaRouter(f"sqlite:///{tmp_path}/r.db", f"sqlite+aiosqlite:///{tmp_path}/r.db", poolclass=NullPool)
+        assert router.probe_lag() == 0.0
+        router.engine.dispose()
+
+
+class TestReadRouting:
+
+    def test_public_anketa_served_from_replica(self, client, replica):
+        resp = client.get("/api/v1/public/anketa/replica-token")
+        assert resp.status_code == 200
+        assert resp.json()["full_name"] == "ТОЛЬКО НА РЕПЛИКЕ"
+
+    def test_lagging_replica_falls_back_to_primary(self, client, replica):
+        replica.lag = 30.0
+        resp = client.get("/api/v1/public/anketa/replica-token")
+        assert resp.status_code == 404
+
+    def test_no_replica_reads_primary(self, client, seeded_db):
+        assert database.replica is None
+        db = seeded_db["session"]
+        db.add(Anketa(created_by=seeded_db["admin"].id, status="saved", share_token="primary-token"))
+        db.commit()
+        assert client.get("/api/v1/public/anketa/primary-token").status_code == 200
+
+    def test_analytics_from_replica(self, client, admin_headers, replica):
+        total_replica = client.get("/api/v1/anketas/analytics", headers=admin_headers).json()["current_total"]
+        replica.lag = 30.0
+        total_primary = client.get("/api/v1/anketas/analytics", headers=admin_headers).json()["current_total"]
+        assert total_replica == total_primary + 1
+
+    def test_export_from_replica(self, client, admin_headers, replica):
+        resp = client.get("/api/v1/admin/export-excel", headers=admin_headers)
+        assert resp.status_code == 200
+        ws = load_workbook(io.BytesIO(resp.content)).worksheets[0]
+        assert "ТОЛЬКО НА РЕПЛИКЕ" in {cell for row in ws.iter_rows(values_only=True) for cell in row}
+
+    def test_writes_stay_on_primary(self, client, admin_headers, replica, sample_anketa_data):
+        resp = client.post("/api/v1/anketas", json=sample_anketa_data, headers=admin_headers)
+        assert resp.status_code in (200, 201)
+        with replica.engine.connect() as conn:
+            count = conn.exec_driver_sql("SELECT COUNT(*) FROM anketas").scalar()
+        assert count == 1
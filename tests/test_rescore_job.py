@@ -0,0 +1,197 @@
+"""Тесты фонового пересчёта вердикта по портфелю (app/services/rescore_job.py)."""
+
+import json
+import logging
+from datetime import date, datetime, timedelta
+
+import pytest
+from dateutil.relativedelta import relativedelta
+
+from app.database import Anketa, RescoreJob, UnderwritingRule
+from app.routers import admin as admin_router
+from app.rules_cache import rules_cache
+from app.services import rescore_job
+from app.services.calculation_service import calc_auto_verdict
+from app.services.rescore_job import _utcnow, cancel_job, create_job, job_status, run_rescore_job
+from app.services.verdict_memo import is_verdict_current
+
+DTIS = (30.0, 45.0, 55.0, 70.0)
+
+
+@pytest.fixture(autouse=True)
+def no_threads(monkeypatch):
+    """Эндпоинт не запускает поток — тесты выполняют задание синхронно."""
+    started = []
+    monkeypatch.setattr(admin_router, "start_rescore_thread", lambda engine, job_id: started.append(job_id))
+    rescore_job._shutdown.clear()
+    return started
+
+
+@pytest.fixture
+def portfolio(seeded_db):
+    """Четыре сохранённые анкеты (без вердикта), черновик и удалённая."""
+    db = seeded_db["session"]
+    anketas = [
+        Anketa(created_by=seeded_db["inspector"].id, status=status, client_type="individual",
+               dti=dti, down_payment_percent=30, purchase_price=200_000_000, interest_rate=24,
+               lease_term_months=36, total_monthly_income=10_000_000, monthly_obligations_payment=0,
+               birth_date=date.today() - relativedelta(years=35),
+               deleted_at=datetime(2026, 1, 1) if status == "deleted" else None)
+        for dti, status in [*((d, "saved") for d in DTIS), (45.0, "draft"), (45.0, "deleted")]
+    ]
+    db.add_all(anketas)
+    db.commit()
+    return anketas
+
+
+def _run(db, job_id=None, **kwargs):
+    job_id = job_id or create_job(db, None).id
+    status = run_rescore_job(db.get_bind(), job_id, **{"batch_size": 2, "duty_cycle": 1, **kwargs})
+    db.expire_all()
+    return status, db.get(RescoreJob, job_id)
+
+
+def _set_rule(db, key, value):
+    db.query(UnderwritingRule).filter(UnderwritingRule.rule_key == key).update({"value": value})
+    rules_cache.bump(db)
+
+
+def _stored(anketas) -> list[tuple]:
+    return [(a.auto_decision, a.recommended_pv, a.auto_decision_reasons) for a in anketas]
+
+
+class TestRescoreJob:
+
+    def test_scores_saved_portfolio(self, seeded_db, portfolio):
+        db = seeded_db["session"]
+        status, job = _run(db)
+        assert status == "completed" and job.finished_at is not None
+        assert (job.total, job.processed, job.changed, job.skipped) == (4, 4, 4, 0)
+        rules = rules_cache.get(db)
+        for anketa in portfolio[:4]:
+            expected = calc_auto_verdict(anketa, rules.rules, risk_rules=rules.risk_rules)
+            assert anketa.auto_decision == expected["auto_decision"]
+            assert anketa.recommended_pv == expected["recommended_pv"]
+            assert json.loads(anketa.auto_decision_reasons) == expected["auto_decision_reasons"]
+            assert is_verdict_current(anketa, rules)
+        # черновик и удалённая не трогаются
+        assert all(a.verdict_fingerprint is None for a in portfolio[4:])
+
+    def test_rule_change_rescores(self, seeded_db, portfolio):
+        db = seeded_db["session"]
+        _run(db)
+        before = _stored(portfolio[:4])
+        _set_rule(db, "max_dti_approve", "40")
+        _, job = _run(db)
+        assert (job.processed, job.skipped) == (4, 0)
+        after = _stored(portfolio[:4])
+        assert before[1][0] == "approved" and after[1][0] == "review"
+        assert job.changed == sum(b != a for b, a in zip(before, after))
+        assert all(is_verdict_current(a, rules_cache.get(db)) for a in portfolio[:4])
+
+    def test_current_verdicts_skipped(self, seeded_db, portfolio):
+        db = seeded_db["session"]
+        _run(db)
+        _, job = _run(db)
+        assert (job.processed, job.changed, job.skipped) == (4, 0, 4)
+        assert job_status(job)["progress"] == 100.0
+
+    def test_resumes_from_checkpoint(self, seeded_db, portfolio):
+        db = seeded_db["session"]
+        job = create_job(db, None)
+        job.status, job.last_id, job.processed = "running", portfolio[1].id, 2
+        job.heartbeat_at = _utcnow() - timedelta(seconds=rescore_job.RESCORE_STALE_AFTER + 1)
+        db.commit()
+        status, job = _run(db, job.id)
+        assert status == "completed" and job.processed == 4 and job.changed == 2
+        assert [a.verdict_fingerprint is not None for a in portfolio[:4]] == [False, False, True, True]
+
+    def test_rules_change_mid_job_restarts(self, seeded_db, portfolio):
+        db = seeded_db["session"]
+        job = create_job(db, None)
+        job.last_id, job.processed, job.changed, job.skipped = portfolio[2].id, 3, 2, 1
+        db.commit()
+        _set_rule(db, "max_dti_approve", "40")
+        _, job = _run(db, job.id)
+        assert job.rules_version == rules_cache.get(db).version
+        assert job.processed == 4 and all(a.verdict_fingerprint for a in portfolio[:4])
+        # счётчики — только за проход по новым правилам
+        assert (job.changed, job.skipped) == (4, 0)
+        assert job.changed + job.skipped <= job.total
+
+    def test_running_job_not_claimed_twice(self, seeded_db, portfolio):
+        db = seeded_db["session"]
+        job = create_job(db, None)
+        job.status, job.heartbeat_at = "running", _utcnow()
+        db.commit()
+        assert _run(db, job.id)[0] is None
+        assert db.get(RescoreJob, job.id).processed == 0
+
+    def test_cancel(self, seeded_db, portfolio):
+        db = seeded_db["session"]
+        pending = create_job(db, None)
+        cancel_job(db, pending)
+        assert pending.status == "cancelled"
+        assert _run(db, pending.id)[0] is None
+
+        job = create_job(db, None)
+        job.status, job.heartbeat_at = "running", _utcnow() - timedelta(hours=1)
+        db.commit()
+        cancel_job(db, job)
+        assert job.status == "cancelling"
+        status, job = _run(db, job.id)
+        assert status == "cancelled" and job.processed == 0
+
+    def test_shutdown_keeps_checkpoint(self, seeded_db, portfolio):
+        db = seeded_db["session"]
+        rescore_job._shutdown.set()
+        status, job = _run(db)
+        assert status == "running" and job.heartbeat_at is None
+        # следующий старт подхватывает задание без ожидания RESCORE_STALE_AFTER
+        rescore_job._shutdown.clear()
+        assert _run(db, job.id)[0] == "completed"
+
+    def test_per_row_verdict_log_silenced(self, seeded_db, portfolio, caplog):
+        db = seeded_db["session"]
+        with caplog.at_level(logging.INFO, logger="app"):
+            _run(db)
+            assert not [r for r in caplog.records if r.funcName == "calc_auto_verdict"]
+            assert any("Пересчёт #" in r.getMessage() for r in caplog.records)
+            rules = rules_cache.get(db)
+            calc_auto_verdict(portfolio[0], rules.rules)
+            assert [r.levelno for r in caplog.records if r.funcName == "calc_auto_verdict"] == [logging.INFO]
+
+    def test_failure_recorded(self, seeded_db, portfolio, monkeypatch):
+        def boom(*args, **kwargs):
+            raise RuntimeError("сбой")
+        monkeypatch.setattr(rescore_job, "calc_auto_verdict", boom)
+        status, job = _run(seeded_db["session"])
+        assert status == "failed" and job.error == "сбой"
+
+
+class TestRescoreJobApi:
+
+    def test_start_and_status(self, client, seeded_db, portfolio, admin_headers, no_threads):
+        resp = client.post("/api/v1/admin/rescore-jobs", headers=admin_headers)
+        assert resp.status_code == 201
+        data = resp.json()
+        assert data["status"] == "pending" and data["total"] == 4 and data["progress"] == 0.0
+        assert no_threads == [data["id"]]
+        assert client.post("/api/v1/admin/rescore-jobs", headers=admin_headers).status_code == 409
+
+        _run(seeded_db["session"], data["id"])
+        status = client.get(f"/api/v1/admin/rescore-jobs/{data['id']}", headers=admin_headers).json()
+        assert status["status"] == "completed" and status["processed"] == 4 and status["progress"] == 100.0
+        assert status["eta_seconds"] is None
+        assert [j["id"] for j in client.get("/api/v1/admin/rescore-jobs", headers=admin_headers).json()] == [data["id"]]
+
+    def test_cancel(self, client, seeded_db, admin_headers):
+        job_id = client.post("/api/v1/admin/rescore-jobs", headers=admin_headers).json()["id"]
+        resp = client.post(f"/api/v1/admin/rescore-jobs/{job_id}/cancel", headers=admin_headers)
+        assert resp.json()["status"] == "cancelled"
+        assert client.post(f"/api/v1/admin/rescore-jobs/{job_id}/cancel", headers=admin_headers).status_code == 400
+        assert client.get("/api/v1/admin/rescore-jobs/999", headers=admin_headers).status_code == 404
+
+    def test_requires_permission(self, client, seeded_db, inspector_headers):
+        assert client.post("/api/v1/admin/rescore-jobs", headers=inspector_headers).status_code == 403
+        assert client.get("/api/v1/admin/rescore-jobs", headers=inspector_headers).status_code == 403
@@ -0,0 +1,114 @@
+"""Тесты симулятора изменения правил (POST /api/v1/admin/rules/simulate)."""
+
+from datetime import date
+
+import pytest
+from dateutil.relativedelta import relativedelta
+
+from app.database import Anketa
+from app.services.calculation_service import calc_auto_verdict, load_rules
+from app.services.rule_simulation import verdict_snapshot
+
+URL = "/api/v1/admin/rules/simulate"
+
+
+@pytest.fixture
+def portfolio(seeded_db):
+    """Сохранённые анкеты с DTI вокруг порогов + черновик и удалённая (в симуляцию не входят)."""
+    db = seeded_db["session"]
+    user_id = seeded_db["inspector"].id
+    specs = [
+        ("saved", "individual", 40.0, None), ("approved", "individual", 55.0, None),
+        ("review", "individual", 58.0, None), ("saved", "legal_entity", 65.0, None),
+        ("saved", "individual", 45.0, "61-90"),
+        ("draft", "individual", 55.0, None), ("deleted", "individual", 55.0, None),
+    ]
+    for status, client_type, dti, category in specs:
+        a = Anketa(created_by=user_id, status=status, client_type=client_type, dti=dti,
+                   down_payment_percent=20, purchase_price=100_000_000, interest_rate=24,
+                   lease_term_months=36, total_monthly_income=10_000_000, risk_grade="E")
+        a.overdue_category = category
+        a.company_overdue_category = category
+        a.last_overdue_date = date.today() - relativedelta(months=18) if category else None
+        db.add(a)
+    db.commit()
+    return db
+
+
+class TestSimulateEndpoint:
+
+    def test_raise_dti_threshold(self, client, portfolio, admin_headers):
+        resp = client.post(URL, json={"rules": {"max_dti_approve": "60"}}, headers=admin_headers)
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["total"] == 5
+        assert data["changed_rules"] == ["max_dti_approve"]
+        assert data["before"] == {"approved": 2, "review": 2, "rejected": 1}
+        assert data["after"] == {"approved": 4, "review": 0, "rejected": 1}
+        assert data["transitions"] == {"review->approved": 2}
+        assert data["changed"] == 2
+
+    def test_before_matches_scalar_verdict(self, client, portfolio, admin_headers):
+        rules = load_rules(portfolio)
+        live = portfolio.query(Anketa).filter(Anketa.status.notin_(("draft", "deleted"))).all()
+        expected = {"approved": 0, "review": 0, "rejected": 0}
+        for a in live:
+            expected[calc_auto_verdict(a, rules, risk_rules=[])["auto_decision"]] += 1
+        data = client.post(URL, json={}, headers=admin_headers).json()
+        assert data["before"] == data["after"] == expected
+        assert data["changed"] == 0 and data["transitions"] == {}
+
+    def test_segments(self, client, portfolio, admin_headers):
+        data = client.post(URL, json={"rules": {"max_dti_review": "70"}, "segment_by": "client_type"},
+                           headers=admin_headers).json()
+        segments = {s["segment"]: s for s in data["segments"]}
+        assert segments["legal_entity"]["transitions"] == {"rejected->review": 1}
+        assert segments["individual"]["changed"] == 0
+        assert sum(s["total"] for s in data["segments"]) == data["total"]
+
+    def test_pv_overlay(self, client, portfolio, admin_headers):
+        data = client.post(URL, json={"rules": {"overdue_61_90_gt_pv_add": "15"}, "risk_rules": {"e": 30}},
+                           headers=admin_headers).json()
+        pv = data["recommended_pv"]
+        assert pv["increased"] == 5 and pv["decreased"] == 0
+        assert pv["max_increase"] == 15.0  # риск-грейд E: 20 -> 30, и +5 за просрочку 61-90
+
+    @pytest.mark.parametrize("body,status", [
+        ({"rules": {"no_such_rule": "1"}}, 400),
+        ({"rules": {"max_dti_approve": "много"}}, 400),
+        ({"rules": {"overdue_30_result": "maybe"}}, 400),
+        ({"risk_rules": {"E": -1}}, 400),
+        ({"segment_by": "full_name"}, 400),
+    ])
+    def test_validation(self, client, portfolio, admin_headers, body, status):
+        assert client.post(URL, json=body, headers=admin_headers).status_code == status
+
+    def test_requires_rules_manage(self, client, portfolio, inspector_headers):
+        assert client.post(URL, json={}, headers=inspector_headers).status_code == 403
+
+    def test_rules_not_modified(self, client, portfolio, admin_headers):
+        client.post(URL, json={"rules": {"max_dti_approve": "60"}}, headers=admin_headers)
+        assert load_rules(portfolio)["max_dti_approve"] == 50.0
+
+
+class TestSnapshotCache:
+
+    def test_snapshot_reused(self, client, portfolio, admin_headers):
+        client.post(URL, json={}, headers=admin_headers)
+        data = client.post(URL, json={}, headers=admin_headers).json()
+        assert data["snapshot"]["loads"] == 1 and data["snapshot"]["hits"] == 1
+        assert data["snapshot"]["rows"] == 5
+
+    def test_new_anketa_invalidates(self, client, portfolio, admin_headers, seeded_db):
+        client.post(URL, json={}, headers=admin_headers)
+        portfolio.add(Anketa(created_by=seeded_db["inspector"].id, status="saved", dti=90.0))
+        portfolio.commit()
+        data = client.post(URL, json={}, headers=admin_headers).json()
+        assert data["total"] == 6
+        assert data["snapshot"]["loads"] == 2
+
+    def test_refresh_and_ttl(self, client, portfolio, admin_headers, monkeypatch):
+        client.post(URL, json={}, headers=admin_headers)
+        assert client.post(URL, json={"refresh": True}, headers=admin_headers).json()["snapshot"]["loads"] == 2
+        monkeypatch.setattr(verdict_snapshot, "ttl", 0)
+        assert client.post(URL, json={}, headers=admin_headers).json()["snapshot"]["loads"] == 3
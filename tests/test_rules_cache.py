@@ -0,0 +1,121 @@
+"""Тесты версионного кэша правил (app/rules_cache.py) и ETag на /verdict-rules, /risk-rules."""
+
+import pytest
+
+import app.rules_cache
+from app.database import RiskRule, UnderwritingRule
+from app.rules_cache import RulesCache, rules_cache
+
+
+def _rule_id(db, key: str) -> int:
+    return db.query(UnderwritingRule.id).filter(UnderwritingRule.rule_key == key).scalar()
+
+
+class TestRulesCache:
+
+    def test_snapshot_contents(self, seeded_db):
+        snap = RulesCache().get(seeded_db["session"])
+        assert snap.version == 0
+        assert snap.rules["max_dti_approve"] == 50.0
+        assert snap.risk_rule("e") == snap.risk_rule("E") == {"category": "E", "min_pv": 20.0}
+        assert snap.risk_rule(None) is None and snap.risk_rule("нет такого") is None
+
+    def test_inactive_risk_rule_excluded(self, seeded_db):
+        db = seeded_db["session"]
+        db.query(RiskRule).filter(RiskRule.category == "E").update({"is_active": False})
+        db.commit()
+        assert RulesCache().get(db).risk_rule("E") is None
+
+    def test_cached_within_interval(self, seeded_db):
+        db = seeded_db["session"]
+        cache = RulesCache(check_interval=60)
+        first = cache.get(db)
+        assert cache.get(db) is first
+        assert cache.stats()["loads"] == 1 and cache.stats()["hits"] == 1
+
+    def test_bump_is_atomic_increment(self, seeded_db):
+        db = seeded_db["session"]
+        cache = RulesCache()
+        assert [cache.bump(db), cache.bump(db), cache.bump(db)] == [1, 2, 3]
+        assert cache.get(db).version == 3
+
+    def test_other_worker_detects_bump(self, seeded_db, monkeypatch):
+        """Два кэша = два воркера над одной БД."""
+        db = seeded_db["session"]
+        now = [1000.0]
+        monkeypatch.setattr(app.rules_cache.time, "monotonic", lambda: now[0])
+        worker_a, worker_b = RulesCache(check_interval=1), RulesCache(check_interval=1)
+        assert worker_b.get(db).rules["max_dti_approve"] == 50.0
+
+        db.query(UnderwritingRule).filter(UnderwritingRule.rule_key == "max_dti_approve").update({"value": "45"})
+        worker_a.bump(db)
+        assert worker_a.get(db).rules["max_dti_approve"] == 45.0  # свой воркер — сразу
+        assert worker_b.get(db).rules["max_dti_approve"] == 50.0  # чужой — до следующей проверки
+        now[0] += 1
+        assert worker_b.get(db).rules["max_dti_approve"] == 45.0
+        assert worker_b.stats() == {"version": 1, "check_interval": 1, "hits": 1, "loads": 2}
+
+    def test_version_check_without_change_keeps_snapshot(self, seeded_db):
+        db = seeded_db["session"]
+        cache = RulesCache(check_interval=0)
+        first = cache.get(db)
+        assert cache.get(db) is first
+        assert cache.stats()["loads"] == 1
+
+
+class TestAdminWritesBumpVersion:
+
+    def test_update_rule(self, client, seeded_db, admin_headers):
+        db = seeded_db["session"]
+        rules_cache.get(db)
+        resp = client.patch(f"/api/v1/admin/rules/{_rule_id(db, 'max_dti_approve')}",
+                            json={"value": "55"}, headers=admin_headers)
+        assert resp.status_code == 200
+        snap = rules_cache.get(db)
+        assert snap.version == 1 and snap.rules["max_dti_approve"] == 55.0
+
+    def test_invalid_value_does_not_bump(self, client, seeded_db, admin_headers):
+        db = seeded_db["session"]
+        resp = client.patch(f"/api/v1/admin/rules/{_rule_id(db, 'max_dti_approve')}",
+                            json={"value": "abc"}, headers=admin_headers)
+        assert resp.status_code == 400
+        assert rules_cache.get(db).version == 0
+
+    def test_risk_rule_crud(self, client, seeded_db, admin_headers):
+        db = seeded_db["session"]
+        resp = client.post("/api/v1/admin/risk-rules", json={"category": "G1", "min_pv": 40}, headers=admin_headers)
+        rule_id = resp.json()["id"]
+        assert rules_cache.get(db).risk_rule("g1")["min_pv"] == 40
+        client.patch(f"/api/v1/admin/risk-rules/{rule_id}", json={"min_pv": 45}, headers=admin_headers)
+        assert rules_cache.get(db).risk_rule("G1")["min_pv"] == 45
+        client.delete(f"/api/v1/admin/risk-rules/{rule_id}", headers=admin_headers)
+        snap = rules_cache.get(db)
+        assert snap.risk_rule("G1") is None and snap.version == 3
+
+
+class TestRulesEtag:
+
+    @pytest.mark.parametrize("url", ["/api/v1/anketas/verdict-rules", "/api/v1/anketas/risk-rules"])
+    def test_etag_and_304(self, client, seeded_db, inspector_headers, url):
+        resp = client.get(url, headers=inspector_headers)
+        assert resp.status_code == 200
+        etag = resp.headers["etag"]
+        assert etag == '"rules-0"'
+        resp = client.get(url, headers={**inspector_headers, "If-None-Match": etag})
+        assert resp.status_code == 304 and resp.content == b""
+        assert resp.headers["etag"] == etag
+
+    def test_etag_changes_after_admin_write(self, client, seeded_db, admin_headers, inspector_headers):
+        url = "/api/v1/anketas/verdict-rules"
+        etag = client.get(url, headers=inspector_headers).headers["etag"]
+        client.patch(f"/api/v1/admin/rules/{_rule_id(seeded_db['session'], 'max_dti_review')}",
+                     json={"value": "65"}, headers=admin_headers)
+        resp = client.get(url, headers={**inspector_headers, "If-None-Match": etag})
+        assert resp.status_code == 200
+        assert resp.headers["etag"] == '"rules-1"'
+        assert resp.json()["max_dti_review"] == 65.0
+
+    def test_risk_rules_payload(self, client, seeded_db, inspector_headers):
+        data = client.get("/api/v1/anketas/risk-rules", headers=inspector_headers).json()
+        assert {"category": "E", "min_pv": 20.0} in data
+        assert [r["category"] for r in data] == sorted(r["category"] for r in data)
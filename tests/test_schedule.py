@@ -0,0 +1,184 @@
+"""Тесты графика платежей (app/services/schedule_service.py) и эндпоинтов графика."""
+
+import csv
+import io
+
+import numpy as np
+import pytest
+
+from app.database import Anketa
+from app.services.calculation_service import calc_annuity, run_calculations
+from app.services.pdf_service import render_anketa_html
+from app.services.schedule_service import (
+    _cached_schedule, principal_for, schedule, schedule_cache_stats, schedule_csv, schedule_matrix,
+)
+
+
+def _iterative(principal: float, rate: float, term: int) -> list[tuple]:
+    """Эталон: помесячный цикл, последний платёж гасит остаток."""
+    payment = calc_annuity(principal, rate, term)
+    r = rate / 100 / 12
+    balance, rows = principal, []
+    for month in range(1, term + 1):
+        interest = balance * r
+        part = balance if month == term else payment - interest
+        balance -= part
+        rows.append((part + interest, part, interest, balance))
+    return rows
+
+
+@pytest.fixture
+def anketa_with_terms(seeded_db):
+    db = seeded_db["session"]
+    anketa = Anketa(
+        created_by=seeded_db["inspector"].id, status="saved", client_type="individual",
+        purchase_price=10_000_000, down_payment_percent=20, down_payment_amount=2_000_000,
+        remaining_amount=8_000_000, lease_term_months=12, interest_rate=24, monthly_payment=756_476.77,
+    )
+    db.add(anketa)
+    db.commit()
+    return anketa
+
+
+class TestScheduleMatrix:
+
+    @pytest.mark.parametrize("principal,rate,term", [
+        (8_000_000, 24, 12), (150_000_000, 36.5, 60), (1_000, 0.01, 1), (500_000_000, 18, 600),
+    ])
+    def test_matches_iterative(self, principal, rate, term):
+        sched = schedule(principal, rate, term)
+        expected = np.array(_iterative(principal, rate, term))
+        actual = np.column_stack([sched.payment, sched.principal, sched.interest, sched.balance])
+        np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-4 * principal / term)
+        assert sched.monthly_payment == pytest.approx(calc_annuity(principal, rate, term))
+        assert sched.principal.sum() == pytest.approx(principal)
+        assert sched.balance[-1] == 0.0
+
+    def test_zero_rate_is_linear(self):
+        sched = schedule(1_200_000, 0, 12)
+        assert set(sched.payment.tolist()) == {100_000.0}
+        assert sched.total_interest == 0
+        assert sched.balance.tolist() == [1_200_000 - 100_000 * k for k in range(1, 13)]
+
+    def test_mixed_terms_padded(self):
+        m = schedule_matrix([1_000_000, 2_000_000, 3_000_000], [24, 0, 30], [3, 6, 12])
+        assert m["payment"].shape == (3, 12)
+        assert not m["payment"][0, 3:].any() and not m["balance"][1, 6:].any()
+        for i, (p, r, t) in enumerate([(1_000_000, 24, 3), (2_000_000, 0, 6), (3_000_000, 30, 12)]):
+            np.testing.assert_allclose(m["principal"][i, :t], schedule(p, r, t).principal)
+
+    def test_cached_and_read_only(self):
+        _cached_schedule.cache_clear()
+        first = schedule(8_000_000, 24, 12)
+        assert schedule(8_000_000.0, 24.0, 12) is first
+        assert schedule_cache_stats()["hits"] == 1
+        with pytest.raises(ValueError):
+            first.payment[0] = 0
+
+    @pytest.mark.parametrize("price,pv", [(10_000_000, 20), (123_456_789, 15.5), (99_999_999.99, 33.3)])
+    def test_principal_for_matches_calculation(self, price, pv):
+        anketa = Anketa(purchase_price=price, down_payment_percent=pv)
+        run_calculations(anketa)
+        assert principal_for(price, pv) == anketa.remaining_amount
+
+    def test_principal_without_pv(self):
+        assert principal_for(1_000_000, None) == principal_for(1_000_000, 0) == 1_000_000
+
+    def test_csv_batches(self):
+        chunks = list(schedule_csv([([7, 8], [1_000, 2_000], [24, 0], [2, 3]), ([], [], [], [])]))
+        assert chunks[0] == "anketa_id,month,payment,principal,interest,balance\n"
+        rows = list(csv.reader(io.StringIO("".join(chunks[1:]))))
+        assert [r[:2] for r in rows] == [["7", "1"], ["7", "2"], ["8", "1"], ["8", "2"], ["8", "3"]]
+        assert rows[-1] == ["8", "3", "666.67", "666.67", "0.00", "0.00"]
+
+
+class TestScheduleApi:
+
+    def test_ad_hoc_json(self, client, seeded_db, inspector_headers):
+        resp = client.get("/api/v1/anketas/schedule",
+                          params={"price": 10_000_000, "pv": 20, "rate": 24, "term": 12}, headers=inspector_headers)
+        assert resp.status_code == 200
+        [variant] = resp.json()["variants"]
+        assert variant["principal"] == 8_000_000
+        assert variant["monthly_payment"] == round(calc_annuity(8_000_000, 24, 12), 2)
+        assert len(variant["rows"]) == 12 and variant["rows"][-1]["balance"] == 0
+
+    def test_ad_hoc_variants(self, client, seeded_db, inspector_headers):
+        resp = client.get("/api/v1/anketas/schedule", headers=inspector_headers,
+                          params={"price": 10_000_000, "pv": [10, 30], "rate": 24, "term": [12, 24]})
+        variants = resp.json()["variants"]
+        assert [(v["pv"], v["term"]) for v in variants] == [(10, 12), (10, 24), (30, 12), (30, 24)]
+        assert variants[2]["principal"] == 7_000_000
+
+    def test_ad_hoc_csv(self, client, seeded_db, inspector_headers):
+        resp = client.get("/api/v1/anketas/schedule", headers=inspector_headers,
+                          params={"principal": 1_000, "rate": [0, 24], "term": 2, "format": "csv"})
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/csv")
+        lines = resp.text.splitlines()
+        assert lines[0] == "variant,month,payment,principal,interest,balance"
+        assert lines[1:3] == ["1,1,500.00,500.00,0.00,500.00", "1,2,500.00,500.00,0.00,0.00"]
+        assert len(lines) == 5
+
+    @pytest.mark.parametrize("params", [
+        {"rate": 24, "term": 12},
+        {"price": 1_000_000, "rate": 24, "term": 0},
+        {"price": 1_000_000, "rate": 24, "term": 601},
+        {"price": 1_000_000, "rate": -1, "term": 12},
+        {"price": 1_000_000, "pv": 100, "rate": 24, "term": 12},
+        {"price": 1_000_000, "pv": list(range(6)), "rate": list(range(1, 4)), "term": [6, 12, 24]},
+    ])
+    def test_ad_hoc_invalid(self, client, seeded_db, inspector_headers, params):
+        resp = client.get("/api/v1/anketas/schedule", params=params, headers=inspector_headers)
+        assert resp.status_code == 400
+
+    def test_anketa_schedule(self, client, anketa_with_terms, inspector_headers):
+        resp = client.get(f"/api/v1/anketas/{anketa_with_terms.id}/schedule", headers=inspector_headers)
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["anketa_id"] == anketa_with_terms.id
+        assert data["monthly_payment"] == anketa_with_terms.monthly_payment
+        assert sum(r["principal"] for r in data["rows"]) == pytest.approx(8_000_000, abs=0.1)
+
+        resp = client.get(f"/api/v1/anketas/{anketa_with_terms.id}/schedule?format=csv", headers=inspector_headers)
+        assert resp.text.splitlines()[1] == "1,756476.77,596476.77,160000.00,7403523.23"
+
+    def test_anketa_without_terms(self, client, seeded_db, inspector_headers):
+        db = seeded_db["session"]
+        anketa = Anketa(created_by=seeded_db["inspector"].id, status="draft", client_type="individual")
+        db.add(anketa)
+        db.commit()
+        resp = client.get(f"/api/v1/anketas/{anketa.id}/schedule", headers=inspector_headers)
+        assert resp.status_code == 400
+        assert client.get("/api/v1/anketas/999999/schedule", headers=inspector_headers).status_code == 404
+
+    def test_admin_export(self, client, seeded_db, anketa_with_terms, admin_headers):
+        db = seeded_db["session"]
+        db.add_all([
+            Anketa(created_by=seeded_db["admin"].id, status="saved", client_type="individual",
+                   remaining_amount=1_000, interest_rate=12, lease_term_months=3),
+            Anketa(created_by=seeded_db["admin"].id, status="draft", client_type="individual",
+                   remaining_amount=1_000, interest_rate=12, lease_term_months=3),
+        ])
+        db.commit()
+        resp = client.get("/api/v1/admin/export-schedules", headers=admin_headers)
+        assert resp.status_code == 200
+        rows = list(csv.DictReader(io.StringIO(resp.text)))
+        assert len(rows) == 12 + 3
+        assert {r["anketa_id"] for r in rows} == {str(anketa_with_terms.id), str(anketa_with_terms.id + 1)}
+
+    def test_admin_export_forbidden(self, client, seeded_db, inspector_headers):
+        assert client.get("/api/v1/admin/export-schedules", headers=inspector_headers).status_code == 403
+
+
+class TestPdfAppendix:
+
+    def test_schedule_in_html(self, anketa_with_terms, seeded_db):
+        html = render_anketa_html(anketa_with_terms, seeded_db["inspector"])
+        assert "График платежей" in html
+        assert html.count("<td>12</td>") == 1
+        assert "756 476.77" in html
+
+    def test_no_terms_no_appendix(self, seeded_db):
+        anketa = Anketa(id=1, client_type="individual", status="draft")
+        assert "График платежей" not in render_anketa_html(anketa, seeded_db["inspector"])
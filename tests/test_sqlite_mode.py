@@ -0,0 +1,88 @@
+"""Тесты режима производительности SQLite: pragmas, writer lock, конкурентная запись."""
+
+import threading
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, Anketa, AnketaHistory, User
+from app.db_sqlite import enable_sqlite_performance_mode
+
+
+@pytest.fixture
+def perf_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/perf.db", connect_args={"check_same_thread": False})
+    enable_sqlite_performance_mode(engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), {"id": 1, "email": "w@test", "full_name": "W",
+                                               "password_hash": "x", "role": "inspector"})
+    yield engine
+    engine.dispose()
+
+
+class TestSqlitePerformanceMode:
+
+    def test_pragmas_applied(self, perf_engine):
+        with perf_engine.connect() as conn:
+            pragma = lambda name: conn.execute(text(f"PRAGMA {name}")).scalar()
+            assert pragma("journal_mode") == "wal"
+            assert pragma("synchronous") == 1  # NORMAL
+            assert pragma("busy_timeout") > 0
+            assert pragma("cache_size") < 0    # в КБ
+            assert pragma("mmap_size") > 0
+
+    def test_writer_lock_held_until_commit(self, perf_engine):
+        lock = perf_engine.sqlite_writer_lock
+        db = sessionmaker(bind=perf_engine)()
+        db.query(Anketa).all()
+        assert not lock._lock.locked()  # чтение lock не берёт
+        db.add(Anketa(created_by=1, status="draft"))
+        db.flush()
+        assert lock._lock.locked()
+        db.commit()
+        assert not lock._lock.locked()
+        db.close()
+
+    def test_writer_lock_released_on_rollback(self, perf_engine):
+        db = sessionmaker(bind=perf_engine)()
+        db.add(Anketa(created_by=1, status="draft"))
+        db.flush()
+        db.rollback()
+        db.close()
+        assert not perf_engine.sqlite_writer_lock._lock.locked()
+
+    def test_concurrent_writers_queue_instead_of_failing(self, perf_engine):
+        Session = sessionmaker(bind=perf_engine, autoflush=False)
+        threads, per_thread = 8, 15
+        errors = []
+
+        def _worker():
+            for _ in range(per_thread):
+                db = Session()
+                try:
+                    a = Anketa(created_by=1, status="draft")
+                    db.add(a)
+                    db.flush()
+                    a.status = "saved"
+                    db.add(AnketaHistory(anketa_id=a.id, changed_by=1, field_name="status",
+                                         old_value="draft", new_value="saved"))
+                    db.commit()
+                except exc.OperationalError as e:
+                    errors.append(e)
+                    db.rollback()
+                finally:
+                    db.close()
+
+        workers = [threading.Thread(target=_worker) for _ in range(threads)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+
+        assert errors == []
+        with Session() as db:
+            assert db.query(Anketa).filter(Anketa.status == "saved").count() == threads * per_thread
+            assert db.query(AnketaHistory).count() == threads * per_thread
+        assert perf_engine.sqlite_writer_lock.timeouts == 0
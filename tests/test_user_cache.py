@@ -0,0 +1,120 @@
+"""Тесты кэша активных пользователей: LRU + TTL, запросы без SELECT users, вытеснение из /admin/users."""
+
+import time
+
+import pytest
+from sqlalchemy import event
+
+from app.auth import ActiveUserCache, active_user_cache
+from app.database import User
+from tests.conftest import TEST_ASYNC_ENGINE, TEST_ENGINE
+
+UNREAD_URL = "/api/v1/anketas/notifications/unread-count"
+
+
+@pytest.fixture
+def user_lookups():
+    """SELECT активного пользователя по токену (sync и async engines)."""
+    captured = []
+
+    def _capture(conn, cursor, statement, *args):
+        if statement.lstrip().startswith("SELECT") and "users.is_active = 1" in statement:
+            captured.append(statement)
+
+    engines = (TEST_ENGINE, TEST_ASYNC_ENGINE.sync_engine)
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _capture)
+    yield captured
+    for engine in engines:
+        event.remove(engine, "before_cursor_execute", _capture)
+
+
+def _user(user_id, is_active=True):
+    return User(id=user_id, email=f"u{user_id}@test.com", full_name="U", role="inspector", is_active=is_active,
+                is_superadmin=False)
+
+
+class TestActiveUserCacheUnit:
+
+    def test_hit_returns_fresh_snapshot(self):
+        cache = ActiveUserCache(ttl=60, max_size=10)
+        cache.put(_user(1))
+        first, second = cache.get(1), cache.get(1)
+        assert first.email == "u1@test.com"
+        assert first is not second
+        assert (cache.hits, cache.misses) == (2, 0)
+
+    def test_least_recently_used_evicted(self):
+        cache = ActiveUserCache(ttl=60, max_size=2)
+        cache.put(_user(1))
+        cache.put(_user(2))
+        cache.get(1)
+        cache.put(_user(3))
+        assert cache.get(2) is None
+        assert cache.get(1) is not None and cache.get(3) is not None
+
+    def test_expired_entry_dropped(self, monkeypatch):
+        cache = ActiveUserCache(ttl=30, max_size=10)
+        cache.put(_user(1))
+        later = time.monotonic() + 31
+        monkeypatch.setattr(time, "monotonic", lambda: later)
+        assert cache.get(1) is None
+        assert cache.stats()["size"] == 0
+
+    def test_inactive_and_missing_not_cached(self):
+        cache = ActiveUserCache(ttl=60, max_size=10)
+        cache.put(None)
+        cache.put(_user(1, is_active=False))
+        assert cache.stats()["size"] == 0
+
+    def test_zero_ttl_disables(self):
+        cache = ActiveUserCache(ttl=0, max_size=10)
+        cache.put(_user(1))
+        assert cache.get(1) is None
+
+
+class TestActiveUserCacheRequests:
+
+    def test_poller_skips_user_lookup(self, client, inspector_headers, user_lookups):
+        for _ in range(4):
+            assert client.get(UNREAD_URL, headers=inspector_headers).status_code == 200
+        assert len(user_lookups) == 1
+        assert active_user_cache.hits == 3
+
+    def test_sync_and_async_share_cache(self, client, inspector_headers, user_lookups):
+        client.get(UNREAD_URL, headers=inspector_headers)
+        assert client.get("/api/v1/anketas/edit-requests", headers=inspector_headers).status_code == 200
+        assert len(user_lookups) == 1
+
+    def test_deactivation_evicts(self, client, admin_headers, inspector_headers, seeded_db):
+        client.get(UNREAD_URL, headers=inspector_headers)
+        resp = client.patch(f"/api/v1/admin/users/{seeded_db['inspector'].id}", json={"is_active": False},
+                            headers=admin_headers)
+        assert resp.status_code == 200
+        assert client.get(UNREAD_URL, headers=inspector_headers).status_code == 401
+
+    def test_update_evicts_changed_fields(self, client, admin_headers, inspector_headers, seeded_db):
+        client.get("/api/v1/auth/me", headers=inspector_headers)
+        client.patch(f"/api/v1/admin/users/{seeded_db['inspector'].id}", json={"full_name": "Новое Имя"},
+                     headers=admin_headers)
+        assert client.get("/api/v1/auth/me", headers=inspector_headers).json()["full_name"] == "Новое Имя"
+
+    def test_reset_password_evicts(self, client, admin_headers, inspector_headers, seeded_db, user_lookups):
+        client.get(UNREAD_URL, headers=inspector_headers)
+        client.post(f"/api/v1/admin/users/{seeded_db['inspector'].id}/reset-password", headers=admin_headers)
+        user_lookups.clear()
+        client.get(UNREAD_URL, headers=inspector_headers)
+        assert len(user_lookups) == 1
+
+    def test_delete_evicts(self, client, admin_headers, inspector_headers, seeded_db):
+        client.get(UNREAD_URL, headers=inspector_headers)
+        inspector_id = seeded_db["inspector"].id
+        assert client.delete(f"/api/v1/admin/users/{inspector_id}", headers=admin_headers).status_code == 200
+        assert client.get(UNREAD_URL, headers=inspector_headers).status_code == 401
+
+    def test_stats_endpoint(self, client, admin_headers, inspector_headers):
+        client.get(UNREAD_URL, headers=inspector_headers)
+        client.get(UNREAD_URL, headers=inspector_headers)
+        stats = client.get("/api/v1/admin/user-cache", headers=admin_headers).json()
+        assert stats["hits"] >= 1
+        assert stats["size"] == 2  # инспектор и админ
@@ -3,8 +3,13 @@
 from datetime import date
 from dateutil.relativedelta import relativedelta
 
+import pytest
+
 from app.database import Anketa
-from app.services.calculation_service import calc_auto_verdict
+from app.services.batch_verdict import batch_auto_verdict, verdict_columns
+from app.services.calculation_service import (
+    OVERDUE_CATEGORIES, OverdueCell, OverdueMatrix, _overdue_cell, calc_auto_verdict, overdue_matrix,
+)
 
 
 def _make_anketa(**kwargs) -> Anketa:
@@ -572,3 +577,76 @@ class TestVerdictConfigurableRules:
         a = _make_anketa(dti=40, open_applications_count=3)
         result = calc_auto_verdict(a, rules)
         assert result["auto_decision"] == "rejected"
+
+
+class TestOverdueMatrix:
+
+    @pytest.mark.parametrize("thresholds", [
+        {},
+        {"overdue_31_60_threshold_near": 3, "overdue_31_60_threshold_far": 18, "overdue_90plus_threshold": 6},
+        {"overdue_31_60_threshold_near": 6.5, "overdue_31_60_threshold_far": 12.5, "overdue_61_90_threshold": 0.5},
+        # ближний порог дальше дальнего: средней корзины нет
+        {"overdue_31_60_threshold_near": 12, "overdue_31_60_threshold_far": 6},
+        {"overdue_31_60_threshold_near": 0, "overdue_31_60_threshold_far": -1, "overdue_61_90_threshold": -5},
+    ])
+    def test_matches_rule_chain(self, default_rules, thresholds):
+        rules = {**default_rules, **thresholds}
+        matrix = OverdueMatrix(rules)
+        for cat in OVERDUE_CATEGORIES + (None, "", "неизвестно"):
+            for months in [None, *range(0, 40)]:
+                assert matrix.lookup(cat, months) == _overdue_cell(cat, months, rules), (cat, months)
+
+    def test_buckets(self, default_rules):
+        edges, cells, no_date = OverdueMatrix(default_rules).table["31-60"]
+        assert edges == (6, 13)
+        assert [c.decision for c in cells] == ["rejected", "review", "approved"]
+        assert cells[1].pv_add == 5.0
+        assert no_date.decision == "approved"
+
+    def test_cache_key_covers_overdue_rules(self):
+        from app.bootstrap import DEFAULT_RULES
+        from app.services.calculation_service import OVERDUE_RULE_KEYS
+        assert {r["rule_key"] for r in DEFAULT_RULES if r["rule_key"].startswith("overdue_")} <= set(OVERDUE_RULE_KEYS)
+
+    def test_compiled_once_per_rules(self, default_rules):
+        assert overdue_matrix(default_rules) is overdue_matrix(dict(default_rules))
+        assert overdue_matrix({**default_rules, "overdue_61_90_threshold": 6}) is not overdue_matrix(default_rules)
+
+    def test_reasons_rendered_lazily(self, default_rules):
+        cell = OverdueMatrix(default_rules).lookup("90+", 30)
+        assert cell.requires_guarantor
+        assert cell.explain("[Директор] ", 30) == (
+            "[Директор] Просрочка 90+, давность 30 мес > 24 мес — на рассмотрение, ПВ +20%, обязательный поручитель")
+        assert OverdueMatrix(default_rules).lookup("61-90", None).explain("", None) == (
+            "Просрочка 61-90, давность нет даты ≤ 12 мес — отказ")
+
+    def test_batch_does_not_render_reasons(self, default_rules, monkeypatch):
+        def _fail(*args):
+            raise AssertionError("причина не должна строиться")
+        monkeypatch.setattr(OverdueCell, "explain", _fail)
+        anketa = _make_anketa(overdue_category="31-60", last_overdue_date=_months_ago(8))
+        batch = batch_auto_verdict(verdict_columns([anketa]), default_rules)
+        assert batch.row(0)["auto_decision"] == "review"
+
+    def test_scalar_without_reasons(self, default_rules, monkeypatch):
+        anketa = _make_anketa(
+            client_type="legal_entity", dti=58.0, down_payment_percent=5, company_overdue_category="31-60",
+            company_last_overdue_date=_months_ago(8), director_overdue_category="90+",
+            director_last_overdue_date=_months_ago(30), current_overdue_amount=1_000_000, has_lombard=True,
+            total_monthly_income=10_000_000, interest_rate=24, lease_term_months=36, purchase_price=300_000_000,
+        )
+        full = calc_auto_verdict(anketa, default_rules)
+        assert len(full["auto_decision_reasons"]) > 3
+
+        def _fail(*args):
+            raise AssertionError("причина не должна строиться")
+        monkeypatch.setattr(OverdueCell, "explain", _fail)
+        short = calc_auto_verdict(anketa, default_rules, with_reasons=False)
+        assert short == {**full, "auto_decision_reasons": []}
+
+    def test_scalar_uses_given_matrix(self, default_rules):
+        """Вердикт по матрице снимка правил, а не по dict (rules_cache передаёт скомпилированную)."""
+        anketa = _make_anketa(overdue_category="61-90", last_overdue_date=_months_ago(8))
+        strict = OverdueMatrix({**default_rules, "overdue_61_90_threshold": 6})
+        assert calc_auto_verdict(anketa, default_rules)["auto_decision"] == "rejected"
+        assert calc_auto_verdict(anketa, default_rules, overdue=strict)["auto_decision"] == "approved"
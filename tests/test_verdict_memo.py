@@ -0,0 +1,126 @@
+"""Тесты мемоизации авто-вердикта (app/services/verdict_memo.py)."""
+
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+from dateutil.relativedelta import relativedelta
+
+from app.database import Anketa, UnderwritingRule
+from app.rules_cache import rules_cache
+from app.services.calculation_service import calc_auto_verdict
+from app.services.verdict_memo import (
+    VERDICT_INPUTS, VerdictMemo, is_verdict_current, verdict_fingerprint, verdict_memo,
+)
+
+
+def _anketa(**overrides) -> SimpleNamespace:
+    values = dict.fromkeys(VERDICT_INPUTS)
+    values.update(
+        full_name="ТЕСТОВ", client_type="individual", dti=55.0, down_payment_percent=20,
+        total_monthly_income=10_000_000, monthly_obligations_payment=0, interest_rate=24, lease_term_months=36, purchase_price=200_000_000,
+        overdue_category="31-60", last_overdue_date=date.today() - relativedelta(months=8),
+        birth_date=date.today() - relativedelta(years=30, days=40), risk_grade="E",
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+class TestFingerprint:
+
+    def test_stable_and_ignores_other_fields(self):
+        assert verdict_fingerprint(_anketa(), 3) == verdict_fingerprint(_anketa(full_name="ДРУГОЙ"), 3)
+
+    @pytest.mark.parametrize("field,value", [
+        ("dti", 55.5), ("risk_grade", "F1"), ("has_lombard", True), ("client_type", "legal_entity"),
+        ("company_overdue_category", "90+"), ("open_applications_count", 1),
+    ])
+    def test_changes_with_inputs(self, field, value):
+        assert verdict_fingerprint(_anketa(), 0) != verdict_fingerprint(_anketa(**{field: value}), 0)
+
+    def test_changes_with_rules_version(self):
+        assert verdict_fingerprint(_anketa(), 1) != verdict_fingerprint(_anketa(), 2)
+
+    def test_dates_as_the_verdict_sees_them(self):
+        base = _anketa()
+        # Та же давность в месяцах и тот же возраст — тот же отпечаток
+        same = _anketa(birth_date=base.birth_date - timedelta(days=1),
+                       last_overdue_date=base.last_overdue_date - timedelta(days=1))
+        assert verdict_fingerprint(base, 0) == verdict_fingerprint(same, 0)
+        older = _anketa(birth_date=date.today() - relativedelta(years=31))
+        assert verdict_fingerprint(base, 0) != verdict_fingerprint(older, 0)
+        later = _anketa(last_overdue_date=date.today() - relativedelta(months=13))
+        assert verdict_fingerprint(base, 0) != verdict_fingerprint(later, 0)
+
+
+class TestVerdictMemo:
+
+    def _snapshot(self, db):
+        return rules_cache.get(db)
+
+    def test_hit_returns_same_verdict(self, seeded_db):
+        snapshot = self._snapshot(seeded_db["session"])
+        memo = VerdictMemo()
+        first, fingerprint = memo.verdict(_anketa(), snapshot)
+        expected = calc_auto_verdict(_anketa(), snapshot.rules, risk_rules=snapshot.risk_rules)
+        assert first == expected
+        second, same_fingerprint = memo.verdict(_anketa(), snapshot)
+        assert second == expected and same_fingerprint == fingerprint
+        assert memo.stats() == {"size": 1, "max_size": memo.max_size, "hits": 1, "misses": 1, "hit_rate": 0.5}
+
+    def test_results_are_copies(self, seeded_db):
+        snapshot = self._snapshot(seeded_db["session"])
+        memo = VerdictMemo()
+        memo.verdict(_anketa(), snapshot)[0]["auto_decision_reasons"].append("мусор")
+        hit = memo.verdict(_anketa(), snapshot)[0]
+        hit["auto_decision_reasons"].append("ещё")
+        assert "мусор" not in memo.verdict(_anketa(), snapshot)[0]["auto_decision_reasons"]
+
+    def test_lru_eviction(self, seeded_db):
+        snapshot = self._snapshot(seeded_db["session"])
+        memo = VerdictMemo(max_size=2)
+        for dti in (10.0, 20.0, 10.0, 30.0, 20.0):
+            memo.verdict(_anketa(dti=dti), snapshot)
+        # 10 обновлён перед вставкой 30 — вытеснен 20, который затем считается заново
+        assert memo.stats()["hits"] == 1 and memo.stats()["misses"] == 4
+        assert memo.stats()["size"] == 2
+
+    def test_new_rules_version_misses(self, seeded_db):
+        db = seeded_db["session"]
+        memo = VerdictMemo()
+        memo.verdict(_anketa(), rules_cache.get(db))
+        rules_cache.bump(db)
+        memo.verdict(_anketa(), rules_cache.get(db))
+        assert memo.stats()["hits"] == 0
+
+
+class TestSaveUsesMemo:
+
+    def _save(self, client, headers, data) -> int:
+        anketa_id = client.post("/api/v1/anketas?client_type=individual", headers=headers).json()["id"]
+        client.patch(f"/api/v1/anketas/{anketa_id}", json=data, headers=headers)
+        assert client.post(f"/api/v1/anketas/{anketa_id}/save", headers=headers).status_code == 200
+        return anketa_id
+
+    def test_identical_inputs_hit(self, client, seeded_db, admin_headers, sample_anketa_data):
+        first = self._save(client, admin_headers, sample_anketa_data)
+        second = self._save(client, admin_headers, {**sample_anketa_data, "full_name": "ДРУГОЙ КЛИЕНТ",
+                                                    "phone_numbers": "+998907654321"})
+        assert client.get("/api/v1/admin/verdict-memo", headers=admin_headers).json()["hits"] == 1
+
+        db = seeded_db["session"]
+        a, b = db.get(Anketa, first), db.get(Anketa, second)
+        assert a.verdict_fingerprint == b.verdict_fingerprint
+        assert (a.auto_decision, a.auto_decision_reasons) == (b.auto_decision, b.auto_decision_reasons)
+        assert is_verdict_current(a, rules_cache.get(db))
+
+    def test_rule_change_invalidates_stored_fingerprint(self, client, seeded_db, admin_headers, sample_anketa_data):
+        db = seeded_db["session"]
+        anketa_id = self._save(client, admin_headers, sample_anketa_data)
+        rule_id = db.query(UnderwritingRule.id).filter(UnderwritingRule.rule_key == "max_dti_approve").scalar()
+        client.patch(f"/api/v1/admin/rules/{rule_id}", json={"value": "45"}, headers=admin_headers)
+        assert not is_verdict_current(db.get(Anketa, anketa_id), rules_cache.get(db))
+        assert verdict_memo.stats()["misses"] == 1
+
+    def test_memo_stats_requires_permission(self, client, seeded_db, inspector_headers):
+        assert client.get("/api/v1/admin/verdict-memo", headers=inspector_headers).status_code == 403